@@ -0,0 +1,412 @@
+"""
+信号提醒
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+后台服务按固定节拍拉一次全部跟踪的 (交易对, 周期)，只评估出现了新 K 线的键：取刚收盘的那根
+（倒数第二根，不随未收盘 K 线反复重绘），与筛选页同一套 score_vectorized 一次评完，
+再与该键上一次的状态比较，产生提醒：
+
+  direction    ─ 方向变化（NEUTRAL → STRONG_LONG 等），新方向需连续保持 confirm 根 K 线
+  ema          ─ 形成 EMA 多头 / 空头排列（回到中性不提醒）
+  limit_long   ─ 收盘 K 线最低价触及上一根给出的限价做多入场价（上一根收盘在其上方）
+  limit_short  ─ 收盘 K 线最高价触及上一根给出的限价做空入场价（上一根收盘在其下方）
+
+每个键第一次被评估只记状态、不提醒，服务启动时不会一下子冒出几百条。
+去重：同一 (交易对, 周期, 类型, 值, K 线) 只发一次（换交易所重建序列等情况会重复评估同一根）。
+防抖：同一 (交易对, 周期, 类型) 两次提醒至少相隔 cooldown 根 K 线，按 K 线时间算，与墙钟无关。
+
+各键状态存在定长数组里，比较全部向量化，Python 循环只走真正触发的提醒。
+提醒先进队列，由分发线程交给各 sink（进程内环形缓冲 / JSONL 文件 / webhook），慢 sink 不拖评估；
+sink 抛异常只计数。
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, NamedTuple
+
+import numpy as np
+
+from candle_store import tf_ms
+from indicators import FRAME_COLUMNS, IndicatorEngine
+from strategy import DEFAULT_PARAMS, DIRECTIONS, FEATURE_COLS, StrategyParams, score_vectorized
+
+KINDS = ("direction", "ema", "limit_long", "limit_short")
+_COLS = FEATURE_COLS + ["high", "low"]
+_POS  = FRAME_COLUMNS.get_indexer(_COLS)
+_EMA  = np.array(["中性", "多头排列", "空头排列"])   # 下标即 EMA 状态编码
+_NEVER = -(1 << 62)                                 # 从未提醒过（减法不溢出）
+
+
+class Alert(NamedTuple):
+    symbol: str
+    tf:     str
+    kind:   str     # KINDS 之一
+    value:  str     # 新方向 / 新 EMA 状态 / 触及的价位
+    text:   str
+    price:  float   # 被评估 K 线的收盘价
+    bar_ts: int     # 被评估 K 线的收盘时间（= 新 K 线开盘时间，ms）
+    at:     float   # 产生时间（unix 秒）
+
+    @property
+    def id(self) -> tuple:
+        return self.symbol, self.tf, self.kind, self.value, self.bar_ts
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict(), ensure_ascii=False)
+
+
+def _latest(src) -> tuple:
+    """(最后一根 K 线开盘时间 ns, 倒数第二根的 _COLS 行)；不足两根时为 (None, None)。"""
+    if isinstance(src, IndicatorEngine):
+        ts, row = src.last_ts, src.last(1)
+        return (None, None) if ts is None or row is None else (ts.value, row[_POS])
+    if src is None or len(src) < 2:
+        return None, None
+    return src.index[-1].value, src.to_numpy(dtype=float)[-2, src.columns.get_indexer(_COLS)]
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SINKS
+# ═════════════════════════════════════════════════════════════════════════════
+
+class MemorySink:
+    """进程内环形缓冲，页面从这里读最近的提醒。"""
+
+    def __init__(self, maxlen: int = 500):
+        self._buf  = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def send(self, alert: Alert) -> None:
+        with self._lock:
+            self._buf.append(alert)
+
+    def recent(self, n: int = None, kinds: Iterable[str] = None) -> list:
+        """最近 n 条，新的在前；kinds 限定类型。"""
+        with self._lock:
+            items = list(reversed(self._buf))
+        if kinds is not None:
+            kinds = set(kinds)
+            items = [a for a in items if a.kind in kinds]
+        return items[:n]
+
+    def close(self) -> None:
+        pass
+
+
+class FileSink:
+    """追加写 JSONL，一行一条。文件超过 max_bytes 时轮转为 <path>.1（只留一份旧文件）。"""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024):
+        self.path      = path
+        self.max_bytes = max_bytes
+        self._fh       = None
+        self._lock     = threading.Lock()
+
+    def send(self, alert: Alert) -> None:
+        with self._lock:
+            if self._fh is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh.write(alert.to_json() + "\n")
+            self._fh.flush()
+            if self._fh.tell() >= self.max_bytes:
+                self._fh.close()
+                os.replace(self.path, self.path + ".1")
+                self._fh = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+
+class WebhookSink:
+    """POST JSON 到 url。post(url, body) 可替换成别的 HTTP 客户端，默认 urllib；非 2xx 抛异常。"""
+
+    def __init__(self, url: str, timeout: float = 3.0, post: Callable[[str, bytes], None] = None):
+        self.url     = url
+        self.timeout = timeout
+        self.post    = post or self._post
+
+    def _post(self, url: str, body: bytes) -> None:
+        req = urllib.request.Request(url, body, {"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as r:
+            if not 200 <= r.status < 300:
+                raise RuntimeError(f"webhook {url} 返回 {r.status}")
+
+    def send(self, alert: Alert) -> None:
+        self.post(self.url, alert.to_json().encode())
+
+    def close(self) -> None:
+        pass
+
+
+class WebhookStub:
+    """本地 webhook 收集端：127.0.0.1 上起一个 HTTP 服务，收到的 JSON 存进 received。调试 / 基准用。"""
+
+    def __init__(self, port: int = 0):
+        self.received = []
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                stub.received.append(json.loads(body))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/alerts"
+
+    def start(self) -> "WebhookStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="webhook-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# ENGINE
+# ═════════════════════════════════════════════════════════════════════════════
+
+class AlertEngine:
+    """source() 返回 {(symbol, tf): IndicatorEngine | 指标 DataFrame}；sinks 为带 send(alert) / close() 的对象。
+
+    evaluate 可以直接调用（同步，返回本轮提醒）；start() 起评估线程（每 interval 秒调一次 source）
+    和分发线程。未起分发线程时提醒留在队列里，drain() 同步交给 sinks。
+    """
+
+    def __init__(self, source: Callable[[], dict] = None, sinks: Iterable = (), interval: float = 60.0,
+                 confirm: int = 1, cooldown: int = 3, P: StrategyParams = DEFAULT_PARAMS,
+                 queue_size: int = 10_000, dedup_size: int = 100_000):
+        self.source     = source
+        self.sinks      = list(sinks)
+        self.interval   = interval
+        self.confirm    = max(1, confirm)
+        self.cooldown   = cooldown
+        self.P          = P
+        self.queue      = queue.Queue(queue_size)
+        self.dedup_size = dedup_size
+        # 计数
+        self.evaluations = 0
+        self.scored      = 0      # 累计评估的 (键, K 线)
+        self.alerts      = 0      # 累计入队
+        self.duplicates  = 0      # 去重丢弃
+        self.debounced   = 0      # 冷却期内丢弃
+        self.dropped     = 0      # 队列满丢弃
+        self.delivered   = 0
+        self.sink_errors = 0
+        self.errors      = 0      # source / evaluate 异常
+        self.last_eval_s = 0.0
+        self.last_eval_at = 0.0
+        # 状态：键 → 槽位，各字段一个数组
+        self._slot  = {}
+        self._keys  = []
+        self._ts    = np.empty(0, np.int64)     # 上次评估时最后一根 K 线的开盘时间（ns）
+        self._dir   = np.empty(0, np.int8)      # 已确认的方向
+        self._cand  = np.empty(0, np.int8)      # 候选方向及其连续根数
+        self._cnt   = np.empty(0, np.int32)
+        self._ema   = np.empty(0, np.int8)
+        self._close = np.empty(0)
+        self._ll    = np.empty(0)
+        self._ls    = np.empty(0)
+        self._bar   = np.empty(0, np.int64)     # 周期长度（ns）
+        self._fired = np.empty((0, len(KINDS)), np.int64)
+        self._sent  = OrderedDict()
+        self._lock  = threading.Lock()
+        self._stop  = threading.Event()
+        self._threads: list = []
+
+    # ── 状态 ─────────────────────────────────────────────────────────────────
+    def _add(self, key: tuple) -> int:
+        i = len(self._keys)
+        if i == len(self._ts):
+            n = max(64, 2 * i)
+            grow = lambda a, fill: np.concatenate([a, np.full((n - i,) + a.shape[1:], fill, a.dtype)])
+            self._ts,   self._dir, self._cand = grow(self._ts, -1), grow(self._dir, -1), grow(self._cand, -1)
+            self._cnt,  self._ema, self._bar  = grow(self._cnt, 0), grow(self._ema, -1), grow(self._bar, 0)
+            self._close, self._ll, self._ls   = grow(self._close, np.nan), grow(self._ll, np.nan), grow(self._ls, np.nan)
+            self._fired = grow(self._fired, _NEVER)
+        self._slot[key] = i
+        self._keys.append(key)
+        self._bar[i] = tf_ms(key[1]) * 1_000_000
+        return i
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # ── 评估 ─────────────────────────────────────────────────────────────────
+    def evaluate(self, frames: dict, now: float = None) -> list:
+        """评估出现新 K 线的键，返回本轮（去重、防抖后）入队的提醒。"""
+        with self._lock:
+            t0     = time.perf_counter()
+            alerts = self._evaluate(frames, time.time() if now is None else now)
+            for a in alerts:
+                try:
+                    self.queue.put_nowait(a)
+                except queue.Full:
+                    self.dropped += 1
+            self.alerts      += len(alerts)
+            self.evaluations += 1
+            self.last_eval_s  = time.perf_counter() - t0
+            self.last_eval_at = time.time()
+            return alerts
+
+    def _evaluate(self, frames: dict, now: float) -> list:
+        slots, ts, rows = [], [], []
+        for key, src in frames.items():
+            t, row = _latest(src)
+            if t is None:
+                continue
+            i = self._slot.get(key)
+            if i is None:
+                i = self._add(key)
+            elif self._ts[i] == t:
+                continue
+            slots.append(i)
+            ts.append(t)
+            rows.append(row)
+        if not slots:
+            return []
+        idx = np.array(slots)
+        ts  = np.array(ts, np.int64)
+        X   = np.array(rows)
+        out = score_vectorized({c: X[:, j] for j, c in enumerate(FEATURE_COLS)}, self.P)
+        self.scored += len(idx)
+
+        code  = out["direction_code"].astype(np.int8)
+        ema   = np.where(out["ema_bull"], 1, np.where(out["ema_bear"], 2, 0)).astype(np.int8)
+        high, low = X[:, -2], X[:, -1]
+        seen  = self._ts[idx] >= 0
+        old_dir, old_ema = self._dir[idx], self._ema[idx]
+        close, ll, ls    = self._close[idx], self._ll[idx], self._ls[idx]
+
+        # 方向：候选方向连续 confirm 根保持才落定；第一次评估直接落定
+        cnt    = np.where(code == self._cand[idx], self._cnt[idx] + 1, 1)
+        settle = (cnt >= self.confirm) | ~seen
+        fire   = np.column_stack([
+            seen & settle & (code != old_dir),
+            seen & (ema != old_ema) & (ema != 0),
+            seen & (close > ll) & (low <= ll),
+            seen & (close < ls) & (high >= ls),
+        ])
+        ok = ts[:, None] - self._fired[idx] >= self.cooldown * self._bar[idx][:, None]
+        self.debounced += int((fire & ~ok).sum())
+        fire &= ok
+
+        self._ts[idx], self._cand[idx], self._cnt[idx] = ts, code, cnt
+        self._dir[idx]   = np.where(settle, code, old_dir)
+        self._ema[idx]   = ema
+        self._close[idx] = out["price"]
+        self._ll[idx], self._ls[idx] = out["limit_long_entry"], out["limit_short_entry"]
+        r, k = np.nonzero(fire)
+        self._fired[idx[r], k] = ts[r]
+
+        alerts = []
+        for r, k in zip(r.tolist(), k.tolist()):
+            sym, tf = self._keys[idx[r]]
+            kind    = KINDS[k]
+            if kind == "direction":
+                value = str(DIRECTIONS[code[r]])
+                text  = f"{sym} {tf} 方向 {DIRECTIONS[old_dir[r]]} → {value}（评分 {out['score'][r]:.0f}）"
+            elif kind == "ema":
+                value = str(_EMA[ema[r]])
+                text  = f"{sym} {tf} EMA 转为{value}"
+            elif kind == "limit_long":
+                value = f"{ll[r]:.6g}"
+                text  = f"{sym} {tf} 最低 {low[r]:.6g} 触及限价做多入场 {value}"
+            else:
+                value = f"{ls[r]:.6g}"
+                text  = f"{sym} {tf} 最高 {high[r]:.6g} 触及限价做空入场 {value}"
+            a = Alert(sym, tf, kind, value, text, float(out["price"][r]), int(ts[r] // 1_000_000), now)
+            if a.id in self._sent:
+                self.duplicates += 1
+                continue
+            self._sent[a.id] = None
+            if len(self._sent) > self.dedup_size:
+                self._sent.popitem(last=False)
+            alerts.append(a)
+        return alerts
+
+    # ── 分发 ─────────────────────────────────────────────────────────────────
+    def _deliver(self, alert: Alert) -> None:
+        for s in self.sinks:
+            try:
+                s.send(alert)
+            except Exception:
+                self.sink_errors += 1
+        self.delivered += 1
+
+    def drain(self) -> int:
+        """把队列里的提醒同步交给 sinks，返回条数。"""
+        n = 0
+        while True:
+            try:
+                a = self.queue.get_nowait()
+            except queue.Empty:
+                return n
+            self._deliver(a)
+            n += 1
+
+    def stats(self) -> dict:
+        return {"keys": len(self._keys), "evaluations": self.evaluations, "scored": self.scored,
+                "alerts": self.alerts, "duplicates": self.duplicates, "debounced": self.debounced,
+                "dropped": self.dropped, "delivered": self.delivered, "queued": self.queue.qsize(),
+                "sink_errors": self.sink_errors, "errors": self.errors, "last_eval_ms": self.last_eval_s * 1e3}
+
+    # ── 后台线程 ─────────────────────────────────────────────────────────────
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self) -> "AlertEngine":
+        if self.running:
+            return self
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._eval_loop, name="alert-engine", daemon=True),
+                         threading.Thread(target=self._dispatch_loop, name="alert-dispatch", daemon=True)]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self.drain()
+        for s in self.sinks:
+            s.close()
+
+    def _eval_loop(self) -> None:
+        while not self._stop.is_set():
+            t = time.monotonic()
+            try:
+                self.evaluate(self.source())
+            except Exception:
+                self.errors += 1
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - t)))
+
+    def _dispatch_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                a = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._deliver(a)
@@ -0,0 +1,289 @@
+"""
+历史回补
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+按 since 分页拉取 fetch_ohlcv，把多个交易对 / 周期的历史写进本地 K 线库（candle_store）。
+
+  · 多个 (交易对, 周期) 并发，同一交易所共用一个限速器，请求间隔不小于 rateLimit
+  · 被限流（DDoSProtection / RateLimitExceeded）时全体退避，网络错误按指数退避重试
+  · 断点续传：每次运行先问本地库缺哪些区间（开头、中间缺口、结尾），只拉这些区间
+  · 结尾区间逐页追加（中断不丢已拉数据）；开头与中间缺口攒若干页后合并写入一次
+  · 交易所本身没有的区间（停机、上市前）请求一次拿不到就跳过
+
+FakeExchange 是本地假交易所：生成确定性的模拟 K 线，可配置上市时间、停机缺口、限流与随机失败，
+用于不联网验证整个流程。
+
+用法:
+  python backfill.py --exchange okx --symbols BTC/USDT,ETH/USDT --timeframes 1h,15m --since 2023-01-01
+"""
+
+import argparse
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+from candle_store import COLS, CandleStore, tf_ms
+
+try:
+    import ccxt
+    _THROTTLED = (ccxt.DDoSProtection,)  # RateLimitExceeded 是其子类
+    _TRANSIENT = (ccxt.NetworkError, ccxt.ExchangeNotAvailable)
+except ImportError:
+    ccxt = None
+    _THROTTLED = ()
+    _TRANSIENT = (ConnectionError, TimeoutError)
+
+
+class Throttled(Exception):
+    """假交易所的限流错误（真实交易所抛 ccxt.RateLimitExceeded）。"""
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# RATE LIMIT
+# ═════════════════════════════════════════════════════════════════════════════
+
+class RateLimiter:
+    """按固定间隔发放请求名额，线程安全。penalize 让之后的所有请求一起推迟。"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next    = 0.0
+        self._lock    = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            at  = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+    def penalize(self, seconds: float) -> None:
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# BACKFILL
+# ═════════════════════════════════════════════════════════════════════════════
+
+class Backfill:
+    """回补任务。run() 返回每个 (交易对, 周期) 的统计表；stop 事件置位后各任务在当前页结束时退出。"""
+
+    def __init__(self, exchange, store: CandleStore, symbols: Iterable[str], timeframes: Iterable[str],
+                 since: int, until: int = None, page_limit: int = 300, workers: int = 4,
+                 max_retries: int = 6, merge_pages: int = 50, stop: threading.Event = None,
+                 progress: Callable[[str, str, int], None] = None):
+        self.ex          = exchange
+        self.store       = store
+        self.symbols     = list(symbols)
+        self.timeframes  = list(timeframes)
+        self.since       = since
+        self.until       = until
+        self.page_limit  = page_limit
+        self.workers     = workers
+        self.max_retries = max_retries
+        self.merge_pages = merge_pages
+        self.stop        = stop or threading.Event()
+        self.progress    = progress
+        # ccxt 的 rateLimit 单位是毫秒 / 请求
+        self.limiter     = RateLimiter(getattr(exchange, "rateLimit", 100) / 1000)
+
+    def run(self) -> pd.DataFrame:
+        keys = [(s, t) for s in self.symbols for t in self.timeframes]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            futs = [pool.submit(self._run_key, s, t) for s, t in keys]
+            try:
+                rows = [f.result() for f in futs]
+            except BaseException:
+                # Ctrl-C 等：通知各任务在当前页结束后退出，已写入的数据保留
+                self.stop.set()
+                raise
+        return pd.DataFrame(rows).set_index(["symbol", "timeframe"])
+
+    def _fetch(self, symbol: str, tf: str, since: int) -> list:
+        backoff = max(self.limiter.interval, 0.25)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return self.ex.fetch_ohlcv(symbol, timeframe=tf, since=since, limit=self.page_limit) or []
+            except _THROTTLED + (Throttled,):
+                if attempt == self.max_retries:
+                    raise
+                self.limiter.penalize(backoff)
+            except _TRANSIENT:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+        return []
+
+    def _run_key(self, symbol: str, tf: str) -> dict:
+        step  = tf_ms(tf)
+        ex_id = self.ex.id
+        until = self.until if self.until is not None else self.ex.milliseconds()
+        start = -(-self.since // step) * step  # 向上对齐到周期边界
+        stat  = dict(symbol=symbol, timeframe=tf, pages=0, rows=0, gaps=0, empty=0, error=None)
+        try:
+            last = self.store.last_ts(ex_id, symbol, tf)
+            for a, b in self.store.gaps(ex_id, symbol, tf, start, until):
+                if self.stop.is_set():
+                    break
+                stat["gaps"] += 1
+                tail = last is None or a > last
+                # 结尾区间从最后一根开始拉，顺带修订当时未收盘的那根
+                self._fill(symbol, tf, (last if tail and last is not None else a), b, tail, stat)
+        except Exception as e:
+            stat["error"] = f"{type(e).__name__}: {e}"
+        stat["last_ts"] = self.store.last_ts(ex_id, symbol, tf)
+        return stat
+
+    def _fill(self, symbol: str, tf: str, cursor: int, end: int, tail: bool, stat: dict) -> None:
+        step, ex_id, buf = tf_ms(tf), self.ex.id, []
+        try:
+            while cursor <= end and not self.stop.is_set():
+                raw = self._fetch(symbol, tf, cursor)
+                stat["pages"] += 1
+                raw = [r for r in raw if cursor <= r[0] <= end]
+                if not raw:
+                    stat["empty"] += 1
+                    break
+                df = _frame(raw)
+                if tail:
+                    stat["rows"] += self.store.write(ex_id, symbol, tf, df)
+                else:
+                    buf.append(df)
+                    if len(buf) >= self.merge_pages:
+                        stat["rows"] += self.store.merge(ex_id, symbol, tf, pd.concat(buf))
+                        buf = []
+                cursor = int(raw[-1][0]) + step
+                if self.progress is not None:
+                    self.progress(symbol, tf, cursor)
+        finally:
+            if buf:
+                stat["rows"] += self.store.merge(ex_id, symbol, tf, pd.concat(buf))
+
+
+def _frame(raw: list) -> pd.DataFrame:
+    a = np.asarray(raw, dtype=float)
+    return pd.DataFrame(a[:, 1:6], columns=COLS,
+                        index=pd.DatetimeIndex(a[:, 0].astype(np.int64).astype("datetime64[ms]"), name="ts"))
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# FAKE EXCHANGE
+# ═════════════════════════════════════════════════════════════════════════════
+
+class FakeExchange:
+    """本地假交易所，fetch_ohlcv 接口与 ccxt 一致，K 线由 (交易对, 时间戳) 确定性生成。
+
+    listing: {symbol: 上市时间(ms)}，之前没有数据；holes: [(start, end)] 停机区间，区间内没有 K 线；
+    限流按令牌桶：容量 burst、每 rateLimit 毫秒补一个，用完抛 Throttled（与交易所按时间窗计数一致）；
+    fail_rate 为随机网络错误的概率。
+    calls 记录每次请求的 monotonic 时间，用于核对限速。
+    """
+
+    def __init__(self, id: str = "fake", rate_limit_ms: int = 20, max_limit: int = 300, now: int = None,
+                 listing: dict = None, holes: Iterable[tuple] = (), fail_rate: float = 0.0,
+                 burst: int = 5, seed: int = 0):
+        self.id        = id
+        self.rateLimit = rate_limit_ms
+        self.max_limit = max_limit
+        self.now       = now
+        self.listing   = listing or {}
+        self.holes     = list(holes)
+        self.fail_rate = fail_rate
+        self.burst     = burst
+        self.calls: list = []
+        self.throttled = 0
+        self._rng      = np.random.default_rng(seed)
+        self._lock     = threading.Lock()
+        self._tokens   = float(burst)
+        self._refill   = None
+
+    def milliseconds(self) -> int:
+        return self.now if self.now is not None else int(time.time() * 1000)
+
+    def candles(self, symbol: str, tf: str, start: int, end: int) -> np.ndarray:
+        """[start, end] 内应有的全部 K 线（N × 6），即交易所的“真值”。"""
+        step = tf_ms(tf)
+        lo   = max(start, self.listing.get(symbol, 0))
+        ts   = np.arange(-(-lo // step) * step, min(end, self.milliseconds()) + 1, step, dtype=np.int64)
+        for a, b in self.holes:
+            ts = ts[(ts < a) | (ts > b)]
+        return self._ohlcv(symbol, step, ts)
+
+    def _ohlcv(self, symbol: str, step: int, ts: np.ndarray) -> np.ndarray:
+        # 每根 K 线只由 (交易对, 时间戳) 决定，分页边界怎么切都得到同样的数据
+        h    = (ts // step).astype(np.uint64) * np.uint64(2654435761) + np.uint64(zlib.crc32(symbol.encode()))
+        u    = (h % np.uint64(1_000_003)).astype(float) / 1_000_003
+        base = 100.0 + zlib.crc32(symbol.encode()) % 1000
+        c    = base * (1 + 0.2 * np.sin(ts / 8.64e8)) * (1 + 0.004 * (u - 0.5))
+        o    = base * (1 + 0.2 * np.sin((ts - step) / 8.64e8))
+        return np.column_stack([ts.astype(float), o, np.maximum(o, c) * 1.001, np.minimum(o, c) * 0.999,
+                                c, 1 + 100 * u])
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since: int = None, limit: int = None,
+                    params: dict = None) -> list:
+        with self._lock:
+            t = time.monotonic()
+            if self._refill is not None:
+                self._tokens = min(self.burst, self._tokens + (t - self._refill) * 1000 / self.rateLimit)
+            self._refill = t
+            if self._tokens < 1:
+                self.throttled += 1
+                raise Throttled(f"{self.id} 429")
+            self._tokens -= 1
+            self.calls.append(t)
+            fail = self.fail_rate and self._rng.random() < self.fail_rate
+        if fail:
+            raise _TRANSIENT[0]("fake network error")
+        step  = tf_ms(timeframe)
+        limit = min(limit or self.max_limit, self.max_limit)
+        now   = self.milliseconds()
+        if since is None:
+            since = now - step * limit
+        # 与真实交易所一样：从 since 起返回最多 limit 根，停机 / 上市前的区间直接跳过
+        out    = []
+        cursor = max(since, self.listing.get(symbol, since))
+        while len(out) < limit and cursor <= now:
+            out.extend(self.candles(symbol, timeframe, cursor, cursor + step * limit - 1).tolist())
+            cursor += step * limit
+        return out[:limit]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--exchange", default="okx")
+    ap.add_argument("--symbols", required=True, help="逗号分隔，如 BTC/USDT,ETH/USDT")
+    ap.add_argument("--timeframes", default="1h")
+    ap.add_argument("--since", required=True, help="起始日期，如 2023-01-01")
+    ap.add_argument("--until", help="结束日期，默认到现在")
+    ap.add_argument("--dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "candles"),
+                    help="本地 K 线库目录，默认与应用共用（写入按序列加文件锁，应用运行时也可回补）")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--page-limit", type=int, default=300)
+    args = ap.parse_args()
+
+    if ccxt is None:
+        raise SystemExit("需要 ccxt：pip install ccxt")
+    # 限速由 Backfill 统一做，关掉 ccxt 自带的逐实例节流
+    ex  = getattr(ccxt, args.exchange)({"enableRateLimit": False, "timeout": 15000})
+    ms  = lambda d: int(pd.Timestamp(d).value // 1_000_000)
+    job = Backfill(ex, CandleStore(args.dir), args.symbols.split(","), args.timeframes.split(","),
+                   since=ms(args.since), until=ms(args.until) if args.until else None,
+                   page_limit=args.page_limit, workers=args.workers)
+    try:
+        print(job.run())
+    except KeyboardInterrupt:
+        job.stop.set()
+        print("已中断，下次运行从本地库最后一根继续")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+历史回测
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+对整段历史一次性算出每根 K 线的评分与点位（strategy.score_vectorized），
+再用之后 K 线的最高 / 最低价判断挂单成交、止盈止损先后，统计命中率、期望与回撤。
+
+三种下单方式（与策略页一致）:
+  market       ─ 按方向在 entry（现价 ±0.1%）挂单，tp1 / tp2 / sl
+  limit_long   ─ 看多信号时在支撑下方挂多单，limit_long_*
+  limit_short  ─ 看空信号时在阻力上方挂空单，limit_short_*
+
+撮合规则（K 线内部顺序未知，一律按保守处理）:
+  · 信号 K 线收盘后挂单，之后 fill_bars 根内最低价 / 最高价触及 entry 视为成交，否则撤单
+  · 成交后第一根触及 sl 或 tp1 的 K 线决定结果；同一根同时触及按止损计
+  · 成交那根只认止损：K 线内先成交还是先到 tp1 无从得知，tp1 / tp2 从下一根起算
+  · horizon 根内都没触及则按第 horizon 根收盘价平仓（timeout）；数据不够 horizon 根的记为 open，不计入统计
+  · tp2 只记录是否在止损前到达，平仓仍按 tp1
+  · 默认同一方式同时只持有一笔：持仓或挂单期间出现的新信号忽略（overlap=True 则每个信号都独立计）
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicators import calc_indicators
+from strategy import DEFAULT_PARAMS, StrategyParams, features_from_frame, score_vectorized
+
+VARIANTS = ("market", "limit_long", "limit_short")
+# 结果编码
+OPEN, EXPIRED, TP1, SL, TIMEOUT = 0, 1, 2, 3, 4
+OUTCOMES = np.array(["open", "expired", "tp1", "sl", "timeout"])
+
+_CHUNK = 16_384  # 每批信号数，窗口矩阵约 _CHUNK × horizon，内存有界
+
+
+def _orders(lv: dict, variant: str) -> tuple:
+    """某种下单方式的 (信号 K 线下标, 方向 ±1, entry, tp1, tp2, sl)。"""
+    code = lv["direction_code"]
+    long_, short_ = (code == 1) | (code == 2), (code == 3) | (code == 4)
+    if variant == "market":
+        ix   = np.flatnonzero(long_ | short_)
+        side = np.where(long_[ix], 1, -1)
+        keys = ("entry", "tp1", "tp2", "sl")
+    elif variant == "limit_long":
+        ix   = np.flatnonzero(long_)
+        side = np.ones(len(ix), dtype=int)
+        keys = ("limit_long_entry", "limit_long_tp1", "limit_long_tp2", "limit_long_sl")
+    elif variant == "limit_short":
+        ix   = np.flatnonzero(short_)
+        side = -np.ones(len(ix), dtype=int)
+        keys = ("limit_short_entry", "limit_short_tp1", "limit_short_tp2", "limit_short_sl")
+    else:
+        raise ValueError(f"未知下单方式: {variant}")
+    return (ix, side) + tuple(np.asarray(lv[k], dtype=float)[ix] for k in keys)
+
+
+def _first(m: np.ndarray) -> np.ndarray:
+    """每行第一个 True 的列号，没有则为列数。"""
+    return np.where(m.any(axis=1), m.argmax(axis=1), m.shape[1])
+
+
+def _resolve(ix, side, entry, tp1, tp2, sl, high, low, close, horizon: int, fill_bars: int) -> dict:
+    """逐信号求成交 / 平仓位置与结果，全部为数组运算（按 _CHUNK 分批）。"""
+    n    = len(close)
+    # 末尾补 horizon 根永不触发的 K 线，窗口切片不用判断越界
+    hi   = np.concatenate([high, np.full(horizon, -np.inf)])
+    lo   = np.concatenate([low,  np.full(horizon, np.inf)])
+    win_hi = np.lib.stride_tricks.sliding_window_view(hi[1:], horizon)
+    win_lo = np.lib.stride_tricks.sliding_window_view(lo[1:], horizon)
+    cols   = np.arange(horizon)
+
+    m = len(ix)
+    fill_k, exit_k  = np.full(m, horizon), np.full(m, horizon)
+    outcome, hit2   = np.zeros(m, dtype=np.int8), np.zeros(m, dtype=bool)
+    for a in range(0, m, _CHUNK):
+        b  = min(a + _CHUNK, m)
+        i  = ix[a:b]
+        wh, wl = win_hi[i], win_lo[i]
+        lg = (side[a:b] > 0)[:, None]
+        e, t1, t2, s = (x[a:b, None] for x in (entry, tp1, tp2, sl))
+
+        touched = np.where(lg, wl <= e, wh >= e)
+        touched[:, fill_bars:] = False
+        fk    = _first(touched)
+        after = cols >= fk[:, None]
+        later = cols > fk[:, None]
+        k_sl  = _first(after & np.where(lg, wl <= s, wh >= s))
+        k_tp1 = _first(later & np.where(lg, wh >= t1, wl <= t1))
+        k_tp2 = _first(later & np.where(lg, wh >= t2, wl <= t2))
+
+        filled = fk < horizon
+        ek  = np.minimum(k_sl, k_tp1)
+        out = np.select(
+            [~filled & (i + fill_bars < n), ~filled,
+             filled & (k_tp1 < k_sl), filled & (k_sl < horizon),
+             filled & (i + horizon < n)],
+            [EXPIRED, OPEN, TP1, SL, TIMEOUT], OPEN,
+        )
+        fill_k[a:b]  = fk
+        exit_k[a:b]  = np.where((out == TP1) | (out == SL), ek, horizon - 1)
+        outcome[a:b] = out
+        hit2[a:b]    = filled & (k_tp2 < k_sl) & (k_tp2 < horizon)
+
+    exit_bar = np.where(fill_k < horizon, ix + 1 + exit_k, ix + fill_bars)
+    exit_px  = np.select(
+        [outcome == TP1, outcome == SL, outcome == TIMEOUT],
+        [tp1, sl, close[np.minimum(ix + horizon, n - 1)]], np.nan,
+    )
+    return dict(fill_bar=np.where(fill_k < horizon, ix + 1 + fill_k, -1), exit_bar=exit_bar,
+                outcome=outcome, exit=exit_px, tp2_hit=hit2)
+
+
+def _no_overlap(ix: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """同一时间只持有一笔：按信号顺序贪心选取，返回布尔掩码。仅此处逐个循环（O(信号数)）。"""
+    keep, free = np.zeros(len(ix), dtype=bool), -1
+    for j, (i, e) in enumerate(zip(ix.tolist(), end.tolist())):
+        if i >= free:
+            keep[j], free = True, e + 1
+    return keep
+
+
+def simulate(levels: dict, high: np.ndarray, low: np.ndarray, close: np.ndarray, horizon: int = 96,
+             fill_bars: int = 4, variants=VARIANTS, overlap: bool = False) -> dict:
+    """数组版回测，返回 {下单方式: {列名: ndarray}}，列与 backtest 的逐笔表一致（不含 time / variant）。"""
+    fill_bars = max(1, min(fill_bars, horizon))
+    out = {}
+    for v in variants:
+        ix, side, entry, tp1, tp2, sl = _orders(levels, v)
+        r = _resolve(ix, side, entry, tp1, tp2, sl, high, low, close, horizon, fill_bars)
+        if not overlap:
+            keep = _no_overlap(ix, r["exit_bar"])
+            ix, side, entry, tp1, tp2, sl = ix[keep], side[keep], entry[keep], tp1[keep], tp2[keep], sl[keep]
+            r = {k: a[keep] for k, a in r.items()}
+        risk = np.maximum(np.abs(entry - sl), 1e-12)
+        out[v] = dict(
+            bar=ix, side=side, entry=entry, tp1=tp1, tp2=tp2, sl=sl, **r,
+            pnl_pct=side * (r["exit"] - entry) / entry * 100,
+            r=side * (r["exit"] - entry) / risk,
+        )
+    return out
+
+
+def backtest(df: pd.DataFrame, horizon: int = 96, fill_bars: int = 4, variants=VARIANTS,
+             overlap: bool = False, levels: dict = None, params: StrategyParams = DEFAULT_PARAMS) -> pd.DataFrame:
+    """回测整段 OHLCV，返回逐笔交易表（每行一个挂单，含撤单与未平仓）。
+
+    df 只需 open/high/low/close 列，缺指标列时用 calc_indicators 补算；
+    levels 可传入预先算好的 score_vectorized 结果，否则按 params 计算。
+    """
+    if levels is None:
+        if "atr" not in df.columns:
+            df = calc_indicators(df)
+        levels = score_vectorized(features_from_frame(df), params)
+    high, low, close = (df[c].to_numpy(dtype=float) for c in ("high", "low", "close"))
+    res   = simulate(levels, high, low, close, horizon, fill_bars, variants, overlap)
+    parts = []
+    for v, r in res.items():
+        t = pd.DataFrame(r)
+        t["outcome"] = OUTCOMES[r["outcome"]]
+        t.insert(0, "time", df.index[r["bar"]])
+        t.insert(0, "variant", v)
+        parts.append(t)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _max_drawdown(x: np.ndarray) -> float:
+    """累计曲线的最大回撤（与 x 同单位），起点为 0。"""
+    if not len(x):
+        return 0.0
+    eq = np.concatenate([[0.0], np.cumsum(x)])
+    return float(np.max(np.maximum.accumulate(eq) - eq))
+
+
+def metrics(outcome: np.ndarray, exit_bar: np.ndarray, r: np.ndarray, pnl_pct: np.ndarray,
+            tp2_hit: np.ndarray) -> dict:
+    """一组挂单的统计：成交率、止盈 / 止损 / 超时占比、期望（R 与 %）、最大回撤（按平仓顺序累计 R）。
+
+    outcome 为 OUTCOMES 编码；open（数据不够判断）的挂单不计入。
+    """
+    done  = (outcome == TP1) | (outcome == SL) | (outcome == TIMEOUT)
+    order = np.argsort(exit_bar[done], kind="stable")
+    rr    = r[done][order]
+    n     = len(rr)
+    gain, loss = rr[rr > 0].sum(), -rr[rr < 0].sum()
+    nan   = float("nan")
+    return {
+        "orders":         int((outcome != OPEN).sum()),
+        "trades":         n,
+        "fill_rate":      n / max(1, int(done.sum() + (outcome == EXPIRED).sum())),
+        "tp1_rate":       float((outcome[done] == TP1).mean()) if n else nan,
+        "tp2_rate":       float(tp2_hit[done].mean()) if n else nan,
+        "sl_rate":        float((outcome[done] == SL).mean()) if n else nan,
+        "timeout_rate":   float((outcome[done] == TIMEOUT).mean()) if n else nan,
+        "win_rate":       float((rr > 0).mean()) if n else nan,
+        "expectancy_r":   float(rr.mean()) if n else nan,
+        "expectancy_pct": float(pnl_pct[done].mean()) if n else nan,
+        "profit_factor":  float(gain / loss) if loss > 0 else nan,
+        "total_r":        float(rr.sum()),
+        "max_dd_r":       _max_drawdown(rr),
+    }
+
+
+def summarize(trades: pd.DataFrame) -> pd.DataFrame:
+    """逐笔表按下单方式汇总，每行一个 metrics。"""
+    code = {name: i for i, name in enumerate(OUTCOMES)}
+    rows = {}
+    for v, t in trades.groupby("variant", sort=False):
+        rows[v] = metrics(t["outcome"].map(code).to_numpy(), t["exit_bar"].to_numpy(), t["r"].to_numpy(),
+                          t["pnl_pct"].to_numpy(), t["tp2_hit"].to_numpy())
+    return pd.DataFrame.from_dict(rows, orient="index")
@@ -0,0 +1,169 @@
+"""
+信号提醒引擎基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+N 个交易对 × 3 个周期的指标引擎（随机游走行情），每个“分钟”给全部键各追加一根新 K 线（最坏情况：
+所有键同时出新 K 线），然后评估一轮。对比：
+  per-key   ─ 每个键各自构造快照、score_strategy 评分（页面各会话现在的做法）
+  engine    ─ alerts.AlertEngine：只取收盘那一行，整批 score_vectorized，状态数组向量化比较
+报每轮耗时、占一分钟预算的比例、每轮提醒数，并校验：
+  · 引擎落定的方向与逐键 score_strategy（收盘 K 线）完全一致
+  · 去重：回退状态后重评同一批 K 线，产生的提醒全部被去重拦下
+  · 防抖：同一 (键, 类型) 相邻两条提醒的间隔不小于 cooldown 根 K 线；不防抖时提醒更多
+  · 内存 / 文件 / 本地 webhook 三个 sink 收到的提醒与入队的一致
+
+用法:
+  python benchmarks/bench_alerts.py --symbols 500 --minutes 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import AlertEngine, FileSink, MemorySink, WebhookSink, WebhookStub
+from candle_store import tf_ms
+from indicators import IndicatorEngine
+from strategy import score_strategy
+
+TFS   = ("15m", "1h", "4h")
+START = pd.Timestamp("2025-01-01")
+
+
+def _engines(n: int, bars: int = 300, seed: int = 0) -> tuple:
+    """{(symbol, tf): IndicatorEngine} 及每个键的随机数流（追加新 K 线用）。"""
+    rng  = np.random.default_rng(seed)
+    engs = {}
+    for i in range(n):
+        for tf in TFS:
+            vol   = 0.012 * np.sqrt(tf_ms(tf) / 3_600_000)
+            close = 100 * np.exp(np.cumsum(rng.normal(0, vol, bars)))
+            sprd  = close * rng.uniform(0.001, 0.006, bars)
+            idx   = pd.date_range(START, periods=bars, freq=pd.Timedelta(milliseconds=tf_ms(tf)))
+            df    = pd.DataFrame({"open": np.roll(close, 1), "high": close + sprd, "low": close - sprd,
+                                  "close": close, "volume": rng.lognormal(9, .4, bars)}, index=idx)
+            engs[(f"S{i:03d}", tf)] = IndicatorEngine.from_frame(df)
+    return engs, rng
+
+
+def _tick(engs: dict, rng: np.random.Generator) -> None:
+    """每个键追加一根新 K 线（上一根随之收盘）。"""
+    for (_, tf), e in engs.items():
+        last = e.last()
+        c    = last[3] * np.exp(rng.normal(0, 0.012 * np.sqrt(tf_ms(tf) / 3_600_000)))
+        s    = c * rng.uniform(0.001, 0.006)
+        e.update_bar(e.last_ts + pd.Timedelta(milliseconds=tf_ms(tf)), last[3], c + s, c - s, c, 1e4)
+
+
+def _run(n: int, minutes: int, cooldown: int) -> tuple:
+    engs, rng = _engines(n)
+    eng = AlertEngine(lambda: engs, cooldown=cooldown)
+    eng.evaluate(engs)                      # 首轮只记状态
+    t_upd, t_eval, alerts = 0.0, [], []
+    for _ in range(minutes):
+        t = time.perf_counter(); _tick(engs, rng); t_upd += time.perf_counter() - t
+        t = time.perf_counter(); alerts += eng.evaluate(engs); t_eval.append(time.perf_counter() - t)
+    return engs, eng, alerts, t_upd / minutes, np.array(t_eval)
+
+
+def _parity(engs: dict, eng: AlertEngine) -> bool:
+    ok = True
+    for key, e in engs.items():
+        ref = score_strategy(e.frame().iloc[:-1])["direction"]
+        ok &= ref == ["NEUTRAL", "LONG", "STRONG_LONG", "SHORT", "STRONG_SHORT"][eng._dir[eng._slot[key]]]
+    return bool(ok)
+
+
+def _dedup(n: int) -> bool:
+    engs, rng = _engines(n, seed=1)
+    eng = AlertEngine(cooldown=0)
+    eng.evaluate(engs)
+    for _ in range(3):
+        _tick(engs, rng)
+        eng.evaluate(engs)
+    state = {k: getattr(eng, k).copy() for k in ("_ts", "_dir", "_cand", "_cnt", "_ema", "_close", "_ll", "_ls", "_fired")}
+    _tick(engs, rng)
+    first = eng.evaluate(engs)
+    for k, v in state.items():
+        setattr(eng, k, v)
+    again = eng.evaluate(engs)
+    return len(first) > 0 and not again and eng.duplicates == len(first)
+
+
+def _debounce(alerts: list, cooldown: int) -> bool:
+    last = {}
+    for a in alerts:
+        k = (a.symbol, a.tf, a.kind)
+        if k in last and a.bar_ts - last[k] < cooldown * tf_ms(a.tf):
+            return False
+        last[k] = a.bar_ts
+    return True
+
+
+def _sinks(n: int, minutes: int) -> tuple:
+    engs, rng = _engines(n, seed=2)
+    stub = WebhookStub().start()
+    mem  = MemorySink(maxlen=100_000)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "alerts.jsonl")
+        eng  = AlertEngine(lambda: engs, [mem, FileSink(path), WebhookSink(stub.url)], interval=0.05).start()
+        for _ in range(minutes):
+            _tick(engs, rng)
+            time.sleep(0.1)                  # 评估线程按 interval 轮询，新 K 线出现后下一轮评估
+        time.sleep(0.3)
+        eng.stop()
+        stub.stop()
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(x) for x in f]
+    ids = [list(a.id) for a in reversed(mem.recent())]
+    ok  = (eng.alerts == eng.delivered == len(ids) > 0 and eng.sink_errors == 0
+           and [[x[k] for k in ("symbol", "tf", "kind", "value", "bar_ts")] for x in lines] == ids
+           and sorted(map(str, stub.received)) == sorted(map(str, lines)))
+    return ok, eng
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--symbols", type=int, default=500)
+    ap.add_argument("--minutes", type=int, default=20)
+    ap.add_argument("--cooldown", type=int, default=3, help="同一 (键, 类型) 两次提醒的最小间隔（K 线根数）")
+    args = ap.parse_args()
+
+    engs, eng, alerts, t_upd, t_eval = _run(args.symbols, args.minutes, args.cooldown)
+    keys = len(engs)
+    t = time.perf_counter()
+    for e in engs.values():
+        score_strategy(e.frame().iloc[:-1])
+    t_naive = time.perf_counter() - t
+
+    print(f"{args.symbols} symbols × {len(TFS)} timeframes = {keys} keys, {args.minutes} minutes, every key a new bar each minute")
+    print(f"{'':24s}{'ms/minute':>10s}{'% of 60 s':>10s}")
+    for name, dt in (("per-key score_strategy", t_naive), ("engine (median)", float(np.median(t_eval))),
+                     ("engine (max)", float(t_eval.max()))):
+        print(f"  {name:22s}{dt * 1e3:10.1f}{dt / 60 * 100:10.3f}")
+    print(f"  {'(bar updates, feed)':22s}{t_upd * 1e3:10.1f}")
+    s = eng.stats()
+    kinds = pd.Series([a.kind for a in alerts]).value_counts().to_dict() if alerts else {}
+    print(f"alerts {s['alerts']} ({s['alerts'] / args.minutes:.0f}/minute) {kinds}   debounced {s['debounced']}")
+
+    _, loose, loose_alerts, _, _ = _run(args.symbols, args.minutes, 0)
+    ok_par = _parity(engs, eng)
+    ok_dup = _dedup(min(args.symbols, 100))
+    ok_deb = _debounce(alerts, args.cooldown) and len(loose_alerts) > len(alerts)
+    ok_snk, seng = _sinks(min(args.symbols, 50), 5)
+    print(f"without debounce       {len(loose_alerts)} alerts")
+    print(f"direction == score_strategy      {'OK' if ok_par else 'MISMATCH'}")
+    print(f"dedup on re-evaluation           {'OK' if ok_dup else 'MISMATCH'}")
+    print(f"cooldown respected               {'OK' if ok_deb else 'MISMATCH'}")
+    print(f"memory / file / webhook sinks    {'OK' if ok_snk else 'MISMATCH'}  ({seng.delivered} delivered)")
+    sys.exit(0 if ok_par and ok_dup and ok_deb and ok_snk else 1)
+
+
+if __name__ == "__main__":
+    main()
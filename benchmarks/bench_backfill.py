@@ -0,0 +1,108 @@
+"""
+历史回补演练
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+用本地假交易所（backfill.FakeExchange）跑一遍完整回补，不联网：
+
+  1. 预置本地库：一个交易对只有中间一段，另一个中间被挖掉一块
+  2. 第一轮回补跑到一半强行中断
+  3. 第二轮从本地库续传，补齐开头、中间缺口和结尾
+  4. 逐根核对本地库与交易所真值一致，并核对请求间隔从未低于 rateLimit、没有被限流
+
+用法:
+  python benchmarks/bench_backfill.py --symbols 6 --days 500
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backfill import Backfill, FakeExchange, _frame
+from candle_store import CandleStore, tf_ms
+
+DAY = 86_400_000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--symbols", type=int, default=6)
+    ap.add_argument("--days", type=int, default=500)
+    ap.add_argument("--timeframes", default="15m,1h")
+    ap.add_argument("--rate-limit-ms", type=int, default=5)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--fail-rate", type=float, default=0.02)
+    args = ap.parse_args()
+
+    now   = int(pd.Timestamp("2024-06-01 12:34").value // 1_000_000)
+    since = now - args.days * DAY
+    syms  = [f"S{i}/USDT" for i in range(args.symbols)]
+    tfs   = args.timeframes.split(",")
+    ex    = FakeExchange(rate_limit_ms=args.rate_limit_ms, now=now, fail_rate=args.fail_rate,
+                         listing={syms[-1]: since + args.days // 3 * DAY},          # 区间中途才上市
+                         holes=[(since + 100 * DAY, since + 100 * DAY + 6 * 3_600_000)])  # 交易所停机 6 小时
+    root  = tempfile.mkdtemp(prefix="candles-")
+    store = CandleStore(root)
+    try:
+        # 预置：S0 只有中间 30 天；S1 有整段但中间缺 20 天
+        for tf in tfs:
+            mid = since + args.days // 2 * DAY
+            store.write(ex.id, syms[0], tf, _frame(ex.candles(syms[0], tf, mid, mid + 30 * DAY).tolist()))
+            full = ex.candles(syms[1], tf, since, now)
+            cut  = (full[:, 0] < since + 200 * DAY) | (full[:, 0] > since + 220 * DAY)
+            store.write(ex.id, syms[1], tf, _frame(full[cut].tolist()))
+
+        # 第一轮：拉到约一半页数时中断
+        stop, pages = threading.Event(), [0]
+        total = sum((now - since) // tf_ms(tf) // 300 + 1 for tf in tfs) * len(syms)
+
+        def _progress(*_):
+            pages[0] += 1
+            if pages[0] >= total // 2:
+                stop.set()
+
+        t0 = time.perf_counter()
+        r1 = Backfill(ex, store, syms, tfs, since, workers=args.workers, stop=stop, progress=_progress).run()
+        t1 = time.perf_counter()
+        r2 = Backfill(ex, CandleStore(root), syms, tfs, since, workers=args.workers).run()
+        t2 = time.perf_counter()
+
+        # 核对
+        check, bad = CandleStore(root), []
+        for s in syms:
+            for tf in tfs:
+                truth = ex.candles(s, tf, since, now)
+                got   = check.read(ex.id, s, tf)
+                arr   = np.column_stack([got.index.as_unit("ms").asi8, got.to_numpy()]) if len(got) else np.empty((0, 6))
+                if arr.shape != truth.shape or not np.array_equal(arr, truth):
+                    bad.append((s, tf, arr.shape, truth.shape))
+        gaps = [g for s in syms for tf in tfs for g in check.gaps(ex.id, s, tf)]
+        dt   = np.diff(np.asarray(ex.calls))
+        rows = int(r1["rows"].sum() + r2["rows"].sum())
+
+        print(f"series              {len(syms)} symbols × {tfs} × {args.days} days")
+        print(f"run 1 (interrupted) {t1 - t0:6.2f} s  pages {int(r1['pages'].sum()):,}  rows {int(r1['rows'].sum()):,}")
+        print(f"run 2 (resume)      {t2 - t1:6.2f} s  pages {int(r2['pages'].sum()):,}  rows {int(r2['rows'].sum()):,}"
+              f"  errors {int(r2['error'].notna().sum())}")
+        print(f"throughput          {rows / (t2 - t0):,.0f} rows/s  ({len(ex.calls) / (t2 - t0):.0f} req/s, "
+              f"budget {1000 / args.rate_limit_ms:.0f} req/s)")
+        # 任意 100 个连续请求的耗时不应短于 99 个 rateLimit 间隔
+        span = (np.asarray(ex.calls)[100:] - np.asarray(ex.calls)[:-100]).min() * 1000 if len(ex.calls) > 100 else float("nan")
+        print(f"request spacing     min gap {dt.min() * 1000:.2f} ms, min 100-request span {span:.0f} ms "
+              f"(budget {99 * args.rate_limit_ms} ms), throttled {ex.throttled}")
+        print(f"remaining gaps      {len(gaps)} (exchange downtime only)")
+        print(f"parity              {'OK' if not bad else bad[:5]}")
+        sys.exit(1 if bad or ex.throttled else 0)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
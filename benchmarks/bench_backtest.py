@@ -0,0 +1,122 @@
+"""
+回测基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+生成多年的 15 分钟模拟 K 线（默认 150,000 根 ≈ 4.3 年），计时 backtest.backtest 各阶段，
+并在前 --check 根上用逐笔循环的参考实现核对每一笔的成交 / 平仓位置与结果。
+
+也可以用 --csv 回测真实数据（需含 ts/open/high/low/close 列）。
+
+用法:
+  python benchmarks/bench_backtest.py --bars 150000
+  python benchmarks/bench_backtest.py --csv btc_15m.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import VARIANTS, backtest, summarize, _orders
+from indicators import calc_indicators
+from strategy import features_from_frame, score_vectorized
+
+
+def _synthetic(bars: int, seed: int) -> pd.DataFrame:
+    rng    = np.random.default_rng(seed)
+    # 分段漂移，制造趋势与震荡交替的行情
+    drift  = np.repeat(rng.normal(0, 0.0006, bars // 500 + 1), 500)[:bars]
+    closes = 30_000 * np.exp(np.cumsum(rng.normal(drift, 0.004, bars)))
+    opens  = np.roll(closes, 1); opens[0] = closes[0]
+    wick   = closes * rng.uniform(0.0005, 0.004, bars)
+    idx    = pd.date_range("2021-01-01", periods=bars, freq="15min")
+    return pd.DataFrame({"open": opens, "high": np.maximum(opens, closes) + wick,
+                         "low": np.minimum(opens, closes) - wick, "close": closes,
+                         "volume": rng.lognormal(9, 0.4, bars)}, index=idx)
+
+
+def _reference(df: pd.DataFrame, levels: dict, variant: str, horizon: int, fill_bars: int) -> list:
+    """逐笔、逐根 K 线的直观实现（overlap=True 语义），只用于核对。"""
+    hi, lo = df["high"].to_numpy(), df["low"].to_numpy()
+    n   = len(hi)
+    out = []
+    ix, side, entry, tp1, tp2, sl = _orders(levels, variant)
+    for j, i in enumerate(ix.tolist()):
+        lg, e, t1, t2, s = side[j] > 0, entry[j], tp1[j], tp2[j], sl[j]
+        fill = next((k for k in range(i + 1, min(i + 1 + fill_bars, n))
+                     if ((lo[k] <= e) if lg else (hi[k] >= e))), None)
+        if fill is None:
+            out.append(("expired" if i + fill_bars < n else "open", -1, i + fill_bars, False))
+            continue
+        first = {}
+        for k in range(fill, min(i + 1 + horizon, n)):
+            for name, px in (("sl", s), ("tp1", t1), ("tp2", t2)):
+                if k == fill and name != "sl":
+                    continue  # 成交那根只认止损
+                touch = (lo[k] <= px) if (lg == (name == "sl")) else (hi[k] >= px)
+                if touch:
+                    first.setdefault(name, k)
+        k_sl, k_tp1, k_tp2 = (first.get(x, n + horizon) for x in ("sl", "tp1", "tp2"))
+        if k_tp1 < k_sl:
+            res, ex = "tp1", k_tp1
+        elif "sl" in first:
+            res, ex = "sl", k_sl
+        else:
+            res, ex = ("timeout" if i + horizon < n else "open"), i + horizon
+        out.append((res, fill, ex, k_tp2 < k_sl and "tp2" in first))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--bars", type=int, default=150_000)
+    ap.add_argument("--csv", help="真实 K 线 CSV，给出时忽略 --bars")
+    ap.add_argument("--horizon", type=int, default=96)
+    ap.add_argument("--fill-bars", type=int, default=4)
+    ap.add_argument("--check", type=int, default=20_000, help="参考实现核对的 K 线数，0 跳过")
+    ap.add_argument("--seed", type=int, default=3)
+    args = ap.parse_args()
+
+    raw = (pd.read_csv(args.csv, index_col="ts", parse_dates=True) if args.csv
+           else _synthetic(args.bars, args.seed))
+
+    t0 = time.perf_counter()
+    df = calc_indicators(raw)
+    t1 = time.perf_counter()
+    levels = score_vectorized(features_from_frame(df))
+    t2 = time.perf_counter()
+    trades = backtest(df, args.horizon, args.fill_bars, levels=levels)
+    t3 = time.perf_counter()
+    table = summarize(trades)
+    t4 = time.perf_counter()
+
+    print(f"bars                {len(df):,}  ({df.index[0]} → {df.index[-1]})")
+    print(f"indicators          {(t1 - t0) * 1000:8.1f} ms")
+    print(f"score + levels      {(t2 - t1) * 1000:8.1f} ms")
+    print(f"fills / exits       {(t3 - t2) * 1000:8.1f} ms  ({len(trades):,} orders)")
+    print(f"summary             {(t4 - t3) * 1000:8.1f} ms")
+    print(f"total               {(t4 - t0):8.2f} s")
+    with pd.option_context("display.width", 200, "display.max_columns", 20, "display.precision", 3):
+        print(table)
+
+    if args.check:
+        sub  = df.iloc[:args.check]
+        lv   = score_vectorized(features_from_frame(sub))
+        got  = backtest(sub, args.horizon, args.fill_bars, overlap=True, levels=lv)
+        bad  = 0
+        for v in VARIANTS:
+            g   = got[got["variant"] == v]
+            ref = _reference(sub, lv, v, args.horizon, args.fill_bars)
+            for (res, fill, ex, r2), row in zip(ref, g.itertuples()):
+                if (res, fill, ex, r2) != (row.outcome, row.fill_bar, row.exit_bar, bool(row.tp2_hit)):
+                    bad += 1
+        print(f"reference check     {args.check:,} bars: {'OK' if not bad else f'{bad} mismatches'}")
+        sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+行情图重跑基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+模拟策略页每次重跑画 N 个交易对的 K 线图 + MACD 图，对比：
+  rebuild  ─ 原实现：go.Figure() 逐条 add_trace + 完整 update_layout，数据先转 Python list
+  factory  ─ charts.ChartFactory：模板只建一次，NumPy 数组直接填数据，按数据指纹缓存成品图
+
+两种重跑：
+  unchanged  ─ 两次重跑之间行情没变（REST 缓存未过期）
+  tick       ─ 每次重跑最后一根 K 线都被推送修订（流式行情）
+
+服务端耗时 = 构图 + Streamlit 的 plotly_chart 序列化（to_dict + to_json）；
+下发字节数按 Streamlit 的 ForwardMsg 计：与上次字节相同且 ≥10KB 的元素只发引用哈希。
+
+用法:
+  python benchmarks/bench_charts.py --symbols 4 --reruns 100
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io
+import plotly.tools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charts import ChartFactory
+from indicators import IndicatorEngine
+
+try:
+    from streamlit.elements.lib.streamlit_plotly_theme import configure_streamlit_plotly_theme
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from streamlit.runtime.forward_msg_cache import create_reference_msg, populate_hash_if_needed
+except ImportError:
+    ForwardMsg = None
+else:
+    configure_streamlit_plotly_theme()   # 页面里 st.plotly_chart 导入时注册的默认模板，基准里保持一致
+
+C = {"bg": "#FFFFFF", "sub": "#6B7280", "green": "#059669", "red": "#DC2626", "blue": "#2563EB", "amber": "#D97706"}
+
+
+# ── 原实现（逐字搬自 render_strategy 改造前）──────────────────────────────────
+def _old_candle(df: pd.DataFrame, sym: str) -> go.Figure:
+    tail = df.tail(120).copy()
+    xs   = list(range(len(tail)))
+    fig  = go.Figure()
+    fig.add_trace(go.Candlestick(
+        x=xs, open=tail["open"], high=tail["high"], low=tail["low"], close=tail["close"],
+        increasing=dict(fillcolor="#059669", line=dict(color="#047857", width=1)),
+        decreasing=dict(fillcolor="#DC2626", line=dict(color="#B91C1C", width=1)),
+        name=sym, showlegend=False,
+        hoverlabel=dict(bgcolor="#1F2937", font=dict(color="#F9FAFB", size=11)),
+    ))
+    ema_cfg = [("ema9","#2563EB","EMA9"),("ema21","#D97706","EMA21"),("ema55","#7C3AED","EMA55")]
+    for col, color, name in ema_cfg:
+        fig.add_trace(go.Scatter(x=xs, y=tail[col], line=dict(color=color, width=1.5),
+                                 name=name, mode="lines", hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=xs, y=tail["bb_upper"],
+                             line=dict(color="rgba(107,114,128,.3)", width=1, dash="dot"),
+                             showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=xs, y=tail["bb_lower"],
+                             line=dict(color="rgba(107,114,128,.3)", width=1, dash="dot"),
+                             fill="tonexty", fillcolor="rgba(107,114,128,.04)",
+                             showlegend=False, hoverinfo="skip"))
+    step = 20
+    tvs  = list(range(0, len(tail), step))
+    tts  = [str(tail.index[i])[:13] for i in tvs]
+    fig.update_layout(
+        height=280, margin=dict(l=0, r=2, t=8, b=0),
+        paper_bgcolor=C["bg"], plot_bgcolor=C["bg"],
+        xaxis=dict(showgrid=False, zeroline=False, rangeslider=dict(visible=False),
+                   tickvals=tvs, ticktext=tts,
+                   tickfont=dict(size=9, family="JetBrains Mono", color=C["sub"]),
+                   fixedrange=False),
+        yaxis=dict(showgrid=True, gridcolor="#F3F4F6", zeroline=False, side="right",
+                   tickfont=dict(size=9, family="JetBrains Mono", color=C["sub"]),
+                   fixedrange=False),
+        legend=dict(orientation="h", yanchor="top", y=1.06, xanchor="left", x=0,
+                    font=dict(size=9, color=C["sub"]), bgcolor="rgba(0,0,0,0)"),
+        dragmode="pan", font=dict(family="Inter"),
+    )
+    return fig
+
+
+def _old_macd(df: pd.DataFrame, sym_label: str) -> go.Figure:
+    tail = df.tail(80)
+    xs   = list(range(len(tail)))
+    hc   = [C["green"] if v >= 0 else C["red"] for v in tail["macd_hist"]]
+    fig  = go.Figure()
+    fig.add_trace(go.Bar(x=xs, y=tail["macd_hist"], marker_color=hc, showlegend=False, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=xs, y=tail["macd"], line=dict(color=C["blue"], width=1.5), name="MACD"))
+    fig.add_trace(go.Scatter(x=xs, y=tail["macd_signal"], line=dict(color=C["amber"], width=1.5), name="Signal"))
+    fig.update_layout(
+        title=dict(text=f"{sym_label} MACD", font=dict(size=11, color=C["sub"]), x=0),
+        height=150, margin=dict(l=0, r=0, t=26, b=0),
+        paper_bgcolor=C["bg"], plot_bgcolor=C["bg"],
+        xaxis=dict(showgrid=False, showticklabels=False, fixedrange=False),
+        yaxis=dict(showgrid=True, gridcolor="#F3F4F6",
+                   tickfont=dict(size=8, family="JetBrains Mono", color=C["sub"]), fixedrange=False),
+        legend=dict(orientation="h", font=dict(size=9), y=1.2, bgcolor="rgba(0,0,0,0)"),
+        dragmode="pan",
+    )
+    return fig
+
+
+# ── 行情 ─────────────────────────────────────────────────────────────────────
+def _engine(seed: int, bars: int = 300) -> IndicatorEngine:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-01-01", periods=bars, freq="1h")
+    c   = 60000 * np.exp(np.cumsum(rng.normal(0, 0.004, bars)))
+    o   = np.r_[c[0], c[:-1]]
+    w   = np.abs(rng.normal(0, 0.002, (2, bars)))
+    df  = pd.DataFrame({"open": o, "high": np.maximum(o, c) * (1 + w[0]), "low": np.minimum(o, c) * (1 - w[1]),
+                        "close": c, "volume": rng.uniform(1, 100, bars)}, index=idx)
+    return IndicatorEngine.from_frame(df, bars)
+
+
+def _tick(eng: IndicatorEngine, rng) -> None:
+    last = eng.frame().iloc[-1]
+    c    = float(last["close"]) * (1 + rng.normal(0, 0.0005))
+    eng.update_bar(eng.last_ts, last["open"], max(last["high"], c), min(last["low"], c), c, last["volume"] + 1)
+
+
+def _values(v) -> np.ndarray:
+    """plotly JSON 里的数组（list 或 base64 二进制数组）→ float ndarray。"""
+    if isinstance(v, dict):
+        return np.frombuffer(base64.b64decode(v["bdata"]), dtype=v["dtype"]).astype(float)
+    return np.asarray(v, dtype=float)
+
+
+def _emit(fig: go.Figure) -> str:
+    """st.plotly_chart 对传入 Figure 做的服务端工作。"""
+    return plotly.io.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True),
+                             validate=False)
+
+
+class _Wire:
+    """按 Streamlit ForwardMsgCache 的规则统计下发字节数：浏览器已有同哈希的大元素时只发引用。"""
+
+    def __init__(self):
+        self.sent  = set()
+        self.bytes = 0
+
+    def send(self, spec: str) -> None:
+        if ForwardMsg is None:
+            self.bytes += len(spec)
+            return
+        msg = ForwardMsg()
+        msg.delta.new_element.plotly_chart.spec = spec
+        populate_hash_if_needed(msg)
+        if msg.metadata.cacheable and msg.hash in self.sent:
+            msg = create_reference_msg(msg)
+        elif msg.metadata.cacheable:
+            self.sent.add(msg.hash)
+        self.bytes += msg.ByteSize()
+
+
+def _run(name: str, candle, macd, engines: dict, reruns: int, tick: bool) -> tuple:
+    rng, wire, spec_bytes, t = np.random.default_rng(0), _Wire(), 0, 0.0
+    for _ in range(reruns):
+        if tick:
+            for eng in engines.values():
+                _tick(eng, rng)
+        t0 = time.perf_counter()
+        specs = [_emit(f(eng.frame(), s)) for s, eng in engines.items() for f in (candle, macd)]
+        t += time.perf_counter() - t0
+        for spec in specs:
+            wire.send(spec)
+            spec_bytes += len(spec)
+    n = reruns
+    return name, t / n * 1e3, spec_bytes / n / 1024, wire.bytes / n / 1024
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--symbols", type=int, default=4)
+    ap.add_argument("--reruns", type=int, default=100)
+    args = ap.parse_args()
+
+    syms = [f"S{i}/USDT" for i in range(args.symbols)]
+    print(f"{args.symbols} symbols × (candle + MACD) per rerun, {args.reruns} reruns")
+    print(f"{'':22s}{'server ms':>10s}{'spec KB':>10s}{'wire KB':>10s}")
+    for tick in (False, True):
+        factory = ChartFactory(C)
+        rows = [
+            _run("rebuild", _old_candle, _old_macd, {s: _engine(i) for i, s in enumerate(syms)}, args.reruns, tick),
+            _run("factory", factory.candle, factory.macd, {s: _engine(i) for i, s in enumerate(syms)}, args.reruns, tick),
+        ]
+        print("tick" if tick else "unchanged")
+        for name, ms, spec, wire in rows:
+            print(f"  {name:20s}{ms:10.2f}{spec:10.1f}{wire:10.1f}")
+        print(f"  cache hits {factory.hits}, misses {factory.misses}")
+
+    eng, ok = _engine(0), True
+    for old, new in ((_old_candle(eng.frame(), syms[0]), ChartFactory(C).candle(eng.frame(), syms[0])),
+                     (_old_macd(eng.frame(), syms[0]), ChartFactory(C).macd(eng.frame(), syms[0]))):
+        old, new = old.to_dict(), new.to_dict()
+        for o, n in zip(old["data"], new["data"]):
+            for k in ("x", "y", "open", "high", "low", "close"):
+                if k in o:
+                    ok &= np.allclose(_values(o[k]), _values(n[k]), rtol=1e-6, equal_nan=True)
+            ok &= list(o.get("marker", {}).get("color", [])) == list(n.get("marker", {}).get("color", []))
+        ok &= old["layout"]["xaxis"].get("ticktext") == new["layout"]["xaxis"].get("ticktext")
+    print(f"data parity            {'OK' if ok else 'MISMATCH'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
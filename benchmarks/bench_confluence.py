@@ -0,0 +1,92 @@
+"""
+多周期共振基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+N 个交易对逐根推进 15m 行情，对比一次刷新的计算量（不含网络）：
+  per-tf      ─ 多周期合成之前：每个周期各自一个指标引擎吃原生 K 线，只评当前周期（score_strategy）
+  single-tf   ─ 当前实现：Resampler 更新（各周期共用基础序列）+ 取当前周期快照 + score_strategy
+  confluence  ─ 同样的 Resampler 更新 + confluence 直接读各周期引擎最后一行，一次向量化评完全部周期
+并校验共振表里每个周期的评分 / 方向与对该周期单独调用 score_strategy 一致。
+
+用法:
+  python benchmarks/bench_confluence.py --symbols 8 --steps 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_resample import _native, _truth
+from confluence import confluence
+from indicators import IndicatorEngine
+from resample import Resampler
+from strategy import score_strategy
+
+TFS = ["15m", "1h", "4h"]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--symbols", type=int, default=8)
+    ap.add_argument("--steps", type=int, default=300)
+    ap.add_argument("--bars", type=int, default=300)
+    args = ap.parse_args()
+
+    start  = 16 * args.bars + 10
+    truths = {f"S{i}": _truth(start + args.steps, seed=i) for i in range(args.symbols)}
+    single, multi, old = {}, {}, {}
+    for s, t in truths.items():
+        shown  = t.iloc[:start]
+        seeds  = {tf: _native(shown, tf).iloc[-args.bars:] for tf in TFS}
+        single[s] = Resampler.from_frame(shown.iloc[-args.bars:], "15m", TFS, args.bars, seeds=seeds)
+        multi[s]  = Resampler.from_frame(shown.iloc[-args.bars:], "15m", TFS, args.bars, seeds=seeds)
+        old[s]    = IndicatorEngine.from_frame(seeds["1h"], args.bars)
+
+    t_old = t_single = t_new = t_conf = 0.0
+    for i in range(start, start + args.steps):
+        nats = {s: _native(t.iloc[i - 8:i + 1], "1h").iloc[-2:] for s, t in truths.items()}
+        bars = {s: t.iloc[i:i + 1] for s, t in truths.items()}
+        t0 = time.perf_counter()
+        for s in truths:
+            old[s].update_frame(nats[s])
+            score_strategy(old[s].frame())
+        t_old += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for s, r in single.items():
+            r.update_frame(bars[s])
+            score_strategy(r.frame("1h"))
+        t_single += time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for s, r in multi.items():
+            r.update_frame(bars[s])
+        t1 = time.perf_counter()
+        table = confluence({s: {tf: r.engine(tf) for tf in TFS} for s, r in multi.items()})
+        t_new  += time.perf_counter() - t0
+        t_conf += time.perf_counter() - t1
+
+    bad = []
+    for s, r in multi.items():
+        for tf in TFS:
+            ref = score_strategy(r.frame(tf))
+            if ref["score"] != table.loc[s, f"score_{tf}"] or ref["direction"] != table.loc[s, f"direction_{tf}"]:
+                bad.append((s, tf))
+
+    per = lambda t: t / args.steps * 1e3
+    print(f"{args.symbols} symbols, {args.steps} refreshes")
+    print(f"per-tf refresh         {per(t_old):6.2f} ms   (1 timeframe, {args.symbols} score_strategy calls)")
+    print(f"single-tf refresh      {per(t_single):6.2f} ms   (1 timeframe, {args.symbols} score_strategy calls)")
+    print(f"confluence refresh     {per(t_new):6.2f} ms   ({len(TFS)} timeframes, 1 vectorized call)  "
+          f"{t_single / t_new:.2f}x vs single-tf")
+    print(f"  scoring only         single-tf {per(t_single - (t_new - t_conf)):5.2f} ms   "
+          f"confluence {per(t_conf):5.2f} ms")
+    print(table.round(2).to_string())
+    print(f"parity                 {'OK' if not bad else bad}")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
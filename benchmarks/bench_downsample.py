@@ -0,0 +1,89 @@
+"""
+长窗口 K 线图降采样基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+同一张 K 线图（K 线 + EMA9/21/55 + 布林带）分别画最近 120 / 1 万 / 10 万根，对比：
+  full        ─ 不降采样：每根 K 线、每个指标点都下发（ChartFactory(max_candles=∞)）
+  downsample  ─ charts.ChartFactory 默认：K 线按桶合成至多 160 根，指标线 MinMaxLTTB 至多 320 点
+
+服务端耗时 = 构图（每次都是新数据，不命中缓存）+ Streamlit 的 plotly_chart 序列化；
+另外校验降采样后的图：窗口最高价 / 最低价一根不丢，首尾时间一致，指标线首尾点保留；
+并对比 MinMaxLTTB 与完整 LTTB 的耗时、选中点覆盖的数值范围（最差的一条线）。
+
+用法:
+  python benchmarks/bench_downsample.py --reps 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_charts import C, _emit, _values
+from charts import ChartFactory
+from downsample import lttb, minmax_lttb
+from indicators import calc_indicators
+
+
+def _frame(bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2020-01-01", periods=bars, freq="15min")
+    c   = 60000 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    o   = np.r_[c[0], c[:-1]]
+    w   = np.abs(rng.normal(0, 0.001, (2, bars)))
+    df  = pd.DataFrame({"open": o, "high": np.maximum(o, c) * (1 + w[0]), "low": np.minimum(o, c) * (1 - w[1]),
+                        "close": c, "volume": rng.uniform(1, 100, bars)}, index=idx)
+    return calc_indicators(df)
+
+
+def _time(factory: ChartFactory, df: pd.DataFrame, reps: int) -> tuple:
+    t = time.perf_counter()
+    for _ in range(reps):
+        spec = _emit(factory._build_candle(df, "BTC", len(df)))
+    return (time.perf_counter() - t) / reps * 1e3, spec
+
+
+def _check(df: pd.DataFrame, spec: str) -> bool:
+    d  = json.loads(spec)["data"]
+    x  = _values(d[0]["x"])
+    ok = _values(d[0]["high"]).max() == df["high"].max() and _values(d[0]["low"]).min() == df["low"].min()
+    ok &= x[0] == 0 and _values(d[1]["x"])[-1] == len(df) - 1
+    ok &= np.isclose(_values(d[1]["y"])[-1], df["ema9"].iloc[-1], rtol=1e-6)
+    return bool(ok)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--reps", type=int, default=10)
+    args = ap.parse_args()
+
+    full, down, ok = ChartFactory(C, max_candles=10**9), ChartFactory(C), True
+    print(f"{'bars':>8s}{'':12s}{'server ms':>10s}{'spec KB':>10s}{'points':>10s}")
+    for bars in (120, 10_000, 100_000):
+        df = _frame(bars)
+        for name, factory in (("full", full), ("downsample", down)):
+            ms, spec = _time(factory, df, args.reps)
+            pts = sum(len(_values(t["x"])) for t in json.loads(spec)["data"])
+            print(f"{bars:8d}  {name:10s}{ms:10.2f}{len(spec) / 1024:10.1f}{pts:10d}")
+            if name == "downsample":
+                ok &= _check(df, spec)
+
+    # MinMaxLTTB 与完整 LTTB（10 万点 → 320 点）：耗时，以及选中点覆盖的数值范围
+    y = _frame(100_000)[["ema9", "ema21", "ema55", "bb_upper", "bb_lower"]].to_numpy()
+    t = time.perf_counter(); ref = lttb(y, 320); t_ref = time.perf_counter() - t
+    t = time.perf_counter(); mm = minmax_lttb(y, 320); t_mm = time.perf_counter() - t
+    cover = lambda i: np.min((np.nanmax(np.take_along_axis(y, i, 0), 0) - np.nanmin(np.take_along_axis(y, i, 0), 0))
+                             / (np.nanmax(y, 0) - np.nanmin(y, 0)))
+    print(f"lttb {t_ref * 1e3:.1f} ms   minmax_lttb {t_mm * 1e3:.1f} ms   "
+          f"value range kept  lttb {cover(ref):.1%}  minmax_lttb {cover(mm):.1%}")
+    print(f"extremes / endpoints   {'OK' if ok else 'MISMATCH'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+多交易所连接池演练
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+两个本地假交易所（耗时按对数正态分布，带长尾），不联网，对比：
+  single  ─ 只用首选交易所（原实现：慢了干等、挂了等到超时再退回模拟数据）
+  pool    ─ exchange_pool.ExchangePool（健康度路由 + p95 对冲 + 熔断切换）
+
+三段场景依次进行：
+  1. 两边都正常，首选交易所有 tail 比例的请求卡 stall 秒
+  2. 首选交易所整体不可达（每个请求等满 timeout 后报超时）
+  3. 首选交易所恢复，熔断半开探测成功后流量回到它身上
+
+用法:
+  python benchmarks/bench_exchange_pool.py --requests 300 --threads 8
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exchange_pool import ExchangePool
+
+try:
+    from ccxt import RequestTimeout
+except ImportError:
+    RequestTimeout = TimeoutError
+
+
+class FakeVenue:
+    """fetch_ohlcv 接口与 ccxt 一致的假交易所：耗时 = 中位数 × 对数正态，tail 比例的请求额外卡 stall 秒。"""
+
+    def __init__(self, id: str, median: float, tail: float = 0.0, stall: float = 1.0,
+                 timeout: float = 0.8, seed: int = 0):
+        self.id      = id
+        self.median  = median
+        self.tail    = tail
+        self.stall   = stall
+        self.timeout = timeout
+        self.down    = False
+        self.calls   = 0
+        self._rng    = np.random.default_rng(seed)
+        self._lock   = threading.Lock()
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1h", since: int = None, limit: int = None) -> list:
+        with self._lock:
+            self.calls += 1
+            dt = self.median * float(self._rng.lognormal(0, 0.3))
+            if self._rng.random() < self.tail:
+                dt += self.stall
+        if self.down:
+            time.sleep(self.timeout)
+            raise RequestTimeout(f"{self.id} timed out")
+        time.sleep(min(dt, self.timeout))
+        if dt > self.timeout:
+            raise RequestTimeout(f"{self.id} timed out")
+        return [[0, 1.0, 1.0, 1.0, 1.0, 1.0]]
+
+
+def _single(v: FakeVenue):
+    def _call():
+        try:
+            v.fetch_ohlcv("BTC/USDT")
+            return v.id
+        except Exception:
+            return "mock"
+    return _call
+
+
+def _pooled(pool: ExchangePool):
+    def _call():
+        try:
+            return pool.call("fetch_ohlcv", "BTC/USDT")[1]
+        except Exception:
+            return "mock"
+    return _call
+
+
+def _run(call, n: int, threads: int) -> tuple:
+    lat, src = np.empty(n), [None] * n
+
+    def _one(i):
+        t0 = time.perf_counter()
+        src[i] = call()
+        lat[i] = time.perf_counter() - t0
+
+    with ThreadPoolExecutor(threads) as ex:
+        list(ex.map(_one, range(n)))
+    return lat * 1000, src
+
+
+def _report(name: str, lat: np.ndarray, src: list) -> None:
+    share = {s: src.count(s) / len(src) for s in sorted(set(src))}
+    mix   = "  ".join(f"{s} {p:4.0%}" for s, p in share.items())
+    print(f"  {name:7s} p50 {np.percentile(lat, 50):6.0f} ms  p95 {np.percentile(lat, 95):6.0f} ms  "
+          f"p99 {np.percentile(lat, 99):6.0f} ms  max {lat.max():6.0f} ms   {mix}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--requests", type=int, default=300)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--tail", type=float, default=0.02)
+    ap.add_argument("--stall", type=float, default=0.6)
+    args = ap.parse_args()
+
+    a, b = FakeVenue("okx", 0.04, args.tail, args.stall, seed=1), FakeVenue("binance", 0.06, seed=2)
+    pool = ExchangePool([a, b], workers=args.threads * 2, cooldown=0.5)
+
+    print("1. both healthy, okx has a slow tail")
+    _report("single", *_run(_single(a), args.requests, args.threads))
+    _report("pool", *_run(_pooled(pool), args.requests, args.threads))
+    print(f"  hedged {pool.hedged}, hedge won {pool.hedge_wins}")
+
+    print("2. okx unreachable")
+    a.down = True
+    _report("single", *_run(_single(a), args.requests // 3, args.threads))
+    calls = a.calls
+    _report("pool", *_run(_pooled(pool), args.requests, args.threads))
+    print(f"  requests that still reached okx: {a.calls - calls} (breaker {pool.venue('okx').breaker.state})")
+
+    print("3. okx back")
+    a.down = False
+    time.sleep(pool.venue("okx").breaker.cooldown)
+    _report("pool", *_run(_pooled(pool), args.requests, args.threads))
+    print()
+    print(pool.health().round(3).to_string())
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
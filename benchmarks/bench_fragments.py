@@ -0,0 +1,106 @@
+"""
+整页 HTML 渲染基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+不起 Streamlit 服务，直接在裸模式下载入页面脚本（st.* 调用不下发，只走元素构造），逐页计时：
+  cold  ─ 清空全部 Fragment 缓存、共享快照与页面里的 lru_cache（相当于进程刚启动 / 行情全变）
+  warm  ─ 同一份行情连续重跑（REST 缓存未过期时的常态）
+
+每页另报元素个数（每次重跑 Streamlit 都要重发的 markdown / 图表 / 控件数），
+以及单个卡片片段的渲染耗时：Fragment 命中缓存 vs 每次 f-string 拼接。
+
+用法:
+  python benchmarks/bench_fragments.py --reruns 20
+"""
+
+import argparse
+import logging
+import os
+import runpy
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AEGIS_STREAM", "off")
+
+import fragments
+
+
+def _load() -> dict:
+    logging.disable(logging.WARNING)
+    return runpy.run_path(os.path.join(ROOT, "耿天翔deep.py"), run_name="bench")
+
+
+def _pages(g: dict) -> dict:
+    # st.fragment 包装在裸模式下不执行函数体，直接调原函数
+    return {"strategy": lambda: g["_strategy_live"].__wrapped__("1小时", ("BTC", "ETH"), True, "近期"),
+            "screener": lambda: g["_screener_live"].__wrapped__("1小时"),
+            "onchain":  g["render_onchain"],
+            "rebate":   g["render_rebate"],
+            "contact":  g["render_contact"]}
+
+
+def _cold(g: dict) -> None:
+    fragments.clear()
+    g["_get_snapshots"]().clear()
+    for name in ("_signal_matrix", "_whale_table", "_netflow_fig"):
+        g[name].cache_clear()
+
+
+def _time(f, reruns: int, before=None) -> float:
+    t = 0.0
+    for _ in range(reruns):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        f()
+        t += time.perf_counter() - t0
+    return t / reruns * 1e3
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--reruns", type=int, default=20)
+    args = ap.parse_args()
+
+    from streamlit.delta_generator import DeltaGenerator
+    g, n = _load(), [0]
+    enqueue = DeltaGenerator._enqueue
+
+    def _count(self, *a, **k):
+        n[0] += 1
+        return enqueue(self, *a, **k)
+
+    DeltaGenerator._enqueue = _count
+    print(f"{'page':10s}{'cold ms':>10s}{'warm ms':>10s}{'elements':>10s}")
+    for name, f in _pages(g).items():
+        f()                                   # 行情 / 图表缓存先预热，只比 HTML 渲染
+        cold = _time(f, args.reruns, lambda: _cold(g))
+        n[0] = 0
+        warm = _time(f, args.reruns)
+        print(f"{name:10s}{cold:10.2f}{warm:10.2f}{n[0] / args.reruns:10.0f}")
+    s = fragments.stats()
+    print(f"fragments {s['fragments']}, hits {s['hits']}, misses {s['misses']}, cached {s['size']}")
+
+    # 单个卡片（页面里的 _CARD）：Fragment 命中缓存 vs 每次 f-string 拼接
+    C, SHADOW, card = g["C"], g["SHADOW"], g["_CARD"]
+    body = "<p>" + "x" * 400 + "</p>"
+    fstr = lambda: (f'<div style="background:{C["card"]};border-radius:14px;padding:1.1rem 1.2rem;'
+                    f'box-shadow:{SHADOW};border:1px solid {C["border"]};">{body}</div>')
+    reps = 100_000
+    t = time.perf_counter()
+    for _ in range(reps):
+        card(inner=body, extra="")
+    t_frag = time.perf_counter() - t
+    t = time.perf_counter()
+    for _ in range(reps):
+        fstr()
+    t_fstr = time.perf_counter() - t
+    ok = card(inner=body, extra="") == fstr()
+    print(f"card  fragment {t_frag / reps * 1e9:.0f} ns   f-string {t_fstr / reps * 1e9:.0f} ns")
+    print(f"template parity        {'OK' if ok else 'MISMATCH'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+增量指标基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+模拟一条行情逐根推进，每根 K 线先推 revisions 次未收盘修订、再推收盘值，对比：
+  full    ─ 每次更新都用 calc_indicators 整段重算最近 max_bars 根（原实现）
+  engine  ─ indicators.IndicatorEngine.update_bar 增量更新
+
+校验引擎输出与 calc_indicators 在全部指标列上一致（绝对误差 ≤ 1e-9）：
+  · 推进过程中若干个时点（含未收盘修订后，即 _base 回退重算的结果）对比已揭示前缀的整段计算
+  · 总根数是 max_bars 的数倍，2×max_bars 缓冲区写满后搬移（wrap）多次，搬移后紧接着的修订也覆盖到
+  · 早于最后一根的 K 线被忽略，frame() 不变
+
+用法:
+  python benchmarks/bench_indicators.py --bars 2000 --max-bars 300 --revisions 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import INDICATOR_COLS, OHLCV_COLS, IndicatorEngine, calc_indicators
+
+TOL = 1e-9
+
+
+def _truth(bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-01-01", periods=bars, freq="15min")
+    c   = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, bars)))
+    o   = np.r_[c[0], c[:-1]]
+    w   = np.abs(rng.normal(0, 0.002, (2, bars)))
+    # 夹一段横盘（loss 为 0，RSI 为 NaN 的分支）
+    c[40:60] = o[40:60] = c[39]
+    return pd.DataFrame({"open": o, "high": np.maximum(o, c) * (1 + w[0]), "low": np.minimum(o, c) * (1 - w[1]),
+                         "close": c, "volume": rng.uniform(1, 100, bars)}, index=idx)
+
+
+def _partial(bar: np.ndarray, k: int, n: int) -> np.ndarray:
+    """第 k / n 次未收盘修订：高低点只会外扩，收盘在开盘与最终收盘之间。"""
+    o, h, l, c, v = bar
+    f = (k + 1) / (n + 1)
+    x = o + (c - o) * f
+    return np.array([o, max(o, x) + (h - max(o, x)) * f, min(o, x) - (min(o, x) - l) * f, x, v * f])
+
+
+def _diff(eng: IndicatorEngine, ref: pd.DataFrame) -> float:
+    """引擎 frame() 与 ref 最后 len(frame) 行的最大绝对误差；时间戳或 NaN 位置不一致时为 inf。"""
+    got = eng.frame()
+    ref = ref.iloc[-len(got):]
+    if not got.index.equals(ref.index):
+        return float("inf")
+    a, b = got[OHLCV_COLS + INDICATOR_COLS].to_numpy(), ref[OHLCV_COLS + INDICATOR_COLS].to_numpy()
+    if not np.array_equal(np.isnan(a), np.isnan(b)):
+        return float("inf")
+    d = np.abs(a - b)
+    return float(np.nanmax(d)) if d.size else 0.0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--bars", type=int, default=2000)
+    ap.add_argument("--max-bars", type=int, default=300)
+    ap.add_argument("--revisions", type=int, default=3, help="每根 K 线收盘前的修订次数")
+    ap.add_argument("--checks", type=int, default=25, help="推进过程中与整段计算对比的时点数")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    truth = _truth(args.bars, args.seed)
+    ts    = truth.index.as_unit("ns").asi8
+    data  = truth[OHLCV_COLS].to_numpy()
+    mb    = args.max_bars
+    eng   = IndicatorEngine(max_bars=mb)
+    # 对比时点：均匀分布 + 每次缓冲区搬移时追加的那一根（下标 2·mb、3·mb+1、4·mb+2 …）
+    wraps  = list(range(2 * mb, args.bars, mb + 1))
+    checks = set(np.linspace(0, args.bars - 1, args.checks).astype(int)) | set(wraps)
+
+    worst, t_eng, n_upd = 0.0, 0.0, 0
+    for i in range(args.bars):
+        for k in range(args.revisions):
+            t0 = time.perf_counter()
+            eng.update_bar(ts[i], *_partial(data[i], k, args.revisions))
+            t_eng += time.perf_counter() - t0
+            n_upd += 1
+            if i in checks and k == args.revisions - 1:
+                rev = truth.iloc[:i + 1].copy()
+                rev.iloc[-1] = _partial(data[i], k, args.revisions)
+                worst = max(worst, _diff(eng, calc_indicators(rev)))
+        t0 = time.perf_counter()
+        eng.update_bar(ts[i], *data[i])
+        t_eng += time.perf_counter() - t0
+        n_upd += 1
+        if i in checks:
+            worst = max(worst, _diff(eng, calc_indicators(truth.iloc[:i + 1])))
+    ok_par = worst <= TOL
+
+    before = eng.frame()
+    eng.update_bar(ts[-2], *data[-2] * 1.01)
+    ok_old = eng.frame().equals(before) and len(before) == min(mb, args.bars)
+
+    window = truth.iloc[-mb:]
+    t0, reps = time.perf_counter(), 20
+    for _ in range(reps):
+        calc_indicators(window)
+    t_full = (time.perf_counter() - t0) / reps
+
+    print(f"{args.bars} bars × {args.revisions + 1} updates, max_bars {mb}, buffer wraps {len(wraps)}, "
+          f"checkpoints {len(checks)}")
+    print(f"update cost         full {t_full * 1e3:.2f} ms   engine {t_eng / n_upd * 1e6:.1f} µs "
+          f"({t_full / (t_eng / n_upd):,.0f}x)")
+    print(f"engine == calc_indicators        {'OK' if ok_par else 'MISMATCH'}  (max |Δ| {worst:.2e}, tol {TOL:g})")
+    print(f"older bar ignored                {'OK' if ok_old else 'MISMATCH'}")
+    sys.exit(0 if ok_par and ok_old else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+清算价位引擎基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+用 liquidation.SyntheticTradeFeed 生成若干天的成交流（带 OI），对比：
+  rebuild      ─ 每次刷新从头把全部历史灌进新引擎
+  incremental  ─ 引擎常驻，每次刷新只灌上次以来的成交（页面的用法）
+另报冷启动灌入吞吐（按批粒度）、snapshot（任意区间 / 宽度聚合）耗时，并校验：
+  · 无 OI、无衰减时，逐笔 Python 参考实现（dict 记桶、逐档位算清算价）与引擎的分布完全一致
+  · OI 增量守恒：一次 ΔOI 开仓后多单、空单各自新增 ΔOI
+
+用法:
+  python benchmarks/bench_liquidation.py --days 2 --rate 1
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from liquidation import DAY_MS, DEFAULT_TIERS, LiquidationEngine, SyntheticTradeFeed, TradeBatch
+
+NOW = 1_760_000_000_000
+
+
+def _history(days: float, rate: float, batch_ms: int, seed: int = 0) -> tuple:
+    feed = SyntheticTradeFeed(1.0, 0, seed=seed, rate=rate, batch_ms=batch_ms)
+    return feed, feed.history(NOW, int(days * DAY_MS), 60_000.0)
+
+
+def _reference(batches: list, ref: float, bucket: float, mmr: float, open_ratio: float) -> tuple:
+    """逐笔参考实现：与引擎同样的桶、同样的“批内先清算再开仓”，只是不向量化。"""
+    step, origin = ref * bucket, ref * 0.5
+    tiers = {L: w / sum(DEFAULT_TIERS.values()) for L, w in DEFAULT_TIERS.items()}
+    long, short = {}, {}
+    idx = lambda p: math.floor((p - origin) / step)
+    for b in batches:
+        lo, hi = idx(float(b.price.min())), idx(float(b.price.max()))
+        long  = {k: v for k, v in long.items() if k < lo}
+        short = {k: v for k, v in short.items() if k > hi}
+        for p, q, s in zip(b.price.tolist(), b.amount.tolist(), b.side.tolist()):
+            for L, w in tiers.items():
+                if s > 0:
+                    k = idx(p * (1 - 1 / L + mmr)); long[k] = long.get(k, 0.0) + p * q * open_ratio * w
+                else:
+                    k = idx(p * (1 + 1 / L - mmr)); short[k] = short.get(k, 0.0) + p * q * open_ratio * w
+    return long, short, origin
+
+
+def _parity(batches: list) -> bool:
+    eng = LiquidationEngine(60_000.0, half_life=float("inf"))
+    for b in batches:
+        eng.ingest(b._replace(oi=float("nan")))
+    long, short, origin = _reference(batches, 60_000.0, 0.0005, 0.005, 0.3)
+    off = int(round((origin - eng.origin) / eng.step))
+    ok  = True
+    for ref, arr in ((long, eng._long), (short, eng._short)):
+        dense = np.zeros_like(arr)
+        for k, v in ref.items():
+            dense[k + off] += v
+        ok &= np.allclose(dense, arr, rtol=1e-9, atol=1e-6)
+    return bool(ok)
+
+
+def _oi_conservation() -> bool:
+    eng = LiquidationEngine(100.0, half_life=float("inf"))
+    eng.update_oi(1e6, 0)
+    px  = np.array([100.0, 100.2, 99.9, 100.1])
+    eng.ingest(TradeBatch(np.arange(1, 5), px, np.ones(4), np.array([1, -1, 1, -1]), 1.5e6))
+    return bool(np.isclose(eng._long.sum(), 5e5) and np.isclose(eng._short.sum(), 5e5))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--days", type=float, default=2)
+    ap.add_argument("--rate", type=float, default=1.0, help="每秒成交笔数")
+    ap.add_argument("--refreshes", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"{'cold start':24s}{'trades':>10s}{'ms':>10s}{'trades/s':>12s}")
+    for batch_ms in (60_000, 300_000):
+        feed, hist = _history(args.days, args.rate, batch_ms)
+        n   = sum(len(b.ts) for b in hist)
+        eng = LiquidationEngine(60_000.0)
+        t   = time.perf_counter(); eng.ingest_many(hist); dt = time.perf_counter() - t
+        print(f"  batch {batch_ms // 1000:4d}s{'':12s}{n:10d}{dt * 1e3:10.1f}{n / dt:12.0f}")
+
+    # 刷新：每次新增 5 秒成交
+    feed, hist = _history(args.days, args.rate, 300_000)
+    eng = LiquidationEngine(60_000.0)
+    eng.ingest_many(hist)
+    t_inc, t_full, now = 0.0, 0.0, NOW
+    for _ in range(args.refreshes):
+        now += 5_000
+        new = feed.advance(now)
+        t = time.perf_counter(); eng.ingest_many(new); t_inc += time.perf_counter() - t
+        hist += new
+        t = time.perf_counter(); LiquidationEngine(60_000.0).ingest_many(hist); t_full += time.perf_counter() - t
+    t = time.perf_counter()
+    for _ in range(100):
+        eng.snapshot(eng.price * .87, eng.price * 1.13, 600)
+    t_snap = (time.perf_counter() - t) / 100
+    print(f"refresh (5 s of trades)   rebuild {t_full / args.refreshes * 1e3:.1f} ms   "
+          f"incremental {t_inc / args.refreshes * 1e3:.3f} ms   snapshot {t_snap * 1e3:.3f} ms")
+
+    _, small = _history(0.25, 0.5, 60_000, seed=1)
+    ok_ref, ok_oi = _parity(small), _oi_conservation()
+    print(f"reference parity       {'OK' if ok_ref else 'MISMATCH'}")
+    print(f"OI conservation        {'OK' if ok_oi else 'MISMATCH'}")
+    sys.exit(0 if ok_ref and ok_oi else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+参数寻优基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+在模拟 15 分钟 K 线上跑一轮网格搜索，比较单进程与进程池的耗时，
+并给出每个任务实际序列化的字节数（只有参数）与把价格数组随任务下发时的字节数。
+
+用法:
+  python benchmarks/bench_optimizer.py --bars 100000 --workers 8
+"""
+
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_backtest import _synthetic
+from indicators import calc_indicators
+from optimizer import _SHARED_COLS, grid, optimize, walk_forward
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--bars", type=int, default=100_000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--folds", type=int, default=4)
+    args = ap.parse_args()
+
+    df    = calc_indicators(_synthetic(args.bars, 3))
+    cands = grid({"tp1_atr": [1.2, 1.8, 2.4], "sl_atr": [0.8, 1.2, 1.6], "weak_score": [2, 3]})
+    wins  = [w for tr, te in walk_forward(len(df), args.folds) for w in (tr, te)]
+    job   = (cands[0], wins, 96, 4, "market")
+    arrays = {c: df[c].to_numpy() for c in _SHARED_COLS}
+
+    print(f"bars × candidates   {len(df):,} × {len(cands)}  ({args.folds} walk-forward folds)")
+    print(f"job payload         {len(pickle.dumps(job)):,} B  (with arrays: {len(pickle.dumps((job, arrays))):,} B)")
+    t = time.perf_counter()
+    serial = optimize(df, cands, folds=args.folds, workers=1)
+    t1 = time.perf_counter() - t
+    print(f"workers=1           {t1:6.2f} s  ({t1 / len(cands) * 1000:.0f} ms / candidate)")
+    if args.workers > 1:
+        t = time.perf_counter()
+        pooled = optimize(df, cands, folds=args.folds, workers=args.workers)
+        tn = time.perf_counter() - t
+        same = serial.drop(columns="rank").equals(pooled.drop(columns="rank"))
+        print(f"workers={args.workers:<10d} {tn:6.2f} s  ({t1 / tn:.1f}×, identical table: {same})")
+    print(serial.head(5)[["rank", "tp1_atr", "sl_atr", "weak_score", "train_expectancy_r",
+                          "test_expectancy_r", "train_trades", "test_trades"]].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
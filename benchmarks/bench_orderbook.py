@@ -0,0 +1,158 @@
+"""
+L2 盘口更新基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+模拟 OKX books 频道：一份 400 档快照，随后 N 条增量（每条改几档：改量、撤单、新挂单，集中在盘口附近，
+中间价随机游走），价格 / 数量是交易所原始字符串，每条增量带序号与校验和。对比：
+  naive      ─ 每侧一个 dict，每条增量后 sorted() 取前 25 档算校验和
+  orderbook  ─ orderbook.OrderBook：有序键数组 + bisect，增量原地更新
+另报查询耗时（前 100 档累计深度、挂单墙），并校验：
+  · 逐条增量得到的盘口与最终状态的快照完全一致（档位、校验和）
+  · 校验和被篡改、序号断档时抛 BookOutOfSync，之后的增量被拒绝
+
+用法:
+  python benchmarks/bench_orderbook.py --updates 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orderbook import BookOutOfSync, OrderBook
+
+TICK = 0.1
+
+
+def _px(i: int) -> str:
+    return f"{i * TICK:.1f}"
+
+
+def _stream(n: int, seed: int = 0) -> tuple:
+    """快照 + n 条增量，价格以 tick 为单位的整数记录，避免浮点误差；返回 (快照, 增量列表, 最终状态)。"""
+    rng  = np.random.default_rng(seed)
+    mid  = 600_000                                   # 60000.0 / TICK
+    bids = {mid - 1 - i: int(rng.integers(1, 500)) for i in range(400)}
+    asks = {mid + 1 + i: int(rng.integers(1, 500)) for i in range(400)}
+    snap = ([[_px(p), str(q)] for p, q in sorted(bids.items(), reverse=True)],
+            [[_px(p), str(q)] for p, q in sorted(asks.items())])
+    deltas = []
+    for _ in range(n):
+        mid += int(rng.integers(-2, 3))
+        chg  = {}
+        for side, book in (("b", bids), ("a", asks)):
+            for _ in range(int(rng.integers(1, 4))):
+                off = int(rng.geometric(0.15))
+                p   = mid - off if side == "b" else mid + off
+                q   = 0 if (p in book and rng.random() < 0.3) else int(rng.integers(1, 500))
+                if q == 0:
+                    book.pop(p, None)
+                elif (side == "b" and asks and p >= min(asks)) or (side == "a" and bids and p <= max(bids)):
+                    continue                          # 不产生交叉盘口
+                else:
+                    book[p] = q
+                chg.setdefault(side, []).append([_px(p), str(q)])
+        deltas.append((chg.get("b", []), chg.get("a", [])))
+    return snap, deltas, (bids, asks)
+
+
+def _checksum(bids: list, asks: list) -> int:
+    parts = []
+    for i in range(max(len(bids), len(asks))):
+        if i < len(bids):
+            parts.append(bids[i])
+        if i < len(asks):
+            parts.append(asks[i])
+    c = zlib.crc32(":".join(parts).encode())
+    return c - (1 << 32) if c >= 1 << 31 else c
+
+
+def _naive(snap: tuple, deltas: list) -> list:
+    """每侧 dict，每条增量后排序取前 25 档算校验和。"""
+    bids = {float(p): (p, q) for p, q in snap[0]}
+    asks = {float(p): (p, q) for p, q in snap[1]}
+    sums = []
+    for b, a in deltas:
+        for side, levels in ((bids, b), (asks, a)):
+            for p, q in levels:
+                if float(q) == 0:
+                    side.pop(float(p), None)
+                else:
+                    side[float(p)] = (p, q)
+        top_b = [f"{p}:{q}" for p, q in (bids[k] for k in sorted(bids, reverse=True)[:25])]
+        top_a = [f"{p}:{q}" for p, q in (asks[k] for k in sorted(asks)[:25])]
+        sums.append(_checksum(top_b, top_a))
+    return sums
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--updates", type=int, default=20_000)
+    args = ap.parse_args()
+
+    snap, deltas, (fb, fa) = _stream(args.updates)
+    t = time.perf_counter(); sums = _naive(snap, deltas); t_naive = time.perf_counter() - t
+
+    book = OrderBook("BTC/USDT")
+    book.snapshot(*snap, seq=0)
+    t = time.perf_counter()
+    for i, (b, a) in enumerate(deltas):
+        book.delta(b, a, seq=i + 1, prev_seq=i, checksum=sums[i])
+    t_book = time.perf_counter() - t
+
+    plain = OrderBook("BTC/USDT")
+    plain.snapshot(*snap)
+    t = time.perf_counter()
+    for b, a in deltas:
+        plain.delta(b, a)
+    t_plain = time.perf_counter() - t
+
+    n = len(deltas)
+    print(f"{n} deltas, {len(snap[0])} levels per side")
+    print(f"{'':28s}{'us/update':>10s}{'updates/s':>12s}")
+    for name, dt in (("naive (dict + sort)", t_naive), ("orderbook + checksum", t_book), ("orderbook", t_plain)):
+        print(f"  {name:26s}{dt / n * 1e6:10.1f}{n / dt:12.0f}")
+
+    t = time.perf_counter()
+    for _ in range(200):
+        book.cumulative(100)
+    t_cum = (time.perf_counter() - t) / 200
+    t = time.perf_counter()
+    for _ in range(200):
+        book.walls(0.003)
+    t_wall = (time.perf_counter() - t) / 200
+    print(f"cumulative(100) {t_cum * 1e6:.0f} us   walls {t_wall * 1e6:.0f} us")
+
+    # 与最终状态的快照一致
+    ref = OrderBook("BTC/USDT")
+    ref.snapshot([[_px(p), str(q)] for p, q in sorted(fb.items(), reverse=True)],
+                 [[_px(p), str(q)] for p, q in sorted(fa.items())])
+    ok = book.bids.top() == ref.bids.top() and book.asks.top() == ref.asks.top()
+    ok &= book.checksum() == ref.checksum() == sums[-1]
+
+    # 篡改校验和 / 序号断档
+    for kw in (dict(seq=n + 1, prev_seq=n, checksum=sums[-1] + 1), dict(seq=n + 5, prev_seq=n + 3)):
+        bad = OrderBook("BTC/USDT")
+        bad.snapshot(*snap, seq=0)
+        for i, (b, a) in enumerate(deltas[:n - 1]):
+            bad.delta(b, a, seq=i + 1, prev_seq=i)
+        bad.seq = n
+        try:
+            bad.delta(*deltas[-1], **kw)
+            ok = False
+        except BookOutOfSync:
+            try:
+                bad.delta([], [], seq=n + 10, prev_seq=n + 9)
+                ok = False
+            except BookOutOfSync:
+                ok &= not bad.synced
+    print(f"replay == snapshot, out-of-sync detection   {'OK' if ok else 'MISMATCH'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+多周期合成基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+模拟一条 15m 行情逐根推进（每根先推一次未收盘修订，再推收盘值），对比：
+  per-tf     ─ 每个周期各自向交易所拉 K 线、各自一个 IndicatorEngine（原实现）
+  resampler  ─ resample.Resampler：只拉基础周期，高周期本地增量合成
+
+校验最终各周期的 OHLC 与 pandas resample 的结果完全一致（volume 为浮点求和，允许舍入误差），
+指标列与原实现逐根一致；统计交易所请求数、每次更新耗时、切换周期（取 frame）耗时。
+
+用法:
+  python benchmarks/bench_resample.py --steps 2000 --tfs 15m,1h,4h,2h,1d
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import INDICATOR_COLS, OHLCV_COLS, IndicatorEngine
+from resample import Resampler, aggregate
+
+BASE = "15m"
+
+
+def _truth(bars: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2024-01-01 05:00", periods=bars, freq="15min")
+    c   = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, bars)))
+    o   = np.r_[c[0], c[:-1]]
+    w   = np.abs(rng.normal(0, 0.002, (2, bars)))
+    return pd.DataFrame({"open": o, "high": np.maximum(o, c) * (1 + w[0]), "low": np.minimum(o, c) * (1 - w[1]),
+                         "close": c, "volume": rng.uniform(1, 100, bars)}, index=idx)
+
+
+def _native(df: pd.DataFrame, tf: str) -> pd.DataFrame:
+    """交易所原生 K 线：由已揭示的基础 K 线合成（含最后一根未收盘）。"""
+    ts = df.index.as_unit("ms").asi8
+    bts, agg = aggregate(ts, df[OHLCV_COLS].to_numpy(), tf)
+    idx = pd.DatetimeIndex(bts.astype("datetime64[ms]").astype("datetime64[ns]"))
+    return pd.DataFrame(agg, index=idx, columns=OHLCV_COLS)
+
+
+def _pandas(df: pd.DataFrame, tf: str) -> pd.DataFrame:
+    rule = pd.Timedelta(tf.replace("m", "min").replace("d", "D"))
+    return df.resample(rule, origin="epoch", label="left", closed="left").agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}).dropna()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--steps", type=int, default=2000)
+    ap.add_argument("--tfs", default="15m,1h,4h,2h,1d")
+    ap.add_argument("--bars", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    tfs   = args.tfs.split(",")
+    ratio = max(pd.Timedelta(t.replace("m", "min").replace("d", "D")) // pd.Timedelta("15min") for t in tfs)
+    start = ratio * args.bars + 10
+    truth = _truth(start + args.steps, args.seed)
+
+    # 冷启动：两边都用原生 K 线做历史
+    shown  = truth.iloc[:start]
+    seeds  = {tf: _native(shown, tf).iloc[-args.bars:] for tf in tfs}
+    res    = Resampler.from_frame(shown.iloc[-args.bars:], BASE, tfs, args.bars, seeds=seeds)
+    old    = {tf: IndicatorEngine.from_frame(seeds[tf], args.bars) for tf in tfs}
+    req_old, req_new = len(tfs), 1 + len(tfs) - (BASE in tfs)
+
+    t_new = t_old = 0.0
+    for i in range(start, start + args.steps):
+        bar = truth.iloc[i:i + 1]
+        part = bar.copy()
+        part[["high", "low", "close"]] = [[bar["open"].iloc[0] * 1.0005, bar["open"].iloc[0] * 0.9995,
+                                           bar["open"].iloc[0]]]
+        part["volume"] /= 3
+        for upd in (part, bar):   # 未收盘修订，然后收盘
+            shown = pd.concat([truth.iloc[i - ratio * 2:i], upd])
+            t0 = time.perf_counter()
+            res.update_frame(upd)
+            t_new += time.perf_counter() - t0
+            req_new += 1
+            for tf in tfs:
+                nat = _native(shown, tf).iloc[-2:]
+                t0  = time.perf_counter()
+                old[tf].update_frame(nat)
+                t_old += time.perf_counter() - t0
+                req_old += 1
+    updates = 2 * args.steps
+
+    ok = True
+    for tf in tfs:
+        got = res.frame(tf)
+        ref = _pandas(truth.iloc[:start + args.steps], tf).iloc[-len(got):]
+        ohlc = np.array_equal(got[["open", "high", "low", "close"]].to_numpy(), ref[["open", "high", "low", "close"]].to_numpy()) \
+            and got.index.equals(ref.index)
+        vol  = np.allclose(got["volume"].to_numpy(), ref["volume"].to_numpy(), rtol=1e-12)
+        ind  = np.allclose(got[INDICATOR_COLS].to_numpy(), old[tf].frame()[INDICATOR_COLS].to_numpy(),
+                           rtol=1e-9, atol=1e-9, equal_nan=True)
+        ok  &= ohlc and vol and ind
+        print(f"{tf:>4}  bars {len(got):4d}   OHLC vs pandas {'exact' if ohlc else 'MISMATCH'}   "
+              f"volume {'ok' if vol else 'MISMATCH'}   indicators vs per-tf {'ok' if ind else 'MISMATCH'}")
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        for tf in tfs:
+            res.frame(tf)
+    t_switch = (time.perf_counter() - t0) / (1000 * len(tfs))
+    print()
+    print(f"exchange requests   per-tf {req_old:,}   resampler {req_new:,}  ({req_old / req_new:.1f}x fewer)")
+    print(f"update cost         per-tf {t_old / updates * 1e3:.2f} ms   resampler {t_new / updates * 1e3:.2f} ms "
+          f"(all {len(tfs)} timeframes)")
+    print(f"timeframe switch    {t_switch * 1e6:.1f} µs (no network)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+全市场筛选基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+生成 N 个交易对的模拟 K 线（带不同趋势，保证各方向都有样本），比较：
+  loop        ─ 逐个调用 score_strategy（原实现）
+  vectorized  ─ screener.screen（交易对 × 特征矩阵，一次向量化评分）
+并逐个交易对校验评分、方向与全部点位完全一致（不是近似）。
+
+用法:
+  python benchmarks/bench_screener.py --symbols 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import FRAME_COLUMNS, calc_indicators
+from screener import feature_matrix, screen
+from strategy import FEATURE_COLS, score_strategy, score_vectorized
+
+CHECK_COLS = ["score", "price", "entry", "tp1", "tp2", "sl", "rr", "support", "resist",
+              "limit_long_entry", "limit_short_entry"]
+
+
+def _frames(n: int, bars: int, seed: int) -> dict:
+    rng   = np.random.default_rng(seed)
+    idx   = pd.date_range("2024-01-01", periods=bars, freq="1h")
+    drift = rng.normal(0, 0.002, n)
+    out   = {}
+    for i in range(n):
+        closes = rng.uniform(0.05, 50_000) * np.exp(np.cumsum(rng.normal(drift[i], 0.01, bars)))
+        spread = closes * rng.uniform(0.001, 0.006, bars)
+        opens  = np.roll(closes, 1); opens[0] = closes[0]
+        df = pd.DataFrame({"open": opens, "high": closes + spread, "low": closes - spread,
+                           "close": closes, "volume": rng.lognormal(9, 0.4, bars)}, index=idx)
+        # 与 IndicatorEngine.frame() 相同的布局：单块 float64、共用 FRAME_COLUMNS
+        out[f"S{i:04d}"] = pd.DataFrame(calc_indicators(df)[FRAME_COLUMNS].to_numpy(), index=idx, columns=FRAME_COLUMNS)
+    return out
+
+
+def _best(fn, repeat: int) -> tuple[float, object]:
+    best, res = float("inf"), None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        res = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--symbols", type=int, default=500)
+    ap.add_argument("--bars", type=int, default=300)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    frames = _frames(args.symbols, args.bars, args.seed)
+    t_loop, scalar = _best(lambda: {s: score_strategy(df) for s, df in frames.items()}, args.repeat)
+    t_vec,  table  = _best(lambda: screen(frames), args.repeat)
+    _, X = feature_matrix(frames)
+    feat = {c: X[:, i] for i, c in enumerate(FEATURE_COLS)}
+    t_core, _      = _best(lambda: score_vectorized(feat), args.repeat)
+
+    # 逐个交易对对比：NaN 视为相等，其余要求逐位相同
+    mismatch = []
+    for sym, r in table.iterrows():
+        s = scalar[sym]
+        if r["direction"] != s["direction"]:
+            mismatch.append((sym, "direction", r["direction"], s["direction"]))
+        for c in CHECK_COLS:
+            a, b = float(r[c]), float(s[c])
+            if not (a == b or (np.isnan(a) and np.isnan(b))):
+                mismatch.append((sym, c, a, b))
+
+    dirs = table["direction"].value_counts().to_dict()
+    print(f"symbols             {len(table)} × {args.bars} bars")
+    print(f"directions          {dirs}")
+    print(f"loop score_strategy {t_loop * 1000:8.2f} ms")
+    print(f"vectorized screen   {t_vec * 1000:8.2f} ms  ({t_loop / t_vec:.1f}×)")
+    print(f"  of which scoring  {t_core * 1000:8.2f} ms  (rest: last-row extraction + table build)")
+    print(f"parity              {'OK' if not mismatch else f'{len(mismatch)} mismatches'}")
+    for m in mismatch[:10]:
+        print("  ", m)
+    sys.exit(1 if mismatch else 0)
+
+
+if __name__ == "__main__":
+    main()
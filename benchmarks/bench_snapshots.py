@@ -0,0 +1,131 @@
+"""
+共享信号快照基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+裸模式下载入页面脚本，模拟 N 个会话看同一组行情：每轮行情更新一次（清空快照中心），随后 N 个会话各重跑
+一次策略页 / 筛选页的数据部分。对比：
+  per-session  ─ 每个会话重跑前都清空快照，各自算指标评分、拼卡片、出图（共享快照之前的做法）
+  shared       ─ 每轮只有第一个会话重算并发布，其余会话读同一版本
+另报行情没变时单个会话的重跑耗时（只剩输出元素），并校验：
+  · 快照里的卡片 HTML 与直接调用 _coin_parts 得到的逐字相同
+  · 并发 refresh 同一主题、同一输入时 build 只执行一次，所有线程拿到同一版本
+  · 快照只读：改 data 抛 TypeError，改其中的 ndarray 抛 ValueError
+
+用法:
+  python benchmarks/bench_snapshots.py --sessions 20 --rounds 5
+"""
+
+import argparse
+import logging
+import os
+import runpy
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AEGIS_STREAM", "off")
+os.environ.setdefault("AEGIS_ALERTS", "off")
+
+from snapshots import SnapshotHub
+
+SYMBOLS = ("BTC", "ETH")
+
+
+def _load() -> dict:
+    logging.disable(logging.WARNING)
+    return runpy.run_path(os.path.join(ROOT, "耿天翔deep.py"), run_name="bench")
+
+
+def _rounds(page, hub: SnapshotHub, sessions: int, rounds: int, shared: bool) -> float:
+    t = 0.0
+    for _ in range(rounds):
+        hub.clear()
+        for _ in range(sessions):
+            if not shared:
+                hub.clear()
+            t0 = time.perf_counter()
+            page()
+            t += time.perf_counter() - t0
+    return t / rounds * 1e3
+
+
+def _parity(g: dict) -> bool:
+    dfs, tks = g["get_market_snapshot"](list(SYMBOLS), "1小时")
+    books    = g["get_order_books"](list(SYMBOLS), tks)
+    ok = True
+    for sym in SYMBOLS:
+        snap = g["_coin_snapshot"](sym, "1小时", 120, dfs[sym], tks[sym], books[sym])
+        s    = g["with_walls"](g["score_strategy"](dfs[sym]), *books[sym].sr_walls(g["DEPTH_WALL_RANGE"]))
+        ref  = g["_coin_parts"](sym, dfs[sym], s, tks[sym], "1小时", None, dfs[sym], 120, books[sym])
+        ok  &= all(snap.data[k] == ref[k] for k in ("header", "matrix", "market", "limit"))
+    return bool(ok)
+
+
+def _single_flight(threads: int = 8) -> bool:
+    hub, calls, out = SnapshotHub(), [0], []
+
+    def build():
+        calls[0] += 1
+        time.sleep(0.05)
+        return {"x": np.arange(3)}
+
+    ts = [threading.Thread(target=lambda: out.append(hub.refresh("t", ("in",), build))) for _ in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return calls[0] == 1 and len({s.version for s in out}) == 1
+
+
+def _immutable() -> bool:
+    snap = SnapshotHub().publish("t", {"x": np.arange(3)})
+    try:
+        snap.data["y"] = 1
+        return False
+    except TypeError:
+        pass
+    try:
+        snap.data["x"][0] = 1
+        return False
+    except ValueError:
+        return True
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--sessions", type=int, default=20)
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    g   = _load()
+    hub = g["_get_snapshots"]()
+    # st.fragment 包装在裸模式下不执行函数体，直接调原函数
+    pages = {"strategy": lambda: g["_strategy_live"].__wrapped__("1小时", SYMBOLS, True, "近期"),
+             "screener": lambda: g["_screener_live"].__wrapped__("1小时")}
+    print(f"{args.sessions} sessions per data update")
+    print(f"{'page':10s}{'per-session ms':>16s}{'shared ms':>12s}{'unchanged rerun ms':>20s}")
+    for name, page in pages.items():
+        page()                                # 行情 / 图表缓存先预热
+        solo = _rounds(page, hub, args.sessions, args.rounds, shared=False)
+        b0   = hub.builds
+        both = _rounds(page, hub, args.sessions, args.rounds, shared=True)
+        t    = time.perf_counter()
+        for _ in range(args.sessions):
+            page()
+        rerun = (time.perf_counter() - t) / args.sessions * 1e3
+        print(f"{name:10s}{solo:16.1f}{both:12.1f}{rerun:20.2f}   builds/update {(hub.builds - b0) / args.rounds:.0f}")
+    s = hub.stats()
+    print(f"snapshot hub: topics {s['topics']}, builds {s['builds']}, hits {s['hits']}")
+
+    ok_par, ok_sf, ok_ro = _parity(g), _single_flight(), _immutable()
+    print(f"snapshot == direct render    {'OK' if ok_par else 'MISMATCH'}")
+    print(f"single-flight build          {'OK' if ok_sf else 'MISMATCH'}")
+    print(f"read-only snapshot           {'OK' if ok_ro else 'MISMATCH'}")
+    sys.exit(0 if ok_par and ok_sf and ok_ro else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+热路径基准套件
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+离线可跑（行情取自 synthetic.SyntheticMarket，固定种子与起点，每次结果相同），把一次刷新拆成几段分别计时，
+定位回归出在哪一段：
+  fetch       ─ 取 K 线（离线时即 _fetch_ohlcv 失败后的模拟数据源：合成行情出 K 线）
+  indicators  ─ calc_indicators 整段计算
+  incremental ─ IndicatorEngine.update_bar 修订最后一根（推送行情每个 tick 的成本）
+  score       ─ score_strategy 单币评分 / screen 整池向量化评分
+  candle_fig  ─ ChartFactory 构建 K 线图（绕过成品图缓存）
+  html        ─ 单币区块 _coin_parts / 筛选页 _screener_parts 的 HTML 拼接（图表命中缓存）
+
+两组规模：单币 K 线根数（默认 300 / 10k / 1M）与 300 根下的交易对数（默认 2 / 50 / 500）。
+每段报中位数 / 最小耗时，另用 tracemalloc 单独跑一遍记内存峰值（计时那几遍不开追踪）。
+
+基线：--save 把结果连同环境信息写入 JSON；--compare 读基线逐项对比，最小耗时或内存峰值超过
+基线 (1 + threshold) 倍、且绝对差超过噪声下限的标为 REGRESSION，有回归时退出码为 1。
+基线只在同一台机器、同一环境下有可比性（环境不同时报告里会提示）。
+
+用法:
+  python benchmarks/bench_suite.py --quick
+  python benchmarks/bench_suite.py --save
+  python benchmarks/bench_suite.py --compare --threshold 0.25
+  python benchmarks/bench_suite.py --bars 300,10000 --symbols 2,50 --only indicators,score
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import runpy
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AEGIS_STREAM", "off")
+os.environ.setdefault("AEGIS_ALERTS", "off")
+os.environ.setdefault("AEGIS_CANDLE_DIR", "")
+
+from charts import ChartFactory
+from indicators import IndicatorEngine, calc_indicators
+from screener import screen
+from strategy import score_strategy
+from symbols import SymbolRegistry
+from synthetic import SyntheticMarket
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "suite.json")
+START    = 1_735_689_600_000      # 2025-01-01 UTC，合成行情起点
+STEP     = 15 * 60_000
+TF       = "15m"
+STAGES   = ("fetch", "indicators", "incremental", "score", "candle_fig", "html")
+BARS     = (300, 10_000, 1_000_000)
+SYMBOLS  = (2, 50, 500)
+QUICK    = {"bars": (300, 10_000), "symbols": (2, 50)}
+
+
+def _load() -> dict:
+    logging.disable(logging.WARNING)
+    return runpy.run_path(os.path.join(ROOT, "耿天翔deep.py"), run_name="bench")
+
+
+def _market(n: int) -> SyntheticMarket:
+    """前 n 个交易对（演示币池在前，不够时补 S000…）的合成行情，推进到起点后 400 步。"""
+    reg  = SymbolRegistry.demo()
+    syms = (reg.bases + [f"S{i:03d}" for i in range(n)])[:n]
+    mk   = SyntheticMarket(syms, [reg.ref_price(s) for s in syms], START, step_ms=STEP, seed=1)
+    mk.advance(START + 400 * STEP + 7 * 60_000)
+    return mk
+
+
+# ── 计时 / 内存 ─────────────────────────────────────────────────────────────
+def _time(fn, min_time: float, min_runs: int = 3, max_runs: int = 200) -> tuple:
+    """(中位数 ms, 最小 ms, 次数)；先预热一次，之后至少 min_runs 次、累计至少 min_time 秒。"""
+    fn()
+    gc.collect()
+    runs, end = [], time.perf_counter() + min_time
+    while len(runs) < min_runs or (time.perf_counter() < end and len(runs) < max_runs):
+        t = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t)
+    return float(np.median(runs)) * 1e3, min(runs) * 1e3, len(runs)
+
+
+def _peak(fn) -> float:
+    """fn 执行期间 Python 堆（含 NumPy 缓冲区）的峰值增量，KB。"""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (peak - base) / 1024
+
+
+# ── 各段 ─────────────────────────────────────────────────────────────────────
+def _bar_stages(g: dict, mk: SyntheticMarket, n: int) -> dict:
+    sym = mk.symbols[0]
+    df  = mk.candles(sym, TF, n)                 # 预热：起点之前的回补只算一次
+    ind = calc_indicators(df)
+    s   = score_strategy(ind)
+    eng = IndicatorEngine.from_frame(df.iloc[-300:])   # 增量状态与历史长度无关，窗口取默认 300 根
+    ts, (o, h, l, c, v) = eng.last_ts, eng.last()[:5]
+    cf  = ChartFactory(g["C"])
+    tk  = {"last": float(ind["close"].iloc[-1])}
+    k   = iter(range(1 << 30))
+    return {
+        "fetch":       lambda: mk.candles(sym, TF, n),
+        "indicators":  lambda: calc_indicators(df),
+        "incremental": lambda: eng.update_bar(ts, o, h, l, c * (1 + 1e-6 * (next(k) % 7)), v),
+        "score":       lambda: score_strategy(ind),
+        "candle_fig":  lambda: cf._build_candle(ind, sym, n),
+        "html":        lambda: g["_coin_parts"](sym, ind, s, tk, "15分钟"),
+    }
+
+
+def _symbol_stages(g: dict, mk: SyntheticMarket, n: int) -> dict:
+    syms = mk.symbols[:n]
+    dfs  = {s: mk.candles(s, TF, 300) for s in syms}
+    inds = {s: calc_indicators(df) for s, df in dfs.items()}
+    return {
+        "fetch":      lambda: [mk.candles(s, TF, 300) for s in syms],
+        "indicators": lambda: [calc_indicators(df) for df in dfs.values()],
+        "score":      lambda: screen(inds),
+        "html":       lambda: g["_screener_parts"](inds, "15分钟"),
+    }
+
+
+def run(scales: dict, only: set, min_time: float) -> dict:
+    g, out = _load(), {}
+    mk     = _market(max(scales["symbols"] + (2,)))
+    groups = [(f"bars={n}", _bar_stages(g, mk, n)) for n in scales["bars"]]
+    groups += [(f"symbols={n}", _symbol_stages(g, mk, n)) for n in scales["symbols"]]
+    for scale, stages in groups:
+        for name, fn in stages.items():
+            if only and name not in only:
+                continue
+            med, best, runs = _time(fn, min_time)
+            out[f"{scale}/{name}"] = {"ms": round(med, 4), "min_ms": round(best, 4), "runs": runs,
+                                      "peak_kb": round(_peak(fn), 1)}
+            print(f"  {scale:16s}{name:13s}{med:11.3f}{best:11.3f}{runs:6d}{out[f'{scale}/{name}']['peak_kb']:12,.0f}",
+                  flush=True)
+    return out
+
+
+def _env() -> dict:
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "system": platform.system(), "cpus": os.cpu_count(),
+            "processor": platform.processor() or platform.machine()}
+
+
+# ── 基线 ─────────────────────────────────────────────────────────────────────
+def save(results: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"env": _env(), "saved_at": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results},
+                  f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: dict, path: str, threshold: float, floor_ms: float, floor_kb: float) -> int:
+    """逐项对比，打印报告，返回回归项数。耗时按最小值比（中位数受机器上其他负载影响大），内存按峰值比。"""
+    with open(path, encoding="utf-8") as f:
+        base = json.load(f)
+    if base.get("env") != _env():
+        print(f"note: baseline env differs ({base.get('env')}) — timings may not be comparable")
+    print(f"\nvs baseline {os.path.relpath(path, ROOT)} ({base.get('saved_at', '?')}), threshold +{threshold:.0%}")
+    print(f"  {'stage':29s}{'base ms':>10s}{'now ms':>10s}{'ratio':>8s}{'base KB':>11s}{'now KB':>11s}")
+    bad = 0
+    for key, r in results.items():
+        b = base["results"].get(key)
+        if b is None:
+            print(f"  {key:29s}{'':10s}{r['min_ms']:10.3f}{'':8s}{'':11s}{r['peak_kb']:11,.0f}  new")
+            continue
+        ratio = r["min_ms"] / b["min_ms"] if b["min_ms"] else float("inf")
+        slow  = ratio > 1 + threshold and r["min_ms"] - b["min_ms"] > floor_ms
+        fat   = r["peak_kb"] > b["peak_kb"] * (1 + threshold) and r["peak_kb"] - b["peak_kb"] > floor_kb
+        fast  = ratio < 1 / (1 + threshold) and b["min_ms"] - r["min_ms"] > floor_ms
+        flag  = ("REGRESSION" + (" (time)" if not fat else " (memory)" if not slow else "") if slow or fat
+                 else "improved" if fast else "")
+        bad  += bool(slow or fat)
+        print(f"  {key:29s}{b['min_ms']:10.3f}{r['min_ms']:10.3f}{ratio:8.2f}{b['peak_kb']:11,.0f}{r['peak_kb']:11,.0f}  {flag}")
+    gone = len(set(base["results"]) - set(results))
+    if gone:
+        print(f"  ({gone} baseline entries not run this time)")
+    return bad
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--bars", default=None, help="单币 K 线根数，逗号分隔（默认 300,10000,1000000）")
+    ap.add_argument("--symbols", default=None, help="交易对数，逗号分隔（默认 2,50,500）")
+    ap.add_argument("--quick", action="store_true", help="跳过 1M 根与 500 个交易对两档")
+    ap.add_argument("--only", default="", help=f"只跑这些段，逗号分隔（{','.join(STAGES)}）")
+    ap.add_argument("--min-time", type=float, default=0.3, help="每段至少累计计时的秒数")
+    ap.add_argument("--save", nargs="?", const=BASELINE, default=None, help="把结果写为基线")
+    ap.add_argument("--compare", nargs="?", const=BASELINE, default=None, help="与基线对比")
+    ap.add_argument("--threshold", type=float, default=0.25, help="超过基线多少比例算回归")
+    ap.add_argument("--floor-ms", type=float, default=0.05, help="耗时差的噪声下限")
+    ap.add_argument("--floor-kb", type=float, default=256, help="内存峰值差的噪声下限")
+    args = ap.parse_args()
+
+    ints   = lambda s: tuple(int(float(x)) for x in s.split(",") if x)
+    scales = QUICK if args.quick else {"bars": BARS, "symbols": SYMBOLS}
+    scales = {"bars": ints(args.bars) if args.bars is not None else scales["bars"],
+              "symbols": ints(args.symbols) if args.symbols is not None else scales["symbols"]}
+    only   = {x for x in args.only.split(",") if x}
+    if only - set(STAGES):
+        ap.error(f"unknown stage(s): {', '.join(sorted(only - set(STAGES)))}")
+
+    print(f"python {platform.python_version()}, numpy {np.__version__}, pandas {pd.__version__}, {os.cpu_count()} CPU")
+    print(f"  {'scale':16s}{'stage':13s}{'median ms':>11s}{'min ms':>11s}{'runs':>6s}{'peak KB':>12s}")
+    results = run(scales, only, args.min_time)
+    print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MB")
+
+    bad = compare(results, args.compare, args.threshold, args.floor_ms, args.floor_kb) if args.compare else 0
+    if args.save:
+        save(results, args.save)
+        print(f"baseline saved to {os.path.relpath(args.save, ROOT)}")
+    if args.compare:
+        print(f"{bad} regression(s)" if bad else "no regressions")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+合成行情基准
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+synthetic.SyntheticMarket 整批生成的吞吐：m 个交易对 × n 步，分别按每步 sub 个子步（带逐笔）与只出 K 线
+（sub=1）报 bars/s、ticks/s；另报按墙钟推进后取 300 根 4h K 线（含起点之前的回补）的耗时。并校验：
+  · 确定性：同一种子分几批、每批多少步生成，结果逐位相同
+  · 连续性：墙钟前进后，之前取到的已收盘 K 线不变，未收盘的一根只会“长”（高点不降、低点不升）
+  · 回补接缝：起点之前回补的最后一根收盘 = 起点之后第一根开盘
+  · 周期合成：直接取 4h 与由 15m 聚合得到的 4h 一致
+  · 相关性：关掉跳跃与波动率切换后，收益相关矩阵与目标（单因子 β_i·β_j / 给定矩阵）的偏差
+  · 盘口：同一子步内确定，买卖价围绕当前价、每侧有挂单墙
+
+用法:
+  python benchmarks/bench_synthetic.py --symbols 200 --steps 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resample import aggregate
+from synthetic import SyntheticMarket
+
+START = 1_735_689_600_000      # 2025-01-01 UTC
+HOUR  = 3_600_000
+
+
+def _betas(m: int) -> np.ndarray:
+    return np.random.default_rng(7).uniform(0.3, 0.9, m)
+
+
+def _market(m: int, **kw) -> SyntheticMarket:
+    prices = np.random.default_rng(8).uniform(1, 1e4, m)
+    return SyntheticMarket([f"S{i:03d}" for i in range(m)], prices, START, beta=_betas(m), **kw)
+
+
+def _throughput(m: int, steps: int, sub: int) -> tuple:
+    mk = _market(m, sub=sub)
+    mk.generate(256)                                   # 预热
+    t  = time.perf_counter()
+    b  = mk.generate(steps)
+    dt = time.perf_counter() - t
+    return steps * m / dt, b.ticks.size / dt
+
+
+def _deterministic(m: int) -> bool:
+    a, b = _market(m, seed=3), _market(m, seed=3)
+    one  = a.generate(3000)
+    many = [b.generate(k) for k in (1, 255, 256, 700, 1788)]
+    return (all(np.array_equal(getattr(one, f), np.concatenate([getattr(p, f) for p in many]))
+                for f in ("ts", "open", "high", "low", "close", "volume", "tick_ts", "ticks")))
+
+
+def _continuous(m: int) -> bool:
+    mk, ok, now = _market(m), True, START + 3 * HOUR
+    mk.advance(now)
+    prev = {s: mk.candles(s, "15m", 50) for s in mk.symbols[:5]}
+    for _ in range(40):
+        now += 7 * 60_000
+        mk.advance(now)
+        for s, a in prev.items():
+            b  = mk.candles(s, "15m", 50)
+            c  = a.index.intersection(b.index)
+            ok &= np.array_equal(a.loc[c[:-1]].values, b.loc[c[:-1]].values)
+            if c[-1] == a.index[-1]:
+                x, y = a.loc[c[-1]], b.loc[c[-1]]
+                ok &= x["open"] == y["open"] and y["high"] >= x["high"] and y["low"] <= x["low"] and y["volume"] >= x["volume"]
+            prev[s] = b
+    return bool(ok)
+
+
+def _seam_and_tf(m: int) -> tuple:
+    mk = _market(m)
+    mk.advance(START + 5 * HOUR + 7 * 60_000)
+    ok_seam, ok_tf = True, True
+    for s in mk.symbols[:5]:
+        df = mk.candles(s, "15m", 2000)
+        at = df.index.get_loc(df.index[df.index.asi8 // 1_000_000 == START][0])
+        ok_seam &= np.isclose(df["close"].iloc[at - 1], df["open"].iloc[at], rtol=1e-12)
+        ok_seam &= np.allclose(df["open"].values[1:], df["close"].values[:-1], rtol=1e-12)
+        h4 = mk.candles(s, "4h", 60)
+        ts = df.index.asi8 // 1_000_000
+        bts, agg = aggregate(ts, df[["open", "high", "low", "close", "volume"]].values, "4h", drop_partial=True)
+        keep = np.isin(bts, h4.index.asi8 // 1_000_000)
+        ok_tf &= np.allclose(agg[keep], h4.values[-keep.sum():], rtol=1e-9)
+    return bool(ok_seam), bool(ok_tf)
+
+
+def _correlation(m: int, steps: int) -> tuple:
+    calm = dict(jumps=(0, 0), regimes=(1, 1, 72, 12), sub=1)
+    mk   = _market(m, **calm)
+    r    = np.diff(np.log(mk.generate(steps).close), axis=0)
+    tgt  = np.outer(_betas(m), _betas(m))
+    np.fill_diagonal(tgt, 1)
+    err1 = np.abs(np.corrcoef(r.T) - tgt).max()
+    q    = np.random.default_rng(1).normal(size=(m, m + 2))
+    cov  = q @ q.T
+    corr = cov / np.sqrt(np.outer(np.diag(cov), np.diag(cov)))
+    mk   = _market(m, corr=corr, **calm)
+    r    = np.diff(np.log(mk.generate(steps).close), axis=0)
+    err2 = np.abs(np.corrcoef(r.T) - corr).max()
+    return err1, err2
+
+
+def _books(m: int) -> bool:
+    mk = _market(m)
+    mk.advance(START + HOUR + 90_000)
+    a, b = mk.book_arrays(50), mk.book_arrays(50)
+    mid  = np.array([mk.price(s) for s in mk.symbols])
+    bp, bs, ap, az = a
+    ob   = mk.order_book(mk.symbols[0], 50)
+    ok   = all(np.array_equal(x, y) for x, y in zip(a, b))
+    ok  &= bool((bp[:, 0] < mid).all() and (ap[:, 0] > mid).all())
+    ok  &= bool(((bs / np.median(bs, axis=1, keepdims=True)) > 4).sum(1).min() >= 1)
+    ok  &= ob.mid is not None and abs(ob.mid / mid[0] - 1) < 1e-9
+    mk.advance(START + HOUR + 150_000)
+    ok  &= not np.array_equal(mk.book_arrays(50)[1], bs)
+    return bool(ok)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--symbols", type=int, default=200)
+    ap.add_argument("--steps", type=int, default=20000)
+    ap.add_argument("--sub", type=int, default=15, help="每个基础步的子步数（逐笔分辨率）")
+    args = ap.parse_args()
+
+    print(f"{args.symbols} symbols × {args.steps} steps")
+    print(f"{'':22s}{'bars/s':>14s}{'ticks/s':>14s}")
+    for name, sub in ((f"with ticks (sub={args.sub})", args.sub), ("bars only (sub=1)", 1)):
+        bars, ticks = _throughput(args.symbols, args.steps, sub)
+        print(f"  {name:20s}{bars:14,.0f}{ticks:14,.0f}")
+    mk = _market(args.symbols)
+    t  = time.perf_counter()
+    mk.advance(START + 86_400_000)
+    for s in mk.symbols[:20]:
+        mk.candles(s, "4h", 300)
+    cold = (time.perf_counter() - t) / 20 * 1e3
+    t  = time.perf_counter()
+    for s in mk.symbols[:20]:
+        mk.candles(s, "4h", 300)
+    warm = (time.perf_counter() - t) / 20 * 1e3
+    print(f"  300 × 4h candles per symbol: cold {cold:.2f} ms (incl. backfill), warm {warm:.2f} ms")
+
+    m = min(args.symbols, 20)
+    ok_det, ok_con = _deterministic(m), _continuous(m)
+    ok_seam, ok_tf = _seam_and_tf(m)
+    err1, err2     = _correlation(min(args.symbols, 12), 40000)
+    ok_cor         = err1 < 0.05 and err2 < 0.05
+    ok_book        = _books(m)
+    print(f"deterministic across batching    {'OK' if ok_det else 'MISMATCH'}")
+    print(f"closed bars never rewritten      {'OK' if ok_con else 'MISMATCH'}")
+    print(f"backfill seam continuous         {'OK' if ok_seam else 'MISMATCH'}")
+    print(f"4h == aggregated 15m             {'OK' if ok_tf else 'MISMATCH'}")
+    print(f"correlation vs target            {'OK' if ok_cor else 'MISMATCH'}  (max |Δρ| factor {err1:.3f}, matrix {err2:.3f})")
+    print(f"order books                      {'OK' if ok_book else 'MISMATCH'}")
+    sys.exit(0 if ok_det and ok_con and ok_seam and ok_tf and ok_cor and ok_book else 1)
+
+
+if __name__ == "__main__":
+    main()
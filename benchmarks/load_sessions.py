@@ -0,0 +1,183 @@
+"""
+并发会话压测
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+启动一个无头 Streamlit 服务，用 N 个 WebSocket 客户端模拟已登录用户停留在核心策略页，
+统计服务进程的线程数与 CPU 占用，衡量每个在线会话的服务端成本。
+
+客户端行为与浏览器一致：收到 auto_rerun（st.fragment 定时刷新）时按间隔发送片段重跑请求；
+服务端自己 st.rerun() 的循环则无需客户端参与。
+
+仅支持 Linux（读取 /proc）。依赖 websockets（随 streamlit 安装）。
+
+用法:
+  python benchmarks/load_sessions.py --sessions 20 --duration 30
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP  = os.path.join(ROOT, "耿天翔deep.py")
+UID  = "20061008"
+CLK  = os.sysconf("SC_CLK_TCK")
+
+
+def _proc_stats(pid: int) -> tuple[int, float]:
+    """(线程数, 累计 CPU 秒)"""
+    with open(f"/proc/{pid}/status") as f:
+        threads = next(int(l.split()[1]) for l in f if l.startswith("Threads:"))
+    with open(f"/proc/{pid}/stat") as f:
+        parts = f.read().rsplit(")", 1)[1].split()
+    return threads, (int(parts[11]) + int(parts[12])) / CLK
+
+
+def _rerun(widget_states=(), fragment_id: str = "", auto: bool = False) -> bytes:
+    msg = BackMsg()
+    cs  = msg.rerun_script
+    cs.query_string = ""
+    cs.page_script_hash = ""
+    cs.fragment_id = fragment_id
+    cs.is_auto_rerun = auto
+    for ws in widget_states:
+        w = cs.widget_states.widgets.add()
+        w.id = ws["id"]
+        if "string_value" in ws:
+            w.string_value = ws["string_value"]
+        if "trigger_value" in ws:
+            w.trigger_value = ws["trigger_value"]
+    return msg.SerializeToString()
+
+
+class Session:
+    def __init__(self, url: str):
+        self.url       = url
+        self.runs      = 0
+        self.authed    = False
+        self.timers: dict = {}
+        self._widgets  = {}
+
+    async def run(self, stop: asyncio.Event) -> None:
+        async with websockets.connect(self.url, subprotocols=["streamlit"], max_size=None) as ws:
+            await ws.send(_rerun())
+            recv = asyncio.ensure_future(self._recv(ws))
+            await stop.wait()
+            recv.cancel()
+            for t in self.timers.values():
+                t.cancel()
+
+    async def _recv(self, ws) -> None:
+        async for raw in ws:
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                el = msg.delta.new_element
+                ek = el.WhichOneof("type")
+                if ek in ("text_input", "button"):
+                    wid = getattr(el, ek).id
+                    if wid.endswith("uid_input") or wid.endswith("btn_uid"):
+                        self._widgets[ek] = wid
+            elif kind == "script_finished":
+                self.runs += 1
+                if not self.authed and len(self._widgets) == 2:
+                    self.authed = True
+                    await ws.send(_rerun([
+                        {"id": self._widgets["text_input"], "string_value": UID},
+                        {"id": self._widgets["button"], "trigger_value": True},
+                    ]))
+            elif kind == "auto_rerun":
+                fid = msg.auto_rerun.fragment_id
+                if fid not in self.timers:
+                    self.timers[fid] = asyncio.ensure_future(self._tick(ws, fid, msg.auto_rerun.interval))
+
+    async def _tick(self, ws, fid: str, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await ws.send(_rerun(fragment_id=fid, auto=True))
+
+
+async def _drive(port: int, n: int, duration: float, pid: int) -> dict:
+    url  = f"ws://127.0.0.1:{port}/_stcore/stream"
+    stop = asyncio.Event()
+    base_threads, _ = _proc_stats(pid)
+    sessions = [Session(url) for _ in range(n)]
+    tasks    = [asyncio.ensure_future(s.run(stop)) for s in sessions]
+    # 预热：等全部会话登录并完成首轮渲染
+    t0 = time.time()
+    while time.time() - t0 < 60 and sum(s.authed and s.runs >= 2 for s in sessions) < n:
+        await asyncio.sleep(0.5)
+    await asyncio.sleep(2)
+    threads0, cpu0 = _proc_stats(pid)
+    runs0 = sum(s.runs for s in sessions)
+    peak, samples = threads0, []
+    t1 = time.time()
+    while time.time() - t1 < duration:
+        await asyncio.sleep(0.5)
+        samples.append(_proc_stats(pid)[0])
+        peak = max(peak, samples[-1])
+    threads1, cpu1 = _proc_stats(pid)
+    elapsed = time.time() - t1
+    runs1 = sum(s.runs for s in sessions)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        "sessions": n,
+        "logged_in": sum(s.authed for s in sessions),
+        "base_threads": base_threads,
+        "threads": threads1,
+        "peak_threads": peak,
+        "avg_threads": sum(samples) / len(samples),
+        "threads_per_session": (sum(samples) / len(samples) - base_threads) / n,
+        "cpu_s": cpu1 - cpu0,
+        "cpu_pct": (cpu1 - cpu0) / elapsed * 100,
+        "cpu_ms_per_session_s": (cpu1 - cpu0) / elapsed / n * 1000,
+        "script_runs": runs1 - runs0,
+        "window_s": elapsed,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--sessions", type=int, default=20)
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--port", type=int, default=8599)
+    ap.add_argument("--app", default=APP, help="被测脚本，默认主程序")
+    args = ap.parse_args()
+
+    env = dict(os.environ, AEGIS_STREAM="off")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", args.app, "--server.headless", "true",
+         "--server.port", str(args.port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(120):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{args.port}/_stcore/health", timeout=1)
+                break
+            except Exception:
+                time.sleep(0.5)
+        r = asyncio.run(_drive(args.port, args.sessions, args.duration, proc.pid))
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+    print(f"sessions            {r['sessions']} (logged in {r['logged_in']})")
+    print(f"threads             base {r['base_threads']}  avg {r['avg_threads']:.1f}  peak {r['peak_threads']}")
+    print(f"threads / session   {r['threads_per_session']:.2f} (time-averaged, above base)")
+    print(f"cpu                 {r['cpu_s']:.2f}s over {r['window_s']:.0f}s ({r['cpu_pct']:.1f}% of one core)")
+    print(f"cpu / session       {r['cpu_ms_per_session_s']:.1f} ms per second")
+    print(f"script runs         {r['script_runs']}")
+
+
+if __name__ == "__main__":
+    main()
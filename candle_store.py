@@ -0,0 +1,298 @@
+"""
+本地 K 线库
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+按 (交易所, 交易对, 周期) 分目录的列式追加文件，按偏移只读需要的行：
+
+  <root>/okx/BTC_USDT/1h/ts.i8      int64，毫秒时间戳，严格递增
+                         open.f8    float64，与 ts 逐行对齐
+                         high.f8 / low.f8 / close.f8 / volume.f8
+
+  · write 只追加：早于最后一根的 K 线忽略；等于最后一根的原地覆盖（未收盘 K 线修订）
+  · merge 用于回补缺口 / 更早的历史：与已有数据合并后写到临时目录，再整目录替换
+  · 行数取各列文件行数的最小值，追加中途崩溃留下的半行自动忽略，下次写入前截齐
+  · 范围查询先在 ts 列上逐点 pread 二分，再按偏移读出需要的行，不读整个文件；读完即关，不常驻
+    文件句柄（交易对 × 周期多时，常驻映射每列各占一个 fd，会撞上进程打开文件数上限）
+  · 写入（write / merge）先取 <周期目录>.lock 上的独占文件锁，应用和 backfill.py 可以同时写同一目录
+    （没有 fcntl 的平台上只有进程内互斥）
+  · 一年 1m 数据约 52.5 万行 × 48 字节 ≈ 25 MB
+"""
+
+import bisect
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import numpy as np
+import pandas as pd
+
+COLS  = ["open", "high", "low", "close", "volume"]
+_TS   = "ts.i8"
+_SAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+# ccxt timeframe → 毫秒
+TF_MS = {"1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+         "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+         "12h": 43_200_000, "1d": 86_400_000, "1w": 604_800_000}
+
+
+def tf_ms(tf: str) -> int:
+    if tf in TF_MS:
+        return TF_MS[tf]
+    unit = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+    return int(tf[:-1]) * unit[tf[-1]]
+
+
+@contextmanager
+def _file_lock(path: str):
+    """跨进程独占锁（flock），锁文件放在周期目录旁边，merge 整目录替换时不受影响。"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class _TsColumn:
+    """ts 列的只读序列视图：下标访问即一次 pread，供 bisect 在磁盘上二分。"""
+
+    def __init__(self, fd: int, n: int):
+        self.fd, self.n = fd, n
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __getitem__(self, i: int) -> int:
+        return int.from_bytes(os.pread(self.fd, 8, i * 8), "little", signed=True)
+
+
+class _Series:
+    """单个 (交易所, 交易对, 周期) 的列文件。写入持线程锁 + 文件锁；读取按偏移读出窗口，不保留打开的文件。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        # merge 换目录中途崩溃：新目录还没就位时用旧目录恢复（持文件锁再判断，别的进程可能正在换）
+        if not os.path.exists(path) and os.path.exists(path + ".old"):
+            with _file_lock(path):
+                if not os.path.exists(path) and os.path.exists(path + ".old"):
+                    os.rename(path + ".old", path)
+
+    def _file(self, col: str) -> str:
+        return os.path.join(self.path, _TS if col == "ts" else f"{col}.f8")
+
+    def _rows_on_disk(self) -> int:
+        try:
+            return min(os.path.getsize(self._file(c)) for c in ["ts"] + COLS) // 8
+        except FileNotFoundError:
+            return 0
+
+    def __len__(self) -> int:
+        # 不缓存：别的进程（backfill.py）可能刚追加或 merge 过，行数与行号都会变
+        return self._rows_on_disk()
+
+    def column(self, col: str, lo: int, hi: int) -> np.ndarray:
+        """第 [lo, hi) 行的一列。"""
+        if hi <= lo:
+            return np.empty(0, np.int64 if col == "ts" else np.float64)
+        return np.fromfile(self._file(col), dtype=np.int64 if col == "ts" else np.float64,
+                           count=hi - lo, offset=lo * 8)
+
+    def bounds(self, start: Optional[int], end: Optional[int]) -> tuple:
+        """[start, end]（毫秒，含两端）对应的行区间 [lo, hi)。"""
+        n = len(self)
+        if not n or (start is None and end is None):
+            return 0, n
+        fd = os.open(self._file("ts"), os.O_RDONLY)
+        try:
+            col = _TsColumn(fd, n)
+            lo  = bisect.bisect_left(col, start) if start is not None else 0
+            hi  = bisect.bisect_right(col, end, lo) if end is not None else n
+        finally:
+            os.close(fd)
+        return lo, hi
+
+    def write(self, ts: np.ndarray, data: np.ndarray) -> int:
+        """ts 升序 int64 毫秒，data 为 len(ts) × 5。返回新增行数（覆盖最后一根不计）。"""
+        with self.lock, _file_lock(self.path):
+            os.makedirs(self.path, exist_ok=True)
+            n = self._rows_on_disk()
+            # 截齐上次中断留下的半行
+            for c in ["ts"] + COLS:
+                f = self._file(c)
+                if os.path.exists(f) and os.path.getsize(f) != n * 8:
+                    os.truncate(f, n * 8)
+            last = None
+            if n:
+                with open(self._file("ts"), "rb") as f:
+                    f.seek((n - 1) * 8)
+                    last = int(np.frombuffer(f.read(8), dtype=np.int64)[0])
+            if last is not None:
+                if len(ts) and ts[0] <= last:
+                    keep = ts >= last
+                    ts, data = ts[keep], data[keep]
+                if len(ts) and ts[0] == last:
+                    # 覆盖最后一根（只改值，不改长度）
+                    for i, c in enumerate(COLS):
+                        with open(self._file(c), "r+b") as f:
+                            f.seek((n - 1) * 8)
+                            f.write(data[0, i:i + 1].astype(np.float64).tobytes())
+                    ts, data = ts[1:], data[1:]
+            if len(ts):
+                # 数据列先写、ts 最后写：崩溃时 ts 最短，半行被忽略
+                for i, c in enumerate(COLS):
+                    with open(self._file(c), "ab") as f:
+                        f.write(np.ascontiguousarray(data[:, i], dtype=np.float64).tobytes())
+                with open(self._file("ts"), "ab") as f:
+                    f.write(np.ascontiguousarray(ts, dtype=np.int64).tobytes())
+            return len(ts)
+
+    def merge(self, ts: np.ndarray, data: np.ndarray) -> int:
+        """与已有数据按时间合并（同一时间戳以新数据为准），整体重写。返回新增行数。"""
+        with self.lock, _file_lock(self.path):
+            n = self._rows_on_disk()
+            if n:
+                old_ts = np.fromfile(self._file("ts"), dtype=np.int64, count=n)
+                old    = np.column_stack([np.fromfile(self._file(c), dtype=np.float64, count=n) for c in COLS])
+                all_ts = np.concatenate([old_ts, ts])
+                all_d  = np.concatenate([old, data])
+                order  = np.argsort(all_ts, kind="stable")
+                all_ts, all_d = all_ts[order], all_d[order]
+                last   = np.r_[all_ts[1:] != all_ts[:-1], True]
+                all_ts, all_d = all_ts[last], all_d[last]
+            else:
+                all_ts, all_d = ts, data
+            tmp = self.path + ".tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            for i, c in enumerate(COLS):
+                np.ascontiguousarray(all_d[:, i], dtype=np.float64).tofile(os.path.join(tmp, f"{c}.f8"))
+            np.ascontiguousarray(all_ts, dtype=np.int64).tofile(os.path.join(tmp, _TS))
+            if os.path.exists(self.path):
+                os.rename(self.path, self.path + ".old")
+            os.rename(tmp, self.path)
+            shutil.rmtree(self.path + ".old", ignore_errors=True)
+            return len(all_ts) - n
+
+
+class CandleStore:
+    """本地 K 线库，线程安全；写入按序列加文件锁，多个进程可以同时写同一目录。"""
+
+    def __init__(self, root: str):
+        self.root    = root
+        self._series: dict = {}
+        self._lock   = threading.Lock()
+
+    def _get(self, exchange: str, symbol: str, tf: str) -> _Series:
+        key = (exchange, symbol, tf)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                path = os.path.join(self.root, _SAFE.sub("_", exchange), _SAFE.sub("_", symbol), _SAFE.sub("_", tf))
+                s = self._series[key] = _Series(path)
+        return s
+
+    # ── 写入 ─────────────────────────────────────────────────────────────────
+    def write(self, exchange: str, symbol: str, tf: str, df: pd.DataFrame) -> int:
+        """追加 OHLCV（DatetimeIndex 或 ts 列），返回新增行数。早于最后一根的行被忽略。"""
+        if df is None or not len(df):
+            return 0
+        return self._get(exchange, symbol, tf).write(*_arrays(df))
+
+    def merge(self, exchange: str, symbol: str, tf: str, df: pd.DataFrame) -> int:
+        """写入任意时间位置的 K 线（回补缺口 / 更早的历史），返回新增行数。代价与序列长度成正比，宜批量调用。"""
+        if df is None or not len(df):
+            return 0
+        return self._get(exchange, symbol, tf).merge(*_arrays(df))
+
+    # ── 读取 ─────────────────────────────────────────────────────────────────
+    def __contains__(self, key: tuple) -> bool:
+        return len(self._get(*key)) > 0
+
+    def count(self, exchange: str, symbol: str, tf: str) -> int:
+        return len(self._get(exchange, symbol, tf))
+
+    def first_ts(self, exchange: str, symbol: str, tf: str) -> Optional[int]:
+        s = self._get(exchange, symbol, tf)
+        return int(s.column("ts", 0, 1)[0]) if len(s) else None
+
+    def last_ts(self, exchange: str, symbol: str, tf: str) -> Optional[int]:
+        s = self._get(exchange, symbol, tf)
+        n = len(s)
+        return int(s.column("ts", n - 1, n)[0]) if n else None
+
+    def read(self, exchange: str, symbol: str, tf: str, start: int = None, end: int = None,
+             limit: int = None) -> pd.DataFrame:
+        """读取 [start, end]（毫秒，含两端）内的 K 线；给了 limit 时只取区间内最后 limit 根。"""
+        s = self._get(exchange, symbol, tf)
+        if not len(s):
+            return _empty()
+        lo, hi = s.bounds(start, end)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        idx = pd.DatetimeIndex(s.column("ts", lo, hi).astype("datetime64[ms]").astype("datetime64[ns]"), name="ts")
+        df  = pd.DataFrame({c: s.column(c, lo, hi) for c in COLS}, index=idx)
+        df.attrs["source"] = exchange
+        return df
+
+    def gaps(self, exchange: str, symbol: str, tf: str, start: int = None, end: int = None) -> list:
+        """[start, end] 内缺失的区间 [(缺口第一根, 缺口最后一根)]（毫秒）。交易所停机造成的缺口也会列出。"""
+        step = tf_ms(tf)
+        s    = self._get(exchange, symbol, tf)
+        if not len(s):
+            return [(start, end)] if start is not None and end is not None and start <= end else []
+        seg = s.column("ts", *s.bounds(start, end))
+        out = []
+        if start is not None and (not len(seg) or seg[0] > start):
+            # 区间内没有数据且没给 end 时，缺口没有右端，不列出
+            first = int(seg[0]) - step if len(seg) else end
+            if first is not None and first >= start:
+                out.append((start, first))
+        if len(seg) > 1:
+            jump = np.flatnonzero(np.diff(seg) > step)
+            out += [(int(seg[j]) + step, int(seg[j + 1]) - step) for j in jump]
+        if end is not None and len(seg) and seg[-1] + step <= end:
+            out.append((int(seg[-1]) + step, end))
+        return out
+
+    def keys(self) -> list:
+        """磁盘上已有的 (交易所, 交易对, 周期) 目录名（已做文件名转义）。"""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for ex in sorted(os.listdir(self.root)):
+            for sym in sorted(os.listdir(os.path.join(self.root, ex))):
+                for tf in sorted(os.listdir(os.path.join(self.root, ex, sym))):
+                    # 跳过锁文件与 merge 的临时 / 备份目录
+                    if not tf.endswith((".lock", ".tmp", ".old")):
+                        out.append((ex, sym, tf))
+        return out
+
+
+def _arrays(df: pd.DataFrame) -> tuple:
+    """DataFrame → (升序去重的 int64 毫秒时间戳, N × 5 float64)。重复时间戳保留最后一次。"""
+    idx  = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.DatetimeIndex(df["ts"])
+    ts   = idx.as_unit("ms").asi8
+    data = df[COLS].to_numpy(dtype=float)
+    if len(ts) > 1 and not (np.diff(ts) > 0).all():
+        order = np.argsort(ts, kind="stable")
+        ts, data = ts[order], data[order]
+        last = np.r_[ts[1:] != ts[:-1], True]
+        ts, data = ts[last], data[last]
+    return ts, data
+
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({c: np.empty(0) for c in COLS}, index=pd.DatetimeIndex([], name="ts"))
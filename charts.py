@@ -0,0 +1,235 @@
+"""
+行情图
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+K 线（含 EMA / 布林带）、MACD 与盘口深度图。原来每次重跑都从 go.Figure() 起逐条 add_trace、完整 update_layout，
+数据先转成 Python list 再逐元素校验、序列化成十进制文本。现在：
+
+  · 布局与各条线的样式只在构造时建一次（经 plotly 校验，存成 plotly JSON 结构），之后每次只把数据
+    填进模板的浅拷贝，不再建 trace / layout 对象、逐属性校验；主题模板（几 KB 的嵌套结构）所有图共用一份
+  · Streamlit 的 plotly_chart 每次都调用 Figure.to_dict()，原来这一步（逐属性深拷贝、编码数组、
+    带上模板）比构图本身还贵；成品图的 to_dict() 直接返回现成的结构
+  · 数据直接从 NumPy 编码成 plotly.js 的二进制数组（f8 约 10.7 字节 / 点，list 转十进制文本约 18 字节）；
+    不参与悬停的指标线用 float32，再减一半
+  · 成品图按数据指纹（首尾时间戳、根数、最后一根的全部数值）缓存，数据没变就返回同一个 Figure：
+    Streamlit 对 ≥10KB 且与上次字节相同的元素只发引用哈希，不重发整张图
+  · layout.uirevision 固定为交易对：数据更新时前端只替换数据，用户的缩放 / 平移保持不变
+  · 长窗口降采样：K 线按桶合成、指标线 MinMaxLTTB，屏幕上的点数有上限，与窗口长度无关
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from downsample import minmax_lttb, ohlc_buckets
+from indicators import frame_fingerprint as _fingerprint
+
+_CANDLE_LINES = [("ema9", "#2563EB", "EMA9"), ("ema21", "#D97706", "EMA21"), ("ema55", "#7C3AED", "EMA55")]
+_CANDLE_COLS  = ["open", "high", "low", "close", "ema9", "ema21", "ema55", "bb_upper", "bb_lower"]
+_MACD_COLS    = ["macd_hist", "macd", "macd_signal"]
+
+
+def _tail(df: pd.DataFrame, cols: list, bars: int) -> np.ndarray:
+    """df 最后 bars 根的 cols 列（按位置取，避开 pandas 3 按列名取子表的开销）。"""
+    pos = [df.columns.get_loc(c) for c in cols]
+    return df.iloc[-bars:].to_numpy()[:, pos].astype(float)
+
+
+def _typed(a: np.ndarray, dtype: str) -> dict:
+    """NumPy 数组 → plotly.js 的二进制数组（与 plotly 自己序列化 NumPy 时的格式相同）。"""
+    a = np.ascontiguousarray(a, dtype=dtype)
+    return {"dtype": a.dtype.str[1:], "bdata": base64.b64encode(a.tobytes()).decode()}
+
+
+def _ints(a: np.ndarray) -> dict:
+    """横轴下标（非负、升序），取装得下的最小整数类型。"""
+    top = int(a[-1]) if len(a) else 0
+    return _typed(a, "<i1" if top < 128 else "<i2" if top < 32768 else "<i4")
+
+
+class _FrozenFigure(go.Figure):
+    """已经是 plotly JSON 结构的只读图，to_dict() 直接返回构造时给的 spec（浅拷贝）。
+
+    不建 plotly 的 trace / layout 对象：逐属性赋值、再在 to_dict() 里逐个转回 dict 并编码数组，
+    是构图的主要开销。所以 .data / .layout 是空的，只用来交给 st.plotly_chart 或 plotly.io 序列化。
+    """
+
+    def __init__(self, spec: dict):
+        super().__init__(layout=dict(template={}), _validate=False)
+        self._spec = spec
+
+    def to_dict(self) -> dict:
+        return dict(self._spec)
+
+
+class ChartFactory:
+    """一套配色下的 K 线 / MACD 图工厂，线程安全。
+
+    palette 需要 bg / sub / green / red / blue / amber 几个颜色；cache_size 为缓存的成品图个数（LRU）；
+    max_candles 为 K 线图上的最多根数，更长的窗口降采样（见 downsample）。
+    返回的 Figure 在多个会话间共享，只读（原地修改不会反映到 to_dict()）。
+    """
+
+    def __init__(self, palette: dict, cache_size: int = 64, max_candles: int = 160):
+        self.palette    = palette
+        self.max_candles = max_candles
+        self.cache_size = cache_size
+        self.hits       = 0
+        self.misses     = 0
+        self._cache     = OrderedDict()
+        self._lock      = threading.Lock()
+        self._candle    = self._candle_template().to_dict()
+        self._macd      = self._macd_template().to_dict()
+        self._depth     = self._depth_template().to_dict()
+        # 当前 plotly 默认模板（页面里是 Streamlit 注册的 "streamlit"），所有成品图共用
+        self._theme     = self._candle["layout"].pop("template", {})
+        self._macd["layout"].pop("template", None)
+        self._depth["layout"].pop("template", None)
+
+    # ── 模板（只建一次）─────────────────────────────────────────────────────
+    def _candle_template(self) -> go.Figure:
+        C   = self.palette
+        fig = go.Figure()
+        fig.add_trace(go.Candlestick(
+            increasing=dict(fillcolor="#059669", line=dict(color="#047857", width=1)),
+            decreasing=dict(fillcolor="#DC2626", line=dict(color="#B91C1C", width=1)),
+            showlegend=False,
+            hoverlabel=dict(bgcolor="#1F2937", font=dict(color="#F9FAFB", size=11)),
+        ))
+        for _, color, name in _CANDLE_LINES:
+            fig.add_trace(go.Scatter(line=dict(color=color, width=1.5), name=name, mode="lines", hoverinfo="skip"))
+        fig.add_trace(go.Scatter(line=dict(color="rgba(107,114,128,.3)", width=1, dash="dot"),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(line=dict(color="rgba(107,114,128,.3)", width=1, dash="dot"),
+                                 fill="tonexty", fillcolor="rgba(107,114,128,.04)",
+                                 showlegend=False, hoverinfo="skip"))
+        fig.update_layout(
+            height=280, margin=dict(l=0, r=2, t=8, b=0),
+            paper_bgcolor=C["bg"], plot_bgcolor=C["bg"],
+            xaxis=dict(showgrid=False, zeroline=False, rangeslider=dict(visible=False),
+                       tickfont=dict(size=9, family="JetBrains Mono", color=C["sub"]),
+                       fixedrange=False),
+            yaxis=dict(showgrid=True, gridcolor="#F3F4F6", zeroline=False, side="right",
+                       tickfont=dict(size=9, family="JetBrains Mono", color=C["sub"]),
+                       fixedrange=False),
+            legend=dict(orientation="h", yanchor="top", y=1.06, xanchor="left", x=0,
+                        font=dict(size=9, color=C["sub"]), bgcolor="rgba(0,0,0,0)"),
+            dragmode="pan", font=dict(family="Inter"),
+        )
+        return fig
+
+    def _macd_template(self) -> go.Figure:
+        C   = self.palette
+        fig = go.Figure()
+        fig.add_trace(go.Bar(showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(line=dict(color=C["blue"], width=1.5), name="MACD"))
+        fig.add_trace(go.Scatter(line=dict(color=C["amber"], width=1.5), name="Signal"))
+        fig.update_layout(
+            title=dict(font=dict(size=11, color=C["sub"]), x=0),
+            height=150, margin=dict(l=0, r=0, t=26, b=0),
+            paper_bgcolor=C["bg"], plot_bgcolor=C["bg"],
+            xaxis=dict(showgrid=False, showticklabels=False, fixedrange=False),
+            yaxis=dict(showgrid=True, gridcolor="#F3F4F6",
+                       tickfont=dict(size=8, family="JetBrains Mono", color=C["sub"]), fixedrange=False),
+            legend=dict(orientation="h", font=dict(size=9), y=1.2, bgcolor="rgba(0,0,0,0)"),
+            dragmode="pan",
+        )
+        return fig
+
+    def _depth_template(self) -> go.Figure:
+        C   = self.palette
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(line=dict(color=C["green"], width=1.5, shape="hv"), fill="tozeroy",
+                                 fillcolor="rgba(5,150,105,.12)", name="买盘",
+                                 hovertemplate="$%{x:,}<br>累计 %{y:,.0f} U<extra></extra>"))
+        fig.add_trace(go.Scatter(line=dict(color=C["red"], width=1.5, shape="hv"), fill="tozeroy",
+                                 fillcolor="rgba(220,38,38,.12)", name="卖盘",
+                                 hovertemplate="$%{x:,}<br>累计 %{y:,.0f} U<extra></extra>"))
+        fig.update_layout(
+            height=150, margin=dict(l=0, r=0, t=8, b=0),
+            paper_bgcolor=C["bg"], plot_bgcolor=C["bg"],
+            xaxis=dict(showgrid=False, zeroline=False,
+                       tickfont=dict(size=8, family="JetBrains Mono", color=C["sub"]), fixedrange=False),
+            yaxis=dict(showgrid=True, gridcolor="#F3F4F6", zeroline=False, side="right",
+                       tickfont=dict(size=8, family="JetBrains Mono", color=C["sub"]), fixedrange=True),
+            legend=dict(orientation="h", yanchor="top", y=1.1, xanchor="left", x=0,
+                        font=dict(size=9, color=C["sub"]), bgcolor="rgba(0,0,0,0)"),
+            dragmode="pan", font=dict(family="Inter"), showlegend=True,
+        )
+        return fig
+
+    # ── 成品图 ───────────────────────────────────────────────────────────────
+    def candle(self, df: pd.DataFrame, sym: str, bars: int = 120) -> go.Figure:
+        """最近 bars 根 K 线 + EMA9/21/55 + 布林带；不论 bars 多大，K 线至多 max_candles 根、每条线至多 2 倍。"""
+        return self._cached(("candle", sym, bars) + _fingerprint(df), lambda: self._build_candle(df, sym, bars))
+
+    def macd(self, df: pd.DataFrame, sym_label: str, bars: int = 80) -> go.Figure:
+        """最近 bars 根的 MACD 柱 + MACD / Signal 线。"""
+        return self._cached(("macd", sym_label, bars) + _fingerprint(df), lambda: self._build_macd(df, sym_label, bars))
+
+    def depth(self, book, sym: str, levels: int = 100) -> go.Figure:
+        """盘口前 levels 档的累计深度（book 为 orderbook.OrderBook），按盘口版本号（全局唯一）缓存。"""
+        return self._cached(("depth", sym, levels, book.version), lambda: self._build_depth(book, sym, levels))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+    def _cached(self, key: tuple, build) -> go.Figure:
+        with self._lock:
+            fig = self._cache.get(key)
+            if fig is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+        fig = build()
+        with self._lock:
+            self._cache[key] = fig
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return fig
+
+    def _build_candle(self, df: pd.DataFrame, sym: str, bars: int) -> go.Figure:
+        a = _tail(df, _CANDLE_COLS, bars)
+        n = len(a)
+        # 超过 max_candles 根时 K 线按桶合成、指标线 LTTB 选点，横轴仍是原下标
+        pos, o, h, l, c = ohlc_buckets(a[:, 0], a[:, 1], a[:, 2], a[:, 3], self.max_candles)
+        data = [dict(t) for t in self._candle["data"]]
+        data[0].update(x=_ints(pos), open=_typed(o, "<f8"), high=_typed(h, "<f8"),
+                       low=_typed(l, "<f8"), close=_typed(c, "<f8"), name=sym)
+        keep = minmax_lttb(a[:, 4:9], 2 * self.max_candles)
+        for i, j in enumerate(range(4, 9), start=1):
+            data[i].update(x=_ints(keep[:, j - 4]), y=_typed(a[keep[:, j - 4], j], "<f4"))
+        step = -(-n // 6)
+        tvs  = list(range(0, n, step))
+        idx  = df.index[-n:]
+        cut  = 10 if n > 1 and (idx[-1] - idx[0]) / (n - 1) * step >= pd.Timedelta(days=1) else 13
+        tts  = [str(ts)[:cut] for ts in idx[tvs]]
+        lay  = dict(self._candle["layout"], uirevision=sym, template=self._theme)
+        lay["xaxis"] = dict(lay["xaxis"], tickvals=tvs, ticktext=tts)
+        return _FrozenFigure(dict(data=data, layout=lay))
+
+    def _build_depth(self, book, sym: str, levels: int) -> go.Figure:
+        bp, bc, ap, ac = book.cumulative(levels)
+        data = [dict(t) for t in self._depth["data"]]
+        data[0].update(x=_typed(bp[::-1], "<f8"), y=_typed(bc[::-1], "<f4"))
+        data[1].update(x=_typed(ap, "<f8"), y=_typed(ac, "<f4"))
+        lay = dict(self._depth["layout"], uirevision=sym, template=self._theme)
+        return _FrozenFigure(dict(data=data, layout=lay))
+
+    def _build_macd(self, df: pd.DataFrame, sym_label: str, bars: int) -> go.Figure:
+        C  = self.palette
+        a  = _tail(df, _MACD_COLS, bars)
+        xs = _ints(np.arange(len(a)))
+        data = [dict(t) for t in self._macd["data"]]
+        data[0].update(x=xs, y=_typed(a[:, 0], "<f4"),
+                       marker=dict(color=np.where(a[:, 0] >= 0, C["green"], C["red"]).tolist()))
+        data[1].update(x=xs, y=_typed(a[:, 1], "<f4"))
+        data[2].update(x=xs, y=_typed(a[:, 2], "<f4"))
+        lay = dict(self._macd["layout"], uirevision=sym_label, template=self._theme)
+        lay["title"] = dict(lay["title"], text=f"{sym_label} MACD")
+        return _FrozenFigure(dict(data=data, layout=lay))
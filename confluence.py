@@ -0,0 +1,76 @@
+"""
+多周期共振
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+同一交易对的多个周期（15m / 1h / 4h …）一起评分，加权合成一个方向：
+
+  · 全部 (交易对, 周期) 的最后一根拼成一个特征矩阵，score_vectorized 一次评完，
+    各周期的评分 / 方向与单独调用 score_strategy 完全一致
+  · 综合评分 = Σ 权重 × 周期评分 / Σ 权重，与单周期评分同量纲，方向阈值沿用 StrategyParams
+  · 共振度 = 与综合方向同向（多 / 空 / 观望）的周期权重占比，1.0 表示全部周期一致
+  · 高周期权重更大（默认 15m : 1h : 4h = 1 : 2 : 3），未列出的周期权重为 1
+  · 各周期可以直接给 IndicatorEngine（如 Resampler.engine(tf)），只读最后一行，不构造快照
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicators import FRAME_COLUMNS, IndicatorEngine
+from screener import feature_matrix
+from strategy import DEFAULT_PARAMS, DIRECTIONS, FEATURE_COLS, StrategyParams, score_vectorized
+
+TF_WEIGHTS = {"15m": 1.0, "1h": 2.0, "4h": 3.0}
+
+# 方向编码 → 多 +1 / 空 -1 / 观望 0
+_SIDE = np.array([0, 1, 1, -1, -1])
+# FEATURE_COLS 在引擎行（FRAME_COLUMNS 顺序）里的位置
+_FEAT = FRAME_COLUMNS.get_indexer(FEATURE_COLS)
+
+
+def _features(flat: dict) -> tuple[list, np.ndarray]:
+    """{(symbol, tf): DataFrame | IndicatorEngine} → (keys, 特征矩阵)。空表 / 空引擎被跳过。"""
+    eng  = {k: v for k, v in flat.items() if isinstance(v, IndicatorEngine)}
+    keys, X = feature_matrix({k: v for k, v in flat.items() if k not in eng})
+    last = {k: e.last() for k, e in eng.items()}
+    last = {k: row[_FEAT] for k, row in last.items() if row is not None}
+    if last:
+        keys = keys + list(last)
+        X    = np.vstack([X, np.array(list(last.values()))])
+    return keys, X
+
+
+def confluence(frames: dict, weights: dict = None, P: StrategyParams = DEFAULT_PARAMS) -> pd.DataFrame:
+    """frames={symbol: {tf: 指标 DataFrame 或 IndicatorEngine}} → 每个交易对一行：
+
+    score（加权评分）、direction、agree（共振度 0~1），以及各周期的 score_<tf> / direction_<tf>。
+    空表或缺失的周期不参与加权。
+    """
+    weights = TF_WEIGHTS if weights is None else weights
+    flat    = {(s, tf): src for s, per_tf in frames.items() for tf, src in per_tf.items() if src is not None}
+    keys, X = _features(flat)
+    if not keys:
+        return pd.DataFrame(columns=["direction", "score", "agree"])
+    present = {s for s, _ in keys}
+    syms = {s: i for i, s in enumerate(s for s in frames if s in present)}
+    tfs  = {tf: j for j, tf in enumerate(dict.fromkeys(tf for per_tf in frames.values() for tf in per_tf))}
+    out  = score_vectorized({c: X[:, i] for i, c in enumerate(FEATURE_COLS)}, P)
+
+    row  = np.array([syms[s] for s, _ in keys])
+    w    = np.array([weights.get(tf, 1.0) for _, tf in keys])
+    wsum = np.bincount(row, w, len(syms))
+    score = np.bincount(row, w * out["score"], len(syms)) / wsum
+    code  = np.select([score >= P.strong_score, score >= P.weak_score,
+                       score <= -P.strong_score, score <= -P.weak_score], [2, 1, 4, 3], 0)
+    same  = _SIDE[out["direction_code"]] == _SIDE[code][row]
+    agree = np.bincount(row, w * same, len(syms)) / wsum
+
+    per  = np.full((len(syms), len(tfs)), np.nan)
+    dirs = np.full((len(syms), len(tfs)), None, dtype=object)
+    tix  = np.array([tfs[tf] for _, tf in keys])
+    per[row, tix]  = out["score"]
+    dirs[row, tix] = out["direction"]
+    cols = {"direction": DIRECTIONS[code], "score": score, "agree": agree}
+    for tf, j in tfs.items():
+        cols[f"score_{tf}"]     = per[:, j]
+        cols[f"direction_{tf}"] = dirs[:, j]
+    # 一次性构造（逐列插入每次都要重建列索引，比评分本身还慢）
+    return pd.DataFrame(cols, index=pd.Index(list(syms), name="symbol"))
@@ -0,0 +1,106 @@
+"""
+图表降采样
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+长窗口（上万到十万根 K 线）画图前压到固定点数，屏幕上的点数与窗口长度无关：
+
+  · K 线：按根数等分成 n 桶，每桶合成一根（open 取第一根、high / low 取极值、close 取最后一根），
+    极值一个不丢，影线长度与原图一致；与多周期合成同一套规则，只是按根数而不是按时间分桶
+  · 指标线：LTTB（Largest-Triangle-Three-Buckets），首尾两点固定，其余每桶保留与
+    上一个选中点、下一桶均值构成三角形面积最大的那个点，拐点与尖峰都留得住；
+    NaN（指标预热段）不参与选点，整桶都是 NaN 时取桶内第一个点，线上的缺口保持不变
+  · MinMaxLTTB：LTTB 逐桶依赖上一个选中点，只能按桶循环，十万点时每桶几百点的面积计算占满耗时；
+    先把序列等分成 ratio × n 个小桶、每桶只留最小 / 最大两点（整段向量化），再对这些候选点做 LTTB。
+    三角形面积最大的点必然是桶内某个方向上的极值，预选丢掉的基本是不会被选中的点
+
+两者返回的都是原序列的下标（K 线为每桶第一根），横轴仍按原下标画，刻度与不降采样时一致。
+"""
+
+import numpy as np
+
+
+def bucket_starts(n: int, n_out: int) -> np.ndarray:
+    """把 0..n-1 等分成 n_out 桶（n_out ≥ n 时不分桶），返回各桶起点下标。"""
+    if n_out >= n:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n, n_out, endpoint=False).astype(np.int64))
+
+
+def ohlc_buckets(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray, n_out: int) -> tuple:
+    """OHLC 按根数合成为至多 n_out 根，返回 (各桶第一根的下标, open, high, low, close)。"""
+    start = bucket_starts(len(c), n_out)
+    if len(start) == len(c):
+        return start, o, h, l, c
+    end = np.append(start[1:], len(c)) - 1
+    return (start, o[start], np.maximum.reduceat(h, start), np.minimum.reduceat(l, start), c[end])
+
+
+def lttb(y: np.ndarray, n_out: int, x: np.ndarray = None) -> np.ndarray:
+    """LTTB 选点，返回升序下标（至多 n_out 个）。x 缺省为 0..n-1。
+
+    y 可以是 N × K 的多条线，各列独立选点、一次循环算完，返回 n_out × K 的下标；
+    此时 x 可以是 N（共用）或 N × K（每列各自的横坐标）。
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        idx = np.arange(n) if n_out >= n else np.linspace(0, n - 1, max(n_out, 0)).astype(np.int64)
+        return idx if y.ndim == 1 else np.repeat(idx[:, None], y.shape[1], axis=1)
+    flat = y.ndim == 1
+    y    = y[:, None] if flat else y
+    x    = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    x    = np.broadcast_to(x.reshape(n, -1), y.shape)
+
+    # 中间 n-2 个点分成 n_out-2 桶；下一桶的均值一次算完（NaN 不计入）
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    ok    = ~np.isnan(y)
+    zero  = np.zeros((1, y.shape[1]))
+    cy    = np.concatenate((zero, np.cumsum(np.where(ok, y, 0.0), axis=0)))
+    cx    = np.concatenate((zero, np.cumsum(np.where(ok, x, 0.0), axis=0)))
+    cn    = np.concatenate((zero, np.cumsum(ok, axis=0)))
+    lo    = edges[1:]
+    hi    = np.append(edges[2:], n)
+    cnt   = cn[hi] - cn[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_x = np.where(cnt > 0, (cx[hi] - cx[lo]) / cnt, x[-1])
+        avg_y = np.where(cnt > 0, (cy[hi] - cy[lo]) / cnt, np.nan)
+    avg_x[-1], avg_y[-1] = x[-1], y[-1]
+
+    out  = np.empty((n_out, y.shape[1]), dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    cols = np.arange(y.shape[1])
+    a    = np.zeros(y.shape[1], dtype=np.int64)
+    for i in range(n_out - 2):
+        s, e = edges[i], edges[i + 1]
+        ax, ay = x[a, cols], y[a, cols]
+        area = np.abs((ax - avg_x[i]) * (y[s:e] - ay) - (ax - x[s:e]) * (avg_y[i] - ay))
+        area[np.isnan(area)] = -1.0
+        a = s + area.argmax(axis=0)
+        out[i + 1] = a
+    return out[:, 0] if flat else out
+
+
+def minmax_lttb(y: np.ndarray, n_out: int, ratio: int = 4) -> np.ndarray:
+    """MinMaxLTTB：每个小桶先留最小 / 最大两点作候选，再对候选做 LTTB。返回值同 lttb（x 为 0..n-1）。"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * ratio * n_out:
+        return lttb(y, n_out)
+    flat = y.ndim == 1
+    y    = y[:, None] if flat else y
+    k    = y.shape[1]
+
+    # 等长小桶（末尾不足一桶的另成一桶），按视图 reshape，不复制数据；
+    # 含 NaN 的桶 argmin / argmax 落在 NaN 上，只发生在指标预热段与有效段交界的那一桶，LTTB 会跳过 NaN
+    size = -(-n // (ratio * n_out))
+    full = n // size * size
+    body = y[:full].reshape(-1, size, k)
+    cand = [np.arange(0, full, size)[:, None] + body.argmin(axis=1),
+            np.arange(0, full, size)[:, None] + body.argmax(axis=1)]
+    if full < n:
+        cand += [full + y[full:].argmin(axis=0)[None], full + y[full:].argmax(axis=0)[None]]
+    cand = np.sort(np.concatenate(cand), axis=0)
+    cand = np.concatenate((np.zeros((1, k), np.int64), cand, np.full((1, k), n - 1)))
+
+    pick = lttb(np.take_along_axis(y, cand, axis=0), n_out, cand)
+    out  = np.take_along_axis(cand, pick, axis=0)
+    return out[:, 0] if flat else out
@@ -0,0 +1,294 @@
+"""
+多交易所连接池
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+同一份行情挂多个交易所客户端（默认 OKX + Binance），按健康度挑选，出故障自动切换：
+
+  · 健康度：每个交易所记录最近 window 次请求的耗时与成败，
+    得分 = 耗时中位数 × (1 + 4 × 错误率)，越小越优；还没有样本的按 default_hedge 估计
+  · 熔断：连续 fail_threshold 次网络类失败后打开，冷却期内不再发请求；冷却结束转半开，只放行一个探测请求，
+    成功即恢复（清掉故障期间的错误记录），失败则冷却时间翻倍（上限 max_cooldown）
+  · 对冲请求：已发出的请求超过该交易所的 p95 耗时仍未返回，就把同一请求发给下一个交易所，先成功的结果胜出；
+    落后的请求不取消，跑完照样计入健康度
+  · 失败切换：请求出错（网络错误、该交易所没有这个交易对等）立即改发下一个交易所，不等对冲计时
+  · 长连接：每个交易所只建一个 ccxt 客户端并一直复用其 requests.Session；连接池按并发线程数放大，
+    并发请求不会因为池满丢弃连接、重新握手
+
+只有网络类错误（超时、限流、连接失败）计入错误率与熔断；交易所正常答复的业务错误
+（如 BadSymbol、NotSupported）说明线路是通的，只触发切换。
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import ccxt
+    _NETWORK_ERRORS = (ccxt.NetworkError, OSError, TimeoutError)
+except ImportError:
+    _NETWORK_ERRORS = (OSError, TimeoutError)
+
+
+class NoVenueAvailable(RuntimeError):
+    """所有交易所都处于熔断中。"""
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# CIRCUIT BREAKER
+# ═════════════════════════════════════════════════════════════════════════════
+
+class CircuitBreaker:
+    """closed → 连续失败 → open → 冷却结束 → half_open（放行一个探测）→ 成功 closed / 失败 open。线程安全。"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, fail_threshold: int = 3, cooldown: float = 5.0, max_cooldown: float = 120.0):
+        self.fail_threshold = fail_threshold
+        self.base_cooldown  = cooldown
+        self.max_cooldown   = max_cooldown
+        self.cooldown       = cooldown
+        self.fails          = 0
+        self._state         = self.CLOSED
+        self._until         = 0.0
+        self._probing       = False
+        self._lock          = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() >= self._until:
+                return self.HALF_OPEN
+            return self._state
+
+    def available(self) -> bool:
+        """当前是否可能放行（不占用探测名额），用于排序。"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            return time.monotonic() >= self._until and not self._probing
+
+    def allow(self) -> bool:
+        """发请求前调用；半开状态下只有第一个调用者拿到探测名额。"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() < self._until or self._probing:
+                return False
+            self._state, self._probing = self.HALF_OPEN, True
+            return True
+
+    def success(self) -> bool:
+        """记录成功，返回是否从熔断中恢复。"""
+        with self._lock:
+            recovered = self._state != self.CLOSED
+            self._state, self._probing = self.CLOSED, False
+            self.fails, self.cooldown  = 0, self.base_cooldown
+            return recovered
+
+    def failure(self) -> None:
+        with self._lock:
+            self.fails += 1
+            if self._state == self.HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            elif self.fails < self.fail_threshold:
+                return
+            self._state, self._probing = self.OPEN, False
+            self._until = time.monotonic() + self.cooldown
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# VENUE
+# ═════════════════════════════════════════════════════════════════════════════
+
+class Venue:
+    """一个交易所客户端及其健康统计（最近 window 次请求）。"""
+
+    def __init__(self, client, window: int = 50, breaker: CircuitBreaker = None):
+        self.client   = client
+        self.id       = client.id
+        self.breaker  = breaker or CircuitBreaker()
+        self.requests = 0
+        self.errors   = 0
+        self._lat     = deque(maxlen=window)   # 成功请求的耗时（秒）
+        self._ok      = deque(maxlen=window)   # 最近请求成败
+        self._lock    = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self._ok.append(ok)
+            if ok:
+                self._lat.append(latency)
+            else:
+                self.errors += 1
+        if not ok:
+            self.breaker.failure()
+        elif self.breaker.success():
+            # 熔断恢复：故障期间的错误不再代表现状，清掉，否则错误率压着得分、流量永远回不来
+            with self._lock:
+                self._ok.clear()
+
+    def _quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            lat = list(self._lat)
+        return float(np.quantile(lat, q)) if lat else None
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self._quantile(0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self._quantile(0.95)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return 1 - sum(self._ok) / len(self._ok) if self._ok else 0.0
+
+    def score(self, prior: float) -> float:
+        p50 = self.p50
+        return (p50 if p50 is not None else prior) * (1 + 4 * self.error_rate)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# POOL
+# ═════════════════════════════════════════════════════════════════════════════
+
+def keep_alive(client, maxsize: int) -> None:
+    """放大 ccxt 客户端 requests.Session 的连接池，让并发线程都能复用长连接。"""
+    session = getattr(client, "session", None)
+    if session is None:
+        return
+    try:
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        return
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+class ExchangePool:
+    """多交易所连接池。call() 按健康度选交易所，必要时对冲 / 切换，返回 (结果, 实际答复的交易所 id)。"""
+
+    def __init__(self, clients: Iterable, hedge: bool = True, min_hedge: float = 0.15,
+                 max_hedge: float = 3.0, default_hedge: float = 1.0, workers: int = 16,
+                 window: int = 50, fail_threshold: int = 3, cooldown: float = 5.0):
+        self.venues        = [Venue(c, window, CircuitBreaker(fail_threshold, cooldown)) for c in clients]
+        if not self.venues:
+            raise ValueError("至少需要一个交易所客户端")
+        self.name          = "+".join(v.id for v in self.venues)
+        self.hedge         = hedge
+        self.min_hedge     = min_hedge
+        self.max_hedge     = max_hedge
+        self.default_hedge = default_hedge
+        self.hedged        = 0   # 发出的对冲请求数
+        self.hedge_wins    = 0   # 对冲请求先返回的次数
+        self._pool         = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="venue")
+        for v in self.venues:
+            keep_alive(v.client, workers)
+
+    # ── 选择 ─────────────────────────────────────────────────────────────────
+    def ranked(self, prefer: str = None) -> list:
+        """可用交易所按得分排序；prefer 可用时排第一（增量刷新尽量留在同一交易所）。"""
+        order = sorted((v for v in self.venues if v.breaker.available()),
+                       key=lambda v: v.score(self.default_hedge))
+        if prefer is not None:
+            order.sort(key=lambda v: v.id != prefer)
+        return order
+
+    def primary(self) -> Venue:
+        """当前最优的交易所；全部熔断时返回配置里的第一个。"""
+        order = self.ranked()
+        return order[0] if order else self.venues[0]
+
+    def venue(self, venue_id: str) -> Optional[Venue]:
+        return next((v for v in self.venues if v.id == venue_id), None)
+
+    def _hedge_delay(self, v: Venue) -> float:
+        p95 = v.p95
+        return min(max(p95 if p95 is not None else self.default_hedge, self.min_hedge), self.max_hedge)
+
+    # ── 请求 ─────────────────────────────────────────────────────────────────
+    def _run(self, v: Venue, method: str, args: tuple, kwargs: dict):
+        t0 = time.perf_counter()
+        try:
+            out = getattr(v.client, method)(*args, **kwargs)
+        except _NETWORK_ERRORS:
+            v.record(time.perf_counter() - t0, False)
+            raise
+        except Exception:
+            v.record(time.perf_counter() - t0, True)   # 交易所正常答复了错误，线路是健康的
+            raise
+        v.record(time.perf_counter() - t0, True)
+        return out
+
+    def call(self, method: str, *args, prefer: str = None, **kwargs) -> tuple:
+        """调用各交易所客户端的同名方法，返回 (结果, 交易所 id)；全部失败时抛出最后一个异常。"""
+        queue   = self.ranked(prefer)
+        pending = {}
+        errors  = []
+        last    = None
+
+        def _launch() -> bool:
+            nonlocal last
+            while queue:
+                v = queue.pop(0)
+                if v.breaker.allow():
+                    pending[self._pool.submit(self._run, v, method, args, kwargs)] = v
+                    last = v
+                    return True
+            return False
+
+        if not _launch():
+            raise NoVenueAvailable(f"{self.name} 全部熔断")
+        first = last
+        while pending:
+            timeout = self._hedge_delay(last) if self.hedge and queue else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # 超过 p95 仍未返回：对冲到下一个交易所
+                if _launch():
+                    self.hedged += 1
+                continue
+            for fut in done:
+                v = pending.pop(fut)
+                if fut.exception() is None:
+                    if v is not first:
+                        self.hedge_wins += 1
+                    return fut.result(), v.id
+                errors.append(fut.exception())
+            if not pending:
+                _launch()
+        raise errors[-1] if errors else NoVenueAvailable(f"{self.name} 全部熔断")
+
+    # ── 状态 ─────────────────────────────────────────────────────────────────
+    def health(self) -> pd.DataFrame:
+        """每个交易所一行：熔断状态、请求数、错误率、p50 / p95 耗时（毫秒）、得分。"""
+        rows = []
+        for v in self.venues:
+            p50, p95 = v.p50, v.p95
+            rows.append({
+                "venue":      v.id,
+                "state":      v.breaker.state,
+                "requests":   v.requests,
+                "errors":     v.errors,
+                "error_rate": v.error_rate,
+                "p50_ms":     p50 * 1000 if p50 is not None else np.nan,
+                "p95_ms":     p95 * 1000 if p95 is not None else np.nan,
+                "score":      v.score(self.default_hedge),
+            })
+        return pd.DataFrame(rows).set_index("venue")
+
+    def close(self) -> None:
+        """等进行中的请求跑完后停掉线程池，并关闭各客户端的 HTTP 会话（长连接）。"""
+        self._pool.shutdown(wait=True)
+        for v in self.venues:
+            session = getattr(v.client, "session", None)
+            if session is not None:
+                session.close()
@@ -0,0 +1,77 @@
+"""
+HTML 片段
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+页面的卡片、徽章、表格行都是大段 f-string，每次重跑都把配色、阴影、字体这些常量重新代入、拼一遍。
+Fragment 把这类片段预编译并记住渲染结果：
+
+  · 构造时先代入常量（Fragment(模板, C=配色, SHADOW=...)），模板里只剩具名槽位；
+    槽位可以带格式，包括嵌套的格式参数（{price:,.{dec}f}），常量代入时原样保留
+  · 渲染 = 一次 str.format_map，结果按槽位值 LRU 缓存：行情没变时同一张卡片 / 同一行表格
+    直接返回上次的字符串，不再格式化
+  · 所有片段登记在模块里，stats() 汇总命中率，clear() 清空缓存（基准测试用）
+
+槽位值必须可哈希（数值、字符串、元组）。
+"""
+
+import threading
+from functools import lru_cache
+
+_REGISTRY = []
+_LOCK     = threading.Lock()
+
+
+class _Slot:
+    """常量代入阶段遇到的槽位：原样写回模板（连同格式、下标）。"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getitem__(self, key) -> "_Slot":
+        return _Slot(f"{self.name}[{key}]")
+
+    def __getattr__(self, attr: str) -> "_Slot":
+        return _Slot(f"{self.name}.{attr}")
+
+    def __format__(self, spec: str) -> str:
+        return "{" + self.name + (":" + spec if spec else "") + "}"
+
+
+class _Consts(dict):
+    def __missing__(self, key: str) -> _Slot:
+        return _Slot(key)
+
+
+class Fragment:
+    """预编译的 HTML 片段：fragment(**槽位) → 字符串，按槽位值 LRU 缓存。"""
+
+    def __init__(self, template: str, maxsize: int = 256, **consts):
+        self.template = template.format_map(_Consts(consts)) if consts else template
+        self._render  = lru_cache(maxsize=maxsize)(self._format)
+        with _LOCK:
+            _REGISTRY.append(self)
+
+    def _format(self, **slots) -> str:
+        return self.template.format_map(slots)
+
+    def __call__(self, **slots) -> str:
+        return self._render(**slots)
+
+    def cache_info(self):
+        return self._render.cache_info()
+
+
+def stats() -> dict:
+    """全部片段的缓存统计：hits / misses / size。"""
+    with _LOCK:
+        infos = [f.cache_info() for f in _REGISTRY]
+    return {"fragments": len(infos),
+            "hits":      sum(i.hits for i in infos),
+            "misses":    sum(i.misses for i in infos),
+            "size":      sum(i.currsize for i in infos)}
+
+
+def clear() -> None:
+    """清空全部片段的渲染缓存。"""
+    with _LOCK:
+        for f in _REGISTRY:
+            f._render.cache_clear()
@@ -0,0 +1,263 @@
+"""
+技术指标
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+calc_indicators   ─ 整段向量化计算（pandas 公式，作为基准实现，适合回测等一次性计算）
+IndicatorEngine   ─ 增量指标引擎，保存各指标的递推状态，每根新 K 线 / 修订 K 线 O(1) 更新
+
+两者输出列一致：ema9/21/55/200、rsi、macd/macd_signal/macd_hist、K/D/J、
+bb_upper/bb_lower/bb_mid、atr。
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLS     = ["open", "high", "low", "close", "volume"]
+INDICATOR_COLS = ["ema9", "ema21", "ema55", "ema200", "rsi",
+                  "macd", "macd_signal", "macd_hist", "K", "D", "J",
+                  "bb_upper", "bb_lower", "bb_mid", "atr"]
+# 引擎输出共用同一个列索引对象，下游可以用 `is` 判断列布局，省去逐列比较
+FRAME_COLUMNS  = pd.Index(OHLCV_COLS + INDICATOR_COLS)
+_EMA_SPANS     = (9, 21, 55, 200, 12, 26)
+_NAN           = float("nan")
+
+
+def calc_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """整段计算全部指标，返回新的 DataFrame，不修改入参。"""
+    df = df.copy()
+    c = df["close"].astype(float)
+    h = df["high"].astype(float)
+    l = df["low"].astype(float)
+    for p in [9, 21, 55, 200]:
+        df[f"ema{p}"] = c.ewm(span=p, adjust=False).mean()
+    delta = c.diff()
+    gain  = delta.clip(lower=0).ewm(span=14, adjust=False).mean()
+    loss  = (-delta.clip(upper=0)).ewm(span=14, adjust=False).mean()
+    df["rsi"]         = 100 - 100 / (1 + gain / loss.replace(0, np.nan))
+    ema12             = c.ewm(span=12, adjust=False).mean()
+    ema26             = c.ewm(span=26, adjust=False).mean()
+    df["macd"]        = ema12 - ema26
+    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
+    df["macd_hist"]   = df["macd"] - df["macd_signal"]
+    low9              = l.rolling(9, min_periods=1).min()
+    high9             = h.rolling(9, min_periods=1).max()
+    rsv               = (c - low9) / (high9 - low9 + 1e-12) * 100
+    df["K"]           = rsv.ewm(com=2, adjust=False).mean()
+    df["D"]           = df["K"].ewm(com=2, adjust=False).mean()
+    df["J"]           = 3 * df["K"] - 2 * df["D"]
+    ma20              = c.rolling(20).mean()
+    std20             = c.rolling(20).std()
+    df["bb_upper"]    = ma20 + 2 * std20
+    df["bb_lower"]    = ma20 - 2 * std20
+    df["bb_mid"]      = ma20
+    prev_c            = c.shift(1)
+    tr                = pd.concat([h - l, (h - prev_c).abs(), (l - prev_c).abs()], axis=1).max(axis=1)
+    df["atr"]         = tr.rolling(14).mean()
+    return df
+
+
+def ohlcv_arrays(df: pd.DataFrame, unit: str = "ns") -> tuple:
+    """df → (int64 时间戳, N × 5 OHLCV float 数组)。
+
+    按列名取子表（df[OHLCV_COLS]）在 pandas 3 的字符串列索引上要几百微秒，
+    比一根 K 线的全部指标计算还贵；逐列查位置再按位置取只要几微秒。
+    """
+    pos = [df.columns.get_loc(c) for c in OHLCV_COLS]
+    idx = df.index if isinstance(df.index, pd.DatetimeIndex) else pd.DatetimeIndex(df.index)
+    return idx.as_unit(unit).asi8, df.to_numpy()[:, pos].astype(float)
+
+
+def _ewm(prev, x: float, alpha: float) -> float:
+    """pandas ewm(adjust=False) 的单步递推，运算顺序与 pandas 保持一致。"""
+    if prev is None:
+        return x
+    old_wt = 1.0 - alpha
+    return (old_wt * prev + alpha * x) / (old_wt + alpha)
+
+
+class _State:
+    """一根 K 线处理完之后的全部递推状态。"""
+    __slots__ = ("ema", "macd_sig", "gain", "loss", "K", "D", "prev_close",
+                 "lows", "highs", "closes", "trs")
+
+    def __init__(self):
+        self.ema        = dict.fromkeys(_EMA_SPANS)
+        self.macd_sig   = None
+        self.gain       = None
+        self.loss       = None
+        self.K          = None
+        self.D          = None
+        self.prev_close = None
+        self.lows       = deque(maxlen=9)
+        self.highs      = deque(maxlen=9)
+        self.closes     = deque(maxlen=20)
+        self.trs        = deque(maxlen=14)
+
+    def copy(self) -> "_State":
+        s = _State.__new__(_State)
+        s.ema        = dict(self.ema)
+        s.macd_sig   = self.macd_sig
+        s.gain       = self.gain
+        s.loss       = self.loss
+        s.K          = self.K
+        s.D          = self.D
+        s.prev_close = self.prev_close
+        s.lows       = self.lows.copy()
+        s.highs      = self.highs.copy()
+        s.closes     = self.closes.copy()
+        s.trs        = self.trs.copy()
+        return s
+
+
+def frame_fingerprint(df: pd.DataFrame) -> tuple:
+    """指标快照只会修订最后一根，首尾时间戳 + 根数 + 最后一根的数值即可区分内容（图表 / 快照的缓存键）。"""
+    idx = df.index
+    return len(df), idx[0].value, idx[-1].value, df.to_numpy()[-1].tobytes()
+
+
+class IndicatorEngine:
+    """增量指标引擎。
+
+    update_bar 接收一根 K 线：时间戳新于最后一根则追加，等于最后一根则视为修订（未收盘 K 线变化），
+    通过回退到上一根结束时的状态重新计算，均为 O(1)。只保留最近 max_bars 根的输出，
+    存在 2×max_bars 行的 float64 缓冲里，写满时把最后 max_bars-1 行搬到开头（摊销 O(1)）。
+
+    frame() 返回的 DataFrame 在更新后第一次读取时整体重建（没人看的周期、两次刷新之间的多次推送
+    都不构造），读线程拿到的始终是完整快照；写入（REST 刷新、推送）与重建由内部锁串行化。
+    """
+
+    def __init__(self, max_bars: int = 300, source: str = None):
+        self.max_bars = max_bars
+        self.source   = source
+        self._state   = _State()
+        self._base    = None          # 最后一根 K 线之前的状态，用于修订
+        self._buf     = np.empty((2 * max_bars, len(OHLCV_COLS) + len(INDICATOR_COLS)))
+        self._ts      = np.empty(2 * max_bars, dtype=np.int64)
+        self._n       = 0             # 缓冲区写入位置
+        self._frame   = None
+        self._stale   = False         # 有更新尚未反映到 _frame
+        self._lock    = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, max_bars: int = 300, source: str = None) -> "IndicatorEngine":
+        eng = cls(max_bars=max_bars, source=source or df.attrs.get("source"))
+        eng.update_frame(df)
+        return eng
+
+    @property
+    def last_ts(self):
+        return pd.Timestamp(int(self._ts[self._n - 1])) if self._n else None
+
+    def __len__(self) -> int:
+        return min(self._n, self.max_bars)
+
+    # ── 更新 ─────────────────────────────────────────────────────────────────
+    def update_bar(self, ts, o: float, h: float, l: float, c: float, v: float) -> None:
+        with self._lock:
+            self._apply(pd.Timestamp(ts).value, o, h, l, c, v)
+            self._stale = True
+
+    def update_frame(self, df: pd.DataFrame) -> None:
+        """按顺序应用 df 中的 K 线；早于最后一根的已收盘 K 线被忽略。"""
+        self.update_arrays(*ohlcv_arrays(df))
+
+    def update_arrays(self, tss: np.ndarray, data: np.ndarray) -> None:
+        """同 update_frame，直接给 int64 纳秒时间戳与 N × 5 OHLCV 数组，省去构造 DataFrame。"""
+        with self._lock:
+            for i in range(len(tss)):
+                o, h, l, c, v = data[i]
+                self._apply(int(tss[i]), o, h, l, c, v)
+            self._stale = True
+
+    def _apply(self, ts: int, o, h, l, c, v) -> None:
+        last = int(self._ts[self._n - 1]) if self._n else None
+        if last is not None and ts < last:
+            return
+        if last is not None and ts == last:
+            self._n    -= 1
+            self._state = self._base.copy()
+        else:
+            self._base = self._state.copy()
+            if self._n == len(self._ts):
+                keep = self.max_bars - 1
+                self._buf[:keep] = self._buf[self._n - keep:self._n]
+                self._ts[:keep]  = self._ts[self._n - keep:self._n]
+                self._n = keep
+        self._buf[self._n] = (o, h, l, c, v) + self._step(self._state, h, l, c)
+        self._ts[self._n]  = ts
+        self._n += 1
+
+    @staticmethod
+    def _step(s: _State, h: float, l: float, c: float) -> tuple:
+        ema = s.ema
+        for p in _EMA_SPANS:
+            ema[p] = _ewm(ema[p], c, 2.0 / (p + 1))
+
+        # RSI：第一根没有 delta，输出 NaN
+        rsi = _NAN
+        if s.prev_close is not None:
+            delta  = c - s.prev_close
+            s.gain = _ewm(s.gain, max(delta, 0.0), 2.0 / 15)
+            s.loss = _ewm(s.loss, -min(delta, 0.0), 2.0 / 15)
+            if s.loss != 0:
+                rsi = 100 - 100 / (1 + s.gain / s.loss)
+
+        macd       = ema[12] - ema[26]
+        s.macd_sig = _ewm(s.macd_sig, macd, 2.0 / 10)
+
+        s.lows.append(l)
+        s.highs.append(h)
+        low9, high9 = min(s.lows), max(s.highs)
+        rsv = (c - low9) / (high9 - low9 + 1e-12) * 100
+        s.K = _ewm(s.K, rsv, 1.0 / 3)
+        s.D = _ewm(s.D, s.K, 1.0 / 3)
+
+        s.closes.append(c)
+        if len(s.closes) == 20:
+            mid = math.fsum(s.closes) / 20
+            std = math.sqrt(math.fsum((x - mid) ** 2 for x in s.closes) / 19)
+            bb_u, bb_l = mid + 2 * std, mid - 2 * std
+        else:
+            mid = bb_u = bb_l = _NAN
+
+        if s.prev_close is None:
+            tr = h - l
+        else:
+            tr = max(h - l, abs(h - s.prev_close), abs(l - s.prev_close))
+        s.trs.append(tr)
+        atr = math.fsum(s.trs) / 14 if len(s.trs) == 14 else _NAN
+        s.prev_close = c
+
+        return (ema[9], ema[21], ema[55], ema[200], rsi,
+                macd, s.macd_sig, macd - s.macd_sig, s.K, s.D, 3 * s.K - 2 * s.D,
+                bb_u, bb_l, mid, atr)
+
+    def _publish(self) -> None:
+        if not self._n:
+            self._frame = None
+            return
+        lo  = max(0, self._n - self.max_bars)
+        idx = pd.DatetimeIndex(self._ts[lo:self._n].astype("datetime64[ns]"), name="ts")
+        df  = pd.DataFrame(self._buf[lo:self._n].copy(), index=idx, columns=FRAME_COLUMNS)
+        df.attrs["source"] = self.source
+        self._frame = df
+
+    # ── 读取 ─────────────────────────────────────────────────────────────────
+    def last(self, back: int = 0) -> Optional[np.ndarray]:
+        """倒数第 back + 1 根 K 线的 OHLCV + 指标（FRAME_COLUMNS 顺序）的副本，不存在时为 None；
+        只要最新值时不必构造整张快照。back=1 即最后一根已收盘的 K 线。"""
+        with self._lock:
+            return self._buf[self._n - 1 - back].copy() if back < min(self._n, self.max_bars) else None
+
+    def frame(self) -> pd.DataFrame:
+        """最近 max_bars 根 K 线及指标，只读快照。"""
+        if self._stale:
+            with self._lock:
+                if self._stale:
+                    self._publish()
+                    self._stale = False
+        return self._frame
@@ -0,0 +1,314 @@
+"""
+运行时埋点
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+进程级计时 / 计数，回答“这一页为什么慢、数据是不是退回了模拟”：
+
+  · timer(stage) / timed(stage)：按阶段计时，写入该阶段的延迟直方图 —— 固定桶的累计计数（Prometheus
+    histogram，自进程启动）+ 最近 window 个样本（滚动分位数 / 滚动直方图，只反映现状）
+  · rerun(page)：一次重跑的分段明细。重跑内嵌套的阶段按自身耗时记（子阶段从父阶段里扣掉），
+    各段加上 other 恰好等于总耗时；最近 RERUNS 次留作诊断页的明细表。计时上下文按线程隔离
+    （contextvars），线程池里的阶段（交易所请求等）只进直方图，不进发起它的那次重跑
+  · count(name, **labels)：计数器，如缓存命中 / 未命中、退回模拟数据；error(stage, exc) 记异常类型计数
+    与最近几条异常信息（原来 except Exception 直接吞掉，什么也不留）
+  · register(prefix, fn, **labels)：采集时才调用的读数，fn() 返回 {名字: 数值}，接各组件已有的统计
+    （图表缓存、快照中心、提醒引擎、推送行情…）
+  · prometheus()：text exposition format 0.0.4；serve(host, port) 起本地 /metrics 供抓取
+"""
+
+import bisect
+import contextvars
+import functools
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+
+# 秒；最后一个桶是 +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW  = 512          # 每个阶段保留的最近样本数
+RERUNS  = 50           # 保留的最近重跑明细条数
+ERRORS  = 20           # 保留的最近异常条数
+
+
+class Rerun(NamedTuple):
+    page:     str
+    at:       float     # unix 秒
+    total_ms: float
+    stages:   dict      # {阶段: 自身耗时 ms}，含 other
+
+
+class ErrorEvent(NamedTuple):
+    stage:   str
+    kind:    str        # 异常类名
+    message: str
+    at:      float
+
+
+class Histogram:
+    """单个阶段的延迟：累计桶计数 + 最近 window 个样本。线程安全。"""
+
+    def __init__(self, window: int = WINDOW):
+        self.counts  = np.zeros(len(BUCKETS) + 1, np.int64)
+        self.count   = 0
+        self.sum     = 0.0
+        self.max     = 0.0
+        self._edges  = np.array(BUCKETS)
+        self._recent = deque(maxlen=window)
+        self._lock   = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count     += 1
+            self.sum       += seconds
+            self.max        = max(self.max, seconds)
+            self._recent.append(seconds)
+
+    def recent(self) -> np.ndarray:
+        with self._lock:
+            return np.fromiter(self._recent, float, len(self._recent))
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)) -> list:
+        """最近样本的分位数（秒），没有样本时为 None。"""
+        r = self.recent()
+        return [float(np.quantile(r, q)) for q in qs] if len(r) else [None] * len(qs)
+
+    def rolling(self) -> np.ndarray:
+        """最近样本落在各桶的个数（非累计，最后一个为 +Inf 桶）。"""
+        r = self.recent()
+        return np.bincount(np.searchsorted(self._edges, r), minlength=len(BUCKETS) + 1)
+
+
+class _Frame:
+    __slots__ = ("stage", "t0", "child")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.t0    = time.perf_counter()
+        self.child = 0.0
+
+
+class _Active:
+    """进行中的一次重跑：阶段栈与各阶段自身耗时。"""
+    __slots__ = ("page", "t0", "stack", "stages")
+
+    def __init__(self, page: str):
+        self.page   = page
+        self.t0     = time.perf_counter()
+        self.stack  = []
+        self.stages = {}
+
+
+class Metrics:
+    """进程级埋点注册表。"""
+
+    def __init__(self, namespace: str = "aegis", window: int = WINDOW):
+        self.namespace = namespace
+        self.window    = window
+        self.started   = time.time()
+        self._hist: dict   = {}                  # 阶段 → Histogram
+        self._pages: dict  = {}                  # 页面 → 整次重跑的 Histogram
+        self._counts: dict = {}                  # (名字, ((标签, 值), …)) → 次数
+        self._collectors   = []                  # (prefix, fn, labels)
+        self._reruns       = deque(maxlen=RERUNS)
+        self._errors       = deque(maxlen=ERRORS)
+        self._active       = contextvars.ContextVar(f"{namespace}_rerun", default=None)
+        self._lock         = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        h = self._hist.get(stage)
+        if h is None:
+            with self._lock:
+                h = self._hist.setdefault(stage, Histogram(self.window))
+        return h
+
+    # ── 计时 ─────────────────────────────────────────────────────────────────
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        run = self._active.get()
+        fr  = _Frame(stage)
+        if run is not None:
+            run.stack.append(fr)
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - fr.t0
+            self.observe(stage, dt)
+            if run is not None:
+                run.stack.pop()
+                run.stages[stage] = run.stages.get(stage, 0.0) + dt - fr.child
+                if run.stack:
+                    run.stack[-1].child += dt
+
+    def timed(self, stage: str) -> Callable:
+        """装饰器版 timer。"""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*a, **kw):
+                with self.timer(stage):
+                    return fn(*a, **kw)
+            return wrapper
+        return deco
+
+    @contextmanager
+    def rerun(self, page: str):
+        """一次重跑的分段明细；已在某次重跑里时（如整页重跑内的片段）不另起一条。"""
+        if self._active.get() is not None:
+            yield
+            return
+        run   = _Active(page)
+        token = self._active.set(run)
+        try:
+            yield
+        finally:
+            self._active.reset(token)
+            total  = time.perf_counter() - run.t0
+            stages = {k: v * 1e3 for k, v in run.stages.items()}
+            stages["other"] = max(total * 1e3 - sum(stages.values()), 0.0)
+            self._reruns.append(Rerun(page, time.time(), total * 1e3, stages))
+            h = self._pages.get(page)
+            if h is None:
+                with self._lock:
+                    h = self._pages.setdefault(page, Histogram(self.window))
+            h.observe(total)
+
+    # ── 计数 ─────────────────────────────────────────────────────────────────
+    def count(self, name: str, n: int = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + n
+
+    def error(self, stage: str, exc: BaseException) -> None:
+        """记一次被吞掉的异常：按 (阶段, 类型) 计数，留最近 ERRORS 条信息。"""
+        kind = type(exc).__name__
+        self.count("errors", stage=stage, kind=kind)
+        msg  = str(exc) or "".join(traceback.format_exception_only(type(exc), exc)).strip()
+        self._errors.append(ErrorEvent(stage, kind, msg[:300], time.time()))
+
+    def register(self, prefix: str, fn: Callable[[], dict], **labels) -> None:
+        """采集时调用 fn() -> {名字: 数值}，导出为 <namespace>_<prefix>_<名字>{labels}。"""
+        with self._lock:
+            self._collectors.append((prefix, fn, tuple(sorted(labels.items()))))
+
+    # ── 读 ───────────────────────────────────────────────────────────────────
+    def counters(self) -> dict:
+        with self._lock:
+            return dict(self._counts)
+
+    def total(self, name: str, **labels) -> int:
+        """名字为 name、且标签包含 labels 的计数之和。"""
+        want = set(labels.items())
+        return sum(v for (n, ls), v in self.counters().items() if n == name and want <= set(ls))
+
+    def stages(self) -> dict:
+        with self._lock:
+            return dict(self._hist)
+
+    def pages(self) -> dict:
+        with self._lock:
+            return dict(self._pages)
+
+    def reruns(self) -> list:
+        return list(self._reruns)
+
+    def errors(self) -> list:
+        return list(self._errors)
+
+    def collect(self) -> list:
+        """[(prefix, 标签, {名字: 数值})]；读数函数出错的跳过并计数。"""
+        with self._lock:
+            collectors = list(self._collectors)
+        out = []
+        for prefix, fn, labels in collectors:
+            try:
+                out.append((prefix, labels, {k: float(v) for k, v in (fn() or {}).items()
+                                             if isinstance(v, (int, float, np.number)) and not isinstance(v, bool)}))
+            except Exception as e:
+                self.error(f"collect.{prefix}", e)
+        return out
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format 0.0.4。"""
+        ns, out = self.namespace, []
+
+        def lbl(pairs) -> str:
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+        def hist(name: str, label: str, items: dict, help_: str) -> None:
+            out.append(f"# HELP {ns}_{name} {help_}")
+            out.append(f"# TYPE {ns}_{name} histogram")
+            for key, h in sorted(items.items()):
+                with h._lock:
+                    counts, n, s = h.counts.copy(), h.count, h.sum
+                cum = np.cumsum(counts)
+                for le, c in zip(BUCKETS + ("+Inf",), cum):
+                    out.append(f"{ns}_{name}_bucket{lbl([(label, key), ('le', le)])} {int(c)}")
+                out.append(f"{ns}_{name}_sum{lbl([(label, key)])} {s:.9g}")
+                out.append(f"{ns}_{name}_count{lbl([(label, key)])} {n}")
+
+        hist("stage_seconds", "stage", self.stages(), "Wall time per instrumented stage.")
+        hist("rerun_seconds", "page", self.pages(), "Wall time per page rerun.")
+
+        counts = {}
+        for (name, labels), v in self.counters().items():
+            counts.setdefault(name, []).append((labels, v))
+        for name, rows in sorted(counts.items()):
+            out.append(f"# TYPE {ns}_{name}_total counter")
+            out += [f"{ns}_{name}_total{lbl(labels)} {v}" for labels, v in sorted(rows)]
+
+        gauges = {}
+        for prefix, labels, values in self.collect():
+            for k, v in values.items():
+                gauges.setdefault(f"{prefix}_{k}", []).append((labels, v))
+        for name, rows in sorted(gauges.items()):
+            out.append(f"# TYPE {ns}_{name} gauge")
+            out += [f"{ns}_{name}{lbl(labels)} {v:.9g}" for labels, v in rows]
+
+        out.append(f"# TYPE {ns}_uptime_seconds gauge")
+        out.append(f"{ns}_uptime_seconds {time.time() - self.started:.3f}")
+        return "\n".join(out) + "\n"
+
+    # ── /metrics ─────────────────────────────────────────────────────────────
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> Optional[ThreadingHTTPServer]:
+        """后台线程起本地 HTTP 服务，GET /metrics 返回 prometheus()；端口被占用时返回 None。"""
+        metrics = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, port), _Handler)
+        except OSError:
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# 进程级默认实例：模块只导入一次，Streamlit 每次重跑、各会话线程共用
+METRICS = Metrics()
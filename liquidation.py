@@ -0,0 +1,359 @@
+"""
+清算价位估算
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+由成交流与持仓量（OI）推算各价位上挂着多少待清算的多 / 空仓位，增量更新：
+
+  · 开仓：OI 增加 ΔOI 时，新增 ΔOI 多单与 ΔOI 空单；多单按这段时间主动买单的成交价分布入场，
+    空单按主动卖单分布入场（没有 OI 数据时，按 open_ratio × 成交额直接计为开仓）
+  · 杠杆分层：每笔入场按杠杆档位（默认 5x ~ 100x 的经验分布）拆开，
+    多单清算价 = 入场价 × (1 − 1/L + mmr)，空单 = 入场价 × (1 + 1/L − mmr)
+  · 平仓：OI 减少时两边按比例缩减；价格穿过的清算价位整段清零、计入已清算量；
+    老仓位按半衰期指数衰减（惰性实现：存的是乘过时间权重的值，读出时再除，更新仍是 O(档位)）
+  · 存储：以参考价为中心的等宽价格桶（稠密数组，价格走出范围时向两侧扩展），
+    一批成交的投影 = 档位 × 成交 个清算价一次 np.bincount；任意区间、任意宽度的聚合由前缀和求出
+
+ExchangeTradeFeed 轮询交易所的成交与持仓量驱动引擎；SyntheticTradeFeed 是本地合成成交流（带 OI 序列），
+只在拿不到交易所数据时顶替，也供基准使用。两者都是 pump(engine, until_ms) 接口。
+"""
+
+import threading
+from collections import deque
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+
+DEFAULT_TIERS = {5: .10, 10: .25, 20: .30, 25: .15, 50: .12, 100: .08}
+HOUR_MS       = 3_600_000
+DAY_MS        = 24 * HOUR_MS
+
+
+class TradeBatch(NamedTuple):
+    ts:     np.ndarray           # 毫秒，升序
+    price:  np.ndarray
+    amount: np.ndarray           # 币本位数量
+    side:   np.ndarray           # +1 主动买 / −1 主动卖
+    oi:     float = float("nan")  # 批末持仓量（USDT 名义），没有为 nan
+
+
+class LiqMap(NamedTuple):
+    price:     np.ndarray   # 各桶下沿
+    long:      np.ndarray   # 多单待清算量（USDT）
+    short:     np.ndarray   # 空单待清算量（USDT）
+    long_cum:  np.ndarray   # 从当前价跌到该桶，累计清算的多单
+    short_cum: np.ndarray   # 从当前价涨到该桶，累计清算的空单
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# ENGINE
+# ═════════════════════════════════════════════════════════════════════════════
+
+class LiquidationEngine:
+    """单个交易对的清算价位分布，线程安全。
+
+    ref_price 决定价格桶：桶宽 = ref_price × bucket，初始覆盖 ref_price × (1 ± span)。
+    tiers 为 {杠杆: 占比}，mmr 为维持保证金率，half_life 为仓位半衰期（毫秒）。
+    """
+
+    def __init__(self, ref_price: float, bucket: float = 0.0005, span: float = 0.5, tiers: dict = None,
+                 mmr: float = 0.005, half_life: float = 3 * DAY_MS, open_ratio: float = 0.3):
+        tiers = tiers or DEFAULT_TIERS
+        w     = np.array(list(tiers.values()), dtype=float)
+        inv   = 1.0 / np.array(list(tiers.keys()), dtype=float)
+        self.step       = ref_price * bucket
+        self.origin     = ref_price * (1 - span)
+        self.half_life  = half_life
+        self.open_ratio = open_ratio
+        self.price      = ref_price
+        self.ts         = None
+        self.trades     = 0
+        self._w         = w / w.sum()
+        self._long_mul  = 1 - inv + mmr
+        self._short_mul = 1 + inv - mmr
+        n = int(np.ceil(2 * span / bucket))
+        self._long      = np.zeros(n)
+        self._short     = np.zeros(n)
+        self._pend_buy  = np.zeros(n)   # 上次 OI 以来的主动买 / 卖成交额，按入场价分桶
+        self._pend_sell = np.zeros(n)
+        self._oi: Optional[float] = None
+        self._t0        = None          # 衰减权重的基准时间
+        self._realized  = deque()       # (ts, 多单清算量, 空单清算量)
+        self._lock      = threading.Lock()
+
+    # ── 价格桶 ───────────────────────────────────────────────────────────────
+    def _index(self, p) -> np.ndarray:
+        return np.floor((np.asarray(p, dtype=float) - self.origin) / self.step).astype(np.int64)
+
+    def _fit(self, lo: int, hi: int) -> None:
+        """扩展数组，使下标 lo..hi 落在范围内（不低于价格 0）。"""
+        left  = min(max(-lo, 0), int(self.origin // self.step))
+        right = max(hi + 1 - len(self._long), 0)
+        if not (left or right):
+            return
+        for name in ("_long", "_short", "_pend_buy", "_pend_sell"):
+            setattr(self, name, np.pad(getattr(self, name), (left, right)))
+        self.origin -= left * self.step
+
+    def _weight(self, ts: int) -> float:
+        """ts 时刻的衰减权重（相对 _t0）；过大时把存量折算回来、重置基准。"""
+        if self._t0 is None:
+            self._t0 = ts
+        w = 2.0 ** ((ts - self._t0) / self.half_life)
+        if w > 2.0 ** 40:
+            for arr in (self._long, self._short):
+                arr /= w
+            self._t0, w = ts, 1.0
+        return w
+
+    # ── 更新 ─────────────────────────────────────────────────────────────────
+    def _project(self, entry: np.ndarray, notional: np.ndarray, mul: np.ndarray, out: np.ndarray, w: float) -> None:
+        """一批入场（价格、名义额）按杠杆档位投影到清算价，累加进 out。"""
+        if not len(entry):
+            return
+        liq = entry[None, :] * mul[:, None]
+        idx = self._index(liq).ravel()
+        self._fit(int(idx.min()), int(idx.max()))
+        idx = self._index(liq).ravel()          # 扩展后 origin 可能变了
+        out = getattr(self, out)
+        keep = idx >= 0
+        out += np.bincount(idx[keep], (notional[None, :] * self._w[:, None] * w).ravel()[keep], minlength=len(out))
+
+    def _sweep(self, lo: float, hi: float, ts: int, w: float) -> None:
+        """价格到过 [lo, hi]：清算价 ≥ lo 的多单、≤ hi 的空单全部清算。"""
+        i, j = int(self._index(lo)), int(self._index(hi))
+        i, j = max(i, 0), min(j, len(self._short) - 1)
+        long_hit  = self._long[i:].sum() / w if i < len(self._long) else 0.0
+        short_hit = self._short[:j + 1].sum() / w if j >= 0 else 0.0
+        if long_hit or short_hit:
+            self._long[i:] = 0.0
+            self._short[:j + 1] = 0.0
+            self._realized.append((ts, long_hit, short_hit))
+        while self._realized and self._realized[0][0] < ts - DAY_MS:
+            self._realized.popleft()
+
+    def ingest(self, batch: TradeBatch) -> None:
+        """一批成交（同一批内先按价格区间清算，再记入场）；batch.oi 非 nan 时随后更新 OI。"""
+        if not len(batch.ts):
+            if not np.isnan(batch.oi):
+                self.update_oi(batch.oi, self.ts or 0)
+            return
+        with self._lock:
+            ts = int(batch.ts[-1])
+            w  = self._weight(ts)
+            self._sweep(float(batch.price.min()), float(batch.price.max()), ts, w)
+            notional = batch.price * batch.amount
+            buy      = batch.side > 0
+            if self._oi is None and np.isnan(batch.oi):
+                # 没有 OI：成交额的 open_ratio 直接计为开仓，主动买方开多、主动卖方开空
+                self._project(batch.price[buy], notional[buy] * self.open_ratio, self._long_mul, "_long", w)
+                self._project(batch.price[~buy], notional[~buy] * self.open_ratio, self._short_mul, "_short", w)
+            else:
+                idx = self._index(batch.price)
+                self._fit(int(idx.min()), int(idx.max()))
+                idx = self._index(batch.price)
+                n   = len(self._pend_buy)
+                self._pend_buy  += np.bincount(idx[buy], notional[buy], minlength=n)
+                self._pend_sell += np.bincount(idx[~buy], notional[~buy], minlength=n)
+            self.price   = float(batch.price[-1])
+            self.ts      = ts
+            self.trades += len(batch.ts)
+        if not np.isnan(batch.oi):
+            self.update_oi(batch.oi, ts)
+
+    def ingest_many(self, batches: Iterable[TradeBatch]) -> None:
+        for b in batches:
+            self.ingest(b)
+
+    def update_oi(self, oi: float, ts: int) -> None:
+        """新的持仓量读数：增量按上次以来的主动买 / 卖分布开仓，减量两边按比例平仓。第一次读数只作基准。"""
+        with self._lock:
+            prev, self._oi = self._oi, float(oi)
+            buy, sell = self._pend_buy, self._pend_sell
+            if prev is not None and oi > prev:
+                w      = self._weight(ts)
+                center = self.origin + (np.arange(len(buy)) + 0.5) * self.step
+                for pend, mul, out in ((buy if buy.any() else sell, self._long_mul, "_long"),
+                                       (sell if sell.any() else buy, self._short_mul, "_short")):
+                    nz = np.flatnonzero(pend)
+                    if len(nz):
+                        self._project(center[nz], (oi - prev) * pend[nz] / pend[nz].sum(), mul, out, w)
+            elif prev is not None and oi < prev and prev > 0:
+                self._long  *= oi / prev
+                self._short *= oi / prev
+            self._pend_buy.fill(0.0)
+            self._pend_sell.fill(0.0)
+
+    def apply(self, ev: dict) -> None:
+        """推送事件（streaming 的格式）：trade 事件需带 side（buy / sell），open_interest 事件带 value。"""
+        if ev.get("type") == "trade":
+            side = 1 if ev.get("side") == "buy" else -1
+            self.ingest(TradeBatch(np.array([ev["ts"]], dtype=np.int64), np.array([float(ev["price"])]),
+                                   np.array([float(ev["amount"])]), np.array([side])))
+        elif ev.get("type") == "open_interest":
+            self.update_oi(float(ev["value"]), int(ev["ts"]))
+
+    # ── 读取 ─────────────────────────────────────────────────────────────────
+    def snapshot(self, lo: float, hi: float, step: float) -> LiqMap:
+        """[lo, hi) 按 step 宽的桶聚合（桶内按价格线性拆分原始桶），附累计清算量。"""
+        with self._lock:
+            w     = 2.0 ** (((self.ts or 0) - (self._t0 or 0)) / self.half_life)
+            edges = np.arange(lo, hi + step / 2, step)
+            pos   = (edges - self.origin) / self.step
+            xs    = np.arange(len(self._long) + 1)
+            sums  = [np.diff(np.interp(pos, xs, np.concatenate(([0.0], np.cumsum(a))))) / w
+                     for a in (self._long, self._short)]
+            price = self.price
+        long, short = sums
+        below = edges[:-1] < price
+        long_cum  = np.where(below, np.cumsum((long * below)[::-1])[::-1], 0.0)
+        short_cum = np.where(~below, np.cumsum(short * ~below), 0.0)
+        return LiqMap(edges[:-1], long, short, long_cum, short_cum)
+
+    def realized(self, window: float = DAY_MS) -> tuple:
+        """最近 window 毫秒内（以最后一笔成交时间计）已清算的 (多单, 空单) 量。"""
+        with self._lock:
+            since = (self.ts or 0) - window
+            got   = [(l, s) for t, l, s in self._realized if t >= since]
+        return (sum(l for l, _ in got), sum(s for _, s in got))
+
+    @property
+    def open_interest(self) -> Optional[float]:
+        return self._oi
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# EXCHANGE FEED
+# ═════════════════════════════════════════════════════════════════════════════
+
+class ExchangeTradeFeed:
+    """交易所成交 + 持仓量（REST 轮询），接口同 SyntheticTradeFeed.pump。
+
+    fetch_trades(since) 返回 ccxt 格式的成交列表（ts ≥ since，since 为 None 时取最近一批），
+    fetch_oi() 返回持仓量名义额（USDT），拿不到时 None。两者的异常原样抛给调用方。
+    同一毫秒的成交按 id 去重；一次 pump 的成交作为一批灌入，批末带这次读到的 OI。
+    """
+
+    def __init__(self, fetch_trades, fetch_oi=None):
+        self.fetch_trades = fetch_trades
+        self.fetch_oi     = fetch_oi
+        self.ts           = None        # 已灌入的最后一笔成交时间（毫秒）
+        self._seen        = set()       # 时间戳 == ts 的成交 id
+        self._lock        = threading.Lock()
+
+    def _batch(self, trades: list, oi: Optional[float]) -> TradeBatch:
+        rows = []
+        for t in trades:
+            ts = t.get("timestamp")
+            if ts is None or not t.get("price") or not t.get("amount"):
+                continue
+            if self.ts is not None and (ts < self.ts or (ts == self.ts and t.get("id") in self._seen)):
+                continue
+            rows.append((int(ts), float(t["price"]), float(t["amount"]), 1 if t.get("side") == "buy" else -1, t.get("id")))
+        rows.sort(key=lambda r: r[0])
+        if rows:
+            last = rows[-1][0]
+            if last != self.ts:
+                self._seen.clear()
+            self._seen.update(r[4] for r in rows if r[0] == last)
+            self.ts = last
+        ts, price, amount, side = (np.array(c) for c in zip(*[r[:4] for r in rows])) if rows else \
+            (np.empty(0, np.int64), np.empty(0), np.empty(0), np.empty(0, np.int64))
+        return TradeBatch(ts.astype(np.int64), price, amount, side, float("nan") if oi is None else float(oi))
+
+    def pump(self, engine: LiquidationEngine, until_ms: int = None) -> int:
+        """拉取上次以来的成交与当前 OI 并灌进 engine，返回新成交笔数。until_ms 只为与合成流同接口，不使用。"""
+        with self._lock:
+            trades = self.fetch_trades(self.ts) or []
+            oi     = self.fetch_oi() if self.fetch_oi is not None else None
+            batch  = self._batch(trades, oi)
+            engine.ingest(batch)
+        return len(batch.ts)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SYNTHETIC FEED
+# ═════════════════════════════════════════════════════════════════════════════
+
+class SyntheticTradeFeed:
+    """本地合成成交流：泊松到达、几何布朗运动价格（带偶发跳空）、主动方向与价格变动同向居多，
+    每 batch_ms 一批，批末附 OI（随成交额增减、向 oi 均值回归）。只用自己的 Generator，不动全局随机状态。
+
+    rate 为每秒成交笔数，vol 为年化波动率，notional 为平均每笔成交额（USDT）。
+    """
+
+    def __init__(self, price: float, start_ms: int, seed: int = 0, rate: float = 1.0, vol: float = 0.6,
+                 notional: float = 20_000.0, oi: float = 2e8, batch_ms: int = 60_000):
+        self.price    = float(price)
+        self.ts       = int(start_ms)
+        self.rate     = rate
+        self.vol      = vol
+        self.notional = notional
+        self.oi       = float(oi)
+        self.oi_mean  = float(oi)
+        self.batch_ms = batch_ms
+        self._rng     = np.random.default_rng(seed)
+        self._lock    = threading.Lock()
+
+    def _generate(self, until_ms: int) -> tuple:
+        rng = self._rng
+        n   = rng.poisson(self.rate * max(until_ms - self.ts, 0) / 1000)
+        ts  = np.sort(rng.integers(self.ts + 1, until_ms + 1, n)) if n else np.empty(0, dtype=np.int64)
+        dt  = np.diff(ts, prepend=self.ts) / (365 * DAY_MS)
+        ret = rng.normal(0, self.vol * np.sqrt(dt))
+        ret += np.where(rng.random(n) < 2e-5, rng.normal(0, 0.02, n), 0.0)
+        logp = np.log(self.price) + np.cumsum(ret)
+        side = np.where(ret + rng.normal(0, self.vol * np.sqrt(dt) * 0.5) > 0, 1, -1)
+        size = rng.lognormal(np.log(self.notional) - 0.5, 1.0, n)
+        return ts, logp, size, side
+
+    def _split(self, ts, price, size, side, until_ms: int) -> list:
+        """按 batch_ms 切批，逐批推进 OI。"""
+        edges = np.arange(self.ts + self.batch_ms, until_ms + self.batch_ms, self.batch_ms)
+        edges[-1] = until_ms
+        cut   = np.searchsorted(ts, edges, side="right")
+        out, a = [], 0
+        rng   = self._rng
+        for b in cut:
+            flow = size[a:b].sum()
+            self.oi = max(self.oi + flow * rng.normal(0.05, 0.3) - 0.01 * (self.oi - self.oi_mean), 0.0)
+            out.append(TradeBatch(ts[a:b], price[a:b], size[a:b] / price[a:b], side[a:b], self.oi))
+            a = b
+        self.ts = until_ms
+        return out
+
+    def advance(self, until_ms: int) -> list:
+        """生成 (上次, until_ms] 的成交，按批返回 TradeBatch 列表。"""
+        if until_ms <= self.ts:
+            return []
+        ts, logp, size, side = self._generate(until_ms)
+        price = np.exp(logp)
+        if len(price):
+            self.price = float(price[-1])
+        return self._split(ts, price, size, side, until_ms)
+
+    def anchor(self, price: float) -> None:
+        """把之后生成的成交接到 price 上（页面每次渲染对齐实时 ticker，合成价格不会越走越偏）。"""
+        if price > 0:
+            with self._lock:
+                self.price = float(price)
+
+    def pump(self, engine: LiquidationEngine, until_ms: int) -> int:
+        """生成到 until_ms 并按顺序灌进 engine（多个会话同时调用也不会乱序），返回成交笔数。"""
+        with self._lock:
+            batches = self.advance(until_ms)
+            engine.ingest_many(batches)
+        return sum(len(b.ts) for b in batches)
+
+    def history(self, end_ms: int, span_ms: int, end_price: float) -> list:
+        """生成 [end_ms − span_ms, end_ms] 的历史，整体缩放使最后一笔恰好是 end_price；之后从这里继续。"""
+        self.ts = int(end_ms - span_ms)
+        ts, logp, size, side = self._generate(int(end_ms))
+        price = np.exp(logp - (logp[-1] if len(logp) else np.log(self.price)) + np.log(end_price))
+        self.price = float(end_price)
+        return self._split(ts, price, size, side, int(end_ms))
+
+    def events(self, until_ms: int) -> Iterator[dict]:
+        """同 advance，按推送事件格式逐条产出（trade 事件 + 每批末一个 open_interest 事件）。"""
+        for b in self.advance(until_ms):
+            for t, p, q, s in zip(b.ts.tolist(), b.price.tolist(), b.amount.tolist(), b.side.tolist()):
+                yield {"type": "trade", "price": p, "amount": q, "side": "buy" if s > 0 else "sell", "ts": t}
+            yield {"type": "open_interest", "value": b.oi, "ts": int(b.ts[-1]) if len(b.ts) else self.ts}
@@ -0,0 +1,146 @@
+"""
+共享行情缓存
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+进程级、线程安全的行情存储，所有 Streamlit 会话读同一份数据，
+而不是每个浏览器标签页各自向交易所拉一遍。
+
+  · 键为 (exchange, symbol, timeframe)，ticker 使用 timeframe="ticker"，盘口使用 "depth"
+  · single-flight：同一个键的并发未命中只有一个线程真正去拉取，其余线程等待结果；
+    once() 只做合并不写缓存，供一次写回多个键的批量请求用
+  · 存储的对象视为只读，调用方不得原地修改（盘口例外：OrderBook 自带锁，由推送线程原地更新）
+  · max_entries 限制条目数，超出时淘汰最久未访问的键（LRU），内存随币池规模有界
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, wait
+from typing import Any, Callable, Hashable, Optional
+
+TICKER = "ticker"
+DEPTH  = "depth"
+
+
+class _Entry:
+    __slots__ = ("value", "ts")
+
+    def __init__(self, value: Any, ts: float):
+        self.value = value
+        self.ts    = ts
+
+
+class MarketDataStore:
+    """带 TTL 与 single-flight 的进程级 K 线 / ticker 缓存。"""
+
+    def __init__(self, ttl: float = 5.0, wait_timeout: float = 30.0, max_entries: int = 4096):
+        self.ttl          = ttl
+        self.wait_timeout = wait_timeout
+        self.max_entries  = max_entries
+        self.hits         = 0     # 命中且未过期
+        self.misses       = 0     # 由本线程拉取（未命中或已过期）
+        self.waits        = 0     # 等其他线程拉取（single-flight 合并掉的请求）
+        self._lock        = threading.Lock()
+        self._data: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._inflight: dict[Hashable, threading.Event] = {}
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        """写入并做 LRU 淘汰，调用方需持有锁。"""
+        self._data[key] = _Entry(value, time.time())
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def peek(self, key: Hashable) -> Any:
+        """读取当前值（不论是否过期），不触发拉取。"""
+        with self._lock:
+            e = self._data.get(key)
+        return e.value if e is not None else None
+
+    def age(self, key: Hashable) -> float:
+        with self._lock:
+            e = self._data.get(key)
+        return time.time() - e.ts if e is not None else float("inf")
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def get(self, key: Hashable, fetch: Callable[[Any], Any], ttl: Optional[float] = None) -> Any:
+        """命中且未过期直接返回；否则由一个线程调用 fetch(旧值) 刷新，其余线程等待。"""
+        ttl = self.ttl if ttl is None else ttl
+        while True:
+            with self._lock:
+                e = self._data.get(key)
+                if e is not None and time.time() - e.ts < ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return e.value
+                ev = self._inflight.get(key)
+                leader = ev is None
+                if leader:
+                    ev = threading.Event()
+                    self._inflight[key] = ev
+                    self.misses += 1
+                else:
+                    self.waits += 1
+                prev = e.value if e is not None else None
+            if not leader:
+                # 等领头线程写回后重新检查；领头线程失败时由某个等待者接手
+                ev.wait(self.wait_timeout)
+                continue
+            try:
+                value = fetch(prev)
+                with self._lock:
+                    self._store(key, value)
+                return value
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                ev.set()
+
+    def once(self, key: Hashable, fn: Callable[[], Any]) -> None:
+        """只做 single-flight、不写缓存：同一个键已有线程在执行时等它结束，否则由本线程执行 fn()。
+        用于一次请求写回多个键的批量拉取（如 fetch_tickers），不往 LRU 里放占位条目。"""
+        with self._lock:
+            ev = self._inflight.get(key)
+            leader = ev is None
+            if leader:
+                ev = self._inflight[key] = threading.Event()
+        if not leader:
+            ev.wait(self.wait_timeout)
+            return
+        try:
+            fn()
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            ev.set()
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._data.keys())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses, "waits": self.waits}
+
+
+def run_concurrently(jobs: dict, pool: Executor, deadline: float) -> tuple[dict, set]:
+    """在线程池里并发执行 {name: fn}，最多等待 deadline 秒。
+
+    返回 (已完成的结果, 超时或失败的 name 集合)。超时的任务不会被取消，
+    会在后台跑完并写回缓存，下一次刷新直接命中。
+    """
+    futs = {pool.submit(fn): name for name, fn in jobs.items()}
+    done, _ = wait(futs, timeout=deadline)
+    results, missed = {}, set()
+    for fut, name in futs.items():
+        if fut in done and fut.exception() is None:
+            results[name] = fut.result()
+        else:
+            missed.add(name)
+    return results, missed
@@ -0,0 +1,213 @@
+"""
+参数寻优
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+在历史数据上扫描 StrategyParams（网格 / 随机搜索），用 backtest.simulate 评估，输出排名表。
+
+  · 指标只在主进程算一次；特征列与 high/low 放进一块共享内存，工作进程映射成 numpy 视图直接读，
+    任务里只传参数，不序列化价格数组
+  · 进程池默认用满全部 CPU 核
+  · walk-forward：预热段之后切成 folds+1 段，第 k 折在训练段上评估、紧随其后的一段上验证；
+    排名只看训练段，表里同时给出样本外（测试段）结果，过拟合一眼可见
+
+用法:
+  python optimizer.py --csv btc_15m.csv --folds 4 --out results.csv
+  python optimizer.py --csv btc_15m.csv --random 500 --workers 8
+"""
+
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest import metrics, simulate
+from indicators import calc_indicators
+from strategy import FEATURE_COLS, StrategyParams, score_vectorized
+
+# 默认扫描空间：列表为候选值（网格 / 随机均可），(lo, hi) 元组为随机搜索的均匀区间
+DEFAULT_SPACE = {
+    "rsi_oversold":   [25, 30, 35],
+    "rsi_overbought": [70, 75, 80],
+    "weak_score":     [2, 3],
+    "strong_score":   [5, 6],
+    "tp1_atr":        [1.2, 1.8, 2.4],
+    "sl_atr":         [0.8, 1.2, 1.6],
+}
+_SHARED_COLS = FEATURE_COLS + ["high", "low"]
+_WARMUP      = 200  # 跳过 EMA200 尚未稳定的开头
+
+# 工作进程内的共享数组视图（_attach 设置）
+_ARR: dict = {}
+_SHM: Optional[shared_memory.SharedMemory] = None
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SEARCH SPACE
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _check_space(space: dict) -> None:
+    unknown = set(space) - set(StrategyParams._fields)
+    if unknown:
+        raise ValueError(f"未知参数: {sorted(unknown)}")
+
+
+def grid(space: dict) -> list:
+    """space 中全部候选值的笛卡尔积，未列出的参数取默认值。"""
+    _check_space(space)
+    keys = list(space)
+    return [StrategyParams()._replace(**dict(zip(keys, vals)))
+            for vals in itertools.product(*(space[k] for k in keys))]
+
+
+def random_search(space: dict, n: int, seed: int = 0) -> list:
+    """随机抽 n 组参数：列表均匀取一个，(lo, hi) 区间均匀取值（两端都是整数时取整数）。"""
+    _check_space(space)
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        kw = {}
+        for k, v in space.items():
+            if isinstance(v, tuple):
+                lo, hi = v
+                kw[k] = int(rng.integers(lo, hi + 1)) if isinstance(lo, int) and isinstance(hi, int) \
+                    else float(rng.uniform(lo, hi))
+            else:
+                kw[k] = v[int(rng.integers(len(v)))]
+        out.append(StrategyParams()._replace(**kw))
+    return out
+
+
+def walk_forward(n_bars: int, folds: int = 4, anchored: bool = False, warmup: int = _WARMUP) -> list:
+    """[(训练段, 测试段)]，段为 (start, stop)。folds=0 时整段只作训练段、没有测试段。
+
+    滚动（默认）：训练段为第 k 段；anchored：训练段为第 0..k 段。测试段均为第 k+1 段。
+    """
+    start = min(warmup, n_bars)
+    if folds <= 0:
+        return [((start, n_bars), None)]
+    edges = np.linspace(start, n_bars, folds + 2).astype(int)
+    return [((int(edges[0] if anchored else edges[k]), int(edges[k + 1])),
+             (int(edges[k + 1]), int(edges[k + 2]))) for k in range(folds)]
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SHARED MEMORY
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _share(df: pd.DataFrame) -> tuple:
+    """把特征列与 high/low 写进一块共享内存，返回 (shm, spec)；spec 可 pickle，传给工作进程。"""
+    n   = len(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n * len(_SHARED_COLS) * 8))
+    buf = np.ndarray((len(_SHARED_COLS), n), dtype=np.float64, buffer=shm.buf)
+    for i, c in enumerate(_SHARED_COLS):
+        buf[i] = df[c].to_numpy(dtype=float)
+    return shm, (shm.name, n)
+
+
+def _attach(spec: tuple) -> None:
+    """工作进程初始化：映射共享内存为列视图（零拷贝）。
+
+    池内子进程与主进程共用同一个 resource_tracker，重复登记无害；unlink 只由主进程做。
+    """
+    global _SHM
+    name, n = spec
+    _SHM = shared_memory.SharedMemory(name=name)
+    buf = np.ndarray((len(_SHARED_COLS), n), dtype=np.float64, buffer=_SHM.buf)
+    _ARR.clear()
+    _ARR.update({c: buf[i] for i, c in enumerate(_SHARED_COLS)})
+
+
+def _evaluate(job: tuple) -> list:
+    """评估一组参数：整段算一次点位（逐根独立，可直接切片），再分段回测。返回每段的 metrics。"""
+    params, windows, horizon, fill_bars, variant = job
+    levels = score_vectorized(_ARR, params)
+    out = []
+    for a, b in windows:
+        lv = {k: v[a:b] for k, v in levels.items()}
+        r  = simulate(lv, _ARR["high"][a:b], _ARR["low"][a:b], _ARR["close"][a:b],
+                      horizon, fill_bars, variants=(variant,))[variant]
+        out.append(metrics(r["outcome"], r["exit_bar"], r["r"], r["pnl_pct"], r["tp2_hit"]))
+    return out
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# OPTIMIZE
+# ═════════════════════════════════════════════════════════════════════════════
+
+def optimize(df: pd.DataFrame, candidates: list = None, folds: int = 4, anchored: bool = False,
+             objective: str = "expectancy_r", min_trades: int = 30, variant: str = "market",
+             horizon: int = 96, fill_bars: int = 4, workers: int = None) -> pd.DataFrame:
+    """评估全部候选参数，返回排名表（每行一组参数）。
+
+    列：参数各字段 + train_/test_ 前缀的 objective、trades、win_rate、max_dd_r（各折均值）。
+    按 train_{objective} 降序排名；训练段平均成交不足 min_trades 的排在最后。
+    workers=1 时在当前进程里顺序评估（同样走共享内存），便于调试与对比。
+    """
+    if "atr" not in df.columns:
+        df = calc_indicators(df)
+    candidates = candidates if candidates is not None else grid(DEFAULT_SPACE)
+    splits     = walk_forward(len(df), folds, anchored)
+    windows    = [w for tr, te in splits for w in ((tr, te) if te else (tr,))]
+    jobs       = [(p, windows, horizon, fill_bars, variant) for p in candidates]
+    workers    = workers or os.cpu_count() or 1
+
+    shm, spec = _share(df)
+    try:
+        if workers == 1:
+            _attach(spec)
+            results = [_evaluate(j) for j in jobs]
+            _SHM.close()
+        else:
+            with ProcessPoolExecutor(workers, initializer=_attach, initargs=(spec,)) as pool:
+                results = list(pool.map(_evaluate, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    step = 2 if folds > 0 else 1
+    keys = [objective, "trades", "win_rate", "max_dd_r"]
+    rows = []
+    for p, res in zip(candidates, results):
+        row = p._asdict()
+        for k in keys:
+            row[f"train_{k}"] = float(np.nanmean([m[k] for m in res[0::step]]))
+            if folds > 0:
+                row[f"test_{k}"] = float(np.nanmean([m[k] for m in res[1::step]]))
+        rows.append(row)
+
+    table = pd.DataFrame(rows)
+    table["eligible"] = table["train_trades"] >= min_trades
+    table = table.sort_values(["eligible", f"train_{objective}"], ascending=False, kind="stable",
+                              na_position="last").reset_index(drop=True)
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--csv", required=True, help="K 线 CSV（ts/open/high/low/close 列）")
+    ap.add_argument("--out", default="optimizer_results.csv")
+    ap.add_argument("--random", type=int, help="随机搜索组数；不给则对 DEFAULT_SPACE 做网格搜索")
+    ap.add_argument("--folds", type=int, default=4)
+    ap.add_argument("--anchored", action="store_true")
+    ap.add_argument("--objective", default="expectancy_r")
+    ap.add_argument("--variant", default="market")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.csv, index_col="ts", parse_dates=True)
+    cands = random_search(DEFAULT_SPACE, args.random, args.seed) if args.random else grid(DEFAULT_SPACE)
+    table = optimize(df, cands, folds=args.folds, anchored=args.anchored, objective=args.objective,
+                     variant=args.variant, workers=args.workers)
+    table.to_csv(args.out, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", 30, "display.precision", 3):
+        print(table.head(20))
+
+
+if __name__ == "__main__":
+    main()
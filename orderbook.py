@@ -0,0 +1,260 @@
+"""
+L2 盘口
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+按价位维护的买卖盘，接 REST 快照（fetch_order_book）或推送的快照 + 增量：
+
+  · 每侧一个有序键数组（bisect 定位 O(log n)，插入 / 删除是一次 C 层 memmove）+ 价格 → 数量的 dict；
+    数量为 0 即删除该价位，与各交易所的增量语义一致
+  · 增量带序号时检查连续性（prev_seq 必须等于上一条的 seq），带校验和时按 OKX 规则校验
+    （前 25 档买卖交替拼 "价:量"，CRC32 取有符号 32 位）；对不上抛 BookOutOfSync，
+    盘口标记为未同步、之后的增量一律拒绝，直到重新拿到快照
+  · 查询：最优价 / 中间价、距中间价 pct 以内的累计深度、前 n 档累计深度（深度图），
+    以及挂单墙：窗口内名义额明显高于中位数的价位，按相对强度排序，给支撑 / 阻力位用
+
+线程安全：推送线程写、页面读，同一把锁。
+"""
+
+import itertools
+import threading
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+
+CHECKSUM_LEVELS = 25
+_VERSIONS       = itertools.count(1)   # 所有盘口共用，版本号全局唯一
+
+
+class BookOutOfSync(RuntimeError):
+    """增量序号断档或校验和不符，需要重新拿快照。"""
+
+
+class Wall(NamedTuple):
+    price:    float
+    size:     float
+    notional: float   # price × size
+    strength: float   # 名义额 / 窗口内各价位名义额的中位数
+    distance: float   # 距中间价的相对距离
+
+
+def _parse(level) -> tuple:
+    """[price, size, ...]，价格 / 数量可以是数值或交易所原始字符串；返回 (price, size, 原始 "价:量")。"""
+    p, q = level[0], level[1]
+    raw  = f"{p}:{q}" if isinstance(p, str) else None
+    return float(p), float(q), raw
+
+
+def _fmt(x: float) -> str:
+    s = repr(float(x))
+    return s[:-2] if s.endswith(".0") else s
+
+
+class BookSide:
+    """一侧盘口，价位按优先顺序排列：买盘价格降序、卖盘升序。"""
+
+    def __init__(self, descending: bool):
+        self._sign = -1.0 if descending else 1.0
+        self._keys = []    # 排序键 sign × price，升序
+        self._size = {}    # price → size
+        self._raw  = {}    # price → 原始 "价:量"（校验和用，没有时按数值格式化）
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, price: float, size: float, raw: str = None) -> None:
+        if size <= 0:
+            if self._size.pop(price, None) is not None:
+                self._raw.pop(price, None)
+                del self._keys[bisect_left(self._keys, self._sign * price)]
+            return
+        if price not in self._size:
+            insort(self._keys, self._sign * price)
+        self._size[price] = size
+        if raw is not None:
+            self._raw[price] = raw
+        else:
+            self._raw.pop(price, None)
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self._size.clear()
+        self._raw.clear()
+
+    def truncate(self, depth: int) -> None:
+        for k in self._keys[depth:]:
+            p = self._sign * k
+            self._size.pop(p, None)
+            self._raw.pop(p, None)
+        del self._keys[depth:]
+
+    def best(self) -> Optional[tuple]:
+        if not self._keys:
+            return None
+        p = self._sign * self._keys[0]
+        return p, self._size[p]
+
+    def top(self, n: int = None) -> list:
+        """前 n 档 [(price, size)]，按优先顺序。"""
+        return [(p, self._size[p]) for p in (self._sign * k for k in self._keys[:n])]
+
+    def arrays(self, n: int = None, until: float = None) -> tuple:
+        """前 n 档（或直到价格 until，含）的 (价格, 数量) 数组。"""
+        if until is not None:
+            n = bisect_right(self._keys, self._sign * until)
+        keys = self._keys[:n]
+        px   = np.fromiter((self._sign * k for k in keys), float, len(keys))
+        sz   = np.fromiter((self._size[p] for p in px.tolist()), float, len(keys))
+        return px, sz
+
+    def raw(self, n: int) -> list:
+        out = []
+        for k in self._keys[:n]:
+            p = self._sign * k
+            out.append(self._raw.get(p) or f"{_fmt(p)}:{_fmt(self._size[p])}")
+        return out
+
+
+class OrderBook:
+    """单个交易对的 L2 盘口。max_depth 为每侧最多保留的档数（None 不限）。"""
+
+    def __init__(self, symbol: str = "", max_depth: int = None):
+        self.symbol    = symbol
+        self.max_depth = max_depth
+        self.bids      = BookSide(descending=True)
+        self.asks      = BookSide(descending=False)
+        self.seq       = None
+        self.ts        = None
+        self.synced    = False
+        self.version   = 0      # 每次变更取一个全局递增的新号（图表缓存键）
+        self.updates   = 0
+        self.source    = None
+        self._lock     = threading.Lock()
+
+    @classmethod
+    def from_ccxt(cls, book: dict, symbol: str = "", max_depth: int = None) -> "OrderBook":
+        """ccxt fetch_order_book / watch_order_book 的返回值 → OrderBook。"""
+        ob = cls(symbol or book.get("symbol") or "", max_depth)
+        ob.snapshot(book.get("bids") or [], book.get("asks") or [], seq=book.get("nonce"), ts=book.get("timestamp"))
+        return ob
+
+    # ── 更新 ─────────────────────────────────────────────────────────────────
+    def _apply(self, bids: Iterable, asks: Iterable) -> None:
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            for lv in levels:
+                side.update(*_parse(lv))
+            if self.max_depth:
+                side.truncate(self.max_depth)
+
+    def snapshot(self, bids: Iterable, asks: Iterable, seq: int = None, ts: int = None,
+                 checksum: int = None) -> None:
+        """整本替换。"""
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            self._apply(bids, asks)
+            self.seq, self.ts, self.synced = seq, ts, True
+            self.version = next(_VERSIONS)
+            self._verify(checksum)
+
+    def delta(self, bids: Iterable, asks: Iterable, seq: int = None, prev_seq: int = None, ts: int = None,
+              checksum: int = None) -> None:
+        """增量：数量为 0 的价位删除，其余覆盖。序号断档 / 校验和不符抛 BookOutOfSync。"""
+        with self._lock:
+            if not self.synced:
+                raise BookOutOfSync(f"{self.symbol} 盘口未同步，等待快照")
+            if prev_seq is not None and self.seq is not None and prev_seq != self.seq:
+                self.synced = False
+                raise BookOutOfSync(f"{self.symbol} 序号断档：期望 {self.seq}，收到 prev={prev_seq}")
+            self._apply(bids, asks)
+            self.seq      = seq if seq is not None else self.seq
+            self.ts       = ts if ts is not None else self.ts
+            self.version  = next(_VERSIONS)
+            self.updates += 1
+            self._verify(checksum)
+
+    def _verify(self, checksum: Optional[int]) -> None:
+        if checksum is not None and checksum != self._checksum():
+            self.synced = False
+            raise BookOutOfSync(f"{self.symbol} 校验和不符")
+
+    def _checksum(self, n: int = CHECKSUM_LEVELS) -> int:
+        b, a  = self.bids.raw(n), self.asks.raw(n)
+        parts = []
+        for i in range(max(len(b), len(a))):
+            if i < len(b):
+                parts.append(b[i])
+            if i < len(a):
+                parts.append(a[i])
+        c = zlib.crc32(":".join(parts).encode())
+        return c - (1 << 32) if c >= 1 << 31 else c
+
+    def checksum(self, n: int = CHECKSUM_LEVELS) -> int:
+        """OKX 规则的盘口校验和（前 n 档买卖交替拼 "价:量"，CRC32 有符号）。"""
+        with self._lock:
+            return self._checksum(n)
+
+    # ── 查询 ─────────────────────────────────────────────────────────────────
+    @property
+    def best_bid(self) -> Optional[float]:
+        b = self.bids.best()
+        return b[0] if b else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        a = self.asks.best()
+        return a[0] if a else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        b, a = self.best_bid, self.best_ask
+        if b is None or a is None:
+            return b if a is None else a
+        return (b + a) / 2
+
+    @property
+    def spread(self) -> Optional[float]:
+        b, a = self.best_bid, self.best_ask
+        return None if b is None or a is None else a - b
+
+    def cumulative(self, n: int = None) -> tuple:
+        """前 n 档 (买价, 买盘累计名义额, 卖价, 卖盘累计名义额)，价格按离中间价由近到远。"""
+        with self._lock:
+            bp, bs = self.bids.arrays(n)
+            ap, az = self.asks.arrays(n)
+        return bp, np.cumsum(bp * bs), ap, np.cumsum(ap * az)
+
+    def depth_within(self, pct: float) -> tuple:
+        """距中间价 pct 以内的 (买盘名义额, 卖盘名义额)。"""
+        mid = self.mid
+        if mid is None:
+            return 0.0, 0.0
+        with self._lock:
+            bp, bs = self.bids.arrays(until=mid * (1 - pct))
+            ap, az = self.asks.arrays(until=mid * (1 + pct))
+        return float(bp @ bs), float(ap @ az)
+
+    def walls(self, within: float = 0.03, top: int = 3, min_strength: float = 3.0) -> tuple:
+        """距中间价 within 以内的挂单墙：名义额 ≥ min_strength × 窗口中位数，各侧按强度取前 top 个。"""
+        mid = self.mid
+        if mid is None:
+            return [], []
+        with self._lock:
+            sides = [self.bids.arrays(until=mid * (1 - within)), self.asks.arrays(until=mid * (1 + within))]
+        out = []
+        for px, sz in sides:
+            dist = np.abs(px - mid) / mid
+            if not len(px):
+                out.append([])
+                continue
+            notional = px * sz
+            strength = notional / max(float(np.median(notional)), 1e-12)
+            order    = [i for i in np.argsort(-strength)[:top] if strength[i] >= min_strength]
+            out.append([Wall(float(px[i]), float(sz[i]), float(notional[i]), float(strength[i]), float(dist[i]))
+                        for i in order])
+        return out[0], out[1]
+
+    def sr_walls(self, within: float = 0.03, min_strength: float = 3.0) -> tuple:
+        """最强买墙（支撑）与卖墙（阻力）的价格，窗口内没有墙时为 None。"""
+        bid, ask = self.walls(within, 1, min_strength)
+        return (bid[0].price if bid else None), (ask[0].price if ask else None)
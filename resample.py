@@ -0,0 +1,168 @@
+"""
+多周期 K 线合成
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+每个交易对只向交易所要一条基础周期（默认 15m）的 K 线，高周期（1h / 4h，以及 30m、2h、1d 等任意整数倍）
+在本地增量合成，各自接一个 IndicatorEngine：
+
+  · 分桶与交易所一致：桶起点 = ts 向下取整到周期（UTC 对齐）；周线按周一 00:00 UTC 对齐
+  · 合成规则：open 取桶内第一根、high / low 取极值、close 取最后一根、volume 求和
+  · 基础 K 线每次更新只重算受影响的桶（通常是最后一个未收盘的桶），交给指标引擎修订 / 追加，
+    与基础周期根数无关，O(周期倍数)
+  · 历史：高周期要 max_bars 根就得有 倍数 × max_bars 根基础 K 线（4h 由 15m 合成需 4800 根），
+    所以冷启动时各周期可以用交易所原生 K 线做种子（每周期一次请求），之后只靠基础周期滚动；
+    种子里与基础 K 线重叠的桶一律以本地合成结果为准
+  · 内存有界：基础周期只保留 max(max_bars, 2 × 最大倍数) 根，足够覆盖任意高周期当前的桶
+
+接口与 IndicatorEngine 对齐（update_bar / update_frame / frame / last_ts / source），
+可以直接放进 MarketDataStore、交给 StreamFeed 推送更新；frame(tf) 取任意已跟踪周期。
+"""
+
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from candle_store import tf_ms
+from indicators import IndicatorEngine, ohlcv_arrays
+
+_MONDAY = 4 * 86_400_000  # 1970-01-01 是周四，周线桶从 1970-01-05（周一）起算
+
+
+def bucket(ts: np.ndarray, tf: str) -> np.ndarray:
+    """毫秒时间戳所在 tf 桶的起点。"""
+    step = tf_ms(tf)
+    off  = _MONDAY if tf.endswith("w") else 0
+    return (np.asarray(ts, dtype=np.int64) - off) // step * step + off
+
+
+def aggregate(ts: np.ndarray, data: np.ndarray, tf: str, drop_partial: bool = False) -> tuple:
+    """基础 K 线（升序 ts，N × 5 OHLCV）合成为 tf 周期，返回 (桶起点, M × 5)。
+
+    drop_partial=True 时丢掉开头不完整的桶（第一根基础 K 线不在桶起点）。
+    """
+    if not len(ts):
+        return np.empty(0, dtype=np.int64), np.empty((0, 5))
+    b     = bucket(ts, tf)
+    start = np.flatnonzero(np.concatenate(([True], b[1:] != b[:-1])))
+    end   = np.append(start[1:], len(ts)) - 1
+    out   = np.empty((len(start), 5))
+    out[:, 0] = data[start, 0]
+    out[:, 1] = np.maximum.reduceat(data[:, 1], start)
+    out[:, 2] = np.minimum.reduceat(data[:, 2], start)
+    out[:, 3] = data[end, 3]
+    out[:, 4] = np.add.reduceat(data[:, 4], start)
+    bts = b[start]
+    if drop_partial and ts[0] != bts[0]:
+        bts, out = bts[1:], out[1:]
+    return bts, out
+
+
+class Resampler:
+    """一个交易对的基础周期序列，以及由它合成的各周期指标引擎。线程安全。"""
+
+    def __init__(self, base_tf: str, tfs: Iterable[str] = (), max_bars: int = 300, source: str = None,
+                 history: pd.DataFrame = None, seeds: dict = None):
+        """history 为基础周期历史；seeds={tf: 交易所原生 K 线} 补足基础历史不够长的高周期。"""
+        self.base_tf  = base_tf
+        self.max_bars = max_bars
+        self.source   = source or (history.attrs.get("source") if history is not None else None)
+        self._step    = tf_ms(base_tf)
+        self._keep    = max_bars
+        self._ts, self._data = ohlcv_arrays(history, "ms") if history is not None else (
+            np.empty(0, dtype=np.int64), np.empty((0, 5)))
+        self._engines: dict = {}
+        self._lock    = threading.Lock()
+        for tf in dict.fromkeys([base_tf, *tfs]):
+            self.track(tf, (seeds or {}).get(tf))
+        self._trim()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, base_tf: str, tfs: Iterable[str] = (), max_bars: int = 300,
+                   source: str = None, seeds: dict = None) -> "Resampler":
+        return cls(base_tf, tfs, max_bars, source, history=df, seeds=seeds)
+
+    # ── 周期 ─────────────────────────────────────────────────────────────────
+    @property
+    def tfs(self) -> list:
+        return list(self._engines)
+
+    def track(self, tf: str, seed: pd.DataFrame = None) -> None:
+        """开始维护 tf 周期：先放种子（桶对齐的原生 K 线），再用手上的基础 K 线合成覆盖重叠部分。"""
+        step = tf_ms(tf)
+        if step % self._step:
+            raise ValueError(f"{tf} 不是基础周期 {self.base_tf} 的整数倍")
+        with self._lock:
+            if tf in self._engines:
+                return
+            eng = IndicatorEngine(max_bars=self.max_bars, source=self.source)
+            bts, agg = aggregate(self._ts, self._data, tf, drop_partial=True)
+            if seed is not None and len(seed):
+                sts, sdata = ohlcv_arrays(seed, "ms")
+                # 交易所日线等可能不按 UTC 对齐（如 OKX 的 1D 按北京时间），对不齐的种子不用
+                if (bucket(sts, tf) == sts).all():
+                    keep = sts < bts[0] if len(bts) else np.ones(len(sts), dtype=bool)
+                    bts  = np.concatenate([sts[keep], bts])
+                    agg  = np.concatenate([sdata[keep], agg])
+            if len(bts):
+                eng.update_arrays(bts[-self.max_bars:] * 1_000_000, agg[-self.max_bars:])
+            self._engines[tf] = eng
+            self._keep = max(self._keep, 2 * step // self._step)
+
+    # ── 更新 ─────────────────────────────────────────────────────────────────
+    def update_bar(self, ts, o: float, h: float, l: float, c: float, v: float) -> dict:
+        t = pd.Timestamp(ts).value // 1_000_000
+        return self._update(np.array([t], dtype=np.int64), np.array([[o, h, l, c, v]], dtype=float))
+
+    def update_frame(self, df: pd.DataFrame) -> dict:
+        """应用一段基础周期 K 线（早于最后一根的忽略，等于最后一根的视为修订）。
+        返回 {周期: 本次改动的桶数}，调用方据此持久化合成结果。"""
+        if df is None or not len(df):
+            return {}
+        return self._update(*ohlcv_arrays(df, "ms"))
+
+    def _update(self, ts: np.ndarray, data: np.ndarray) -> dict:
+        with self._lock:
+            if len(self._ts):
+                keep = ts >= self._ts[-1]
+                ts, data = ts[keep], data[keep]
+                if not len(ts):
+                    return {}
+                cut = len(self._ts) - (ts[0] == self._ts[-1])
+                self._ts   = np.concatenate([self._ts[:cut], ts])
+                self._data = np.concatenate([self._data[:cut], data])
+            else:
+                self._ts, self._data = ts, data
+            touched = {}
+            for tf, eng in self._engines.items():
+                b0 = int(bucket(ts[0], tf))
+                if b0 < self._ts[0]:
+                    # 桶的开头已不在缓冲里（极长的断档），从下一个完整的桶起合成
+                    b0 += tf_ms(tf)
+                i0 = int(np.searchsorted(self._ts, b0))
+                bts, agg = aggregate(self._ts[i0:], self._data[i0:], tf)
+                if len(bts):
+                    eng.update_arrays(bts * 1_000_000, agg)
+                touched[tf] = len(bts)
+            self._trim()
+            return touched
+
+    def _trim(self) -> None:
+        if len(self._ts) > 2 * self._keep:
+            self._ts, self._data = self._ts[-self._keep:].copy(), self._data[-self._keep:].copy()
+
+    # ── 读取 ─────────────────────────────────────────────────────────────────
+    @property
+    def last_ts(self):
+        return pd.Timestamp(int(self._ts[-1]), unit="ms") if len(self._ts) else None
+
+    def __len__(self) -> int:
+        return len(self._engines[self.base_tf])
+
+    def engine(self, tf: str = None) -> Optional[IndicatorEngine]:
+        return self._engines.get(tf or self.base_tf)
+
+    def frame(self, tf: str = None) -> Optional[pd.DataFrame]:
+        """tf 周期（默认基础周期）最近 max_bars 根 K 线及指标，只读快照；未跟踪的周期返回 None。"""
+        eng = self._engines.get(tf or self.base_tf)
+        return eng.frame() if eng is not None else None
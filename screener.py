@@ -0,0 +1,38 @@
+"""
+全市场筛选
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+把每个交易对最后一根 K 线的指标拼成 交易对 × 特征 矩阵，一次向量化评分，
+输出按评分排序的方向 / 评分 / 入场 / 止盈止损 / 盈亏比表。
+评分规则与 strategy.score_strategy 完全一致。
+"""
+
+import numpy as np
+import pandas as pd
+
+from strategy import FEATURE_COLS, score_vectorized
+
+TABLE_COLS = ["direction", "score", "price", "entry", "tp1", "tp2", "sl", "rr",
+              "support", "resist", "limit_long_entry", "limit_short_entry"]
+
+
+def feature_matrix(frames: dict) -> tuple[list, np.ndarray]:
+    """{symbol: 指标 DataFrame} → (symbols, 交易对 × len(FEATURE_COLS) 矩阵)。空表被跳过。"""
+    syms = [s for s, df in frames.items() if df is not None and len(df)]
+    X    = np.empty((len(syms), len(FEATURE_COLS)))
+    cols, pos = None, None
+    for i, s in enumerate(syms):
+        df = frames[s]
+        # 指标引擎的快照共用同一个列索引（FRAME_COLUMNS），列位置只查一次；
+        # 按列名取子表每次都要复制，比直接取底层数组慢一个量级
+        if df.columns is not cols and (cols is None or not df.columns.equals(cols)):
+            cols, pos = df.columns, df.columns.get_indexer(FEATURE_COLS)
+        X[i] = df.to_numpy(dtype=float)[-1, pos]
+    return syms, X
+
+
+def screen(frames: dict) -> pd.DataFrame:
+    """对全部交易对评分，返回按 score 降序（同分按盈亏比降序）的表，index 为交易对。"""
+    syms, X = feature_matrix(frames)
+    out = score_vectorized({c: X[:, i] for i, c in enumerate(FEATURE_COLS)})
+    table = pd.DataFrame({c: out[c] for c in TABLE_COLS}, index=pd.Index(syms, name="symbol"))
+    return table.sort_values(["score", "rr"], ascending=[False, False], kind="stable")
@@ -0,0 +1,145 @@
+"""
+信号快照
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+发布 / 订阅：生产者在行情每次更新后算一遍指标、评分与页面要用的成品（HTML 片段、图表），
+发布成带版本号的只读快照，各会话只读最新版本，不再各算各的。
+
+  · 主题（topic）为任意可哈希的值，如 ("coin", "BTC", "1小时", 120)
+  · refresh(topic, inputs, build)：inputs 是输入数据的指纹（K 线指纹、ticker、盘口版本号…），
+    与当前快照的指纹相同直接返回当前快照；不同时由一个线程调用 build() 生成新快照并发布，
+    同时到达的其余线程等它写回（single-flight，与 MarketDataStore 同一做法）——
+    N 个会话看同一组行情，每次更新只算一次
+  · 快照发布后不再修改：data 是只读映射，其中的 ndarray 标记为不可写；
+    DataFrame / Figure 与 MarketDataStore 里的对象一样按约定只读
+  · version 全局递增，会话据此判断内容有没有变；subscribe 在发布时回调，wait 阻塞到出现更新的版本
+  · max_topics 限制主题数，超出淘汰最久未访问的（LRU）
+"""
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+import numpy as np
+
+_VERSIONS = itertools.count(1)
+
+
+class Snapshot(NamedTuple):
+    topic:    Hashable
+    version:  int
+    inputs:   Any                 # 生成时的输入指纹
+    data:     MappingProxyType
+    built_at: float               # unix 秒
+    build_ms: float
+
+
+def _freeze(data: dict) -> MappingProxyType:
+    for v in data.values():
+        if isinstance(v, np.ndarray):
+            v.flags.writeable = False
+    return MappingProxyType(dict(data))
+
+
+class SnapshotHub:
+    """进程级快照中心，线程安全。"""
+
+    def __init__(self, max_topics: int = 1024, wait_timeout: float = 30.0):
+        self.max_topics   = max_topics
+        self.wait_timeout = wait_timeout
+        self.builds       = 0     # 生成次数（= 实际计算次数）
+        self.hits         = 0     # refresh 直接返回当前快照的次数
+        self.errors       = 0
+        self._snaps: OrderedDict = OrderedDict()
+        self._inflight: dict = {}
+        self._subs: dict = {}
+        self._cond = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._snaps)
+
+    # ── 读 ───────────────────────────────────────────────────────────────────
+    def latest(self, topic: Hashable) -> Optional[Snapshot]:
+        with self._cond:
+            snap = self._snaps.get(topic)
+            if snap is not None:
+                self._snaps.move_to_end(topic)
+            return snap
+
+    def wait(self, topic: Hashable, after: int = 0, timeout: float = None) -> Optional[Snapshot]:
+        """阻塞到 topic 出现版本号大于 after 的快照；超时返回当前快照（可能为 None）。"""
+        deadline = time.monotonic() + (self.wait_timeout if timeout is None else timeout)
+        with self._cond:
+            while True:
+                snap = self._snaps.get(topic)
+                left = deadline - time.monotonic()
+                if (snap is not None and snap.version > after) or left <= 0:
+                    return snap
+                self._cond.wait(left)
+
+    def subscribe(self, topic: Hashable, fn: Callable[[Snapshot], None]) -> Callable[[], None]:
+        """发布时回调 fn(snapshot)（在发布者线程里执行，异常只计数）；返回取消订阅的函数。"""
+        with self._cond:
+            self._subs.setdefault(topic, []).append(fn)
+
+        def _cancel():
+            with self._cond:
+                fns = self._subs.get(topic, [])
+                if fn in fns:
+                    fns.remove(fn)
+        return _cancel
+
+    # ── 写 ───────────────────────────────────────────────────────────────────
+    def publish(self, topic: Hashable, data: dict, inputs: Any = None, build_ms: float = 0.0) -> Snapshot:
+        snap = Snapshot(topic, next(_VERSIONS), inputs, _freeze(data), time.time(), build_ms)
+        with self._cond:
+            self._snaps[topic] = snap
+            self._snaps.move_to_end(topic)
+            while len(self._snaps) > self.max_topics:
+                self._snaps.popitem(last=False)
+            fns = list(self._subs.get(topic, ()))
+            self._cond.notify_all()
+        for fn in fns:
+            try:
+                fn(snap)
+            except Exception:
+                self.errors += 1
+        return snap
+
+    def refresh(self, topic: Hashable, inputs: Any, build: Callable[[], dict]) -> Snapshot:
+        """当前快照的输入指纹等于 inputs 时直接返回；否则由一个线程 build() 并发布，其余线程等待。"""
+        while True:
+            with self._cond:
+                snap = self._snaps.get(topic)
+                if snap is not None and snap.inputs == inputs:
+                    self._snaps.move_to_end(topic)
+                    self.hits += 1
+                    return snap
+                ev = self._inflight.get(topic)
+                leader = ev is None
+                if leader:
+                    ev = threading.Event()
+                    self._inflight[topic] = ev
+            if not leader:
+                # 等领头线程发布后重新检查；它算的是别的输入（或失败了）时由某个等待者接手
+                ev.wait(self.wait_timeout)
+                continue
+            try:
+                t    = time.perf_counter()
+                data = build()
+                self.builds += 1
+                return self.publish(topic, data, inputs, (time.perf_counter() - t) * 1e3)
+            finally:
+                with self._cond:
+                    self._inflight.pop(topic, None)
+                ev.set()
+
+    def clear(self) -> None:
+        with self._cond:
+            self._snaps.clear()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"topics": len(self._snaps), "builds": self.builds, "hits": self.hits, "errors": self.errors}
@@ -0,0 +1,257 @@
+"""
+策略评分
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+score_strategy    ─ 单个交易对最后一根 K 线的综合评分 + 市价 / 限价点位（页面展示用）
+score_vectorized  ─ 同一套规则的 NumPy 向量化版本，输入任意形状的特征数组
+                    （全市场筛选时是 交易对 × 1，回测时是 K 线 × 1），逐元素结果与 score_strategy 一致
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+
+class StrategyParams(NamedTuple):
+    """评分阈值与点位倍数。默认值即策略页使用的参数，参数寻优（optimizer）在此基础上扫描。"""
+    rsi_oversold: float   = 30     # RSI < 此值 +2
+    rsi_weak: float       = 45     # RSI < 此值 +1
+    rsi_strong: float     = 60     # RSI > 此值 -1
+    rsi_overbought: float = 75     # RSI > 此值 -2
+    strong_score: int     = 5      # |评分| ≥ 此值为强烈信号
+    weak_score: int       = 2      # |评分| ≥ 此值为轻度信号
+    tp1_atr: float        = 1.8    # 止盈 1 = entry ± ATR × tp1_atr
+    tp2_atr: float        = 3.5
+    sl_atr: float         = 1.2
+    entry_offset: float   = 0.001  # 市价入场相对现价的偏移
+    sr_offset: float      = 0.003  # 支撑 / 阻力相对 EMA 与布林带的外扩
+    limit_offset: float   = 0.002  # 限价入场 / 止盈相对支撑阻力的偏移
+    limit_stop: float     = 0.012  # 限价止损 / 止盈 2 相对支撑阻力的偏移
+
+
+DEFAULT_PARAMS = StrategyParams()
+
+# 方向 → (展示文字, 颜色)
+DIRECTION_STYLE = {
+    "STRONG_LONG":  ("🚀 强烈做多", "#059669"),
+    "LONG":         ("📈 轻多偏多", "#16A34A"),
+    "STRONG_SHORT": ("🔻 强烈做空", "#DC2626"),
+    "SHORT":        ("📉 轻空偏空", "#B91C1C"),
+    "NEUTRAL":      ("〰 震荡观望", "#D97706"),
+}
+
+
+def score_strategy(df: pd.DataFrame, P: StrategyParams = DEFAULT_PARAMS) -> dict:
+    """综合评分 + 策略计算，均线趋势决定方向，不会出现趋势空头却建议做多的错误。"""
+    r    = df.iloc[-1]
+    p    = float(r["close"])
+    atr  = float(r["atr"]) if not np.isnan(r["atr"]) else p * 0.015
+    sigs = []
+    score = 0
+
+    # RSI
+    rsi = float(r["rsi"])
+    if   rsi < P.rsi_oversold:   sigs.append(("RSI(14)", f"{rsi:.1f}", "超卖",    "LONG",   2)); score += 2
+    elif rsi < P.rsi_weak:       sigs.append(("RSI(14)", f"{rsi:.1f}", "偏弱",    "LONG",   1)); score += 1
+    elif rsi > P.rsi_overbought: sigs.append(("RSI(14)", f"{rsi:.1f}", "极度超买", "SHORT", -2)); score -= 2
+    elif rsi > P.rsi_strong:     sigs.append(("RSI(14)", f"{rsi:.1f}", "超买",    "SHORT", -1)); score -= 1
+    else:                        sigs.append(("RSI(14)", f"{rsi:.1f}", "中性",    "NEUT",   0))
+
+    # MACD
+    mv, ms, mh = float(r["macd"]), float(r["macd_signal"]), float(r["macd_hist"])
+    if   mv > ms and mh > 0: sigs.append(("MACD", f"{mv:.0f}", "金叉↑", "LONG",   2)); score += 2
+    elif mv < ms and mh < 0: sigs.append(("MACD", f"{mv:.0f}", "死叉↓", "SHORT", -2)); score -= 2
+    else:                     sigs.append(("MACD", f"{mv:.0f}", "震荡",  "NEUT",   0))
+
+    # KDJ
+    K, D, J = float(r["K"]), float(r["D"]), float(r["J"])
+    if   K > D and K < 80:  sigs.append(("KDJ-K", f"{K:.1f}", "金叉",  "LONG",   2)); score += 2
+    elif K < D and K > 20:  sigs.append(("KDJ-K", f"{K:.1f}", "死叉",  "SHORT", -2)); score -= 2
+    elif K > 85:             sigs.append(("KDJ-K", f"{K:.1f}", "超买",  "SHORT", -1)); score -= 1
+    elif K < 15:             sigs.append(("KDJ-K", f"{K:.1f}", "超卖",  "LONG",   1)); score += 1
+    else:                    sigs.append(("KDJ-K", f"{K:.1f}", "中性",  "NEUT",   0))
+
+    # EMA 趋势 ── 这是方向的核心锚点
+    e9, e21, e55 = float(r["ema9"]), float(r["ema21"]), float(r["ema55"])
+    ema_bull = p > e9 > e21 > e55
+    ema_bear = p < e9 < e21 < e55
+    if   ema_bull: sigs.append(("EMA趋势", f"9>{e21:.0f}", "多头排列", "LONG",   3)); score += 3
+    elif ema_bear: sigs.append(("EMA趋势", f"9<{e21:.0f}", "空头排列", "SHORT", -3)); score -= 3
+    else:          sigs.append(("EMA趋势", "缠绕",          "震荡",    "NEUT",   0))
+
+    # Bollinger Bands
+    bb_u, bb_l = float(r["bb_upper"]), float(r["bb_lower"])
+    if   p < bb_l: sigs.append(("BB",  f"下轨{bb_l:.0f}", "跌破下轨", "LONG",   1)); score += 1
+    elif p > bb_u: sigs.append(("BB",  f"上轨{bb_u:.0f}", "突破上轨", "SHORT", -1)); score -= 1
+    else:          sigs.append(("BB",  "通道内",           "中性",    "NEUT",   0))
+
+    # ── 方向判断（EMA 趋势具有一票否决权）──────────────────────────────────
+    # 如果 EMA 明确空头排列，最终方向不允许为做多
+    if ema_bear and score > 0:
+        score = -score // 2  # 强制转为偏空
+    # 如果 EMA 明确多头排列，最终方向不允许为做空
+    if ema_bull and score < 0:
+        score = abs(score) // 2  # 强制转为偏多
+
+    if   score >= P.strong_score:   direction = "STRONG_LONG"
+    elif score >= P.weak_score:     direction = "LONG"
+    elif score <= -P.strong_score:  direction = "STRONG_SHORT"
+    elif score <= -P.weak_score:    direction = "SHORT"
+    else:                           direction = "NEUTRAL"
+    dtxt, col = DIRECTION_STYLE[direction]
+
+    # ── 点位计算 ─────────────────────────────────────────────────────────────
+    if "LONG" in direction:
+        entry  = p * (1 - P.entry_offset)
+        tp1    = entry + atr * P.tp1_atr
+        tp2    = entry + atr * P.tp2_atr
+        sl     = entry - atr * P.sl_atr
+    elif "SHORT" in direction:
+        entry  = p * (1 + P.entry_offset)
+        tp1    = entry - atr * P.tp1_atr
+        tp2    = entry - atr * P.tp2_atr
+        sl     = entry + atr * P.sl_atr
+    else:
+        entry  = p
+        tp1    = p + atr * 1.5
+        tp2    = p + atr * 3.0
+        sl     = p - atr * 1.5
+
+    rr      = abs(tp1 - entry) / max(abs(sl - entry), 1e-9)
+    support = min(bb_l, e55) * (1 - P.sr_offset)
+    resist  = max(bb_u, e21) * (1 + P.sr_offset)
+
+    limits  = _limit_levels(support, resist, P)
+    return dict(
+        direction=direction, direction_text=dtxt, color=col,
+        entry=entry, tp1=tp1, tp2=tp2, sl=sl, rr=rr, score=score,
+        signals=sigs, support=support, resist=resist,
+        rsi=rsi, K=K, D=D, J=J, macd=mv, macd_signal=ms, macd_hist=mh,
+        price=p, atr=atr, ema9=e9, ema21=e21, ema55=e55, bb_upper=bb_u, bb_lower=bb_l,
+        ema_bull=ema_bull, ema_bear=ema_bear, **limits,
+    )
+
+
+def _limit_levels(support: float, resist: float, P: StrategyParams) -> dict:
+    """限价挂单点位（支撑 / 阻力确定后的部分，with_walls 换支撑阻力后重算）。"""
+    # 多单挂单：在支撑位下方买入，赢向阻力位
+    limit_long_entry  = support * (1 - P.limit_offset)
+    limit_long_tp1    = resist  * (1 - P.limit_offset)
+    limit_long_tp2    = resist  * (1 + P.limit_stop)
+    limit_long_sl     = support * (1 - P.limit_stop)
+    limit_long_rr     = abs(limit_long_tp1 - limit_long_entry) / max(abs(limit_long_sl - limit_long_entry), 1e-9)
+    # 空单挂单：在阻力位上方做空，打向支撑位
+    limit_short_entry = resist  * (1 + P.limit_offset)
+    limit_short_tp1   = support * (1 + P.limit_offset)
+    limit_short_tp2   = support * (1 - P.limit_stop)
+    limit_short_sl    = resist  * (1 + P.limit_stop)
+    limit_short_rr    = abs(limit_short_tp1 - limit_short_entry) / max(abs(limit_short_sl - limit_short_entry), 1e-9)
+    return dict(
+        limit_long_entry=limit_long_entry, limit_long_tp1=limit_long_tp1,
+        limit_long_tp2=limit_long_tp2, limit_long_sl=limit_long_sl, limit_long_rr=limit_long_rr,
+        limit_short_entry=limit_short_entry, limit_short_tp1=limit_short_tp1,
+        limit_short_tp2=limit_short_tp2, limit_short_sl=limit_short_sl, limit_short_rr=limit_short_rr,
+    )
+
+
+def with_walls(s: dict, support_wall: float = None, resist_wall: float = None,
+               P: StrategyParams = DEFAULT_PARAMS) -> dict:
+    """用盘口挂单墙替换指标推出的支撑 / 阻力（墙在现价对应一侧时），并重算限价挂单点位。
+
+    墙价由 orderbook.OrderBook.sr_walls 给出；两边都没有墙时原样返回。
+    """
+    p       = s["price"]
+    support = support_wall if support_wall is not None and support_wall < p else None
+    resist  = resist_wall if resist_wall is not None and resist_wall > p else None
+    if support is None and resist is None:
+        return s
+    out = dict(s, support=support if support is not None else s["support"],
+               resist=resist if resist is not None else s["resist"],
+               support_wall=support is not None, resist_wall=resist is not None)
+    out.update(_limit_levels(out["support"], out["resist"], P))
+    return out
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# VECTORIZED
+# ═════════════════════════════════════════════════════════════════════════════
+
+FEATURE_COLS = ["close", "atr", "rsi", "macd", "macd_signal", "macd_hist", "K", "D",
+                "ema9", "ema21", "ema55", "bb_upper", "bb_lower"]
+# 方向编码：score_vectorized 返回的 direction_code 是 DIRECTIONS 的下标
+DIRECTIONS = np.array(["NEUTRAL", "LONG", "STRONG_LONG", "SHORT", "STRONG_SHORT"])
+
+
+def score_vectorized(f: dict, P: StrategyParams = DEFAULT_PARAMS) -> dict:
+    """score_strategy 的向量化版本。
+
+    f 为 {FEATURE_COLS 中的列名: ndarray}，各数组形状相同；返回同形状的数组 dict，
+    键与 score_strategy 的数值字段一致，另加 direction_code / direction。
+    运算顺序与标量版逐项对应，结果逐元素相同（不是近似）。
+    """
+    p   = np.asarray(f["close"], dtype=float)
+    atr = np.asarray(f["atr"], dtype=float)
+    atr = np.where(np.isnan(atr), p * 0.015, atr)
+
+    # RSI
+    rsi   = np.asarray(f["rsi"], dtype=float)
+    score = np.select([rsi < P.rsi_oversold, rsi < P.rsi_weak, rsi > P.rsi_overbought, rsi > P.rsi_strong],
+                      [2, 1, -2, -1], 0)
+
+    # MACD
+    mv, ms, mh = (np.asarray(f[k], dtype=float) for k in ("macd", "macd_signal", "macd_hist"))
+    score += np.select([(mv > ms) & (mh > 0), (mv < ms) & (mh < 0)], [2, -2], 0)
+
+    # KDJ
+    K, D = np.asarray(f["K"], dtype=float), np.asarray(f["D"], dtype=float)
+    score += np.select([(K > D) & (K < 80), (K < D) & (K > 20), K > 85, K < 15], [2, -2, -1, 1], 0)
+
+    # EMA 趋势
+    e9, e21, e55 = (np.asarray(f[k], dtype=float) for k in ("ema9", "ema21", "ema55"))
+    ema_bull = (p > e9) & (e9 > e21) & (e21 > e55)
+    ema_bear = (p < e9) & (e9 < e21) & (e21 < e55)
+    score += np.select([ema_bull, ema_bear], [3, -3], 0)
+
+    # Bollinger Bands
+    bb_u, bb_l = np.asarray(f["bb_upper"], dtype=float), np.asarray(f["bb_lower"], dtype=float)
+    score += np.select([p < bb_l, p > bb_u], [1, -1], 0)
+
+    # EMA 一票否决
+    score = np.where(ema_bear & (score > 0), (-score) // 2, score)
+    score = np.where(ema_bull & (score < 0), np.abs(score) // 2, score)
+
+    code  = np.select([score >= P.strong_score, score >= P.weak_score,
+                       score <= -P.strong_score, score <= -P.weak_score], [2, 1, 4, 3], 0)
+    is_long, is_short = (code == 1) | (code == 2), (code == 3) | (code == 4)
+
+    # 点位
+    e_long, e_short = p * (1 - P.entry_offset), p * (1 + P.entry_offset)
+    entry = np.where(is_long, e_long, np.where(is_short, e_short, p))
+    tp1   = np.where(is_long, e_long + atr * P.tp1_atr, np.where(is_short, e_short - atr * P.tp1_atr, p + atr * 1.5))
+    tp2   = np.where(is_long, e_long + atr * P.tp2_atr, np.where(is_short, e_short - atr * P.tp2_atr, p + atr * 3.0))
+    sl    = np.where(is_long, e_long - atr * P.sl_atr,  np.where(is_short, e_short + atr * P.sl_atr,  p - atr * 1.5))
+    rr    = np.abs(tp1 - entry) / np.maximum(np.abs(sl - entry), 1e-9)
+
+    # 与内置 min/max 的 NaN 行为保持一致：min(a, b) 仅在 b < a 时取 b
+    support = np.where(e55 < bb_l, e55, bb_l) * (1 - P.sr_offset)
+    resist  = np.where(e21 > bb_u, e21, bb_u) * (1 + P.sr_offset)
+
+    ll_entry, ll_tp1 = support * (1 - P.limit_offset), resist * (1 - P.limit_offset)
+    ll_sl            = support * (1 - P.limit_stop)
+    ls_entry, ls_tp1 = resist * (1 + P.limit_offset), support * (1 + P.limit_offset)
+    ls_sl            = resist * (1 + P.limit_stop)
+
+    return dict(
+        direction_code=code, direction=DIRECTIONS[code], score=score,
+        entry=entry, tp1=tp1, tp2=tp2, sl=sl, rr=rr, support=support, resist=resist,
+        price=p, atr=atr, ema_bull=ema_bull, ema_bear=ema_bear,
+        limit_long_entry=ll_entry, limit_long_tp1=ll_tp1, limit_long_tp2=resist * (1 + P.limit_stop), limit_long_sl=ll_sl,
+        limit_long_rr=np.abs(ll_tp1 - ll_entry) / np.maximum(np.abs(ll_sl - ll_entry), 1e-9),
+        limit_short_entry=ls_entry, limit_short_tp1=ls_tp1, limit_short_tp2=support * (1 - P.limit_stop), limit_short_sl=ls_sl,
+        limit_short_rr=np.abs(ls_tp1 - ls_entry) / np.maximum(np.abs(ls_sl - ls_entry), 1e-9),
+    )
+
+
+def features_from_frame(df: pd.DataFrame) -> dict:
+    """整段 K 线的特征列（回测用，每根 K 线一个元素）。"""
+    return {c: df[c].to_numpy(dtype=float) for c in FEATURE_COLS}
@@ -0,0 +1,352 @@
+"""
+推送行情接入
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+后台线程里跑一个 asyncio 事件循环，消费 ticker / trade / kline 推送，
+直接写进共享行情缓存（MarketDataStore），页面渲染只读快照，不走网络。
+
+事件格式（dict）:
+  {"type": "ticker", "symbol": "BTC/USDT", "data": {...ccxt ticker...}}
+  {"type": "trade",  "symbol": "BTC/USDT", "price": 104800.0, "amount": 0.1, "ts": 1700000000000}
+  {"type": "kline",  "symbol": "BTC/USDT", "timeframe": "1h", "candle": [ts_ms, o, h, l, c, v]}
+  {"type": "depth",  "symbol": "BTC/USDT", "bids": [[p, q], ...], "asks": [...], "snapshot": bool,
+   "seq": 2, "prev_seq": 1, "checksum": -1881014294, "ts": 1700000000000}   # seq / checksum 可省略
+
+事件源可插拔：
+  CcxtProSource  ─ ccxt.pro WebSocket（OKX / Binance 等）
+  ReplaySource   ─ 回放本地 JSONL 文件（每行一个事件）
+  QueueSource    ─ 进程内假服务端，测试时直接 push 事件
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+import pandas as pd
+
+from market_data import DEPTH, MarketDataStore, TICKER
+from orderbook import OrderBook
+
+try:
+    import ccxt.pro as ccxtpro
+    CCXT_PRO_AVAILABLE = True
+except ImportError:
+    CCXT_PRO_AVAILABLE = False
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SOURCES
+# ═════════════════════════════════════════════════════════════════════════════
+
+class MarketSource:
+    """事件源接口：events() 异步产出事件 dict，close() 释放连接。"""
+
+    exchange_id = "unknown"
+
+    async def events(self) -> AsyncIterator[dict]:
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    async def close(self) -> None:
+        pass
+
+
+class CcxtProSource(MarketSource):
+    """ccxt.pro WebSocket 源：每个 (交易对, 通道) 一个 watch 协程，汇入同一个队列。
+
+    cache_id 为写入缓存时用的交易所键（REST 走多交易所连接池时为池名），默认同 exchange_id。
+    depth > 0 时订阅盘口：ccxt.pro 自己拼快照 + 增量并校验，这里每次推送取前 depth 档作为快照事件。
+    """
+
+    def __init__(self, exchange_id: str, symbols: Iterable[str], timeframes: Iterable[str] = (),
+                 trades: bool = False, cache_id: str = None, depth: int = 0):
+        if not CCXT_PRO_AVAILABLE:
+            raise RuntimeError("ccxt.pro 不可用")
+        self.exchange_id = cache_id or exchange_id
+        self.symbols     = list(symbols)
+        self.timeframes  = list(timeframes)
+        self.trades      = trades
+        self.depth       = depth
+        self._ex         = getattr(ccxtpro, exchange_id)({"enableRateLimit": True, "newUpdates": True})
+
+    async def _watch(self, q: asyncio.Queue, fn: Callable, wrap: Callable) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                q.put_nowait(wrap(await fn()))
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def events(self) -> AsyncIterator[dict]:
+        q     = asyncio.Queue()
+        ex    = self._ex
+        tasks = []
+        for sym in self.symbols:
+            tasks.append(self._watch(q, lambda s=sym: ex.watch_ticker(s),
+                                     lambda d, s=sym: [{"type": "ticker", "symbol": s, "data": d}]))
+            for tf in self.timeframes:
+                tasks.append(self._watch(q, lambda s=sym, t=tf: ex.watch_ohlcv(s, t),
+                                         lambda d, s=sym, t=tf: [{"type": "kline", "symbol": s, "timeframe": t,
+                                                                  "candle": c} for c in d]))
+            if self.trades:
+                tasks.append(self._watch(q, lambda s=sym: ex.watch_trades(s),
+                                         lambda d, s=sym: [{"type": "trade", "symbol": s, "price": t["price"],
+                                                            "amount": t["amount"], "side": t.get("side"),
+                                                            "ts": t["timestamp"]} for t in d]))
+            if self.depth:
+                tasks.append(self._watch(q, lambda s=sym: ex.watch_order_book(s, self.depth),
+                                         lambda d, s=sym: [{"type": "depth", "symbol": s, "snapshot": True,
+                                                            "bids": d["bids"][:self.depth], "asks": d["asks"][:self.depth],
+                                                            "seq": d.get("nonce"), "ts": d.get("timestamp")}]))
+        running = [asyncio.ensure_future(t) for t in tasks]
+        try:
+            while True:
+                for ev in await q.get():
+                    yield ev
+        finally:
+            for t in running:
+                t.cancel()
+
+    async def close(self) -> None:
+        await self._ex.close()
+
+
+class ReplaySource(MarketSource):
+    """回放 JSONL 事件文件。speed=0 尽快回放；speed=1 按事件时间戳原速回放。"""
+
+    def __init__(self, path: str, exchange_id: str = "replay", speed: float = 0.0):
+        self.path        = path
+        self.exchange_id = exchange_id
+        self.speed       = speed
+
+    async def events(self) -> AsyncIterator[dict]:
+        last_ts = None
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                ev = json.loads(line)
+                ts = _event_ts(ev)
+                if self.speed > 0 and last_ts is not None and ts is not None:
+                    await asyncio.sleep(max(ts - last_ts, 0) / 1000 / self.speed)
+                else:
+                    await asyncio.sleep(0)
+                last_ts = ts if ts is not None else last_ts
+                yield ev
+
+
+class QueueSource(MarketSource):
+    """进程内假服务端：任意线程调用 push() 注入事件，close() 结束事件流。"""
+
+    _STOP = object()
+
+    def __init__(self, exchange_id: str = "fake"):
+        self.exchange_id = exchange_id
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._q: Optional[asyncio.Queue] = None
+        self._pending: list = []
+        self._ready = threading.Lock()
+
+    def push(self, ev) -> None:
+        with self._ready:
+            if self._loop is None:
+                self._pending.append(ev)
+                return
+        self._loop.call_soon_threadsafe(self._q.put_nowait, ev)
+
+    async def events(self) -> AsyncIterator[dict]:
+        with self._ready:
+            self._loop = asyncio.get_running_loop()
+            self._q    = asyncio.Queue()
+            for ev in self._pending:
+                self._q.put_nowait(ev)
+            self._pending.clear()
+        while True:
+            ev = await self._q.get()
+            if ev is self._STOP:
+                return
+            yield ev
+
+    async def close(self) -> None:
+        self.push(self._STOP)
+
+
+def _event_ts(ev: dict):
+    if ev.get("type") == "kline":
+        return ev["candle"][0]
+    if ev.get("type") == "ticker":
+        return ev["data"].get("timestamp")
+    return ev.get("ts")
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# FEED
+# ═════════════════════════════════════════════════════════════════════════════
+
+class StreamFeed:
+    """把事件源接到共享行情缓存上。
+
+    kline 事件更新已有的指标引擎（修订未收盘 K 线 / 追加新 K 线）；没有历史的 (交易对, 周期)
+    先在线程池里调用 bootstrap(symbol, timeframe) 拉一次历史（返回 IndicatorEngine 或 None），
+    拉取期间的 K 线暂存、拉完补上，其余推送照常消费。
+    prime 中列出的 (交易对, 周期) 在开始消费前就预热好，页面首次渲染也不必走网络。
+    ticker 事件整体替换 ticker；trade 事件只更新已有 ticker 的 last。
+    depth 事件更新该交易对的 OrderBook（快照整本替换、增量原地修改）；增量断档或校验和不符时
+    抛 BookOutOfSync（计入 errors），盘口不再刷新缓存，过期后页面退回 REST 快照。
+    """
+
+    BOOTSTRAP_RETRY = 60.0  # 秒，历史拉取失败后的重试间隔
+
+    def __init__(self, source: MarketSource, store: MarketDataStore,
+                 bootstrap: Callable[[str, str], object] = None, prime: Iterable[tuple] = ()):
+        self.source    = source
+        self.store     = store
+        self.bootstrap = bootstrap
+        self.prime     = list(prime)
+        self.events    = 0
+        self.errors    = 0
+        self.last_event_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._done = threading.Event()
+        self._boot_failed: dict = {}
+        self._booting: dict = {}      # 正在后台拉历史的键 → 期间到达的 K 线（只在事件循环线程上读写）
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_fresh(self, max_age: float) -> bool:
+        return self.running and time.time() - self.last_event_at < max_age
+
+    def start(self) -> "StreamFeed":
+        if self.running:
+            return self
+        self._done.clear()
+        self._thread = threading.Thread(target=self._thread_main, name="stream-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait(self, timeout: float = None) -> bool:
+        """等事件流结束（回放源读完 / 假服务端 close）。"""
+        return self._done.wait(timeout)
+
+    def _thread_main(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._run())
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.run_until_complete(self.source.close())
+            self._loop.close()
+            self._done.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sym, tf in self.prime:
+            await loop.run_in_executor(None, self._bootstrap_key, sym, tf)
+        async for ev in self.source.events():
+            try:
+                self.apply(ev)
+            except Exception:
+                self.errors += 1
+
+    def apply(self, ev: dict) -> None:
+        ex  = self.source.exchange_id
+        typ = ev.get("type")
+        sym = ev.get("symbol")
+        if typ == "ticker":
+            self.store.put((ex, sym, TICKER), ev["data"])
+        elif typ == "trade":
+            tk = self.store.peek((ex, sym, TICKER))
+            if tk is not None:
+                self.store.put((ex, sym, TICKER), {**tk, "last": float(ev["price"])})
+        elif typ == "kline":
+            key = (ex, sym, ev["timeframe"])
+            eng = self.store.peek(key)
+            if eng is not None:
+                self._update(key, eng, ev["candle"])
+            elif not self._defer(key, ev["candle"]):
+                return
+        elif typ == "depth":
+            key  = (ex, sym, DEPTH)
+            book = self.store.peek(key) or OrderBook(sym)
+            if ev.get("snapshot"):
+                book.snapshot(ev["bids"], ev["asks"], seq=ev.get("seq"), ts=ev.get("ts"), checksum=ev.get("checksum"))
+            else:
+                book.delta(ev["bids"], ev["asks"], seq=ev.get("seq"), prev_seq=ev.get("prev_seq"),
+                           ts=ev.get("ts"), checksum=ev.get("checksum"))
+            book.source = ex
+            self.store.put(key, book)
+        else:
+            return
+        self.events += 1
+        self.last_event_at = time.time()
+
+    def _update(self, key: tuple, eng, candle) -> None:
+        ts, o, h, l, c, v = candle[:6]
+        eng.update_bar(pd.Timestamp(ts, unit="ms"), float(o), float(h), float(l), float(c), float(v or 0))
+        self.store.put(key, eng)
+
+    def _defer(self, key: tuple, candle) -> bool:
+        """没有历史的 (交易对, 周期)：历史拉取（阻塞的 REST 请求）放到线程池，期间到的 K 线先攒着，
+        拉完按到达顺序补上。不能在事件循环里直接拉 —— 拉取期间所有推送流都会跟着停。
+        不在事件循环里调用时（直接调 apply）同步拉取。返回这根 K 线是否被接收。"""
+        if key in self._booting:
+            self._booting[key].append(candle)
+            return True
+        if self.bootstrap is None or time.time() - self._boot_failed.get(key, 0.0) < self.BOOTSTRAP_RETRY:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            eng = self._bootstrap_key(key[1], key[2])
+            if eng is not None:
+                self._update(key, eng, candle)
+            return eng is not None
+        self._booting[key] = [candle]
+        fut = loop.run_in_executor(None, self._bootstrap_key, key[1], key[2])
+        fut.add_done_callback(lambda f, key=key: self._booted(key, f))
+        return True
+
+    def _booted(self, key: tuple, fut) -> None:
+        """历史拉取完成（在事件循环线程上回调）：把拉取期间攒下的 K 线补进引擎。"""
+        pending = self._booting.pop(key, [])
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            self.errors += 1
+            self._boot_failed[key] = time.time()
+            return
+        eng = fut.result()
+        for candle in pending if eng is not None else ():
+            self._update(key, eng, candle)
+
+    def _bootstrap_key(self, sym: str, tf: str):
+        key = (self.source.exchange_id, sym, tf)
+        eng = self.store.peek(key)
+        if eng is not None or self.bootstrap is None:
+            return eng
+        if time.time() - self._boot_failed.get(key, 0.0) < self.BOOTSTRAP_RETRY:
+            return None
+        eng = self.bootstrap(sym, tf)
+        if eng is None:
+            self._boot_failed[key] = time.time()
+            return None
+        self.store.put(key, eng)
+        return eng
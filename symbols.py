@@ -0,0 +1,115 @@
+"""
+交易对注册表
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+从交易所 load_markets 加载 USDT 现货交易对，按 24h 成交额排序取前 N 个，
+记录每个市场的价格精度（替代写死的 BTC 1 位 / 其他 2 位小数）。
+交易所不可用时退回内置的演示币池。
+"""
+
+import math
+from typing import Iterable, NamedTuple, Optional
+
+try:
+    import ccxt
+    _TICK_SIZE = ccxt.TICK_SIZE
+except ImportError:
+    _TICK_SIZE = 4
+
+
+class SymbolInfo(NamedTuple):
+    base: str            # "BTC"
+    symbol: str          # "BTC/USDT"（ccxt 统一格式）
+    price_decimals: int  # 价格显示小数位
+    ref_price: float     # 参考价（加载时的最新价），用于模拟数据与量级估计
+
+
+# 演示模式币池：(base, 价格小数位, 参考价)
+_DEMO_UNIVERSE = [
+    ("BTC", 1, 104_800.0), ("ETH", 2, 3_942.0), ("SOL", 2, 172.4), ("BNB", 1, 655.0),
+    ("XRP", 4, 2.31), ("DOGE", 5, 0.2143), ("ADA", 4, 0.7712), ("AVAX", 2, 38.6),
+    ("LINK", 3, 17.82), ("DOT", 3, 7.215), ("TRX", 5, 0.2411), ("LTC", 2, 102.3),
+]
+
+
+def _decimals(precision, mode: int) -> int:
+    """ccxt 精度 → 小数位。TICK_SIZE 模式下 precision 是最小变动价位（如 0.01）。"""
+    if precision is None:
+        return 2
+    if mode == _TICK_SIZE:
+        return max(0, int(round(-math.log10(float(precision)))))
+    return int(precision)
+
+
+def _display_decimals(price: float) -> int:
+    """没有精度信息时按价格量级给一个合理的小数位。"""
+    if price <= 0:
+        return 2
+    return max(0, min(8, 3 - int(math.floor(math.log10(price)))))
+
+
+class SymbolRegistry:
+    """交易对注册表，base（如 "BTC"）为主键，保持成交额排序。"""
+
+    def __init__(self, infos: Iterable[SymbolInfo], quote: str = "USDT"):
+        self.quote  = quote
+        self._infos = {i.base: i for i in infos}
+
+    @classmethod
+    def demo(cls, quote: str = "USDT") -> "SymbolRegistry":
+        return cls((SymbolInfo(b, f"{b}/{quote}", d, p) for b, d, p in _DEMO_UNIVERSE), quote)
+
+    @classmethod
+    def from_exchange(cls, ex, quote: str = "USDT", limit: int = 200,
+                      pinned: Iterable[str] = ("BTC", "ETH")) -> "SymbolRegistry":
+        """加载交易所的活跃 quote 现货市场，按 24h 成交额取前 limit 个；pinned 始终保留且排在最前。"""
+        markets = ex.load_markets()
+        spot = {m["symbol"]: m for m in markets.values()
+                if m.get("spot") and m.get("quote") == quote and m.get("active", True) is not False}
+        try:
+            tickers = ex.fetch_tickers(list(spot)) if ex.has.get("fetchTickers") else {}
+        except Exception:
+            tickers = {}
+
+        def _qv(sym):
+            tk = tickers.get(sym) or {}
+            return float(tk.get("quoteVolume") or 0)
+
+        pinned  = [p for p in pinned if f"{p}/{quote}" in spot]
+        ranked  = sorted((s for s in spot if spot[s]["base"] not in pinned), key=_qv, reverse=True)
+        chosen  = [f"{p}/{quote}" for p in pinned] + ranked[:max(0, limit - len(pinned))]
+        infos = []
+        for sym in chosen:
+            m    = spot[sym]
+            last = float((tickers.get(sym) or {}).get("last") or 0)
+            prec = (m.get("precision") or {}).get("price")
+            dec  = _decimals(prec, ex.precisionMode) if prec is not None else _display_decimals(last)
+            infos.append(SymbolInfo(m["base"], sym, dec, last))
+        return cls(infos, quote)
+
+    # ── 查询 ─────────────────────────────────────────────────────────────────
+    @property
+    def bases(self) -> list:
+        return list(self._infos)
+
+    def __contains__(self, base: str) -> bool:
+        return base in self._infos
+
+    def __len__(self) -> int:
+        return len(self._infos)
+
+    def get(self, base: str) -> Optional[SymbolInfo]:
+        return self._infos.get(base)
+
+    def symbol(self, base: str) -> str:
+        info = self._infos.get(base)
+        return info.symbol if info is not None else f"{base}/{self.quote}"
+
+    def decimals(self, base: str) -> int:
+        info = self._infos.get(base)
+        return info.price_decimals if info is not None else 2
+
+    def ref_price(self, base: str) -> float:
+        info = self._infos.get(base)
+        if info is not None and info.ref_price > 0:
+            return info.ref_price
+        return next((p for b, _, p in _DEMO_UNIVERSE if b == base), 100.0)
@@ -0,0 +1,310 @@
+"""
+合成行情
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+演示模式与压测用的合成市场。路径常驻、只往后长：同一进程里什么时候去取，已经出现过的 K 线都不会变，
+未收盘的那根随墙钟推进（原来每 DATA_TTL 秒换一次种子，整段历史一起跳）。
+
+  · 价格模型：对数价格按子步演化，GBM 漂移 + 扩散 + 复合泊松跳跃（Merton），波动率按全市场共用的
+    两状态马尔可夫链切换（平静 / 剧烈，持续时长服从几何分布）
+  · 相关性：扩散项 = 因子冲击 @ 载荷ᵀ + 特质冲击 × 特质权重。默认单因子（相关系数 ρ_ij = beta_i · beta_j），
+    给出 m × m 相关矩阵时载荷取其 Cholesky 分解
+  · 全部按块向量化：一块 BLOCK 个基础步 × m 个交易对一次生成（一次矩阵乘、一次 cumsum、reshape 取 OHLC），
+    每块随机数取独立子种子，给定 seed 时结果与调用方分几批、什么时候取无关
+  · 起点之前的历史按需回补：同样的模型、同一组因子冲击（仍然相关），逐块向前生成并缩放到与后一块首尾相接
+  · 产出：任意基础步整数倍周期的 K 线（含未收盘的一根）、未收盘步内的逐笔、当前价附近的 L2 盘口；
+    generate(n) 直接推进 n 步并返回整批矩阵，压测 / 基准当数据源用
+"""
+
+import threading
+import zlib
+from typing import Iterable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from candle_store import tf_ms
+from orderbook import OrderBook
+from resample import aggregate
+
+BLOCK   = 256          # 每块基础步数（随机数按块取子种子）
+HOUR_MS = 3_600_000
+DAY_MS  = 86_400_000
+
+
+class Bars(NamedTuple):
+    ts:      np.ndarray   # (n,) 各步开盘时间（ms）
+    open:    np.ndarray   # (n, m)
+    high:    np.ndarray
+    low:     np.ndarray
+    close:   np.ndarray
+    volume:  np.ndarray
+    tick_ts: np.ndarray   # (n × sub,) 各子步结束时间（ms）
+    ticks:   np.ndarray   # (n × sub, m) 子步结束时的价格
+
+
+def _regimes(rng: np.random.Generator, n: int, state: int, left: int, mean: np.ndarray) -> tuple:
+    """两状态马尔可夫链的 n 步状态序列；state / left 为当前状态与剩余步数，返回 (序列, 新 state, 新 left)。"""
+    out, i = np.empty(n, np.int8), 0
+    while i < n:
+        take = min(left, n - i)
+        out[i:i + take] = state
+        i, left = i + take, left - take
+        if left == 0:
+            state = 1 - state
+            left  = int(rng.geometric(1 / mean[state]))
+    return out, state, left
+
+
+def _ladder(rng: np.random.Generator, mid: np.ndarray, levels: int, tick: float) -> tuple:
+    """以 mid（k,）为中间价、相对档宽 tick 的 k 本盘口：(买价, 买量, 卖价, 卖量)，各 k × levels。"""
+    dist = np.arange(1, levels + 1) - .5
+    size = rng.lognormal(0, .6, (2, len(mid), levels)) * (1 + dist / 20) * (5e4 / mid)[None, :, None]
+    wall = np.argsort(rng.random((2, len(mid), levels)), axis=2)[:, :, :3]
+    np.put_along_axis(size, wall, np.take_along_axis(size, wall, 2) * rng.uniform(6, 15, wall.shape), 2)
+    step = (mid * tick)[:, None]
+    return mid[:, None] - dist * step, size[0], mid[:, None] + dist * step, size[1]
+
+
+class SyntheticMarket:
+    """m 个交易对的联合合成行情。线程安全。
+
+    prices 为起点价格；start_ms 为路径起点（对齐到 step_ms），之前的历史按需回补；step_ms 为基础步长
+    （= 基础 K 线周期），sub 为每步的子步数（逐笔 / 未收盘 K 线的分辨率）。
+    vol：每小时波动率；beta：对市场因子的载荷；corr：m × m 相关矩阵（给出时代替单因子）；
+    drift：每年的对数漂移；regimes：(平静倍数, 剧烈倍数, 平静平均小时数, 剧烈平均小时数)；
+    jumps：(每个交易对每天的跳跃次数, 跳幅标准差)；notional：每小时成交额（计价货币）。
+    max_steps：最多保留的已放出步数（None 不限；长时间压测时限制内存，更早的 K 线随之不可取）。
+    vol / beta / drift / notional 可以是标量或每个交易对一个。
+    """
+
+    def __init__(self, symbols: Iterable[str], prices, start_ms: int, step_ms: int = 15 * 60_000, sub: int = 15,
+                 seed: int = 0, vol=0.01, beta=0.6, corr: np.ndarray = None, drift=0.0,
+                 regimes: tuple = (0.7, 1.8, 72.0, 12.0), jumps: tuple = (0.5, 0.03), notional=2e6,
+                 max_steps: int = None, source: str = "synthetic"):
+        self.symbols  = list(symbols)
+        self.index    = {s: j for j, s in enumerate(self.symbols)}
+        m             = len(self.symbols)
+        self.step_ms  = int(step_ms)
+        self.sub      = int(sub)
+        self.start_ms = int(start_ms) // self.step_ms * self.step_ms
+        self.seed     = int(seed)
+        self.source   = source
+        self.p0       = np.broadcast_to(np.asarray(prices, float), (m,)).copy()
+        col           = lambda x: np.broadcast_to(np.asarray(x, float), (m,)).copy()
+        hours         = self.step_ms / self.sub / HOUR_MS             # 每个子步的小时数
+        self._sig     = col(vol) * np.sqrt(hours)
+        self._drift   = col(drift) * hours / 8760 - self._sig ** 2 / 2
+        if corr is not None:
+            self._load = np.linalg.cholesky(np.asarray(corr, float))
+            self._idio = np.zeros(m)
+        else:
+            b          = col(beta)
+            self._load = b[:, None]
+            self._idio = np.sqrt(np.clip(1 - b ** 2, 0, None))
+        self._mult    = np.array(regimes[:2], float)
+        self._mean    = np.maximum(np.array(regimes[2:], float) * HOUR_MS / self.step_ms, 1.0)
+        self._jump_p  = jumps[0] * self.step_ms / DAY_MS
+        self._jump_sd = jumps[1]
+        self._vol_ccy = col(notional) * self.step_ms / HOUR_MS
+        # 已放出的基础步（容量倍增）
+        self._o = self._h = self._l = self._c = self._v = np.empty((0, m))
+        self._n       = 0                                             # 已放出的步数（全局步号上界）
+        self._base    = 0                                             # 数组第 0 行的全局步号
+        self.max_steps = max_steps
+        # 当前块（已生成、尚未全部放出）
+        self._blocks  = 0
+        self._blk     = None
+        self._blk_at  = 0                                             # 当前块第一步的全局步号
+        self._last    = self.p0.copy()
+        rng           = np.random.default_rng([self.seed, 9])
+        self._state, self._left = 0, int(rng.geometric(1 / self._mean[0]))
+        self._back    = {}                                            # j → 起点之前的 (k × 5) OHLCV，时间升序
+        self._back_f  = {}                                            # 回补块号 → (因子冲击, 状态序列)
+        self.now_ms   = self.start_ms
+        self._lock    = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    # ── 生成 ─────────────────────────────────────────────────────────────────
+    def _simulate(self, zf: np.ndarray, rng: np.random.Generator, n: int, p0: np.ndarray, reg: np.ndarray,
+                  cols: slice = slice(None)) -> tuple:
+        """n 步的子步价格 (n × sub, k) 与逐步 OHLCV（各 n × k）；cols 选交易对，zf 为 (n × sub, 因子数) 的因子冲击。"""
+        load, idio, sig = self._load[cols], self._idio[cols], self._sig[cols]
+        k    = len(sig)
+        mult = np.repeat(self._mult[reg], self.sub)[:, None]
+        z    = zf @ load.T + rng.standard_normal((n * self.sub, k)) * idio
+        r    = (z * sig * mult + self._drift[cols]).reshape(n, self.sub, k)
+        hit  = rng.random((n, k)) < self._jump_p
+        if hit.any():
+            r[:, 0][hit] += rng.normal(0, self._jump_sd, int(hit.sum()))
+        px    = p0 * np.exp(np.cumsum(r.reshape(n * self.sub, k), axis=0))
+        s     = px.reshape(n, self.sub, k)
+        close = s[:, -1]
+        open_ = np.vstack([p0[None], close[:-1]])
+        high  = np.maximum(open_, s.max(1))
+        low   = np.minimum(open_, s.min(1))
+        move  = np.abs(np.log(close / open_)) / (sig * np.sqrt(self.sub) * self._mult[reg][:, None])
+        vol   = self._vol_ccy[cols] / open_ * rng.lognormal(-0.08, 0.4, (n, k)) * (0.6 + 0.4 * move)
+        return px, open_, high, low, close, vol
+
+    def _next_block(self) -> None:
+        b   = self._blocks
+        reg, self._state, self._left = _regimes(np.random.default_rng([self.seed, 2, b]), BLOCK,
+                                                self._state, self._left, self._mean)
+        zf  = np.random.default_rng([self.seed, 0, b]).standard_normal((BLOCK * self.sub, self._load.shape[1]))
+        px, o, h, l, c, v = self._simulate(zf, np.random.default_rng([self.seed, 1, b]), BLOCK, self._last, reg)
+        self._blk, self._blk_at = (px, o, h, l, c, v), b * BLOCK
+        self._last    = c[-1].copy()
+        self._blocks += 1
+
+    def _release(self, target: int, ticks: list = None) -> None:
+        """把全局步号 < target 的步放进已放出序列；给了 ticks 时顺带收集这些步的子步价格。"""
+        while self._n < target:
+            if self._blk is None or self._n >= self._blk_at + BLOCK:
+                self._next_block()
+            i, j = self._n - self._blk_at, min(target - self._blk_at, BLOCK)
+            row  = self._n - self._base
+            if row + (j - i) > len(self._o):
+                self._grow(row + (j - i))
+                row = self._n - self._base
+            for dst, src in zip((self._o, self._h, self._l, self._c, self._v), self._blk[1:]):
+                dst[row:row + j - i] = src[i:j]
+            if ticks is not None:
+                ticks.append(self._blk[0][i * self.sub:j * self.sub])
+            self._n += j - i
+
+    def _grow(self, need: int) -> None:
+        """需要 need 行容量：设了 max_steps 时先丢掉最旧的步、只留最近 max_steps // 2 步，仍不够再倍增。"""
+        held = self._n - self._base
+        if self.max_steps and held > self.max_steps // 2:
+            drop = held - self.max_steps // 2
+            for a in (self._o, self._h, self._l, self._c, self._v):
+                a[:held - drop] = a[drop:held]
+            self._base += drop
+            need       -= drop
+        if need > len(self._o):
+            cap = max(2 * len(self._o), need, BLOCK)
+            self._o, self._h, self._l, self._c, self._v = (
+                np.concatenate([a, np.empty((cap - len(a), len(self)))]) for a in (self._o, self._h, self._l, self._c, self._v))
+
+    def advance(self, now_ms: int) -> int:
+        """按墙钟推进到 now_ms（不后退），返回新收盘的步数。"""
+        with self._lock:
+            n0 = self._n
+            self.now_ms = max(self.now_ms, int(now_ms))
+            self._release((self.now_ms - self.start_ms) // self.step_ms)
+            return self._n - n0
+
+    def generate(self, n: int) -> Bars:
+        """不看墙钟，直接再推进 n 个完整步，返回这一批（压测 / 基准的数据源）。"""
+        with self._lock:
+            n0, subs = self._n, []
+            self._release(n0 + n, subs)
+            self.now_ms = self.start_ms + self._n * self.step_ms
+            r    = slice(n0 - self._base, self._n - self._base)
+            ts   = self.start_ms + np.arange(n0, self._n, dtype=np.int64) * self.step_ms
+            tick = np.concatenate(subs) if subs else np.empty((0, len(self)))
+            tts  = ts[0] + np.arange(1, len(tick) + 1, dtype=np.int64) * (self.step_ms // self.sub) if n else ts
+            return Bars(ts, *(a[r].copy() for a in (self._o, self._h, self._l, self._c, self._v)), tts, tick)
+
+    # ── 起点之前的历史 ───────────────────────────────────────────────────────
+    def _backfill(self, j: int, steps: int) -> np.ndarray:
+        """交易对 j 在起点之前至少 steps 步的 OHLCV（时间升序，最后一步的收盘 = 起点价格）。"""
+        have = self._back.get(j, np.empty((0, 5)))
+        while len(have) < steps:
+            b = len(have) // BLOCK
+            if b not in self._back_f:
+                rng = np.random.default_rng([self.seed, 4, b])
+                st  = int(rng.random() < self._mean[1] / self._mean.sum())
+                reg, _, _ = _regimes(rng, BLOCK, st, int(rng.geometric(1 / self._mean[st])), self._mean)
+                zf  = np.random.default_rng([self.seed, 3, b]).standard_normal((BLOCK * self.sub, self._load.shape[1]))
+                self._back_f[b] = (zf, reg)
+            zf, reg = self._back_f[b]
+            end = have[0, 0] if len(have) else self.p0[j]
+            _, o, h, l, c, v = self._simulate(zf, np.random.default_rng([self.seed, 5, b, j]), BLOCK,
+                                              np.ones(1), reg, slice(j, j + 1))
+            k    = end / c[-1, 0]
+            blk  = np.column_stack([o[:, 0] * k, h[:, 0] * k, l[:, 0] * k, c[:, 0] * k, v[:, 0] / k])
+            have = np.vstack([blk, have])
+        self._back[j] = have
+        return have
+
+    # ── 读取 ─────────────────────────────────────────────────────────────────
+    def _forming(self, j: int) -> tuple:
+        """未收盘步：(开盘时间, [o, h, l, c, v])，按墙钟已走完的子步合成。"""
+        if self._blk is None or self._n >= self._blk_at + BLOCK:
+            self._next_block()
+        i    = self._n - self._blk_at
+        done = (self.now_ms - self.start_ms - self._n * self.step_ms) * self.sub // self.step_ms
+        o    = self._blk[1][i, j]
+        px   = self._blk[0][i * self.sub:i * self.sub + done, j]
+        if not len(px):
+            return self.start_ms + self._n * self.step_ms, np.array([o, o, o, o, 0.0])
+        v = self._blk[5][i, j] * done / self.sub
+        return self.start_ms + self._n * self.step_ms, np.array([o, max(o, px.max()), min(o, px.min()), px[-1], v])
+
+    def candles(self, symbol: str, tf: str = None, limit: int = 300, since: int = None) -> pd.DataFrame:
+        """最近 limit 根 tf 周期 K 线（含未收盘的一根，tf 须为基础步长的整数倍）；since（ms）给出时只返回
+        开盘时间 ≥ since 的部分（增量刷新用）。起点之前不够的部分自动回补。"""
+        step = tf_ms(tf) if tf else self.step_ms
+        if step % self.step_ms:
+            raise ValueError(f"{tf} 不是基础步长的整数倍")
+        j = self.index[symbol]
+        with self._lock:
+            fts, frow = self._forming(j)
+            held = self._n - self._base
+            need = (limit + 1) * (step // self.step_ms) if since is None else (fts - since) // self.step_ms + step // self.step_ms
+            fwd  = min(held, max(need, 0))
+            data = np.column_stack([a[held - fwd:held, j] for a in (self._o, self._h, self._l, self._c, self._v)])
+            back = max(need - held, 0) if self._base == 0 else 0
+            if back:
+                data = np.vstack([self._backfill(j, back)[-back:], data])
+        data = np.vstack([data, frow])
+        ts   = fts - np.arange(len(data) - 1, -1, -1, dtype=np.int64) * self.step_ms
+        bts, agg = aggregate(ts, data, tf or f"{self.step_ms // 60_000}m", drop_partial=True)
+        keep = slice(-limit, None) if since is None else bts >= since
+        df   = pd.DataFrame(agg[keep], columns=["open", "high", "low", "close", "volume"],
+                            index=pd.DatetimeIndex(bts[keep].astype("datetime64[ms]").astype("datetime64[ns]")))
+        df.attrs["source"] = self.source
+        return df
+
+    def price(self, symbol: str) -> float:
+        with self._lock:
+            return float(self._forming(self.index[symbol])[1][3])
+
+    def ticks(self, symbol: str) -> tuple:
+        """未收盘步内已走完的子步：(结束时间 ms, 价格)。"""
+        j = self.index[symbol]
+        with self._lock:
+            self._forming(j)
+            i    = self._n - self._blk_at
+            done = (self.now_ms - self.start_ms - self._n * self.step_ms) * self.sub // self.step_ms
+            px   = self._blk[0][i * self.sub:i * self.sub + done, j].copy()
+            t0   = self.start_ms + self._n * self.step_ms
+        return t0 + np.arange(1, len(px) + 1, dtype=np.int64) * (self.step_ms // self.sub), px
+
+    @property
+    def tick_index(self) -> int:
+        """当前子步的全局序号（盘口等按子步变化的产出的缓存键）。"""
+        return (self.now_ms - self.start_ms) * self.sub // self.step_ms
+
+    def book_arrays(self, levels: int = 100, symbols: Iterable[str] = None, tick: float = 2e-4) -> tuple:
+        """各交易对当前价附近 levels 档的 (买价, 买量, 卖价, 卖量)，各为 (k × levels)：数量随距离增大，
+        每侧夹三道 6~15 倍的挂单墙。同一子步内结果不变。"""
+        idx = [self.index[s] for s in symbols] if symbols is not None else range(len(self))
+        with self._lock:
+            mid = np.array([self._forming(j)[1][3] for j in idx])
+            rng = np.random.default_rng([self.seed, 6, self.tick_index])
+        return _ladder(rng, mid, levels, tick)
+
+    def order_book(self, symbol: str, levels: int = 100, mid: float = None) -> OrderBook:
+        """单个交易对的盘口；mid 给出时以它为中间价（交易对可以不在本行情里，如真实 ticker + 模拟盘口）。"""
+        if mid is None:
+            mid = self.price(symbol)
+        rng = np.random.default_rng([self.seed, 7, self.tick_index, zlib.crc32(symbol.encode())])
+        bp, bs, ap, az = _ladder(rng, np.array([mid]), levels, 2e-4)
+        ob = OrderBook(symbol)
+        ob.snapshot(np.column_stack([bp[0], bs[0]]), np.column_stack([ap[0], az[0]]), ts=self.now_ms)
+        ob.source = self.source
+        return ob
@@ -12,9 +12,33 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
+import os
+import math
 import time
 import random
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+from alerts import AlertEngine, FileSink, MemorySink, WebhookSink
+from candle_store import CandleStore, tf_ms
+from charts import ChartFactory
+from confluence import confluence
+from exchange_pool import ExchangePool
+from fragments import Fragment, stats as fragment_stats
+from instrument import BUCKETS, METRICS
+from indicators import OHLCV_COLS, IndicatorEngine, calc_indicators, frame_fingerprint, ohlcv_arrays
+from liquidation import ExchangeTradeFeed, LiquidationEngine, SyntheticTradeFeed
+from market_data import DEPTH, MarketDataStore, TICKER, run_concurrently
+from resample import Resampler, aggregate
+from screener import screen
+from snapshots import SnapshotHub
+from orderbook import OrderBook
+from strategy import score_strategy, with_walls, DIRECTION_STYLE
+from streaming import StreamFeed, CcxtProSource, ReplaySource, CCXT_PRO_AVAILABLE
+from symbols import SymbolRegistry
+from synthetic import SyntheticMarket
 
 # ── ccxt 软依赖 ───────────────────────────────────────────────────────────────
 try:
@@ -81,12 +105,6 @@ _defaults = {
     "authenticated": False,
     "uid": "",
     "page": "🎯 核心策略",
-    "cache_BTC_df": None,
-    "cache_ETH_df": None,
-    "cache_BTC_ticker": None,
-    "cache_ETH_ticker": None,
-    "cache_ts_BTC": 0.0,
-    "cache_ts_ETH": 0.0,
 }
 for _k, _v in _defaults.items():
     if _k not in st.session_state:
@@ -95,6 +113,43 @@ for _k, _v in _defaults.items():
 # 超级 UID（后端隐藏，不在前端任何地方展示）
 _VALID_UIDS = {"20061008", "88888888", "12345678", "66666666"}
 DATA_TTL = 5  # 秒
+CHART_TTL = 60  # 秒，长窗口 K 线图的历史部分的刷新间隔（最新一段始终拼实时序列）
+CHART_WARMUP = 200   # 根，长窗口前面多取的 K 线，窗口第一根的 ema200 等长周期指标也已预热
+OHLCV_BARS = 300     # 每个 (交易对, 周期) 保留的 K 线根数
+OHLCV_INCR_LIMIT = 50  # 增量刷新单次最多拉取的 K 线根数，拉满说明断档过久，退回全量
+GAP_FILL_PAGES = 20    # 全量重建后回补本地库断档最多翻的页数（每页 OHLCV_BARS 根），更久的断档交给 backfill.py
+# 每个交易对只向交易所拉这一条周期，其余周期本地合成（_TF_MAP 里的周期都必须是它的整数倍）
+BASE_TF = os.environ.get("AEGIS_BASE_TF", "15m")
+# 推送行情来源：ws = ccxt.pro WebSocket；off = 只用 REST 轮询；其他值视为 JSONL 回放文件路径
+STREAM_SOURCE = os.environ.get("AEGIS_STREAM", "ws")
+FETCH_DEADLINE = 3.0   # 秒，单次刷新等待交易所的上限，超时的部分沿用上一版数据
+FETCH_WORKERS  = 8
+UNIVERSE_SIZE  = 200   # 跟踪的 USDT 交易对数量（按 24h 成交额）
+DEFAULT_SYMBOLS = ["BTC", "ETH"]  # 策略页默认展示、顶栏与推送订阅的币种
+MAX_PAGE_SYMBOLS = 8   # 策略页同时展示的币种上限（每个币种一套图表）
+# 本地 K 线库目录，冷启动先从磁盘渲染；设为空字符串关闭
+CANDLE_DIR     = os.environ.get("AEGIS_CANDLE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "candles"))
+SCREENER_TTL   = 60    # 秒，全市场筛选页的刷新间隔
+SCREENER_ROWS  = 30    # 筛选表展示的行数
+DEPTH_LEVELS   = 100   # 盘口每侧拉取 / 订阅的档数
+DEPTH_WALL_RANGE = 0.03  # 挂单墙只在距中间价 3% 以内找，找到的墙替换指标推出的支撑 / 阻力
+LIQ_HISTORY_MS = 2 * 86_400_000  # 清算热力图：合成成交流冷启动预热的历史长度
+LIQ_BATCH_MS   = 300_000         # 清算热力图：成交按批灌入引擎的时间粒度（批内先清算再开仓）
+LIQ_STEP       = 0.006           # 清算热力图：价格桶宽占现价的比例
+ALERTS         = os.environ.get("AEGIS_ALERTS", "on")  # off：不启动后台信号提醒
+ALERT_INTERVAL = 60    # 秒，提醒服务刷新行情并评估的节拍（只评估出现了新 K 线的键）
+ALERT_LOG      = os.environ.get("AEGIS_ALERT_LOG", "")  # 非空时提醒另写一份 JSONL（如 data/alerts.jsonl，超过 10 MB 轮转）
+# 提醒跟踪的币种：DEFAULT_SYMBOLS 之外再加的逗号分隔列表（如 "SOL,XRP"）；all = 全部 UNIVERSE_SIZE 个交易对
+ALERT_SYMBOLS  = os.environ.get("AEGIS_ALERT_SYMBOLS", "")
+ALERT_WEBHOOK  = os.environ.get("AEGIS_ALERT_WEBHOOK", "")  # 非空时每条提醒 POST 到该地址
+ALERT_ROWS     = 6     # 侧栏展示的最近提醒条数
+SIM_SEED       = int(os.environ.get("AEGIS_SIM_SEED", "0"))  # 演示模式合成行情的种子（同一种子同一条路径）
+SIM_WARMUP_MS  = 86_400_000  # 合成行情起点距启动的时长，更早的历史按需回补
+# 本地 Prometheus 抓取地址 host:port（GET /metrics）；off 不起服务
+METRICS_ADDR   = os.environ.get("AEGIS_METRICS", "127.0.0.1:9464")
+DIAG_PAGE      = "🩺 运行诊断"  # 隐藏页：不在导航里，登录后地址栏加 ?diag=1 进入
+# 连接池里的交易所（按优先级），逗号分隔；请求按健康度路由，慢了对冲、坏了熔断切换
+EXCHANGE_VENUES = [v for v in os.environ.get("AEGIS_VENUES", "okx,binance").split(",") if v]
 
 # ═════════════════════════════════════════════════════════════════════════════
 # DESIGN TOKENS
@@ -123,294 +178,623 @@ SHADOW_MD = "0 4px 12px rgba(0,0,0,.07)"
 # DATA ENGINE
 # ═════════════════════════════════════════════════════════════════════════════
 
-@st.cache_resource(ttl=3600)
-def _get_exchange():
+@st.cache_resource
+def _get_exchange_pool():
+    """进程级多交易所连接池：每个交易所一个长连接客户端，按健康度路由、对冲与熔断。
+    与进程同寿命，不设 ttl —— 过期重建时旧池的线程池与各交易所的连接没人关闭，每次重建都泄漏一份；
+    路由与熔断恢复由池自己的健康度处理，不需要重建。"""
     if not CCXT_AVAILABLE:
         return None
-    for ExCls in [ccxt.okx, ccxt.binance]:
+    clients = []
+    for vid in EXCHANGE_VENUES:
         try:
-            ex = ExCls({"timeout": 8000, "enableRateLimit": True})
-            return ex
+            clients.append(getattr(ccxt, vid)({"timeout": 8000, "enableRateLimit": True}))
         except Exception:
             pass
-    return None
+    return ExchangePool(clients, workers=FETCH_WORKERS * 2) if clients else None
+
+def _get_exchange():
+    """当前最优交易所的客户端（加载市场信息等一次性请求用）。"""
+    pool = _get_exchange_pool()
+    return pool.primary().client if pool is not None else None
+
+@st.cache_resource
+def _get_market_store() -> MarketDataStore:
+    """进程级行情缓存，所有会话共享，避免每个标签页各自请求交易所。
+    条目上限按币池规模设定：每个交易对 3 个周期 + 1 个 ticker，再留一倍余量。"""
+    return MarketDataStore(ttl=DATA_TTL, max_entries=UNIVERSE_SIZE * 8)
+
+@st.cache_resource(ttl=3600)
+def _get_registry() -> SymbolRegistry:
+    """交易对注册表：按健康度依次尝试各交易所，加载成交额前 UNIVERSE_SIZE 个 USDT 现货；都不可用时用演示币池。"""
+    pool = _get_exchange_pool()
+    for v in (pool.ranked() if pool is not None else []):
+        try:
+            return SymbolRegistry.from_exchange(v.client, limit=UNIVERSE_SIZE, pinned=DEFAULT_SYMBOLS)
+        except Exception:
+            pass
+    return SymbolRegistry.demo()
+
+@st.cache_resource
+def _get_candle_store():
+    """进程级本地 K 线库，未配置目录时为 None。"""
+    return CandleStore(CANDLE_DIR) if CANDLE_DIR else None
+
+def _ccxt_symbol(symbol: str) -> str:
+    return _get_registry().symbol(symbol)
+
+@st.cache_resource
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    """并发拉取行情用的进程级线程池。"""
+    return ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="fetch")
 
-def _fetch_ohlcv(symbol_ccxt: str, tf: str = "1h", limit: int = 300):
-    ex = _get_exchange()
-    if ex is None:
+def _exchange_id() -> str:
+    """缓存键里的交易所名：连接池名（如 okx+binance），数据实际来自哪个交易所记在 attrs["source"]。"""
+    pool = _get_exchange_pool()
+    return pool.name if pool is not None else "mock"
+
+def _fetch_ohlcv(symbol_ccxt: str, tf: str = "1h", limit: int = 300, since: int = None, prefer: str = None):
+    pool = _get_exchange_pool()
+    if pool is None:
         return None
     try:
-        raw = ex.fetch_ohlcv(symbol_ccxt, timeframe=tf, limit=limit)
+        with METRICS.timer("exchange.ohlcv"):
+            raw, venue = pool.call("fetch_ohlcv", symbol_ccxt, timeframe=tf, since=since, limit=limit, prefer=prefer)
         if not raw:
             return None
         df = pd.DataFrame(raw, columns=["ts","open","high","low","close","volume"])
         df["ts"] = pd.to_datetime(df["ts"], unit="ms")
         df = df.set_index("ts")
+        df.attrs["source"] = venue
         return df
-    except Exception:
+    except Exception as e:
+        METRICS.error("exchange.ohlcv", e)
         return None
 
 def _fetch_ticker(symbol_ccxt: str):
-    ex = _get_exchange()
-    if ex is None:
+    pool = _get_exchange_pool()
+    if pool is None:
         return None
     try:
-        return ex.fetch_ticker(symbol_ccxt)
-    except Exception:
+        with METRICS.timer("exchange.ticker"):
+            return pool.call("fetch_ticker", symbol_ccxt)[0]
+    except Exception as e:
+        METRICS.error("exchange.ticker", e)
         return None
 
-# 时间周期 → ccxt timeframe 映射
+def _fetch_tickers(symbols_ccxt: list) -> dict:
+    """批量 ticker：交易所支持 fetchTickers 时一次请求拿全部（不支持的交易所自动切换），否则逐个请求。"""
+    pool = _get_exchange_pool()
+    if pool is None:
+        return {}
+    if len(symbols_ccxt) > 1:
+        try:
+            with METRICS.timer("exchange.tickers"):
+                return pool.call("fetch_tickers", symbols_ccxt)[0] or {}
+        except Exception as e:
+            METRICS.error("exchange.tickers", e)
+    out = {}
+    for sym in symbols_ccxt:
+        tk = _fetch_ticker(sym)
+        if tk is not None:
+            out[sym] = tk
+    return out
+
+def _fetch_order_book(symbol_ccxt: str):
+    pool = _get_exchange_pool()
+    if pool is None:
+        return None
+    try:
+        with METRICS.timer("exchange.depth"):
+            book, venue = pool.call("fetch_order_book", symbol_ccxt, DEPTH_LEVELS)
+    except Exception as e:
+        METRICS.error("exchange.depth", e)
+        return None
+    ob = OrderBook.from_ccxt(book, symbol_ccxt)
+    ob.source = venue
+    return ob
+
+def _fetch_trades(symbol_ccxt: str, since: int = None):
+    pool = _get_exchange_pool()
+    if pool is None:
+        return None
+    try:
+        with METRICS.timer("exchange.trades"):
+            return pool.call("fetch_trades", symbol_ccxt, since)[0]
+    except Exception as e:
+        METRICS.error("exchange.trades", e)
+        return None
+
+def _fetch_open_interest(symbol_ccxt: str):
+    """持仓量名义额（USDT）；交易所只给张数 / 币数时按 markPrice 折算，拿不到时 None。"""
+    pool = _get_exchange_pool()
+    if pool is None:
+        return None
+    try:
+        with METRICS.timer("exchange.oi"):
+            oi = pool.call("fetch_open_interest", symbol_ccxt)[0] or {}
+    except Exception as e:
+        METRICS.error("exchange.oi", e)
+        return None
+    value = oi.get("openInterestValue")
+    if value is None and oi.get("openInterestAmount") is not None and (oi.get("info") or {}).get("markPrice"):
+        value = float(oi["openInterestAmount"]) * float(oi["info"]["markPrice"])
+    return float(value) if value else None
+
+# 时间周期 → ccxt timeframe 映射（均须是 BASE_TF 的整数倍）
 _TF_MAP = {"15分钟": "15m", "1小时": "1h", "4小时": "4h"}
-# 每个时间周期的种子偏移（保证各自独立）
-_TF_SEED = {"15分钟": 0, "1小时": 100, "4小时": 200}
+
+@st.cache_resource
+def _get_market_sim(bases: tuple) -> SyntheticMarket:
+    """演示模式的合成行情（进程级单例，按币池建一份）：各交易对相关、路径连续，随墙钟往后长。"""
+    reg = _get_registry()
+    return SyntheticMarket(bases, [reg.ref_price(b) for b in bases], int(time.time() * 1000) - SIM_WARMUP_MS,
+                           step_ms=tf_ms(BASE_TF), seed=SIM_SEED, source="mock")
+
+def _market_sim() -> SyntheticMarket:
+    sim = _get_market_sim(tuple(_get_registry().bases))
+    sim.advance(int(time.time() * 1000))
+    return sim
 
 def _mock_ohlcv(symbol: str, tf_label: str, limit: int = 300) -> pd.DataFrame:
-    """当 ccxt 不可用时生成高质量模拟数据，严格按 symbol + tf 隔离。"""
-    seed_base = int(time.time() / DATA_TTL) * (1 if symbol == "BTC" else 3)
-    seed = seed_base + _TF_SEED.get(tf_label, 0)
-    rng  = np.random.default_rng(seed % (2**31))
-    base = 104_800.0 if symbol == "BTC" else 3_942.0
-    # 不同周期不同波动率
-    vol_map = {"15分钟": 0.007, "1小时": 0.012, "4小时": 0.018}
-    vol = vol_map.get(tf_label, 0.012)
-    log_r  = rng.normal(0.00003, vol, limit)
-    closes = base * np.exp(np.cumsum(log_r))
-    spread = closes * rng.uniform(0.001, 0.006, limit)
-    highs  = closes + spread
-    lows   = closes - spread
-    opens  = np.roll(closes, 1); opens[0] = closes[0]
-    vols   = rng.lognormal(10 if symbol == "BTC" else 9, 0.4, limit)
-    # 时间轴
-    freq_map = {"15分钟": "15min", "1小时": "1h", "4小时": "4h"}
-    freq = freq_map.get(tf_label, "1h")
-    idx  = pd.date_range(end=datetime.utcnow(), periods=limit, freq=freq)
-    return pd.DataFrame({"open": opens, "high": highs, "low": lows,
-                          "close": closes, "volume": vols}, index=idx)
+    """当 ccxt 不可用时的模拟 K 线：取自进程级合成行情，已收盘的 K 线不会再变，最后一根随墙钟推进。
+    tf_label 也可直接给 ccxt 周期。"""
+    return _market_sim().candles(symbol, _TF_MAP.get(tf_label, tf_label), limit)
+
+def _mock_series(symbol: str, prev: Resampler = None) -> Resampler:
+    """模拟数据版的多周期序列：基础周期取到足够合成最高周期 OHLCV_BARS 根；
+    prev 是上一版模拟序列时只把它最后一根及之后的 K 线续上。"""
+    if prev is not None and prev.source == "mock" and len(prev):
+        prev.update_frame(_market_sim().candles(symbol, BASE_TF, since=int(prev.last_ts.value // 1_000_000)))
+        return prev
+    tfs   = list(_TF_MAP.values())
+    depth = OHLCV_BARS * max(tf_ms(tf) // tf_ms(BASE_TF) for tf in tfs)
+    return Resampler.from_frame(_mock_ohlcv(symbol, BASE_TF, depth), BASE_TF, tfs, max_bars=OHLCV_BARS)
+
+def _persist(sym: str, tf: str, df: pd.DataFrame) -> None:
+    """交易所拉到的 K 线写入本地库；磁盘不可写时静默跳过，不影响页面。"""
+    cs = _get_candle_store()
+    if cs is None or df is None or df.attrs.get("source") in (None, "mock"):
+        return
+    venue = df.attrs["source"]
+    try:
+        last = cs.last_ts(venue, sym, tf)
+        if last is not None:
+            # 断档超过增量窗口后整体重建，拉到的最新一段和库里最后一根之间有缺口：先补上再追加
+            for lo, hi in cs.gaps(venue, sym, tf, last, int(df.index[0].value // 1_000_000) - tf_ms(tf)):
+                _fill_gap(cs, venue, sym, tf, lo, hi)
+        cs.write(venue, sym, tf, df)
+    except OSError:
+        pass
+
+def _fill_gap(cs: CandleStore, venue: str, sym: str, tf: str, lo: int, hi: int) -> None:
+    """向同一交易所按页补拉 [lo, hi]（毫秒）的 K 线并 merge 进库。补不全的部分留作缺口，
+    _disk_series 不会用跨缺口的窗口。"""
+    step, cursor, pages = tf_ms(tf), lo, []
+    for _ in range(GAP_FILL_PAGES):
+        if cursor > hi:
+            break
+        df = _fetch_ohlcv(sym, tf, OHLCV_BARS, since=cursor, prefer=venue)
+        if df is None or df.attrs["source"] != venue:
+            break
+        df = df[(df.index >= pd.Timestamp(cursor, unit="ms")) & (df.index <= pd.Timestamp(hi, unit="ms"))]
+        if df.empty:
+            break
+        pages.append(df)
+        cursor = int(df.index[-1].value // 1_000_000) + step
+    if pages:
+        cs.merge(venue, sym, tf, pd.concat(pages))
+    if cursor <= hi:
+        METRICS.count("candle_gap", tf=tf)
+
+def _disk_tfs(cs: CandleStore, venue: str, sym: str) -> list:
+    """本地库里该交易对已有的、可由 BASE_TF 合成的高周期（_TF_MAP 内）。"""
+    return [tf for tf in _TF_MAP.values() if tf != BASE_TF and cs.count(venue, sym, tf)]
+
+def _has_gap(cs: CandleStore, venue: str, sym: str, tf: str, df: pd.DataFrame) -> bool:
+    """从库里读出的这段窗口内部有缺口。"""
+    return bool(cs.gaps(venue, sym, tf, int(df.index[0].value // 1_000_000), int(df.index[-1].value // 1_000_000)))
+
+def _disk_series(sym: str):
+    """用本地库建多周期序列（按健康度依次找各交易所的数据）：基础周期 + 库里已有的高周期作种子。
+    窗口内有缺口的周期不用（基础周期有缺口时该交易所整体跳过，交给 _seed_series 重拉）；
+    没有可用的基础周期数据时返回 None。"""
+    cs   = _get_candle_store()
+    pool = _get_exchange_pool()
+    if cs is None or pool is None:
+        return None
+    for v in pool.ranked() or pool.venues:
+        try:
+            base = cs.read(v.id, sym, BASE_TF, limit=OHLCV_BARS)
+            if not len(base) or _has_gap(cs, v.id, sym, BASE_TF, base):
+                continue
+            seeds = {tf: cs.read(v.id, sym, tf, limit=OHLCV_BARS) for tf in _disk_tfs(cs, v.id, sym)}
+            seeds = {tf: df for tf, df in seeds.items() if not _has_gap(cs, v.id, sym, tf, df)}
+        except OSError:
+            continue
+        return Resampler.from_frame(base, BASE_TF, list(seeds), max_bars=OHLCV_BARS, seeds=seeds)
+    return None
+
+def _seed_series(sym: str, tfs=(), prefer: str = None):
+    """从交易所建多周期序列：拉一次基础周期，tfs 中的高周期各拉一次原生 K 线作历史种子（同一交易所）。"""
+    base = _fetch_ohlcv(sym, BASE_TF, OHLCV_BARS, prefer=prefer)
+    if base is None:
+        return None
+    venue = base.attrs["source"]
+    _persist(sym, BASE_TF, base)
+    seeds = {}
+    for tf in tfs:
+        if tf == BASE_TF:
+            continue
+        df = _fetch_ohlcv(sym, tf, OHLCV_BARS, prefer=venue)
+        if df is not None and df.attrs["source"] == venue:
+            _persist(sym, tf, df)
+            seeds[tf] = df
+    return Resampler.from_frame(base, BASE_TF, tfs, max_bars=OHLCV_BARS, seeds=seeds)
+
+def _refresh_series(sym: str, prev: Resampler = None, tfs=()):
+    """增量刷新：已有真实序列时只拉取基础周期最后一根及之后的 K 线，各高周期在本地合成更新，
+    不论跟踪多少个周期都只有这一次请求。没有内存中的序列时先从本地库恢复，只向交易所补拉断档部分。"""
+    if prev is None:
+        prev = _disk_series(sym)
+    if prev is None or prev.source in (None, "mock"):
+        return _seed_series(sym, tfs)
+    since = int(prev.last_ts.value // 1_000_000)
+    # 增量部分尽量向同一交易所要，不同交易所的 K 线不混在一条序列里
+    new   = _fetch_ohlcv(sym, BASE_TF, OHLCV_INCR_LIMIT, since=since, prefer=prev.source)
+    if new is None or new.empty:
+        return prev
+    if len(new) >= OHLCV_INCR_LIMIT or new.attrs["source"] != prev.source:
+        # 断档过久或换了交易所：整体重建
+        res = _seed_series(sym, prev.tfs, prefer=new.attrs["source"])
+        return res if res is not None else prev
+    _persist(sym, BASE_TF, new)
+    for tf, k in prev.update_frame(new).items():
+        if tf != BASE_TF and k:
+            _persist(sym, tf, prev.frame(tf).iloc[-k:])
+    return prev
+
+def _ensure_tf(res: Resampler, sym: str, tf: str) -> None:
+    """res 还没跟踪 tf 时开始跟踪：真实数据向同一交易所要一次原生 K 线作历史种子，之后靠基础周期滚动。"""
+    if tf in res.tfs:
+        return
+    seed = None
+    if res.source not in (None, "mock"):
+        seed = _fetch_ohlcv(sym, tf, OHLCV_BARS, prefer=res.source)
+        if seed is not None and seed.attrs["source"] != res.source:
+            seed = None
+        _persist(sym, tf, seed)
+    res.track(tf, seed)
+
+@st.cache_resource
+def _get_stream_feed():
+    """后台推送行情（进程级单例）。推送持续到达时缓存一直新鲜，渲染路径不再请求交易所；
+    推送中断后缓存过期，自动退回 REST 轮询。只订阅基础周期，高周期由 Resampler 合成。"""
+    if STREAM_SOURCE == "off":
+        return None
+    ex_id = _exchange_id()
+    syms  = [_ccxt_symbol(s) for s in DEFAULT_SYMBOLS]
+    if STREAM_SOURCE == "ws":
+        if not CCXT_PRO_AVAILABLE or ex_id == "mock":
+            return None
+        src = CcxtProSource(_get_exchange().id, syms, [BASE_TF], cache_id=ex_id, depth=DEPTH_LEVELS)
+    else:
+        src = ReplaySource(STREAM_SOURCE, exchange_id=ex_id)
+    feed = StreamFeed(src, _get_market_store(),
+                      bootstrap=lambda sym, tf: _refresh_series(sym, tfs=_TF_MAP.values()),
+                      prime=[(s, BASE_TF) for s in syms])
+    return feed.start()
 
 def get_ohlcv(symbol: str, tf_label: str = "1小时") -> pd.DataFrame:
-    """获取 OHLCV，含 TTL 缓存，严格按 symbol 隔离。"""
-    now    = time.time()
-    ts_key = f"cache_ts_{symbol}"
-    df_key = f"cache_{symbol}_df"
-    cached = st.session_state[df_key]
-    if cached is not None and now - st.session_state[ts_key] < DATA_TTL:
-        return cached
-    tf  = _TF_MAP.get(tf_label, "1h")
-    sym = "BTC/USDT" if symbol == "BTC" else "ETH/USDT"
-    df  = _fetch_ohlcv(sym, tf, 300)
-    if df is None or df.empty:
-        df = _mock_ohlcv(symbol, tf_label, 300)
-    df = _calc_indicators(df)
-    st.session_state[df_key] = df
-    st.session_state[ts_key] = now
-    return df
+    """获取 OHLCV，进程级 TTL 缓存，严格按 (交易所, 交易对) 隔离。
+
+    每个交易对缓存一条基础周期序列（Resampler），各周期都从它取，切换周期不走网络；
+    tf_label 为 _TF_MAP 中的标签，或 BASE_TF 整数倍的 ccxt 周期（如 "2h"、"1d"）。
+    返回的 DataFrame 由所有会话共享，只读。
+    """
+    tf    = _TF_MAP.get(tf_label, tf_label)
+    sym   = _ccxt_symbol(symbol)
+    store = _get_market_store()
+    key   = (_exchange_id(), sym, BASE_TF)
+
+    def _load(prev):
+        if prev is None:
+            res = _disk_series(sym)
+            if res is not None:
+                # 冷启动：先用本地库的数据渲染，后台立即增量补齐最新 K 线
+                _get_fetch_pool().submit(store.get, key, _load, 0)
+                return res
+        res = _refresh_series(sym, prev, tfs=[tf])
+        if res is None or not len(res):
+            METRICS.count("fallback_mock", kind="ohlcv")
+            res = _mock_series(symbol, prev)
+        return res
+
+    res = store.get(key, _load)
+    _ensure_tf(res, sym, tf)
+    return res.frame(tf)
+
+def _prefetch_timeframes(symbols: list) -> None:
+    """后台为 symbols 补齐 _TF_MAP 里全部周期的历史种子，之后切换周期直接命中本地合成结果。"""
+    store, ex_id = _get_market_store(), _exchange_id()
+    for s in symbols:
+        res = store.peek((ex_id, _ccxt_symbol(s), BASE_TF))
+        if res is not None and any(tf not in res.tfs for tf in _TF_MAP.values()):
+            for tf in _TF_MAP.values():
+                _get_fetch_pool().submit(_ensure_tf, res, _ccxt_symbol(s), tf)
+
+def get_timeframe_engines(symbols: list) -> dict:
+    """{symbol: {tf: IndicatorEngine}}：各交易对在 _TF_MAP 全部周期上的指标引擎，直接读缓存里的 Resampler，
+    不走网络、不构造快照。还没有种子的周期缺席（后台补齐后下一次刷新出现）。"""
+    store, ex_id = _get_market_store(), _exchange_id()
+    out = {}
+    for s in symbols:
+        res = store.peek((ex_id, _ccxt_symbol(s), BASE_TF))
+        if res is None:
+            continue
+        out[s] = {tf: res.engine(tf) for tf in _TF_MAP.values() if tf in res.tfs and len(res.engine(tf))}
+    return out
+
+def _alert_symbols() -> list:
+    """提醒服务跟踪的币种：默认只有 DEFAULT_SYMBOLS + ALERT_SYMBOLS 里注册表有的，ALERT_SYMBOLS=all 时为全部。"""
+    reg = _get_registry()
+    if ALERT_SYMBOLS.strip().lower() == "all":
+        return reg.bases
+    extra = [b.strip().upper() for b in ALERT_SYMBOLS.split(",") if b.strip()]
+    return [b for b in dict.fromkeys(DEFAULT_SYMBOLS + extra) if b in reg]
+
+def _alert_frames() -> dict:
+    """提醒服务的数据源：并发刷新提醒币种的基础周期序列（最多等 FETCH_DEADLINE 秒，超时的沿用缓存，
+    后台拉完下一轮用上），返回 {(交易对, 周期): IndicatorEngine}。推送在跑时缓存本就新鲜，基本不走网络。"""
+    syms = _alert_symbols()
+    run_concurrently({s: (lambda s=s: get_ohlcv(s, BASE_TF)) for s in syms}, _get_fetch_pool(), FETCH_DEADLINE)
+    _prefetch_timeframes(syms)
+    return {(s, tf): eng for s, per_tf in get_timeframe_engines(syms).items() for tf, eng in per_tf.items()}
+
+@st.cache_resource
+def _get_alert_engine():
+    """后台信号提醒（进程级单例）：第一个会话触发启动后常驻，之后每 ALERT_INTERVAL 秒评估提醒币种的
+    (交易对, 周期)，与有没有页面打开无关，也不随会话数重复计算。返回 (AlertEngine, 页面读的 MemorySink)。"""
+    if ALERTS == "off":
+        return None
+    mem   = MemorySink()
+    sinks = [mem] + ([FileSink(ALERT_LOG)] if ALERT_LOG else []) + ([WebhookSink(ALERT_WEBHOOK)] if ALERT_WEBHOOK else [])
+    return AlertEngine(_alert_frames, sinks, interval=ALERT_INTERVAL).start(), mem
+
+def _ticker_from_candles(symbol: str) -> dict:
+    """ticker 拉取失败时用 1 小时 K 线推算 24 小时统计。"""
+    df   = get_ohlcv(symbol)
+    last = float(df.iloc[-1]["close"])
+    prev = float(df.iloc[-2]["close"]) if len(df) > 1 else last
+    return {
+        "last": last,
+        "percentage": (last - prev) / prev * 100,
+        "high": float(df["high"].iloc[-24:].max()),
+        "low":  float(df["low"].iloc[-24:].min()),
+        "quoteVolume": float(df["volume"].iloc[-24:].sum() * last),
+    }
 
 def get_ticker(symbol: str) -> dict:
-    """获取实时 ticker，严格按 symbol 隔离。"""
-    now    = time.time()
-    tk_key = f"cache_{symbol}_ticker"
-    ts_key = f"cache_ts_{symbol}"
-    if st.session_state[tk_key] is not None and now - st.session_state[ts_key] < DATA_TTL:
-        return st.session_state[tk_key]
-    sym = "BTC/USDT" if symbol == "BTC" else "ETH/USDT"
-    tk  = _fetch_ticker(sym)
-    df  = st.session_state[f"cache_{symbol}_df"]
-    if tk is None or not tk.get("last"):
-        last = float(df.iloc[-1]["close"]) if df is not None else (104800.0 if symbol == "BTC" else 3942.0)
-        prev = float(df.iloc[-2]["close"]) if df is not None and len(df) > 1 else last
-        tk = {
-            "last": last,
-            "percentage": (last - prev) / prev * 100,
-            "high": float(df["high"].iloc[-24:].max()) if df is not None else last * 1.02,
-            "low":  float(df["low"].iloc[-24:].min())  if df is not None else last * 0.98,
-            "quoteVolume": float(df["volume"].iloc[-24:].sum() * last) if df is not None else 0.0,
-        }
-    st.session_state[tk_key] = tk
-    return tk
-
-# ═════════════════════════════════════════════════════════════════════════════
-# INDICATORS
-# ═════════════════════════════════════════════════════════════════════════════
+    """获取实时 ticker，进程级 TTL 缓存，严格按交易对隔离。"""
+    sym = _ccxt_symbol(symbol)
+
+    def _load(_prev):
+        tk = _fetch_ticker(sym)
+        if tk is None or not tk.get("last"):
+            tk = _ticker_from_candles(symbol)
+        return tk
+
+    return _get_market_store().get((_exchange_id(), sym, TICKER), _load)
+
+@METRICS.timed("fetch")
+def get_tickers(symbols: list) -> dict:
+    """批量获取 ticker：缓存过期的交易对合并成一次 fetch_tickers 请求。"""
+    store = _get_market_store()
+    ex_id = _exchange_id()
+    ccxt_syms = {s: _ccxt_symbol(s) for s in symbols}
+    stale = sorted(s for s, cs in ccxt_syms.items() if store.age((ex_id, cs, TICKER)) >= DATA_TTL)
+    if stale:
+        def _load():
+            got = _fetch_tickers([ccxt_syms[s] for s in stale])
+            for s in stale:
+                tk = got.get(ccxt_syms[s])
+                if tk is None or not tk.get("last"):
+                    METRICS.count("fallback_mock", kind="ticker")
+                    tk = _ticker_from_candles(s)
+                store.put((ex_id, ccxt_syms[s], TICKER), tk)
+        # 只合并并发的同一批请求，结果按交易对各自写回，不在 LRU 里留批量占位条目
+        store.once((ex_id, tuple(stale), "tickers"), _load)
+    return {s: get_ticker(s) for s in symbols}
+
+@METRICS.timed("fetch")
+def get_market_snapshot(symbols: list, tf_label: str, tickers: bool = True) -> tuple[dict, dict]:
+    """并发拉取多个交易对的 K 线与 ticker，最多等待 FETCH_DEADLINE 秒。
+
+    超时的交易对沿用缓存里的上一版数据，慢接口不会拖住整个页面；缓存里也没有的记为 None
+    （不拿模拟数据顶替 —— 评分 / 快照会把它当成实时行情发布），由页面显示“行情延迟”。
+    tickers=False 时不拉 ticker（全市场筛选只用 K 线）。
+    返回 ({symbol: df 或 None}, {symbol: ticker})，ticker 只含 df 不为 None 的交易对。
+    """
+    store = _get_market_store()
+    ex_id = _exchange_id()
+    tf    = _TF_MAP.get(tf_label, "1h")
+    jobs  = {("ohlcv", s): (lambda s=s: get_ohlcv(s, tf_label)) for s in symbols}
+    if tickers:
+        jobs[("tickers",)] = lambda: get_tickers(symbols)
+    res, _ = run_concurrently(jobs, _get_fetch_pool(), FETCH_DEADLINE)
+
+    dfs = {}
+    for s in symbols:
+        df = res.get(("ohlcv", s))
+        if df is None:
+            ser = store.peek((ex_id, _ccxt_symbol(s), BASE_TF))
+            df  = ser.frame(tf) if ser is not None and len(ser) else None
+        if df is None:
+            METRICS.count("stale", kind="ohlcv")
+        dfs[s] = df
+    if not tickers:
+        return dfs, {}
+    got = res.get(("tickers",)) or {}
+    tks = {}
+    for s, df in dfs.items():
+        if df is None:
+            continue
+        tk = got.get(s) or store.peek((ex_id, _ccxt_symbol(s), TICKER))
+        tks[s] = tk if tk is not None else {"last": float(df["close"].iloc[-1])}
+    return dfs, tks
+
+def _mock_order_book(symbol: str, price: float) -> OrderBook:
+    """盘口拉取失败时的模拟盘口：合成行情在 price 两侧各 DEPTH_LEVELS 档，数量随距离增大，夹几道挂单墙。
+    同一子步（一分钟）、同一价格返回同一本（版本号不变，快照 / 图表缓存照常命中）。"""
+    return _mock_book(symbol, price, _market_sim().tick_index)
+
+@lru_cache(maxsize=64)
+def _mock_book(symbol: str, price: float, tick: int) -> OrderBook:
+    return _market_sim().order_book(symbol, DEPTH_LEVELS, mid=price)
+
+@METRICS.timed("fetch")
+def get_order_books(symbols: list, tks: dict) -> dict:
+    """并发获取盘口，进程级 TTL 缓存；推送盘口在线时直接读推送维护的那一本。
+    拉取失败 / 超时用 ticker 价格生成模拟盘口。返回 {symbol: OrderBook}。"""
+    store = _get_market_store()
+    ex_id = _exchange_id()
+
+    def _get(s):
+        cs = _ccxt_symbol(s)
+        return store.get((ex_id, cs, DEPTH), lambda _prev: _fetch_order_book(cs))
+
+    res, _ = run_concurrently({s: (lambda s=s: _get(s)) for s in symbols}, _get_fetch_pool(), FETCH_DEADLINE)
+    out = {}
+    for s in symbols:
+        book = res.get(s)
+        if book is None or not book.synced or book.mid is None:
+            METRICS.count("fallback_mock", kind="depth")
+            book = _mock_order_book(s, float(tks[s].get("last") or 0) or 1.0)
+        out[s] = book
+    return out
+
+# 策略页 K 线图的时间范围 → 天数（None 为最近 120 根）
+_CHART_RANGES = {"近期": None, "1周": 7, "1月": 30, "3月": 90, "1年": 365}
+
+def chart_bars(tf_label: str, span: str) -> int:
+    """时间范围对应的 K 线根数，至少 120 根。"""
+    days = _CHART_RANGES.get(span)
+    tf   = _TF_MAP.get(tf_label, tf_label)
+    return 120 if days is None else max(120, days * 86_400_000 // tf_ms(tf))
+
+def _history_frame(symbol: str, tf: str, bars: int):
+    """本地库里最近 bars 根 tf 周期的 K 线（按健康度依次找各交易所）；原生周期不够长时由基础周期合成。
+    比实时序列还短时返回 None。"""
+    cs   = _get_candle_store()
+    pool = _get_exchange_pool()
+    if cs is None or pool is None:
+        return None
+    sym = _ccxt_symbol(symbol)
+    for v in pool.ranked() or pool.venues:
+        try:
+            df = cs.read(v.id, sym, tf, limit=bars)
+            if len(df) < bars and tf != BASE_TF:
+                base = cs.read(v.id, sym, BASE_TF, limit=bars * (tf_ms(tf) // tf_ms(BASE_TF)))
+                ts, data = aggregate(*ohlcv_arrays(base, "ms"), tf, drop_partial=True)
+                if len(ts) > len(df):
+                    idx = pd.DatetimeIndex(ts.astype("datetime64[ms]").astype("datetime64[ns]"), name="ts")
+                    df  = pd.DataFrame(data, index=idx, columns=OHLCV_COLS)
+        except OSError:
+            continue
+        if len(df) > OHLCV_BARS:
+            return df
+    return None
 
-def _calc_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    c = df["close"].astype(float)
-    h = df["high"].astype(float)
-    l = df["low"].astype(float)
-    for p in [9, 21, 55, 200]:
-        df[f"ema{p}"] = c.ewm(span=p, adjust=False).mean()
-    delta = c.diff()
-    gain  = delta.clip(lower=0).ewm(span=14, adjust=False).mean()
-    loss  = (-delta.clip(upper=0)).ewm(span=14, adjust=False).mean()
-    df["rsi"]         = 100 - 100 / (1 + gain / loss.replace(0, np.nan))
-    ema12             = c.ewm(span=12, adjust=False).mean()
-    ema26             = c.ewm(span=26, adjust=False).mean()
-    df["macd"]        = ema12 - ema26
-    df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
-    df["macd_hist"]   = df["macd"] - df["macd_signal"]
-    low9              = l.rolling(9, min_periods=1).min()
-    high9             = h.rolling(9, min_periods=1).max()
-    rsv               = (c - low9) / (high9 - low9 + 1e-12) * 100
-    df["K"]           = rsv.ewm(com=2, adjust=False).mean()
-    df["D"]           = df["K"].ewm(com=2, adjust=False).mean()
-    df["J"]           = 3 * df["K"] - 2 * df["D"]
-    ma20              = c.rolling(20).mean()
-    std20             = c.rolling(20).std()
-    df["bb_upper"]    = ma20 + 2 * std20
-    df["bb_lower"]    = ma20 - 2 * std20
-    df["bb_mid"]      = ma20
-    prev_c            = c.shift(1)
-    tr                = pd.concat([h - l, (h - prev_c).abs(), (l - prev_c).abs()], axis=1).max(axis=1)
-    df["atr"]         = tr.rolling(14).mean()
-    return df
-
-def _score_strategy(df: pd.DataFrame) -> dict:
-    """综合评分 + 策略计算，均线趋势决定方向，不会出现趋势空头却建议做多的错误。"""
-    r    = df.iloc[-1]
-    p    = float(r["close"])
-    atr  = float(r["atr"]) if not np.isnan(r["atr"]) else p * 0.015
-    sigs = []
-    score = 0
-
-    # RSI
-    rsi = float(r["rsi"])
-    if   rsi < 30:   sigs.append(("RSI(14)", f"{rsi:.1f}", "超卖",    "LONG",   2)); score += 2
-    elif rsi < 45:   sigs.append(("RSI(14)", f"{rsi:.1f}", "偏弱",    "LONG",   1)); score += 1
-    elif rsi > 75:   sigs.append(("RSI(14)", f"{rsi:.1f}", "极度超买", "SHORT", -2)); score -= 2
-    elif rsi > 60:   sigs.append(("RSI(14)", f"{rsi:.1f}", "超买",    "SHORT", -1)); score -= 1
-    else:            sigs.append(("RSI(14)", f"{rsi:.1f}", "中性",    "NEUT",   0))
-
-    # MACD
-    mv, ms, mh = float(r["macd"]), float(r["macd_signal"]), float(r["macd_hist"])
-    if   mv > ms and mh > 0: sigs.append(("MACD", f"{mv:.0f}", "金叉↑", "LONG",   2)); score += 2
-    elif mv < ms and mh < 0: sigs.append(("MACD", f"{mv:.0f}", "死叉↓", "SHORT", -2)); score -= 2
-    else:                     sigs.append(("MACD", f"{mv:.0f}", "震荡",  "NEUT",   0))
-
-    # KDJ
-    K, D, J = float(r["K"]), float(r["D"]), float(r["J"])
-    if   K > D and K < 80:  sigs.append(("KDJ-K", f"{K:.1f}", "金叉",  "LONG",   2)); score += 2
-    elif K < D and K > 20:  sigs.append(("KDJ-K", f"{K:.1f}", "死叉",  "SHORT", -2)); score -= 2
-    elif K > 85:             sigs.append(("KDJ-K", f"{K:.1f}", "超买",  "SHORT", -1)); score -= 1
-    elif K < 15:             sigs.append(("KDJ-K", f"{K:.1f}", "超卖",  "LONG",   1)); score += 1
-    else:                    sigs.append(("KDJ-K", f"{K:.1f}", "中性",  "NEUT",   0))
-
-    # EMA 趋势 ── 这是方向的核心锚点
-    e9, e21, e55 = float(r["ema9"]), float(r["ema21"]), float(r["ema55"])
-    ema_bull = p > e9 > e21 > e55
-    ema_bear = p < e9 < e21 < e55
-    if   ema_bull: sigs.append(("EMA趋势", f"9>{e21:.0f}", "多头排列", "LONG",   3)); score += 3
-    elif ema_bear: sigs.append(("EMA趋势", f"9<{e21:.0f}", "空头排列", "SHORT", -3)); score -= 3
-    else:          sigs.append(("EMA趋势", "缠绕",          "震荡",    "NEUT",   0))
-
-    # Bollinger Bands
-    bb_u, bb_l = float(r["bb_upper"]), float(r["bb_lower"])
-    if   p < bb_l: sigs.append(("BB",  f"下轨{bb_l:.0f}", "跌破下轨", "LONG",   1)); score += 1
-    elif p > bb_u: sigs.append(("BB",  f"上轨{bb_u:.0f}", "突破上轨", "SHORT", -1)); score -= 1
-    else:          sigs.append(("BB",  "通道内",           "中性",    "NEUT",   0))
-
-    # ── 方向判断（EMA 趋势具有一票否决权）──────────────────────────────────
-    # 如果 EMA 明确空头排列，最终方向不允许为做多
-    if ema_bear and score > 0:
-        score = -score // 2  # 强制转为偏空
-    # 如果 EMA 明确多头排列，最终方向不允许为做空
-    if ema_bull and score < 0:
-        score = abs(score) // 2  # 强制转为偏多
-
-    if   score >= 5:   direction, dtxt, col = "STRONG_LONG",  "🚀 强烈做多", C["green"]
-    elif score >= 2:   direction, dtxt, col = "LONG",         "📈 轻多偏多", "#16A34A"
-    elif score <= -5:  direction, dtxt, col = "STRONG_SHORT", "🔻 强烈做空", C["red"]
-    elif score <= -2:  direction, dtxt, col = "SHORT",        "📉 轻空偏空", "#B91C1C"
-    else:              direction, dtxt, col = "NEUTRAL",      "〰 震荡观望", C["amber"]
-
-    # ── 点位计算 ─────────────────────────────────────────────────────────────
-    if "LONG" in direction:
-        entry  = p * 0.9990
-        tp1    = entry + atr * 1.8
-        tp2    = entry + atr * 3.5
-        sl     = entry - atr * 1.2
-    elif "SHORT" in direction:
-        entry  = p * 1.0010
-        tp1    = entry - atr * 1.8
-        tp2    = entry - atr * 3.5
-        sl     = entry + atr * 1.2
-    else:
-        entry  = p
-        tp1    = p + atr * 1.5
-        tp2    = p + atr * 3.0
-        sl     = p - atr * 1.5
-
-    rr      = abs(tp1 - entry) / max(abs(sl - entry), 1e-9)
-    support = min(bb_l, e55) * 0.997
-    resist  = max(bb_u, e21) * 1.003
-
-    # ── 限价挂单策略 ─────────────────────────────────────────────────────────
-    # 多单挂单：在支撑位下方买入，赢向阻力位
-    limit_long_entry  = support * 0.998
-    limit_long_tp1    = resist  * 0.998
-    limit_long_tp2    = resist  * 1.012
-    limit_long_sl     = support * 0.988
-    limit_long_rr     = abs(limit_long_tp1 - limit_long_entry) / max(abs(limit_long_sl - limit_long_entry), 1e-9)
-    # 空单挂单：在阻力位上方做空，打向支撑位
-    limit_short_entry = resist  * 1.002
-    limit_short_tp1   = support * 1.002
-    limit_short_tp2   = support * 0.988
-    limit_short_sl    = resist  * 1.012
-    limit_short_rr    = abs(limit_short_tp1 - limit_short_entry) / max(abs(limit_short_sl - limit_short_entry), 1e-9)
-
-    return dict(
-        direction=direction, direction_text=dtxt, color=col,
-        entry=entry, tp1=tp1, tp2=tp2, sl=sl, rr=rr, score=score,
-        signals=sigs, support=support, resist=resist,
-        rsi=rsi, K=K, D=D, J=J, macd=mv, macd_signal=ms, macd_hist=mh,
-        price=p, atr=atr, ema9=e9, ema21=e21, ema55=e55, bb_upper=bb_u, bb_lower=bb_l,
-        ema_bull=ema_bull, ema_bear=ema_bear,
-        limit_long_entry=limit_long_entry, limit_long_tp1=limit_long_tp1,
-        limit_long_tp2=limit_long_tp2, limit_long_sl=limit_long_sl, limit_long_rr=limit_long_rr,
-        limit_short_entry=limit_short_entry, limit_short_tp1=limit_short_tp1,
-        limit_short_tp2=limit_short_tp2, limit_short_sl=limit_short_sl, limit_short_rr=limit_short_rr,
-    )
+def get_chart_frame(symbol: str, tf_label: str, bars: int, live: pd.DataFrame) -> pd.DataFrame:
+    """K 线图用的长窗口：最近 bars 根 K 线及指标。
+
+    历史 K 线来自本地库（模拟模式下为模拟数据），按 CHART_TTL 进程级缓存；实时序列 live 开始之前的部分
+    接上 live 的全部 K 线后整段重算指标 —— 直接拼两边各自算好的指标时，live 开头那段的 ema200 / MACD
+    还没预热，接缝处会出折角。窗口前面多取 CHART_WARMUP 根，第一根的长周期指标也已预热。
+    最后一根的 K 线与页面其余部分一致。bars 不超过 live 的长度、或没有更长的历史时直接返回 live。
+    返回的 DataFrame 只读。
+    """
+    if bars <= len(live):
+        return live
+    tf = _TF_MAP.get(tf_label, tf_label)
+
+    def _load(_prev):
+        df = _history_frame(symbol, tf, bars + CHART_WARMUP)
+        if df is None and live.attrs.get("source") == "mock":
+            # 与实时序列取自同一条合成路径，接缝处天然连续
+            METRICS.count("fallback_mock", kind="history")
+            df = _mock_ohlcv(symbol, tf, bars + CHART_WARMUP)
+        return None if df is None else df[OHLCV_COLS]
+
+    hist = _get_market_store().get((_exchange_id(), _ccxt_symbol(symbol), tf, "chart", bars), _load, ttl=CHART_TTL)
+    if hist is None:
+        return live
+    head = hist.iloc[:hist.index.searchsorted(live.index[0])]
+    with METRICS.timer("indicators"):
+        return calc_indicators(pd.concat([head, live[OHLCV_COLS]]).iloc[-(bars + CHART_WARMUP):]).iloc[-bars:]
 
 # ═════════════════════════════════════════════════════════════════════════════
 # UI PRIMITIVES
 # ═════════════════════════════════════════════════════════════════════════════
 
+# 预编译片段：配色 / 阴影在这里代入一次，渲染结果按槽位值缓存（见 fragments）
+_CARD = Fragment('<div style="background:{C[card]};border-radius:14px;padding:1.1rem 1.2rem;'
+                 'box-shadow:{SHADOW};border:1px solid {C[border]};{extra}">{inner}</div>', C=C, SHADOW=SHADOW)
+_WHITE_CARD = Fragment('<div style="background:{C[bg]};border-radius:14px;padding:1.2rem 1.4rem;'
+                       'box-shadow:{SHADOW_MD};border:1px solid {C[border]};{extra}">{inner}</div>', C=C, SHADOW_MD=SHADOW_MD)
+_METRIC = Fragment('<p style="margin:0;font-size:10px;font-weight:700;color:{C[sub]};'
+                   'letter-spacing:.6px;text-transform:uppercase">{label}</p>'
+                   '<p style="margin:2px 0 0;font-size:{vs};font-weight:700;color:{vc};'
+                   'font-family:{C[mono]}">{value}</p>{sub}', C=C)
+_METRIC_SUB = Fragment('<p style="margin:0;font-size:11px;color:{C[sub]}">{sub}</p>', C=C)
+_DIR_BADGE = Fragment('<span style="background:{col}18;color:{col};border:1.5px solid {col}44;'
+                      'padding:6px 18px;border-radius:20px;font-size:13px;font-weight:800">{txt}</span>')
+# 信号徽章只有三种，导入时渲染好
+_BADGES = {
+    k: f'<span style="display:inline-block;padding:2px 9px;border-radius:20px;font-size:11px;font-weight:600;{cs}">{txt}</span>'
+    for k, (cs, txt) in {
+        "LONG":  (f"background:{C['green_lt']};color:{C['green']};border:1px solid #A7F3D0", "▲ 看多"),
+        "SHORT": (f"background:{C['red_lt']};color:{C['red']};border:1px solid #FECACA",   "▼ 看空"),
+        "NEUT":  (f"background:{C['amber_lt']};color:{C['amber']};border:1px solid #FDE68A","◆ 中性"),
+        "STALE": (f"background:#F1F5F9;color:{C['sub']};border:1px solid {C['border']}",   "⏳ 行情延迟"),
+    }.items()
+}
+_SECTION = Fragment('<div style="margin-bottom:1.7rem">'
+                    '<p style="margin:0;font-size:18px;font-weight:800;color:{C[text]};letter-spacing:-.3px">{title}</p>'
+                    '{sub}</div>', C=C)
+_SECTION_SUB = Fragment('<p style="margin:2px 0 0;font-size:13px;color:{C[sub]}">{sub}</p>', C=C)
+
 def _card(inner: str, extra_style: str = "") -> str:
-    return (f'<div style="background:{C["card"]};border-radius:14px;padding:1.1rem 1.2rem;'
-            f'box-shadow:{SHADOW};border:1px solid {C["border"]};{extra_style}">{inner}</div>')
+    return _CARD(inner=inner, extra=extra_style)
 
 def _white_card(inner: str, extra_style: str = "") -> str:
-    return (f'<div style="background:{C["bg"]};border-radius:14px;padding:1.2rem 1.4rem;'
-            f'box-shadow:{SHADOW_MD};border:1px solid {C["border"]};{extra_style}">{inner}</div>')
+    return _WHITE_CARD(inner=inner, extra=extra_style)
 
 def _metric(label: str, value: str, sub: str = "", vc: str = C["text"], small: bool = False) -> str:
-    vs = "18px" if small else "22px"
-    return (f'<p style="margin:0;font-size:10px;font-weight:700;color:{C["sub"]};'
-            f'letter-spacing:.6px;text-transform:uppercase">{label}</p>'
-            f'<p style="margin:2px 0 0;font-size:{vs};font-weight:700;color:{vc};'
-            f'font-family:{C["mono"]}">{value}</p>'
-            + (f'<p style="margin:0;font-size:11px;color:{C["sub"]}">{sub}</p>' if sub else ""))
+    return _METRIC(label=label, value=value, vc=vc, vs="18px" if small else "22px",
+                   sub=_METRIC_SUB(sub=sub) if sub else "")
 
 def _badge(stype: str) -> str:
-    m = {
-        "LONG":  (f"background:{C['green_lt']};color:{C['green']};border:1px solid #A7F3D0", "▲ 看多"),
-        "SHORT": (f"background:{C['red_lt']};color:{C['red']};border:1px solid #FECACA",   "▼ 看空"),
-        "NEUT":  (f"background:{C['amber_lt']};color:{C['amber']};border:1px solid #FDE68A","◆ 中性"),
-    }
-    cs, txt = m.get(stype, m["NEUT"])
-    return f'<span style="display:inline-block;padding:2px 9px;border-radius:20px;font-size:11px;font-weight:600;{cs}">{txt}</span>'
+    return _BADGES.get(stype, _BADGES["NEUT"])
 
 def _dir_badge(txt: str, col: str) -> str:
-    return (f'<span style="background:{col}18;color:{col};border:1.5px solid {col}44;'
-            f'padding:6px 18px;border-radius:20px;font-size:13px;font-weight:800">{txt}</span>')
+    return _DIR_BADGE(txt=txt, col=col)
+
+def _stale_card(sym: str) -> str:
+    """本轮超时、缓存里也没有行情的交易对：占位卡片，不评分、不出点位。"""
+    return _card(f'<span style="font-size:15px;font-weight:800;color:{C["text"]};margin-right:.6rem">{sym}/USDT</span>'
+                 f'{_badge("STALE")}<span style="font-size:12px;color:{C["sub"]};margin-left:.6rem">'
+                 f'交易所在 {FETCH_DEADLINE:g}s 内未返回，下一轮刷新补上</span>')
 
-def fp(v: float, sym: str) -> str:
-    return f"${v:,.1f}" if sym == "BTC" else f"${v:,.2f}"
+def _stale_note(syms: list) -> str:
+    """筛选页：本轮没有行情、未参与排行的交易对。"""
+    shown = "、".join(syms[:12]) + (f" 等 {len(syms)} 个" if len(syms) > 12 else "")
+    return (f'<p style="margin:.2rem 0 .4rem;font-size:12px;color:{C["sub"]}">{_badge("STALE")} '
+            f'{shown} 本轮未返回行情，未参与排行</p>')
 
 def _section_header(title: str, sub: str = "") -> None:
-    s = f'<p style="margin:0;font-size:18px;font-weight:800;color:{C["text"]};letter-spacing:-.3px">{title}</p>'
-    if sub:
-        s += f'<p style="margin:2px 0 0;font-size:13px;color:{C["sub"]}">{sub}</p>'
-    st.markdown(s, unsafe_allow_html=True)
-    st.markdown("<div style='height:.7rem'></div>", unsafe_allow_html=True)
+    # 原来标题后面单独跟一个 .7rem 的占位元素；并进标题的下边距（再加上省掉的 1rem 元素间距），少发一个元素
+    st.markdown(_SECTION(title=title, sub=_SECTION_SUB(sub=sub) if sub else ""), unsafe_allow_html=True)
 
 def _spacer(h: str = ".8rem") -> None:
     st.markdown(f"<div style='height:{h}'></div>", unsafe_allow_html=True)
@@ -427,16 +811,20 @@ def _watermark() -> None:
 # TOP STATUS BAR
 # ═════════════════════════════════════════════════════════════════════════════
 
-def _topbar() -> None:
-    btc_tk  = get_ticker("BTC")
-    eth_tk  = get_ticker("ETH")
-    btc_p   = float(btc_tk.get("last", 0))
-    eth_p   = float(eth_tk.get("last", 0))
-    btc_pct = float(btc_tk.get("percentage", 0) or 0)
-    eth_pct = float(eth_tk.get("percentage", 0) or 0)
+_TOPBAR_TICKER = Fragment('<span style="font-size:12px;color:{C[sub]}">{sym}&nbsp;'
+                          '<span style="color:{C[text]};font-weight:700;font-family:{C[mono]}">${price:,.{dec}f}</span>&nbsp;'
+                          '<span style="color:{col};font-size:11px;font-weight:600">{arrow} {pct:.2f}%</span></span>', C=C)
 
-    def _pc(v):  return f"{'▲' if v>=0 else '▼'} {abs(v):.2f}%"
-    def _cc(v):  return C["green"] if v >= 0 else C["red"]
+@st.fragment(run_every=DATA_TTL)
+@METRICS.rerun("topbar")
+def _topbar() -> None:
+    reg  = _get_registry()
+    tks  = get_tickers(DEFAULT_SYMBOLS)
+    rows = []
+    for sym in DEFAULT_SYMBOLS:
+        pct = float(tks[sym].get("percentage", 0) or 0)
+        rows.append(_TOPBAR_TICKER(sym=reg.symbol(sym), price=float(tks[sym].get("last", 0) or 0), dec=reg.decimals(sym),
+                                   col=C["green"] if pct >= 0 else C["red"], arrow="▲" if pct >= 0 else "▼", pct=abs(pct)))
 
     mode    = "LIVE · ccxt" if CCXT_AVAILABLE else "DEMO"
     mbg     = C["green_lt"] if CCXT_AVAILABLE else C["amber_lt"]
@@ -451,12 +839,7 @@ def _topbar() -> None:
         f'<span style="background:{mbg};color:{mtxt};padding:2px 9px;border-radius:6px;font-size:10px;font-weight:700">{mode}</span>'
         f'</div>'
         f'<div style="display:flex;gap:22px;align-items:center;flex-wrap:wrap">'
-        f'<span style="font-size:12px;color:{C["sub"]}">₿ BTC/USDT&nbsp;'
-        f'<span style="color:{C["text"]};font-weight:700;font-family:{C["mono"]}">${btc_p:,.1f}</span>&nbsp;'
-        f'<span style="color:{_cc(btc_pct)};font-size:11px;font-weight:600">{_pc(btc_pct)}</span></span>'
-        f'<span style="font-size:12px;color:{C["sub"]}">Ξ ETH/USDT&nbsp;'
-        f'<span style="color:{C["text"]};font-weight:700;font-family:{C["mono"]}">${eth_p:,.2f}</span>&nbsp;'
-        f'<span style="color:{_cc(eth_pct)};font-size:11px;font-weight:600">{_pc(eth_pct)}</span></span>'
+        f'{"".join(rows)}'
         f'<span style="font-size:10px;color:{C["sub"]}">{datetime.now().strftime("%H:%M:%S")}</span>'
         f'</div></div>',
         unsafe_allow_html=True
@@ -466,6 +849,31 @@ def _topbar() -> None:
 # SIDEBAR
 # ═════════════════════════════════════════════════════════════════════════════
 
+_ALERT_COLOR = {"ema": C["blue"], "limit_long": C["green"], "limit_short": C["red"]}
+_ALERT_ROW = Fragment('<div style="padding:6px 0;border-bottom:1px solid {C[border]}">'
+                      '<span style="font-size:10px;color:{C[sub]};font-family:{C[mono]}">{when}</span>'
+                      '<p style="margin:2px 0 0;font-size:11px;font-weight:600;color:{col}">{text}</p></div>', C=C)
+
+@st.fragment(run_every=SCREENER_TTL)
+def _alert_feed() -> None:
+    """侧栏：后台提醒服务最近产生的提醒（服务进程级常驻，这里只读缓冲）。"""
+    svc = _get_alert_engine()
+    if svc is None:
+        return
+    eng, mem = svc
+    rows = mem.recent(ALERT_ROWS)
+    body = "".join(
+        _ALERT_ROW(when=datetime.fromtimestamp(a.at).strftime("%H:%M"), text=a.text,
+                   col=DIRECTION_STYLE[a.value][1] if a.kind == "direction" else _ALERT_COLOR[a.kind])
+        for a in rows
+    ) or f'<p style="margin:0;font-size:11px;color:{C["sub"]}">暂无提醒 · 跟踪 {len(eng)} 个周期</p>'
+    st.markdown(
+        f'<p style="font-size:10px;font-weight:700;color:{C["sub"]};letter-spacing:.8px;margin-bottom:.3rem">🔔 信号提醒</p>'
+        f'{body}',
+        unsafe_allow_html=True
+    )
+    st.markdown("<hr>", unsafe_allow_html=True)
+
 def _sidebar() -> None:
     with st.sidebar:
         mask = st.session_state.uid[:4] + "****" if len(st.session_state.uid) >= 4 else st.session_state.uid
@@ -480,6 +888,7 @@ def _sidebar() -> None:
         st.markdown("<hr>", unsafe_allow_html=True)
         NAV = [
             ("🎯", "核心策略",    "🎯 核心策略"),
+            ("📊", "全市场筛选",  "📊 全市场筛选"),
             ("💰", "顶级返佣",    "💰 顶级返佣"),
             ("🔥", "清算热力图",  "🔥 清算热力图"),
             ("🌊", "链上监控",    "🌊 链上监控"),
@@ -502,6 +911,7 @@ def _sidebar() -> None:
                     st.session_state.page = key
                     st.rerun()
         st.markdown("<hr>", unsafe_allow_html=True)
+        _alert_feed()
         st.markdown(f'<p style="font-size:10px;color:{C["sub"]};text-align:center">AEGIS QUANT Pro v5.0<br>TTL ≤ 5s</p>', unsafe_allow_html=True)
         _spacer(".3rem")
         if st.button("🚪 退出", use_container_width=True, key="logout"):
@@ -597,69 +1007,123 @@ def render_gate() -> None:
 # PAGE 1: 核心策略
 # ═════════════════════════════════════════════════════════════════════════════
 
-def _candle_fig(df: pd.DataFrame, sym: str) -> go.Figure:
-    tail = df.tail(120).copy()
-    xs   = list(range(len(tail)))
-    fig  = go.Figure()
-    fig.add_trace(go.Candlestick(
-        x=xs, open=tail["open"], high=tail["high"], low=tail["low"], close=tail["close"],
-        increasing=dict(fillcolor="#059669", line=dict(color="#047857", width=1)),
-        decreasing=dict(fillcolor="#DC2626", line=dict(color="#B91C1C", width=1)),
-        name=sym, showlegend=False,
-        hoverlabel=dict(bgcolor="#1F2937", font=dict(color="#F9FAFB", size=11)),
-    ))
-    ema_cfg = [("ema9","#2563EB","EMA9"),("ema21","#D97706","EMA21"),("ema55","#7C3AED","EMA55")]
-    for col, color, name in ema_cfg:
-        fig.add_trace(go.Scatter(x=xs, y=tail[col], line=dict(color=color, width=1.5),
-                                 name=name, mode="lines", hoverinfo="skip"))
-    fig.add_trace(go.Scatter(x=xs, y=tail["bb_upper"],
-                             line=dict(color="rgba(107,114,128,.3)", width=1, dash="dot"),
-                             showlegend=False, hoverinfo="skip"))
-    fig.add_trace(go.Scatter(x=xs, y=tail["bb_lower"],
-                             line=dict(color="rgba(107,114,128,.3)", width=1, dash="dot"),
-                             fill="tonexty", fillcolor="rgba(107,114,128,.04)",
-                             showlegend=False, hoverinfo="skip"))
-    step = 20
-    tvs  = list(range(0, len(tail), step))
-    tts  = [str(tail.index[i])[:13] for i in tvs]
-    fig.update_layout(
-        height=280, margin=dict(l=0, r=2, t=8, b=0),
-        paper_bgcolor=C["bg"], plot_bgcolor=C["bg"],
-        xaxis=dict(showgrid=False, zeroline=False, rangeslider=dict(visible=False),
-                   tickvals=tvs, ticktext=tts,
-                   tickfont=dict(size=9, family="JetBrains Mono", color=C["sub"]),
-                   fixedrange=False),
-        yaxis=dict(showgrid=True, gridcolor="#F3F4F6", zeroline=False, side="right",
-                   tickfont=dict(size=9, family="JetBrains Mono", color=C["sub"]),
-                   fixedrange=False),
-        legend=dict(orientation="h", yanchor="top", y=1.06, xanchor="left", x=0,
-                    font=dict(size=9, color=C["sub"]), bgcolor="rgba(0,0,0,0)"),
-        dragmode="pan", font=dict(family="Inter"),
-    )
-    return fig
+@st.cache_resource
+def _get_charts() -> ChartFactory:
+    """进程级图表工厂：布局模板只建一次，成品图按数据指纹缓存，所有会话共享。"""
+    return ChartFactory(C)
+
+@METRICS.timed("figure")
+def _candle_fig(df: pd.DataFrame, sym: str, bars: int = 120) -> go.Figure:
+    return _get_charts().candle(df, sym, bars)
 
+@METRICS.timed("figure")
 def _macd_fig(df: pd.DataFrame, sym_label: str) -> go.Figure:
-    tail = df.tail(80)
-    xs   = list(range(len(tail)))
-    hc   = [C["green"] if v >= 0 else C["red"] for v in tail["macd_hist"]]
-    fig  = go.Figure()
-    fig.add_trace(go.Bar(x=xs, y=tail["macd_hist"], marker_color=hc, showlegend=False, hoverinfo="skip"))
-    fig.add_trace(go.Scatter(x=xs, y=tail["macd"], line=dict(color=C["blue"], width=1.5), name="MACD"))
-    fig.add_trace(go.Scatter(x=xs, y=tail["macd_signal"], line=dict(color=C["amber"], width=1.5), name="Signal"))
-    fig.update_layout(
-        title=dict(text=f"{sym_label} MACD", font=dict(size=11, color=C["sub"]), x=0),
-        height=150, margin=dict(l=0, r=0, t=26, b=0),
-        paper_bgcolor=C["bg"], plot_bgcolor=C["bg"],
-        xaxis=dict(showgrid=False, showticklabels=False, fixedrange=False),
-        yaxis=dict(showgrid=True, gridcolor="#F3F4F6",
-                   tickfont=dict(size=8, family="JetBrains Mono", color=C["sub"]), fixedrange=False),
-        legend=dict(orientation="h", font=dict(size=9), y=1.2, bgcolor="rgba(0,0,0,0)"),
-        dragmode="pan",
+    return _get_charts().macd(df, sym_label)
+
+@METRICS.timed("figure")
+def _depth_fig(book: OrderBook, sym: str) -> go.Figure:
+    return _get_charts().depth(book, sym, DEPTH_LEVELS)
+
+_TF_LABEL = {v: k for k, v in _TF_MAP.items()}
+
+def _confluence_strip(row: pd.Series) -> str:
+    """多周期共振条：各周期方向 + 评分，右侧为加权综合方向与共振度。"""
+    cells = ""
+    for tf in _TF_MAP.values():
+        d = row.get(f"direction_{tf}")
+        if not isinstance(d, str):
+            continue
+        txt, col = DIRECTION_STYLE[d]
+        cells += (f'<div style="flex:1;min-width:92px;background:{col}10;border:1px solid {col}33;'
+                  f'border-radius:10px;padding:6px 10px">'
+                  f'<p style="margin:0;font-size:10px;font-weight:700;color:{C["sub"]}">{_TF_LABEL[tf]}</p>'
+                  f'<p style="margin:1px 0 0;font-size:12px;font-weight:700;color:{col}">{txt}</p>'
+                  f'<p style="margin:0;font-size:10px;color:{C["sub"]};font-family:{C["mono"]}">评分 {row[f"score_{tf}"]:+.0f}</p>'
+                  f'</div>')
+    txt, col = DIRECTION_STYLE[row["direction"]]
+    agree = float(row["agree"])
+    ac    = C["green"] if agree >= 0.8 else C["amber"] if agree >= 0.5 else C["red"]
+    return (
+        f'<div style="background:{C["bg"]};border-radius:14px;padding:.7rem 1rem;box-shadow:{SHADOW};'
+        f'border:1px solid {C["border"]};margin-bottom:8px;display:flex;align-items:center;gap:8px;flex-wrap:wrap">'
+        f'<span style="font-size:10px;font-weight:700;color:{C["sub"]};letter-spacing:.6px;margin-right:4px">多周期共振</span>'
+        f'{cells}'
+        f'<div style="flex:1.4;min-width:150px;text-align:right">'
+        f'{_dir_badge(txt, col)}'
+        f'<p style="margin:6px 0 0;font-size:10px;color:{C["sub"]}">加权评分 '
+        f'<b style="font-family:{C["mono"]};color:{C["text"]}">{row["score"]:+.1f}</b> · 共振度 '
+        f'<b style="font-family:{C["mono"]};color:{ac}">{agree:.0%}</b></p>'
+        f'</div></div>'
     )
-    return fig
 
-def _coin_block(sym: str, df: pd.DataFrame, s: dict, tk: dict, tf_label: str) -> None:
-    dec  = 1 if sym == "BTC" else 2
+_SIGNAL_ROW = Fragment('<div style="display:flex;justify-content:space-between;align-items:center;'
+                      'padding:6px 0;border-bottom:1px solid {C[border]}">'
+                      '<span style="font-size:11px;font-weight:600;color:{C[text]}">{name}'
+                      '<span style="color:{C[sub]};font-weight:400;margin-left:4px;font-family:{C[mono]};font-size:10px">{val}</span></span>'
+                      '<span style="display:flex;align-items:center;gap:5px">'
+                      '<span style="font-size:10px;color:{C[sub]}">{note}</span>'
+                      '{badge}</span></div>', C=C)
+_LEVEL_ROW = Fragment('<div style="display:flex;justify-content:space-between;align-items:center;'
+                      'padding:6px 10px;border-radius:8px;background:{col}0D;margin-bottom:5px">'
+                      '<span style="font-size:11px;font-weight:500;color:{C[sub]}">{ico} {lbl}</span>'
+                      '<span style="font-size:13px;font-weight:700;color:{col};font-family:{C[mono]}">${val:,.{dec}f}</span></div>', C=C)
+_COIN_HEADER = Fragment(
+    '<div style="background:{C[bg]};border-radius:14px;padding:1rem 1.3rem;'
+    'box-shadow:{SHADOW};border:1px solid {C[border]};margin-bottom:8px">'
+    '<div style="display:flex;align-items:center;justify-content:space-between;flex-wrap:wrap;gap:8px">'
+    '<div style="display:flex;align-items:center;gap:12px;flex-wrap:wrap">'
+    '<span style="font-size:15px;font-weight:800;color:{C[text]};font-family:{C[mono]}">{sym}/USDT</span>'
+    '<span style="font-size:26px;font-weight:700;color:{C[text]};font-family:{C[mono]}">${prc:,.{dec}f}</span>'
+    '<span style="font-size:13px;font-weight:700;color:{pcc}">{pcs}</span>'
+    '<span style="font-size:11px;color:{C[sub]}">H:${h24:,.{dec}f} | L:${l24:,.{dec}f} | Vol:${vol:.1f}M</span>'
+    '</div>'
+    '<div style="display:flex;align-items:center;gap:8px">'
+    '{badge}'
+    '<span style="font-size:10px;color:{C[sub]};background:{C[card]};'
+    'padding:4px 10px;border-radius:8px;border:1px solid {C[border]}">{tf_label}周期</span>'
+    '</div>'
+    '</div></div>', C=C, SHADOW=SHADOW)
+
+@lru_cache(maxsize=64)
+def _signal_matrix(signals: tuple, rsi: float, K: float, D: float, ema9: float, ema55: float, dec: int) -> str:
+    """指标信号矩阵卡片的内容，按全部输入缓存（行情没变时直接复用）。"""
+    srows = "".join(_SIGNAL_ROW(name=sg[0], val=sg[1], note=sg[2], badge=_badge(sg[3])) for sg in signals)
+    buys  = sum(1 for sg in signals if sg[3] == "LONG")
+    total = len(signals)
+    bw    = int(buys / total * 100)
+    rc    = C["red"] if rsi>70 else C["green"] if rsi<30 else C["blue"]
+    kc    = C["green"] if K > D else C["red"]
+    return (
+        f'<p style="margin:0 0 .5rem;font-size:10px;font-weight:700;color:{C["sub"]};'
+        f'letter-spacing:.6px;text-transform:uppercase">指标信号矩阵</p>'
+        f'{srows}'
+        f'<div style="margin-top:.7rem">'
+        f'<div style="display:flex;justify-content:space-between;margin-bottom:3px">'
+        f'<span style="font-size:10px;color:{C["green"]};font-weight:600">看多 {buys}/{total}</span>'
+        f'<span style="font-size:10px;color:{C["red"]};font-weight:600">看空 {total-buys}/{total}</span></div>'
+        f'<div style="height:4px;border-radius:2px;background:{C["red_lt"]};overflow:hidden">'
+        f'<div style="height:100%;width:{bw}%;background:{C["green"]};border-radius:2px"></div></div></div>'
+        f'<div style="margin-top:.7rem;display:grid;grid-template-columns:1fr 1fr;gap:6px">'
+        f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
+        f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">RSI(14)</p>'
+        f'<p style="margin:1px 0 0;font-size:17px;font-weight:700;color:{rc};font-family:{C["mono"]}">{rsi:.1f}</p></div>'
+        f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
+        f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">KDJ-K</p>'
+        f'<p style="margin:1px 0 0;font-size:17px;font-weight:700;color:{kc};font-family:{C["mono"]}">{K:.1f}</p></div>'
+        f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
+        f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">EMA9</p>'
+        f'<p style="margin:1px 0 0;font-size:12px;font-weight:700;color:{C["text"]};font-family:{C["mono"]}">${ema9:,.{dec}f}</p></div>'
+        f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
+        f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">EMA55</p>'
+        f'<p style="margin:1px 0 0;font-size:12px;font-weight:700;color:{C["text"]};font-family:{C["mono"]}">${ema55:,.{dec}f}</p></div>'
+        f'</div>'
+    )
+
+@METRICS.timed("html")
+def _coin_parts(sym: str, df: pd.DataFrame, s: dict, tk: dict, tf_label: str, mtf: pd.Series = None,
+                chart: pd.DataFrame = None, bars: int = 120, book: OrderBook = None) -> dict:
+    """单个币种区块的全部成品：各卡片的 HTML 与图表，不调用 st.*（发布进快照，各会话直接输出）。"""
+    dec  = _get_registry().decimals(sym)
     prc  = float(tk.get("last") or s["price"])
     pct  = float(tk.get("percentage") or 0)
     h24  = float(tk.get("high") or df["high"].iloc[-24:].max())
@@ -668,121 +1132,78 @@ def _coin_block(sym: str, df: pd.DataFrame, s: dict, tk: dict, tf_label: str) ->
     pcc  = C["green"] if pct >= 0 else C["red"]
     pcs  = f"{'▲' if pct>=0 else '▼'} {abs(pct):.2f}%"
 
-    # ── 币种标题栏 ──────────────────────────────────────────────────────────
-    st.markdown(
-        f'<div style="background:{C["bg"]};border-radius:14px;padding:1rem 1.3rem;'
-        f'box-shadow:{SHADOW};border:1px solid {C["border"]};margin-bottom:8px">'
-        f'<div style="display:flex;align-items:center;justify-content:space-between;flex-wrap:wrap;gap:8px">'
-        f'<div style="display:flex;align-items:center;gap:12px;flex-wrap:wrap">'
-        f'<span style="font-size:15px;font-weight:800;color:{C["text"]};font-family:{C["mono"]}">{sym}/USDT</span>'
-        f'<span style="font-size:26px;font-weight:700;color:{C["text"]};font-family:{C["mono"]}">${prc:,.{dec}f}</span>'
-        f'<span style="font-size:13px;font-weight:700;color:{pcc}">{pcs}</span>'
-        f'<span style="font-size:11px;color:{C["sub"]}">H:${h24:,.{dec}f} | L:${l24:,.{dec}f} | Vol:${vol/1e6:.1f}M</span>'
-        f'</div>'
-        f'<div style="display:flex;align-items:center;gap:8px">'
-        f'{_dir_badge(s["direction_text"], s["color"])}'
-        f'<span style="font-size:10px;color:{C["sub"]};background:{C["card"]};'
-        f'padding:4px 10px;border-radius:8px;border:1px solid {C["border"]}">{tf_label}周期</span>'
-        f'</div>'
-        f'</div></div>',
-        unsafe_allow_html=True
+    def lvr(lbl, val, col, ico):
+        return _LEVEL_ROW(lbl=lbl, val=val, col=col, ico=ico, dec=dec)
+
+    # ── 指标矩阵 ─────────────────────────────────────────────────────────────
+    inner = _signal_matrix(tuple(s["signals"]), s["rsi"], s["K"], s["D"], s["ema9"], s["ema55"], dec)
+
+    # ── 精准点位 + 限价挂单 ──────────────────────────────────────────────────
+    tt = "📈 多头" if s["ema_bull"] else "📉 空头" if s["ema_bear"] else "↔ 缠绕"
+    market_inner = (
+        f'<p style="margin:0 0 .5rem;font-size:10px;font-weight:700;color:{C["sub"]};'
+        f'letter-spacing:.6px;text-transform:uppercase">市价单策略</p>'
+        + lvr("参考入场", s["entry"], C["blue"],   "⟶")
+        + lvr("止盈 TP1", s["tp1"],   C["green"],  "✦")
+        + lvr("止盈 TP2", s["tp2"],   "#047857",   "✦✦")
+        + lvr("严格止损", s["sl"],    C["red"],    "⊗")
+        + f'<div style="display:flex;justify-content:space-between;padding:5px 0;border-top:1px solid {C["border"]};margin-top:4px">'
+        + f'<span style="font-size:10px;color:{C["sub"]}">均线趋势</span>'
+        + f'<span style="font-size:11px;font-weight:700;color:{C["text"]}">{tt}</span></div>'
+        + f'<div style="display:flex;justify-content:space-between;padding:3px 0">'
+        + f'<span style="font-size:10px;color:{C["sub"]}">风险收益比</span>'
+        + f'<span style="font-size:12px;font-weight:700;color:{C["text"]};font-family:{C["mono"]}">1:{s["rr"]:.2f}</span></div>'
     )
 
-    c1, c2, c3 = st.columns([3, 2, 2], gap="small")
+    # 限价挂单卡片
+    limit_inner = (
+        f'<p style="margin:0 0 .5rem;font-size:10px;font-weight:700;color:{C["purple"]};'
+        f'letter-spacing:.6px;text-transform:uppercase">📌 限价挂单策略</p>'
+        f'<p style="margin:0 0 .4rem;font-size:9px;font-weight:700;color:{C["green"]}">▲ 支撑位挂多{" · 🧱 买墙" if s.get("support_wall") else ""}</p>'
+        + lvr("挂单价",  s["limit_long_entry"], C["green"],  "⟶")
+        + lvr("止盈",    s["limit_long_tp1"],   "#047857",   "✦")
+        + lvr("止损",    s["limit_long_sl"],    "#991B1B",   "⊗")
+        + f'<p style="margin:.5rem 0 .4rem;font-size:9px;font-weight:700;color:{C["red"]}">▼ 阻力位挂空{" · 🧱 卖墙" if s.get("resist_wall") else ""}</p>'
+        + lvr("挂单价",  s["limit_short_entry"],C["red"],    "⟶")
+        + lvr("止盈",    s["limit_short_tp1"],  "#B91C1C",   "✦")
+        + lvr("止损",    s["limit_short_sl"],   "#DC2626",   "⊗")
+        + f'<div style="background:{C["amber_lt"]};border-radius:8px;padding:6px 9px;border-left:2px solid {C["amber"]};margin-top:6px">'
+        + f'<p style="margin:0;font-size:9px;color:{C["amber"]};line-height:1.5">⚠️ 限价单在价格到达对应区域时触发，注意设置止损。</p></div>'
+    )
 
-    # ── 图表 ────────────────────────────────────────────────────────────────
+    return {
+        "s":          s,
+        "header":     _COIN_HEADER(sym=sym, prc=prc, dec=dec, pcc=pcc, pcs=pcs, h24=h24, l24=l24, vol=vol / 1e6,
+                                   badge=_dir_badge(s["direction_text"], s["color"]), tf_label=tf_label),
+        "confluence": _confluence_strip(mtf) if mtf is not None else None,
+        "candle":     _candle_fig(df if chart is None else chart, sym, bars),
+        "depth":      _depth_fig(book, sym) if book is not None else None,
+        "matrix":     _card(inner, "padding:.9rem 1rem"),
+        "market":     _card(market_inner, "padding:.9rem 1rem;margin-bottom:8px"),
+        "limit":      _card(limit_inner, f"padding:.9rem 1rem;border-left:2px solid {C['purple']}"),
+        "macd":       _macd_fig(df, _ccxt_symbol(sym)),
+    }
+
+@METRICS.timed("emit")
+def _coin_block(p) -> None:
+    """输出单个币种区块（p 为 _coin_parts 的结果，通常来自共享快照）。"""
+    st.markdown(p["header"], unsafe_allow_html=True)
+    if p["confluence"] is not None:
+        st.markdown(p["confluence"], unsafe_allow_html=True)
+
+    c1, c2, c3 = st.columns([3, 2, 2], gap="small")
     with c1:
-        fig = _candle_fig(df, sym)
-        st.plotly_chart(fig, use_container_width=True,
+        st.plotly_chart(p["candle"], use_container_width=True,
                         config={"displayModeBar": True,
                                 "modeBarButtonsToRemove": ["toImage","lasso2d","select2d"],
                                 "scrollZoom": True})
-
-    # ── 指标矩阵 ─────────────────────────────────────────────────────────────
+        if p["depth"] is not None:
+            st.plotly_chart(p["depth"], use_container_width=True, config={"displayModeBar": False})
     with c2:
-        srows = "".join(
-            f'<div style="display:flex;justify-content:space-between;align-items:center;'
-            f'padding:6px 0;border-bottom:1px solid {C["border"]}">'
-            f'<span style="font-size:11px;font-weight:600;color:{C["text"]}">{sg[0]}'
-            f'<span style="color:{C["sub"]};font-weight:400;margin-left:4px;font-family:{C["mono"]};font-size:10px">{sg[1]}</span></span>'
-            f'<span style="display:flex;align-items:center;gap:5px">'
-            f'<span style="font-size:10px;color:{C["sub"]}">{sg[2]}</span>'
-            f'{_badge(sg[3])}</span></div>'
-            for sg in s["signals"]
-        )
-        buys  = sum(1 for sg in s["signals"] if sg[3] == "LONG")
-        total = len(s["signals"])
-        bw    = int(buys / total * 100)
-        rc    = C["red"] if s["rsi"]>70 else C["green"] if s["rsi"]<30 else C["blue"]
-        kc    = C["green"] if s["K"] > s["D"] else C["red"]
-        inner = (
-            f'<p style="margin:0 0 .5rem;font-size:10px;font-weight:700;color:{C["sub"]};'
-            f'letter-spacing:.6px;text-transform:uppercase">指标信号矩阵</p>'
-            f'{srows}'
-            f'<div style="margin-top:.7rem">'
-            f'<div style="display:flex;justify-content:space-between;margin-bottom:3px">'
-            f'<span style="font-size:10px;color:{C["green"]};font-weight:600">看多 {buys}/{total}</span>'
-            f'<span style="font-size:10px;color:{C["red"]};font-weight:600">看空 {total-buys}/{total}</span></div>'
-            f'<div style="height:4px;border-radius:2px;background:{C["red_lt"]};overflow:hidden">'
-            f'<div style="height:100%;width:{bw}%;background:{C["green"]};border-radius:2px"></div></div></div>'
-            f'<div style="margin-top:.7rem;display:grid;grid-template-columns:1fr 1fr;gap:6px">'
-            f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
-            f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">RSI(14)</p>'
-            f'<p style="margin:1px 0 0;font-size:17px;font-weight:700;color:{rc};font-family:{C["mono"]}">{s["rsi"]:.1f}</p></div>'
-            f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
-            f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">KDJ-K</p>'
-            f'<p style="margin:1px 0 0;font-size:17px;font-weight:700;color:{kc};font-family:{C["mono"]}">{s["K"]:.1f}</p></div>'
-            f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
-            f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">EMA9</p>'
-            f'<p style="margin:1px 0 0;font-size:12px;font-weight:700;color:{C["text"]};font-family:{C["mono"]}">${s["ema9"]:,.{dec}f}</p></div>'
-            f'<div style="background:{C["bg"]};border-radius:8px;padding:7px 9px;border:1px solid {C["border"]}">'
-            f'<p style="margin:0;font-size:9px;color:{C["sub"]};font-weight:700">EMA55</p>'
-            f'<p style="margin:1px 0 0;font-size:12px;font-weight:700;color:{C["text"]};font-family:{C["mono"]}">${s["ema55"]:,.{dec}f}</p></div>'
-            f'</div>'
-        )
-        st.markdown(_card(inner, "padding:.9rem 1rem"), unsafe_allow_html=True)
-
-    # ── 精准点位 + 限价挂单 ──────────────────────────────────────────────────
+        st.markdown(p["matrix"], unsafe_allow_html=True)
     with c3:
-        def lvr(lbl, val, col, ico):
-            return (f'<div style="display:flex;justify-content:space-between;align-items:center;'
-                    f'padding:6px 10px;border-radius:8px;background:{col}0D;margin-bottom:5px">'
-                    f'<span style="font-size:11px;font-weight:500;color:{C["sub"]}">{ico} {lbl}</span>'
-                    f'<span style="font-size:13px;font-weight:700;color:{col};font-family:{C["mono"]}">${val:,.{dec}f}</span></div>')
-
-        tt = "📈 多头" if s["ema_bull"] else "📉 空头" if s["ema_bear"] else "↔ 缠绕"
-        market_inner = (
-            f'<p style="margin:0 0 .5rem;font-size:10px;font-weight:700;color:{C["sub"]};'
-            f'letter-spacing:.6px;text-transform:uppercase">市价单策略</p>'
-            + lvr("参考入场", s["entry"], C["blue"],   "⟶")
-            + lvr("止盈 TP1", s["tp1"],   C["green"],  "✦")
-            + lvr("止盈 TP2", s["tp2"],   "#047857",   "✦✦")
-            + lvr("严格止损", s["sl"],    C["red"],    "⊗")
-            + f'<div style="display:flex;justify-content:space-between;padding:5px 0;border-top:1px solid {C["border"]};margin-top:4px">'
-            + f'<span style="font-size:10px;color:{C["sub"]}">均线趋势</span>'
-            + f'<span style="font-size:11px;font-weight:700;color:{C["text"]}">{tt}</span></div>'
-            + f'<div style="display:flex;justify-content:space-between;padding:3px 0">'
-            + f'<span style="font-size:10px;color:{C["sub"]}">风险收益比</span>'
-            + f'<span style="font-size:12px;font-weight:700;color:{C["text"]};font-family:{C["mono"]}">1:{s["rr"]:.2f}</span></div>'
-        )
-        st.markdown(_card(market_inner, "padding:.9rem 1rem;margin-bottom:8px"), unsafe_allow_html=True)
-
-        # 限价挂单卡片
-        limit_inner = (
-            f'<p style="margin:0 0 .5rem;font-size:10px;font-weight:700;color:{C["purple"]};'
-            f'letter-spacing:.6px;text-transform:uppercase">📌 限价挂单策略</p>'
-            f'<p style="margin:0 0 .4rem;font-size:9px;font-weight:700;color:{C["green"]}">▲ 支撑位挂多</p>'
-            + lvr("挂单价",  s["limit_long_entry"], C["green"],  "⟶")
-            + lvr("止盈",    s["limit_long_tp1"],   "#047857",   "✦")
-            + lvr("止损",    s["limit_long_sl"],    "#991B1B",   "⊗")
-            + f'<p style="margin:.5rem 0 .4rem;font-size:9px;font-weight:700;color:{C["red"]}">▼ 阻力位挂空</p>'
-            + lvr("挂单价",  s["limit_short_entry"],C["red"],    "⟶")
-            + lvr("止盈",    s["limit_short_tp1"],  "#B91C1C",   "✦")
-            + lvr("止损",    s["limit_short_sl"],   "#DC2626",   "⊗")
-            + f'<div style="background:{C["amber_lt"]};border-radius:8px;padding:6px 9px;border-left:2px solid {C["amber"]};margin-top:6px">'
-            + f'<p style="margin:0;font-size:9px;color:{C["amber"]};line-height:1.5">⚠️ 限价单在价格到达对应区域时触发，注意设置止损。</p></div>'
-        )
-        st.markdown(_card(limit_inner, f"padding:.9rem 1rem;border-left:2px solid {C['purple']}"), unsafe_allow_html=True)
+        st.markdown(p["market"], unsafe_allow_html=True)
+        st.markdown(p["limit"], unsafe_allow_html=True)
 
 def render_strategy() -> None:
     _section_header("🎯 核心策略 · 精准点位", "实时多指标融合分析 · 市价 + 限价双策略输出")
@@ -796,33 +1217,156 @@ def render_strategy() -> None:
         "分析周期", ["15分钟", "1小时", "4小时"],
         index=1, horizontal=True, key="tf_radio", label_visibility="collapsed"
     )
+    span = st.radio(
+        "K 线图范围", list(_CHART_RANGES),
+        index=0, horizontal=True, key="chart_span", label_visibility="collapsed"
+    )
+    mtf = st.toggle("多周期共振（15分钟 / 1小时 / 4小时 加权）", value=True, key="mtf_toggle")
+    st.markdown(
+        f'<p style="font-size:11px;font-weight:700;color:{C["sub"]};letter-spacing:.5px;margin:.4rem 0 4px">选择交易对</p>',
+        unsafe_allow_html=True
+    )
+    symbols = st.multiselect(
+        "交易对", _get_registry().bases, default=DEFAULT_SYMBOLS,
+        max_selections=MAX_PAGE_SYMBOLS, key="sym_select", label_visibility="collapsed"
+    )
     _spacer(".5rem")
+    _strategy_live(tf_label, tuple(symbols or DEFAULT_SYMBOLS), mtf, span)
+    _watermark()
 
-    # ── 严格独立抓取，变量名含币种 ─────────────────────────────────────────
-    btc_df  = get_ohlcv("BTC", tf_label)
-    eth_df  = get_ohlcv("ETH", tf_label)
-    btc_tk  = get_ticker("BTC")
-    eth_tk  = get_ticker("ETH")
-    btc_str = _score_strategy(btc_df)
-    eth_str = _score_strategy(eth_df)
-
-    for sym, df, s, tk in [
-        ("BTC", btc_df, btc_str, btc_tk),
-        ("ETH", eth_df, eth_str, eth_tk),
-    ]:
-        _coin_block(sym, df, s, tk, tf_label)
+_TK_FIELDS = ("last", "percentage", "high", "low", "quoteVolume")
+
+@st.cache_resource
+def _get_snapshots() -> SnapshotHub:
+    """进程级信号快照：指标 / 评分 / 成品卡片与图表每次行情更新只算一次，所有会话读同一版本。"""
+    return SnapshotHub()
+
+def _coin_snapshot(sym: str, tf_label: str, bars: int, df: pd.DataFrame, tk: dict, book: OrderBook,
+                   engines: dict = None):
+    """策略页单个币种区块的共享快照。输入指纹 = K 线指纹 + ticker 用到的字段 + 盘口版本
+    （+ 多周期共振时各周期最后一根）；指纹没变直接读当前版本，变了由一个会话重算并发布。"""
+    inputs = (frame_fingerprint(df), tuple(tk.get(k) for k in _TK_FIELDS), book.version,
+              None if engines is None else tuple((tf, e.last().tobytes()) for tf, e in engines.items()))
+
+    def _build():
+        row = None
+        with METRICS.timer("score"):
+            if engines:
+                # 多周期共振：各周期共用同一条基础序列，一次向量化评完
+                table = confluence({sym: engines})
+                row   = table.loc[sym] if sym in table.index else None
+            # 支撑 / 阻力优先取盘口挂单墙（DEPTH_WALL_RANGE 以内），没有墙时沿用指标推算
+            s = with_walls(score_strategy(df), *book.sr_walls(DEPTH_WALL_RANGE))
+        return _coin_parts(sym, df, s, tk, tf_label, row, get_chart_frame(sym, tf_label, bars, df), bars, book)
+
+    return _get_snapshots().refresh(("coin", sym, tf_label, bars, engines is not None), inputs, _build)
+
+@st.fragment(run_every=DATA_TTL)
+@METRICS.rerun("strategy")
+def _strategy_live(tf_label: str, symbols: tuple, mtf: bool = False, span: str = "近期") -> None:
+    """策略页的数据部分：按 DATA_TTL 定时局部重跑，不重跑整个脚本。
+    评分、卡片与图表来自共享快照，行情没变的重跑只是把现成的元素再输出一遍。"""
+    # ── 并发抓取，严格按币种隔离 ───────────────────────────────────────────
+    dfs, tks = get_market_snapshot(list(symbols), tf_label)
+    _prefetch_timeframes(list(symbols))  # 其余周期后台补齐，切换周期不等网络
+    ready   = [sym for sym in symbols if dfs[sym] is not None]
+    engines = get_timeframe_engines(ready) if mtf else {}
+    bars    = chart_bars(tf_label, span)
+    books   = get_order_books(ready, tks)
+    snaps   = {sym: _coin_snapshot(sym, tf_label, bars, dfs[sym], tks[sym], books[sym],
+                                   engines.get(sym, {}) if mtf else None)
+               for sym in ready}
+    for sym in symbols:
+        if sym in snaps:
+            _coin_block(snaps[sym].data)
+        else:
+            st.markdown(_stale_card(sym), unsafe_allow_html=True)
         _spacer(".5rem")
 
     # ── MACD 对比图 ──────────────────────────────────────────────────────────
-    st.markdown(f'<p style="font-size:11px;font-weight:700;color:{C["sub"]};letter-spacing:.5px;margin:.3rem 0 .4rem">MACD 实时对比</p>', unsafe_allow_html=True)
-    mc1, mc2 = st.columns(2, gap="small")
-    with mc1:
-        st.plotly_chart(_macd_fig(btc_df, "BTC/USDT"), use_container_width=True, config={"displayModeBar": False})
-    with mc2:
-        st.plotly_chart(_macd_fig(eth_df, "ETH/USDT"), use_container_width=True, config={"displayModeBar": False})
+    with METRICS.timer("emit"):
+        st.markdown(f'<p style="font-size:11px;font-weight:700;color:{C["sub"]};letter-spacing:.5px;margin:.3rem 0 .4rem">MACD 实时对比</p>', unsafe_allow_html=True)
+        for i in range(0, len(ready), 2):
+            cols = st.columns(2, gap="small")
+            for col, sym in zip(cols, ready[i:i + 2]):
+                with col:
+                    st.plotly_chart(snaps[sym].data["macd"], use_container_width=True, config={"displayModeBar": False})
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE 1b: 全市场筛选
+# ═════════════════════════════════════════════════════════════════════════════
 
+def render_screener() -> None:
+    _section_header("📊 全市场筛选 · 信号排行", f"核心策略评分规则 · 覆盖 {len(_get_registry())} 个交易对 · 每 {SCREENER_TTL}s 刷新")
+    tf_label = st.radio(
+        "分析周期", ["15分钟", "1小时", "4小时"],
+        index=1, horizontal=True, key="screener_tf", label_visibility="collapsed"
+    )
+    _spacer(".5rem")
+    _screener_live(tf_label)
     _watermark()
 
+_SCREENER_TD  = 'padding:8px 8px;font-size:12px;color:{C[text]};font-family:{C[mono]}'
+_SCREENER_ROW = Fragment(
+    '<tr style="border-bottom:1px solid {C[border]}">'
+    '<td style="padding:8px 8px;font-size:12px;font-weight:700;color:{C[text]}">{sym}</td>'
+    '<td style="padding:8px 8px"><span style="background:{col}1A;color:{col};padding:2px 10px;border-radius:10px;font-size:11px;font-weight:700">{dtxt}</span></td>'
+    '<td style="{TD};font-weight:700;color:{col}">{score:+d}</td>'
+    '<td style="{TD}">${price:,.{dec}f}</td>'
+    '<td style="{TD}">${entry:,.{dec}f}</td>'
+    '<td style="{TD};color:#059669">${tp1:,.{dec}f}</td>'
+    '<td style="{TD};color:#DC2626">${sl:,.{dec}f}</td>'
+    '<td style="{TD}">1:{rr:.2f}</td>'
+    '</tr>', maxsize=1024, C=C, TD=_SCREENER_TD.format(C=C))
+_SCREENER_HEAD = (
+    f'<thead><tr style="border-bottom:2px solid {C["border"]}">'
+    + "".join(f'<th style="padding:6px 8px;font-size:9px;color:{C["sub"]};text-align:left;font-weight:700">{h}</th>'
+              for h in ["交易对", "方向", "评分", "现价", "入场", "止盈1", "止损", "盈亏比"])
+    + '</tr></thead>'
+)
+
+@st.fragment(run_every=SCREENER_TTL)
+@METRICS.rerun("screener")
+def _screener_live(tf_label: str) -> None:
+    """全市场筛选的数据部分：行情指纹没变时直接输出共享快照里的成品，变了由一个会话重新评分并发布。"""
+    dfs, _ = get_market_snapshot(_get_registry().bases, tf_label, tickers=False)
+    stale  = [s for s, df in dfs.items() if df is None]
+    dfs    = {s: df for s, df in dfs.items() if df is not None}
+    snap   = _get_snapshots().refresh(("screener", tf_label), tuple((s, frame_fingerprint(df)) for s, df in dfs.items()),
+                                      lambda: _screener_parts(dfs, tf_label))
+    with METRICS.timer("emit"):
+        c1, c2, c3 = st.columns(3, gap="small")
+        for col, html in zip((c1, c2, c3), snap.data["metrics"]):
+            with col: st.markdown(html, unsafe_allow_html=True)
+        if stale:
+            st.markdown(_stale_note(stale), unsafe_allow_html=True)
+        st.markdown(snap.data["table"], unsafe_allow_html=True)
+
+@METRICS.timed("html")
+def _screener_parts(dfs: dict, tf_label: str) -> dict:
+    """筛选页成品：整个币池一次向量化评分，三张统计卡片 + 排行表的 HTML（发布进共享快照）。"""
+    with METRICS.timer("score"):
+        table = screen(dfs)
+    n_long, n_short = int((table["score"] >= 2).sum()), int((table["score"] <= -2).sum())
+    reg   = _get_registry()
+    rows  = []
+    for sym, r in table.head(SCREENER_ROWS).to_dict("index").items():
+        dtxt, col = DIRECTION_STYLE[r["direction"]]
+        rows.append(_SCREENER_ROW(sym=sym, dtxt=dtxt, col=col, score=int(r["score"]), dec=reg.decimals(sym),
+                                  price=r["price"], entry=r["entry"], tp1=r["tp1"], sl=r["sl"], rr=r["rr"]))
+    return {
+        "ranking": table,
+        "metrics": (_card(_metric("看多信号", str(n_long), "评分 ≥ 2", C["green"])),
+                    _card(_metric("看空信号", str(n_short), "评分 ≤ -2", C["red"])),
+                    _card(_metric("观望", str(len(table) - n_long - n_short), "信号不足", C["amber"]))),
+        "table":   (f'<div style="background:{C["bg"]};border-radius:14px;padding:1.2rem;'
+                    f'box-shadow:{SHADOW};border:1px solid {C["border"]};margin:.5rem 0 1rem;overflow-x:auto">'
+                    f'<p style="margin:0 0 .7rem;font-size:10px;font-weight:700;color:{C["sub"]};letter-spacing:.6px">'
+                    f'🏆 评分前 {min(SCREENER_ROWS, len(table))} / {len(table)} · {tf_label}</p>'
+                    f'<table style="width:100%;border-collapse:collapse">'
+                    f'{_SCREENER_HEAD}<tbody>{"".join(rows)}</tbody></table></div>'),
+    }
+
 # ═════════════════════════════════════════════════════════════════════════════
 # PAGE 2: 顶级返佣通道
 # ═════════════════════════════════════════════════════════════════════════════
@@ -977,26 +1521,56 @@ def render_rebate() -> None:
 # PAGE 3: 清算热力图
 # ═════════════════════════════════════════════════════════════════════════════
 
+@st.cache_resource
+def _get_liq_engine(skey: str) -> tuple:
+    """进程级清算价位引擎（每个交易对一份）与驱动它的成交流。
+    优先用交易所永续合约的实时成交与持仓量（REST 轮询，每次渲染补上次以来的成交，仓位分布随运行时间累积）；
+    交易所不可用时才用合成成交流：预热 LIQ_HISTORY 的历史，终点对齐当前 ticker。"""
+    base = float(get_ticker(skey).get("last") or _get_registry().ref_price(skey))
+    eng  = LiquidationEngine(base)
+    reg  = _get_registry()
+    perp = f"{skey}/{reg.quote}:{reg.quote}"
+    if _fetch_trades(perp) is not None:
+        feed = ExchangeTradeFeed(lambda since: _fetch_trades(perp, since), lambda: _fetch_open_interest(perp))
+        feed.pump(eng)
+        return eng, feed
+    METRICS.count("fallback_mock", kind="liquidation")
+    now  = int(time.time() * 1000)
+    feed = SyntheticTradeFeed(base, now, seed=zlib.crc32(skey.encode()), batch_ms=LIQ_BATCH_MS)
+    eng.ingest_many(feed.history(now, LIQ_HISTORY_MS, base))
+    return eng, feed
+
+def _liq_step(price: float, dec: int) -> float:
+    """热力图价格桶宽：约 LIQ_STEP × 价格，取两位有效数字，不小于最小变动价位。"""
+    raw = price * LIQ_STEP
+    return max(round(raw, 1 - int(math.floor(math.log10(raw)))), 10.0 ** -dec)
+
 def render_liquidation() -> None:
-    _section_header("🔥 全网清算热力图", "聚合全网多空清算分布，定位关键爆仓价格磁吸区域（模拟数据）")
-
-    for sym_label, skey, step in [("BTC/USDT","BTC",600),("ETH/USDT","ETH",24)]:
-        cdf  = st.session_state.get(f"cache_{skey}_df")
-        base = float(cdf.iloc[-1]["close"]) if cdf is not None else (104800 if skey=="BTC" else 3942)
-        dec  = 0 if skey=="BTC" else 1
-        np.random.seed(7 + (1 if skey=="BTC" else 2))
-        lvls = np.arange(base * .87, base * 1.13, step)
-        ll   = np.exp(-((lvls - base*.94)**2) / (base*.025)**2) * 500
-        sl   = np.exp(-((lvls - base*1.06)**2) / (base*.025)**2) * 400
-        for m in [.93, .97, 1.03, 1.07]:
-            idx = int(np.argmin(np.abs(lvls - base * m)))
-            ll[max(0,idx-1):idx+2] += np.random.uniform(150, 500)
-            sl[max(0,idx-1):idx+2] += np.random.uniform(100, 400)
+    _section_header("🔥 全网清算热力图", "按持仓量变化与杠杆分层估算多空清算价位，定位关键爆仓价格磁吸区域")
+
+    reg = _get_registry()
+    for skey in DEFAULT_SYMBOLS:
+        sym_label = reg.symbol(skey)
+        eng, feed = _get_liq_engine(skey)
+        if isinstance(feed, SyntheticTradeFeed):
+            # 合成成交流每次渲染先对齐实时 ticker，价格线与清算价位不会随合成路径漂离行情
+            feed.anchor(float(get_ticker(skey).get("last") or 0))
+        feed.pump(eng, int(time.time() * 1000))
+        base = eng.price
+        dec  = reg.decimals(skey)
+        step = _liq_step(base, dec)
+        m    = eng.snapshot(base * .87, base * 1.13, step)
+        lvls = m.price + step / 2
+        ll, sl = m.long / 1e4, m.short / 1e4
+        if isinstance(feed, SyntheticTradeFeed):
+            st.caption(f"{sym_label}：交易所成交 / 持仓量暂不可用，以下为合成成交流的估算")
         fig = go.Figure()
         fig.add_trace(go.Bar(x=-ll, y=lvls, orientation="h", marker_color="rgba(5,150,105,.6)", name="多单清算",
-                             hovertemplate="价格$%{y:,.0f}<br>多单%{customdata:.0f}万U<extra></extra>", customdata=ll))
+                             hovertemplate=f"价格$%{{y:,.{dec}f}}<br>多单%{{customdata[0]:.0f}}万U<br>跌至此累计%{{customdata[1]:.0f}}万U<extra></extra>",
+                             customdata=np.column_stack([ll, m.long_cum / 1e4])))
         fig.add_trace(go.Bar(x=sl,  y=lvls, orientation="h", marker_color="rgba(220,38,38,.6)",  name="空单清算",
-                             hovertemplate="价格$%{y:,.0f}<br>空单%{customdata:.0f}万U<extra></extra>", customdata=sl))
+                             hovertemplate=f"价格$%{{y:,.{dec}f}}<br>空单%{{customdata[0]:.0f}}万U<br>涨至此累计%{{customdata[1]:.0f}}万U<extra></extra>",
+                             customdata=np.column_stack([sl, m.short_cum / 1e4])))
         fig.add_hline(y=base, line=dict(color=C["blue"],width=2),
                       annotation_text=f"  当前${base:,.{dec}f}", annotation_font=dict(color=C["blue"],size=11))
         mi  = int(np.argmax(ll))
@@ -1013,11 +1587,13 @@ def render_liquidation() -> None:
             margin=dict(l=0,r=0,t=44,b=0), font=dict(family="Inter", color=C["text"]),
         )
         st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
+        ratio   = ll.sum() / max(sl.sum(), 1e-9)
+        rl, rs  = eng.realized()
         c1,c2,c3,c4 = st.columns(4, gap="small")
         with c1: st.markdown(_card(_metric("多单最大爆仓区",f"${lvls[mi]:,.{dec}f}","向下磁吸价位",C["green"])), unsafe_allow_html=True)
         with c2: st.markdown(_card(_metric("空单最大爆仓区",f"${lvls[msi]:,.{dec}f}","向上磁吸价位",C["red"])),   unsafe_allow_html=True)
-        with c3: st.markdown(_card(_metric("多空爆仓量比",f"{ll.sum()/max(sl.sum(),1):.2f}","多>空偏多头",C["blue"])), unsafe_allow_html=True)
-        with c4: st.markdown(_card(_metric("24H总清算规模",f"${(ll.sum()+sl.sum())/10:.0f}万U","双向合计",C["purple"])), unsafe_allow_html=True)
+        with c3: st.markdown(_card(_metric("多空爆仓量比",f"{ratio:.2f}","多>空偏多头" if ratio > 1 else "空>多偏空头",C["blue"])), unsafe_allow_html=True)
+        with c4: st.markdown(_card(_metric("24H已清算规模",f"${(rl+rs)/1e4:,.0f}万U",f"多{rl/1e4:,.0f} / 空{rs/1e4:,.0f}",C["purple"])), unsafe_allow_html=True)
         _spacer()
 
     _watermark()
@@ -1026,10 +1602,10 @@ def render_liquidation() -> None:
 # PAGE 4: 链上监控
 # ═════════════════════════════════════════════════════════════════════════════
 
-def render_onchain() -> None:
-    _section_header("🌊 链上巨鲸 · 数据监控", "大额链上转账异动实时播报 + 交易所净流量")
-
-    rng   = np.random.default_rng(int(time.time()/60))
+@lru_cache(maxsize=2)
+def _whale_table(minute: int) -> str:
+    """巨鲸转账表（模拟数据），同一分钟内内容不变，按分钟缓存。"""
+    rng   = np.random.default_rng(minute)
     wals  = ["0x3a8d…f9e1","bc1q4…7k2p","0x7c1f…a3d9","bc1p9…m5x1","0xd4e2…b8f3"]
     exs   = ["Binance","OKX","Coinbase","冷钱包","Kraken"]
     coins = ["BTC","ETH","BTC","ETH","BTC"]
@@ -1054,7 +1630,7 @@ def render_onchain() -> None:
         for i in range(5)
     )
 
-    st.markdown(
+    return (
         f'<div style="background:{C["bg"]};border-radius:14px;padding:1.2rem;'
         f'box-shadow:{SHADOW};border:1px solid {C["border"]};margin-bottom:1rem;overflow-x:auto">'
         f'<p style="margin:0 0 .7rem;font-size:10px;font-weight:700;color:{C["sub"]};letter-spacing:.6px">🐳 大额链上转账异动</p>'
@@ -1067,11 +1643,13 @@ def render_onchain() -> None:
         f'<th style="padding:6px 8px;font-size:9px;color:{C["sub"]};text-align:left;font-weight:700">地址流向</th>'
         f'<th style="padding:6px 8px;font-size:9px;color:{C["sub"]};text-align:left;font-weight:700">类型</th>'
         f'<th style="padding:6px 8px;font-size:9px;color:{C["sub"]};text-align:left;font-weight:700">信号</th>'
-        f'</tr></thead><tbody>{rows}</tbody></table></div>',
-        unsafe_allow_html=True
+        f'</tr></thead><tbody>{rows}</tbody></table></div>'
     )
 
-    dates30 = [(datetime.now()-timedelta(days=29-i)).strftime("%m/%d") for i in range(30)]
+@lru_cache(maxsize=2)
+def _netflow_fig(day: str) -> go.Figure:
+    """近 30 日交易所净流量图（模拟数据），按日期缓存；返回的 Figure 在会话间共享，只读。"""
+    dates30 = [(datetime.strptime(day, "%Y-%m-%d")-timedelta(days=29-i)).strftime("%m/%d") for i in range(30)]
     flows   = np.random.default_rng(42).normal(0,1200,30)
     flows[5]=-4000;flows[12]=3600;flows[20]=-2800;flows[27]=2600
     fig = go.Figure()
@@ -1085,7 +1663,14 @@ def render_onchain() -> None:
         yaxis=dict(showgrid=True, gridcolor="#F3F4F6", tickfont=dict(size=9,family="JetBrains Mono",color=C["sub"])),
         margin=dict(l=0,r=0,t=32,b=0), font=dict(family="Inter"),
     )
-    st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
+    return fig
+
+def render_onchain() -> None:
+    _section_header("🌊 链上巨鲸 · 数据监控", "大额链上转账异动实时播报 + 交易所净流量")
+
+    st.markdown(_whale_table(int(time.time() / 60)), unsafe_allow_html=True)
+    st.plotly_chart(_netflow_fig(datetime.now().strftime("%Y-%m-%d")), use_container_width=True,
+                    config={"displayModeBar": False})
 
     c1,c2,c3,c4 = st.columns(4, gap="small")
     with c1: st.markdown(_card(_metric("活跃巨鲸钱包","1,247","过去24小时",C["blue"])), unsafe_allow_html=True)
@@ -1221,6 +1806,94 @@ def render_contact() -> None:
     )
     _watermark()
 
+# ═════════════════════════════════════════════════════════════════════════════
+# 隐藏页: 运行诊断
+# ═════════════════════════════════════════════════════════════════════════════
+
+@st.cache_resource
+def _get_metrics_server():
+    """把各组件已有的统计接进埋点（抓取时才读），并按 METRICS_ADDR 起本地 /metrics（进程级只做一次）。
+    端口被占用或 METRICS_ADDR=off 时不起服务，诊断页照常可用。"""
+    METRICS.register("market_store", _get_market_store().stats)
+    METRICS.register("charts", _get_charts().stats)
+    METRICS.register("fragments", fragment_stats)
+    METRICS.register("snapshots", _get_snapshots().stats)
+    alert = _get_alert_engine()
+    if alert is not None:
+        METRICS.register("alerts", alert[0].stats)
+    feed = _get_stream_feed()
+    if feed is not None:
+        METRICS.register("stream", lambda: {"events": feed.events, "errors": feed.errors,
+                                            **({"lag_seconds": time.time() - feed.last_event_at} if feed.last_event_at else {})})
+    pool = _get_exchange_pool()
+    for v in (pool.venues if pool is not None else []):
+        METRICS.register("venue", lambda v=v: {"requests": v.requests, "errors": v.errors,
+                                               **({"p95_seconds": v.p95} if v.p95 is not None else {})}, venue=v.id)
+    if METRICS_ADDR == "off":
+        return None
+    host, _, port = METRICS_ADDR.rpartition(":")
+    return METRICS.serve(host or "127.0.0.1", int(port))
+
+def _ms(x) -> float:
+    return round(x * 1e3, 2) if x is not None else np.nan
+
+def render_diagnostics() -> None:
+    """各阶段滚动延迟、最近重跑的分段明细、缓存命中与退回模拟的次数、被吞掉的异常。不在导航里。"""
+    server = _get_metrics_server()
+    up     = time.time() - METRICS.started
+    _section_header(DIAG_PAGE, f"进程已运行 {up / 3600:.1f} 小时 · 分位数取各阶段最近 {METRICS.window} 个样本 · "
+                               + (f"Prometheus: http://{METRICS_ADDR}/metrics" if server is not None else "/metrics 未开启"))
+
+    reruns = METRICS.reruns()
+    totals = np.array([r.total_ms for r in reruns]) if reruns else np.array([np.nan])
+    store  = _get_market_store().stats()
+    looked = store["hits"] + store["misses"]
+    c1, c2, c3, c4 = st.columns(4, gap="small")
+    with c1: st.markdown(_card(_metric("最近重跑 p95", f"{np.nanquantile(totals, .95):.0f} ms", f"最近 {len(reruns)} 次", C["blue"])), unsafe_allow_html=True)
+    with c2: st.markdown(_card(_metric("退回模拟数据", str(METRICS.total("fallback_mock")), "K 线 / ticker / 盘口 / 历史", C["amber"])), unsafe_allow_html=True)
+    with c3: st.markdown(_card(_metric("被吞掉的异常", str(METRICS.total("errors")), "交易所请求等", C["red"])), unsafe_allow_html=True)
+    with c4: st.markdown(_card(_metric("行情缓存命中率", f"{store['hits'] / looked:.0%}" if looked else "—",
+                                       f"{store['hits']} 命中 / {store['misses']} 拉取", C["green"])), unsafe_allow_html=True)
+
+    st.markdown("##### 阶段耗时")
+    rows = []
+    for name, h in sorted(METRICS.stages().items()):
+        p50, p95, p99 = h.quantiles()
+        rows.append({"阶段": name, "次数": h.count, "p50 ms": _ms(p50), "p95 ms": _ms(p95), "p99 ms": _ms(p99),
+                     "最大 ms": _ms(h.max), "累计 s": round(h.sum, 2)})
+    for name, h in sorted(METRICS.pages().items()):
+        p50, p95, p99 = h.quantiles()
+        rows.append({"阶段": f"重跑 · {name}", "次数": h.count, "p50 ms": _ms(p50), "p95 ms": _ms(p95),
+                     "p99 ms": _ms(p99), "最大 ms": _ms(h.max), "累计 s": round(h.sum, 2)})
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+    stages = sorted(METRICS.stages()) + [f"重跑 · {p}" for p in sorted(METRICS.pages())]
+    if stages:
+        pick = st.selectbox("滚动直方图", stages, key="diag_hist")
+        h    = METRICS.pages()[pick[5:]] if pick.startswith("重跑 · ") else METRICS.stages()[pick]
+        lbls = [f"≤{b * 1e3:g}ms" for b in BUCKETS] + [f">{BUCKETS[-1]:g}s"]
+        st.bar_chart(pd.Series(h.rolling(), index=pd.Index(lbls, name="耗时"), name="次数"))
+
+    st.markdown("##### 最近重跑（自身耗时 ms，嵌套阶段已从外层扣除）")
+    if reruns:
+        tbl = pd.DataFrame([{"页面": r.page, "时间": datetime.fromtimestamp(r.at).strftime("%H:%M:%S"),
+                             "总计": round(r.total_ms, 1), **{k: round(v, 1) for k, v in r.stages.items()}}
+                            for r in reversed(reruns)])
+        st.dataframe(tbl, hide_index=True, use_container_width=True)
+
+    st.markdown("##### 计数与组件统计")
+    cnt = [{"名字": n, "标签": ", ".join(f"{k}={v}" for k, v in ls), "值": v} for (n, ls), v in sorted(METRICS.counters().items())]
+    cnt += [{"名字": f"{prefix}.{k}", "标签": ", ".join(f"{a}={b}" for a, b in ls), "值": v}
+            for prefix, ls, vals in METRICS.collect() for k, v in vals.items()]
+    st.dataframe(pd.DataFrame(cnt), hide_index=True, use_container_width=True)
+
+    errs = METRICS.errors()
+    if errs:
+        st.markdown("##### 最近异常")
+        st.dataframe(pd.DataFrame([{"时间": datetime.fromtimestamp(e.at).strftime("%H:%M:%S"), "阶段": e.stage,
+                                    "类型": e.kind, "信息": e.message} for e in reversed(errs)]),
+                     hide_index=True, use_container_width=True)
+
 # ═════════════════════════════════════════════════════════════════════════════
 # MAIN ROUTER
 # ═════════════════════════════════════════════════════════════════════════════
@@ -1229,22 +1902,31 @@ def main() -> None:
     if not st.session_state.authenticated:
         render_gate()
         return
-
-    _sidebar()
-    _topbar()
+    if st.query_params.get("diag") == "1":
+        # 只在进入时生效一次，之后点导航照常离开
+        st.session_state.page = DIAG_PAGE
+        del st.query_params["diag"]
 
     page = st.session_state.page
-    if   "核心策略" in page: render_strategy()
-    elif "返佣"     in page: render_rebate()
-    elif "清算"     in page: render_liquidation()
-    elif "链上"     in page: render_onchain()
-    elif "情绪"     in page: render_sentiment()
-    elif "客服"     in page: render_contact()
-    else:                    render_strategy()
-
-    # 5 秒自动刷新
-    time.sleep(5)
-    st.rerun()
+    with METRICS.rerun(page):
+        _get_stream_feed()
+        _get_alert_engine()
+        _get_metrics_server()
+        _sidebar()
+        _topbar()
+
+        if   "核心策略" in page: render_strategy()
+        elif "筛选"     in page: render_screener()
+        elif "返佣"     in page: render_rebate()
+        elif "清算"     in page: render_liquidation()
+        elif "链上"     in page: render_onchain()
+        elif "情绪"     in page: render_sentiment()
+        elif "客服"     in page: render_contact()
+        elif page == DIAG_PAGE:  render_diagnostics()
+        else:                    render_strategy()
+    # 自动刷新由各 st.fragment(run_every=…) 负责：_topbar / _strategy_live 每 DATA_TTL 秒，
+    # _screener_live（全币池评分）与侧栏 _alert_feed 每 SCREENER_TTL 秒。浏览器端定时触发局部重跑，
+    # 服务端不再为每个会话挂一个 sleep 线程
 
 if __name__ == "__main__":
     main()